@@ -1,15 +1,34 @@
 """The Sofabaton Hub integration."""
 from __future__ import annotations
 
+import json
 import logging
+from pathlib import Path
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ConfigEntryError, ConfigEntryNotReady
 from homeassistant.helpers.typing import ConfigType
 
 from .api import SofabatonHubApiClient
-from .const import DOMAIN, PLATFORMS
+from .broker import BrokerAuthError, BrokerConnectionError
+from .cache import async_remove_key_cache
+from .const import (
+    CARD_BUNDLE_DIR,
+    CARD_BUNDLE_MANIFEST,
+    CARD_URL_BASE,
+    CARD_URL_DETAIL,
+    CARD_URL_MAIN,
+    CARD_URL_PICKER,
+    CONF_FRONTEND_DEBUG,
+    DATA_FRONTEND,
+    DEFAULT_FRONTEND_DEBUG,
+    DOMAIN,
+    PLATFORMS,
+)
 from .coordinator import SofabatonHubDataUpdateCoordinator
+from .snapshot import async_remove_state_snapshot
+from .websocket_api import async_setup as async_setup_websocket_api
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -26,6 +45,8 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     Returns:
         True to indicate successful setup
     """
+    # Key catalogs are served to the cards over the websocket API
+    async_setup_websocket_api(hass)
     return True
 
 
@@ -45,6 +66,16 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # Create API client instance
     api_client = SofabatonHubApiClient(hass, entry)
 
+    # Open the direct broker connection (direct connection mode only)
+    try:
+        await api_client.async_connect()
+    except BrokerAuthError as err:
+        raise ConfigEntryError(str(err)) from err
+    except BrokerConnectionError as err:
+        raise ConfigEntryNotReady(str(err)) from err
+    # Also release the connection if setup fails further down
+    entry.async_on_unload(api_client.async_disconnect)
+
     # Create data update coordinator instance
     coordinator = SofabatonHubDataUpdateCoordinator(hass, api_client, entry)
 
@@ -54,17 +85,68 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         "api_client": api_client,
     }
 
-    # First data refresh (before subscribing to MQTT topics to avoid receiving messages before data initialization)
-    await coordinator.async_config_entry_first_refresh()
+    # Restore cached key catalogs so dialogs open without waiting for the Hub
+    await coordinator.key_cache.async_load()
+
+    # Restore the activity list of the previous run so entities come up at once
+    restored = await coordinator.async_restore_snapshot()
 
-    # Subscribe to MQTT topics
+    # Subscribe to MQTT topics before the first refresh so the Hub's answer
+    # to the activity list request is received (coordinator data is already
+    # initialized at this point)
     await api_client.async_subscribe_to_topics()
 
+    if restored:
+        # Reconcile with the live activity list in the background
+        entry.async_create_background_task(
+            hass,
+            coordinator.async_config_entry_first_refresh(),
+            f"{DOMAIN} first refresh {entry.entry_id}",
+        )
+    else:
+        # First data refresh (returns as soon as the activity list arrives)
+        await coordinator.async_config_entry_first_refresh()
+
     # Set up platforms (e.g., remote)
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    # Reload entry when options (command pacing) change
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
     # Register frontend JS card resources
     # This allows us to use custom:sofabaton-main-card in Lovelace UI
+    await _async_register_frontend(hass, entry)
+
+    return True
+
+
+async def _async_register_frontend(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Register the Lovelace card resources (once per Home Assistant run).
+
+    The production bundle is registered when it has been built, unless the
+    frontend debug option is on; otherwise the source modules, which log
+    verbosely to the browser console, are registered. Home Assistant cannot
+    unregister frontend modules, so changing the option takes effect after
+    a restart.
+
+    Args:
+        hass: Home Assistant instance
+        entry: Config entry being set up
+    """
+    if DATA_FRONTEND in hass.data:
+        return
+
+    www_path = hass.config.path(f"custom_components/{DOMAIN}/www")
+    bundle = None
+    if not entry.options.get(CONF_FRONTEND_DEBUG, DEFAULT_FRONTEND_DEBUG):
+        bundle = await hass.async_add_executor_job(_read_card_bundle_name, www_path)
+
+    if bundle:
+        urls = [f"{CARD_URL_BASE}/{CARD_BUNDLE_DIR}/{bundle}"]
+    else:
+        # Main card and detail card first, then cards.js for the Lovelace picker
+        urls = [CARD_URL_MAIN, CARD_URL_DETAIL, CARD_URL_PICKER]
+
     try:
         # Use new async static path registration method
         from homeassistant.components.http import StaticPathConfig  # pylint: disable=import-outside-toplevel
@@ -72,29 +154,42 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         await hass.http.async_register_static_paths(
             [
                 StaticPathConfig(
-                    f"/{DOMAIN}/www",
-                    hass.config.path(f"custom_components/{DOMAIN}/www"),
-                    True,  # cache_headers
+                    CARD_URL_BASE,
+                    www_path,
+                    True,  # cache_headers (the bundle file name changes with its content)
                 )
             ]
         )
 
-        # Register frontend modules
-        # Register all JS files to ensure proper loading order
-        # Also defined in manifest.json for compatibility
         from homeassistant.components import frontend  # pylint: disable=import-outside-toplevel
 
-        # Register main card and detail card as ES6 modules first
-        frontend.add_extra_js_url(hass, f"/{DOMAIN}/www/main-card.js")
-        frontend.add_extra_js_url(hass, f"/{DOMAIN}/www/detail-card.js")
-        # Then register the cards.js for Lovelace picker
-        frontend.add_extra_js_url(hass, f"/{DOMAIN}/www/cards.js")
+        for url in urls:
+            frontend.add_extra_js_url(hass, url)
 
-        _LOGGER.info("Successfully registered Sofabaton Hub frontend cards")
+        hass.data[DATA_FRONTEND] = urls
+        _LOGGER.info("Successfully registered Sofabaton Hub frontend cards: %s", urls)
     except Exception as err:  # pylint: disable=broad-except
         _LOGGER.error("Failed to register frontend cards: %s", err)
 
-    return True
+
+def _read_card_bundle_name(www_path: str) -> str | None:
+    """Return the file name of the built card bundle.
+
+    Args:
+        www_path: Path of the www directory
+
+    Returns:
+        Bundle file name, or None if no bundle has been built
+    """
+    manifest = Path(www_path, CARD_BUNDLE_DIR, CARD_BUNDLE_MANIFEST)
+    try:
+        bundle = json.loads(manifest.read_text(encoding="utf-8"))["module"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    if not Path(www_path, CARD_BUNDLE_DIR, bundle).is_file():
+        _LOGGER.warning("Card bundle %s listed in %s is missing", bundle, manifest)
+        return None
+    return bundle
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -109,8 +204,31 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """
     # Remove our data from hass.data
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
+        entry_data = hass.data[DOMAIN].pop(entry.entry_id)
+        # Stop the outbound command pipeline
+        await entry_data["api_client"].async_shutdown()
         # NOTE: Should also unregister frontend modules and static paths here,
         # but HA Core currently does not provide a standard method for this
 
     return unload_ok
+
+
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload a config entry after its options changed.
+
+    Args:
+        hass: Home Assistant instance
+        entry: Config entry to reload
+    """
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove persisted data when a config entry is deleted.
+
+    Args:
+        hass: Home Assistant instance
+        entry: Config entry being removed
+    """
+    await async_remove_key_cache(hass, entry.entry_id)
+    await async_remove_state_snapshot(hass, entry.entry_id)
@@ -2,33 +2,74 @@
 from __future__ import annotations
 
 import asyncio
+from collections.abc import Awaitable, Hashable, Iterable
+from contextlib import suppress
+from functools import partial
 import json
 import logging
+import time
 from typing import Any, Callable
 
 from homeassistant.components import mqtt
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 
+from .broker import BrokerConnection, BrokerMessage, async_acquire_connection
 from .const import (
+    COMMAND_CLASS_ACTIVITY_CONTROL,
+    COMMAND_CLASS_KEY_PRESS,
+    COMMAND_CLASS_REQUEST,
+    COMMAND_PRIORITIES,
+    COMMAND_TOPICS,
+    CONF_ACTIVITY_CONTROL_GAP,
+    CONF_DIRECT_CONNECTION,
+    CONF_DIRECT_TLS,
+    CONF_HOST,
+    CONF_KEY_PRESS_GAP,
+    CONF_KEY_REPEAT_INTERVAL,
     CONF_MAC,
+    CONF_PASSWORD,
+    CONF_PORT,
+    CONF_REQUEST_GAP,
+    CONF_SHARED_SUBSCRIPTION,
+    CONF_USERNAME,
+    DEDUP_MAX_ENTRIES,
+    DEDUP_WINDOW,
+    DEFAULT_DIRECT_CONNECTION,
+    DEFAULT_DIRECT_TLS,
+    DEFAULT_KEY_REPEAT_INTERVAL,
+    DEFAULT_PUBLISH_POLICY,
+    DEFAULT_SHARED_SUBSCRIPTION,
+    KEY_KIND_ASSIGNED,
+    KEY_KIND_FAVORITES,
+    KEY_KIND_MACROS,
+    KEY_CONTROL_TOPICS,
+    KEY_REQUEST_TOPICS,
+    PRIORITY_KEY_PRESS,
+    PUBLISH_POLICIES,
     TOPIC_ACTIVITY_ASSIGNED_KEY_CONTROL,
     TOPIC_ACTIVITY_CONTROL_DOWN,
     TOPIC_ACTIVITY_CONTROL_UP,
     TOPIC_ACTIVITY_FAVORITES_CONTROL,
     TOPIC_ACTIVITY_FAVORITES_LIST,
-    TOPIC_ACTIVITY_FAVORITES_REQUEST,
     TOPIC_ACTIVITY_KEYS_LIST,
-    TOPIC_ACTIVITY_KEYS_REQUEST,
     TOPIC_ACTIVITY_LIST_REQUEST,
     TOPIC_ACTIVITY_LIST_RESPONSE,
     TOPIC_ACTIVITY_MACRO_KEY_CONTROL,
     TOPIC_ACTIVITY_MACRO_LIST,
-    TOPIC_ACTIVITY_MACRO_REQUEST,
 )
+from .dedup import MessageDeduplicator
+from .demux import async_get_demultiplexer
+from .messages import MESSAGE_PARSERS, ActivityList, ActivityStatus, KeyList, decode_message
+from .pipeline import CommandCancelled, CommandPipeline, LatencyStats
+from .repeat import KeyRepeater
+from .retransmit import RequestRetransmitter
 
 _LOGGER = logging.getLogger(__name__)
 
+# Retransmitter key of the activity list request
+_ACTIVITY_LIST_REQUEST = "activity_list"
+
 
 class SofabatonHubApiClient:
     """API client for MQTT communication with Sofabaton Hub."""
@@ -43,14 +84,86 @@ class SofabatonHubApiClient:
         self.hass = hass
         self.entry = entry
         self.mac: str = entry.data[CONF_MAC]
-        self._on_message_callback: Callable[[str, dict[str, Any]], None] | None = None
-        self._request_lock = asyncio.Lock()
+        self._on_message_callback: Callable[[str, Any], None] | None = None
+
+        # Concrete topics are formatted once per hub, not on every publish
+        self._topics: dict[str, str] = {}
+        # Publish topic template -> (topic, command class, awaited response topic, priority)
+        self._command_routes: dict[str, tuple[str, str, str | None, int]] = {
+            topic_template: (
+                self._get_topic(topic_template),
+                command_class,
+                self._get_topic(response_template) if response_template else None,
+                COMMAND_PRIORITIES.get(topic_template, PRIORITY_KEY_PRESS),
+            )
+            for topic_template, (command_class, response_template) in COMMAND_TOPICS.items()
+        }
+        # Concrete topic -> (QoS, retain), applied to every publish
+        self._publish_policies: dict[str, tuple[int, bool]] = {
+            self._get_topic(topic_template): policy
+            for topic_template, policy in PUBLISH_POLICIES.items()
+        }
+        # Publishes per QoS level
+        self.publish_qos_counts: dict[int, int] = {}
+
+        # Outbound command pipeline (replaces the fixed post-publish sleep)
+        # Gaps are configured in milliseconds through the options flow
+        min_gaps = {
+            command_class: entry.options[option] / 1000
+            for command_class, option in (
+                (COMMAND_CLASS_ACTIVITY_CONTROL, CONF_ACTIVITY_CONTROL_GAP),
+                (COMMAND_CLASS_KEY_PRESS, CONF_KEY_PRESS_GAP),
+                (COMMAND_CLASS_REQUEST, CONF_REQUEST_GAP),
+            )
+            if option in entry.options
+        }
+        self.pipeline = CommandPipeline(hass, self._async_mqtt_publish, self.mac, min_gaps)
+
+        # Hold-to-repeat for assigned keys (interval configured in milliseconds)
+        repeat_interval = entry.options.get(CONF_KEY_REPEAT_INTERVAL)
+        self.repeater = KeyRepeater(
+            hass,
+            self._async_send_repeat,
+            self.mac,
+            repeat_interval / 1000 if repeat_interval else DEFAULT_KEY_REPEAT_INTERVAL,
+        )
+        # Time from a key press reaching the integration until it is published
+        self.key_press_latency = LatencyStats()
+
+        # Callbacks removing our MQTT subscriptions (or shared demux routes)
+        self._unsubscribe_callbacks: list[CALLBACK_TYPE] = []
+
+        # Pooled direct broker connection (direct connection mode only)
+        self.broker: BrokerConnection | None = None
+
+        # Concrete inbound topic -> parser; other topics are never decoded
+        self._parsers = {
+            self._get_topic(topic_template): parser
+            for topic_template, parser in MESSAGE_PARSERS.items()
+        }
+
+        # Inbound duplicate detection on raw payload bytes (before decoding)
+        self.deduplicator = MessageDeduplicator(DEDUP_WINDOW, DEDUP_MAX_ENTRIES)
+
+        # Request/response correlation for key list requests
+        self._pending_key_requests: dict[tuple[str, int], asyncio.Future] = {}
+        self._key_response_kinds: dict[str, str] = {
+            self._get_topic(response_template): kind
+            for kind, (_, response_template) in KEY_REQUEST_TOPICS.items()
+        }
+
+        # Resends list and key requests the Hub did not answer
+        self.retransmitter = RequestRetransmitter(hass, self.mac)
+
+        # Concrete topic -> number of callers expecting a message on it
+        # (never dropped as duplicates, see expect_message)
+        self._expected_messages: dict[str, int] = {}
 
-    def set_on_message_callback(self, func: Callable[[str, dict[str, Any]], None]) -> None:
+    def set_on_message_callback(self, func: Callable[[str, Any], None]) -> None:
         """Set callback function to be called when MQTT message is received.
 
         Args:
-            func: Callback function that takes topic and payload as arguments
+            func: Callback function that takes topic and parsed message record as arguments
         """
         self._on_message_callback = func
 
@@ -63,58 +176,165 @@ class SofabatonHubApiClient:
         Returns:
             Complete topic with MAC address substituted
         """
-        return topic_template.format(mac=self.mac)
+        topic = self._topics.get(topic_template)
+        if topic is None:
+            topic = self._topics[topic_template] = topic_template.format(mac=self.mac)
+        return topic
 
     async def _publish(
-        self, topic_template: str, payload: dict[str, Any], use_lock: bool = True
+        self,
+        topic_template: str,
+        payload: dict[str, Any],
+        coalesce: bool = False,
+        not_before: float | None = None,
+        tag: Hashable | None = None,
+    ) -> None:
+        """Publish MQTT message through the outbound command pipeline.
+
+        Args:
+            topic_template: Topic template with {mac} placeholder
+            payload: Message payload dictionary
+            coalesce: Merge into an identical command still waiting in the queue
+            not_before: Monotonic time before which the pipeline holds the message
+            tag: Tag under which the message can be withdrawn while queued
+        """
+        topic, command_class, response_topic, priority = self._command_routes[topic_template]
+        await self.pipeline.async_submit(
+            topic,
+            json.dumps(payload),
+            command_class,
+            _request_response_key(response_topic, payload) if response_topic else None,
+            coalesce,
+            not_before,
+            priority,
+            tag,
+        )
+
+    async def _publish_key_press(
+        self,
+        topic_template: str,
+        payload: dict[str, Any],
+        pressed_at: float | None,
+        coalesce: bool = False,
+        not_before: float | None = None,
     ) -> None:
-        """Publish MQTT message.
+        """Publish a key press and record its press-to-publish latency.
 
         Args:
             topic_template: Topic template with {mac} placeholder
             payload: Message payload dictionary
-            use_lock: Whether to use request lock for sequential processing
+            pressed_at: Monotonic time the press reached the integration, if known
+            coalesce: Merge into an identical press still waiting in the queue
+            not_before: Monotonic time the press is scheduled for; latency is
+                measured from then
         """
+        await self._publish(topic_template, payload, coalesce, not_before)
+        if pressed_at is not None:
+            self.key_press_latency.record(time.monotonic() - max(pressed_at, not_before or 0.0))
 
-        async def _do_publish() -> None:
-            topic = self._get_topic(topic_template)
-            message = json.dumps(payload)
-            _LOGGER.debug("Publishing to topic '%s': %s", topic, message)
-            await mqtt.async_publish(self.hass, topic, message)
+    async def _async_mqtt_publish(self, topic: str, message: str) -> None:
+        """Publish a serialized message to the MQTT broker.
 
-            # Add small delay for Hub single-threaded processing
-            await asyncio.sleep(0.2)
+        QoS and retain flag come from the topic's publish policy.
 
-        if use_lock:
-            async with self._request_lock:
-                await _do_publish()
+        Args:
+            topic: Concrete MQTT topic
+            message: Serialized message payload
+        """
+        qos, retain = self._publish_policies.get(topic, DEFAULT_PUBLISH_POLICY)
+        _LOGGER.debug("Publishing to topic '%s' (QoS %s): %s", topic, qos, message)
+        if self.broker is not None:
+            await self.broker.async_publish(topic, message, qos, retain)
         else:
-            await _do_publish()
+            await mqtt.async_publish(self.hass, topic, message, qos, retain)
+        self.publish_qos_counts[qos] = self.publish_qos_counts.get(qos, 0) + 1
+
+    async def async_connect(self) -> None:
+        """Connect to the broker directly if direct connection mode is on.
+
+        Hubs configured for the same broker share one connection. Without
+        direct connection mode Home Assistant's MQTT integration is used and
+        nothing needs to be done.
+
+        Raises:
+            BrokerConnectionError: The broker could not be reached
+            BrokerAuthError: The broker rejected the credentials
+        """
+        if not self.entry.options.get(CONF_DIRECT_CONNECTION, DEFAULT_DIRECT_CONNECTION):
+            return
+        data = self.entry.data
+        _LOGGER.info(
+            "Connecting Hub %s directly to MQTT broker %s:%s", self.mac, data[CONF_HOST], data[CONF_PORT]
+        )
+        self.broker = await async_acquire_connection(
+            self.hass,
+            data[CONF_HOST],
+            data[CONF_PORT],
+            data.get(CONF_USERNAME),
+            data.get(CONF_PASSWORD),
+            tls=self.entry.options.get(CONF_DIRECT_TLS, DEFAULT_DIRECT_TLS),
+        )
+
+    async def async_shutdown(self) -> None:
+        """Unsubscribe, stop the outbound command pipeline and fail in-flight requests."""
+        await self.repeater.async_shutdown()
+        self.retransmitter.async_shutdown()
+        while self._unsubscribe_callbacks:
+            self._unsubscribe_callbacks.pop()()
+        for request_key in list(self._pending_key_requests):
+            self._fail_key_request(request_key, asyncio.CancelledError())
+        await self.pipeline.async_shutdown()
+        await self.async_disconnect()
+
+    async def async_disconnect(self) -> None:
+        """Release the direct broker connection, if any."""
+        if self.broker is not None:
+            broker, self.broker = self.broker, None
+            await broker.async_release()
 
     @callback
-    def _message_received(self, msg: mqtt.ReceiveMessage) -> None:
+    def _message_received(self, msg: mqtt.ReceiveMessage | BrokerMessage) -> None:
         """Handle received MQTT message.
 
         Args:
             msg: MQTT message object
         """
-        _LOGGER.info("MQTT message received on topic: %s", msg.topic)
-        _LOGGER.debug("MQTT payload (raw): %s", msg.payload)
-
-        if self._on_message_callback:
-            try:
-                # Try to parse payload as JSON
-                payload_json = json.loads(msg.payload)
-                _LOGGER.debug("MQTT payload (parsed): %s", payload_json)
-
-                # Call callback function set in coordinator, passing topic and parsed payload
-                _LOGGER.debug("Calling message callback for topic: %s", msg.topic)
-                self._on_message_callback(msg.topic, payload_json)
-            except json.JSONDecodeError:
-                # Log error if JSON parsing fails
-                _LOGGER.error("Failed to decode JSON from payload: %s", msg.payload)
-        else:
+        _LOGGER.debug("MQTT message received on topic: %s", msg.topic)
+
+        # Drop repeated deliveries before spending time on decoding, unless
+        # the message answers a request that is still waiting for it
+        duplicate = self.deduplicator.is_duplicate(msg.topic, msg.payload)
+        if duplicate and not self._is_awaited_response(msg.topic):
+            _LOGGER.debug("Duplicate message detected for topic %s, ignoring", msg.topic)
+            return
+
+        if not self._on_message_callback:
             _LOGGER.warning("No message callback registered!")
+            return
+
+        try:
+            # Decode and parse only messages we handle
+            record = decode_message(msg.topic, msg.payload, self._parsers)
+        except ValueError as err:
+            _LOGGER.error("Failed to decode payload on topic %s: %s", msg.topic, err)
+            return
+        if record is None:
+            _LOGGER.debug("No parser for topic %s, ignoring", msg.topic)
+            return
+
+        # Match hub answers to their request for pacing
+        response_key = _answer_response_key(msg.topic, record)
+        if response_key is not None:
+            self.pipeline.notify_response(response_key)
+
+        # Call callback function set in coordinator, passing topic and parsed record
+        self._on_message_callback(msg.topic, record)
+
+        # Wake up callers awaiting this response (after coordinator data is updated)
+        if isinstance(record, KeyList):
+            self._resolve_key_request(msg.topic, record)
+        elif isinstance(record, ActivityList):
+            self.retransmitter.acknowledge(_ACTIVITY_LIST_REQUEST)
 
     async def async_subscribe_to_topics(self) -> None:
         """Subscribe to all MQTT topics that need to be monitored."""
@@ -132,22 +352,87 @@ class SofabatonHubApiClient:
             TOPIC_ACTIVITY_MACRO_LIST,
         ]
 
-        for topic_template in topics_to_subscribe:
-            topic = self._get_topic(topic_template)
+        topics = [self._get_topic(topic_template) for topic_template in topics_to_subscribe]
+
+        if self.broker is not None:
+            # The direct connection routes its messages in-process by topic
+            # already, so the shared subscription option does not apply
+            _LOGGER.info("Subscribing to topics on direct connection: %s", topics)
+            self._unsubscribe_callbacks.append(
+                await self.broker.async_subscribe(topics, self._message_received)
+            )
+            return
+
+        if self.entry.options.get(CONF_SHARED_SUBSCRIPTION, DEFAULT_SHARED_SUBSCRIPTION):
+            # Join the domain-wide wildcard subscription instead of subscribing per topic
+            demux = await async_get_demultiplexer(self.hass)
+            _LOGGER.info("Routing topics through shared subscription: %s", topics)
+            self._unsubscribe_callbacks.append(demux.register(topics, self._message_received))
+            return
+
+        for topic in topics:
             _LOGGER.info("Subscribing to topic: %s", topic)
             # Subscribe to topic and specify callback function for message arrival
-            await mqtt.async_subscribe(self.hass, topic, self._message_received)
+            # Payloads arrive as raw bytes: duplicates are dropped before any decoding
+            self._unsubscribe_callbacks.append(
+                await mqtt.async_subscribe(self.hass, topic, self._message_received, encoding=None)
+            )
 
     # --- Request publishing methods ---
 
     async def async_request_activity_list(self) -> None:
-        """Publish request to get Activity list."""
+        """Publish request to get Activity list.
+
+        The request is resent until the Hub answers. While a request is
+        waiting for its answer, further calls share it.
+        """
         import traceback  # pylint: disable=import-outside-toplevel
 
         stack_trace = "".join(traceback.format_stack()[-3:-1])
         _LOGGER.debug("ACTIVITY LIST REQUEST - Called from: %s", stack_trace.strip())
+        if self.retransmitter.in_flight(_ACTIVITY_LIST_REQUEST):
+            _LOGGER.debug("Activity list request already in flight for %s", self.mac)
+            return
         _LOGGER.info("Requesting activity list from Sofabaton Hub %s", self.mac)
-        await self._publish(TOPIC_ACTIVITY_LIST_REQUEST, {"data": "activity_list"})
+        await self._async_send_request(
+            _ACTIVITY_LIST_REQUEST,
+            partial(self._publish, TOPIC_ACTIVITY_LIST_REQUEST, {"data": "activity_list"}),
+            self._activity_list_request_failed,
+        )
+
+    async def _async_send_request(
+        self,
+        key: Hashable,
+        send: Callable[[], Awaitable[None]],
+        on_failed: Callable[[BaseException], None],
+    ) -> None:
+        """Send a request through the retransmitter.
+
+        The first copy is published independently of the caller, so cancelling
+        the caller keeps the request alive. Inside a channel hold it is
+        published by the holding task itself, since a separate task would
+        queue behind the hold.
+
+        Args:
+            key: Key identifying the request
+            send: Coroutine function publishing the request once
+            on_failed: Called when the request fails or is given up
+        """
+        if self.pipeline.holds_channel():
+            await self.retransmitter.async_send(key, send, on_failed)
+            return
+        await asyncio.shield(
+            self.hass.async_create_task(self.retransmitter.async_send(key, send, on_failed))
+        )
+
+    @callback
+    def _activity_list_request_failed(self, err: BaseException) -> None:
+        """Log an activity list request that failed or was never answered.
+
+        Args:
+            err: Publish error, or asyncio.TimeoutError after the last retry
+        """
+        _LOGGER.warning("Activity list request for %s failed: %r", self.mac, err)
 
     # DEVICE_DISABLED: Device functionality temporarily disabled
     # Uncomment below when re-enabling device support
@@ -162,41 +447,219 @@ class SofabatonHubApiClient:
         await self._publish(TOPIC_DEVICE_LIST_REQUEST, {"data": "device_list"})
     """
 
-    async def async_request_assigned_keys(self, activity_id: int) -> None:
-        """Publish request to get assigned keys for specified Activity.
+    async def async_request_keys(
+        self,
+        kind: str,
+        activity_id: int,
+        timeout: float | None = None,
+    ) -> KeyList:
+        """Request a key list for an Activity and wait for the Hub's answer.
+
+        Concurrent requests for the same (kind, activity_id) share one MQTT
+        round trip. Cancelling one caller does not cancel the shared request.
+        Unanswered requests are resent after the Hub's retransmission timeout
+        and given up when the retries are exhausted.
+
+        Args:
+            kind: Key catalog kind (assigned, macros or favorites)
+            activity_id: Activity ID to request keys for
+            timeout: Seconds to wait for the matching response at most; by
+                default the request fails when the retransmitter gives it up
+
+        Returns:
+            Parsed key list of the matching response
+
+        Raises:
+            asyncio.TimeoutError: If the Hub does not answer in time
+        """
+        request_key = (kind, activity_id)
+        future = self._pending_key_requests.get(request_key)
+
+        if future is None:
+            request_template, response_template = KEY_REQUEST_TOPICS[kind]
+            _LOGGER.info("API: Requesting %s keys for activity %s", kind, activity_id)
+            _LOGGER.debug(
+                "API: Will publish to topic %s, expecting response on topic %s",
+                self._get_topic(request_template),
+                self._get_topic(response_template),
+            )
+
+            future = self.hass.loop.create_future()
+            future.add_done_callback(self._key_request_done)
+            self._pending_key_requests[request_key] = future
+            if timeout is not None:
+                expire = self.hass.loop.call_later(
+                    timeout, self._fail_key_request, request_key, asyncio.TimeoutError()
+                )
+                future.add_done_callback(lambda _: expire.cancel())
+            future.add_done_callback(lambda _: self.retransmitter.cancel(request_key))
+
+            # Publish failures reach the waiters through the future
+            with suppress(Exception):
+                await self._async_send_request(
+                    request_key,
+                    partial(
+                        self._publish,
+                        request_template,
+                        {"data": {"activity_id": activity_id}},
+                        tag=_key_request_tag(activity_id),
+                    ),
+                    partial(self._fail_key_request, request_key),
+                )
+        else:
+            _LOGGER.debug(
+                "API: Joining in-flight %s keys request for activity %s", kind, activity_id
+            )
+
+        return await asyncio.shield(future)
+
+    @callback
+    def cancel_key_requests(self, activity_id: int) -> int:
+        """Withdraw key list requests for an activity that are still queued.
+
+        Requests already sent to the Hub are left alone; their answers still
+        fill the cache. Callers waiting on a withdrawn request get
+        CommandCancelled.
+
+        Args:
+            activity_id: Activity nobody shows key lists for anymore
+
+        Returns:
+            Number of requests withdrawn
+        """
+        withdrawn = self.pipeline.cancel(_key_request_tag(activity_id))
+        if withdrawn:
+            _LOGGER.debug("API: Withdrew %s queued key requests for activity %s", withdrawn, activity_id)
+        return withdrawn
+
+    @callback
+    def _fail_key_request(self, request_key: tuple[str, int], err: BaseException) -> None:
+        """Fail an in-flight key request.
+
+        Args:
+            request_key: (kind, activity_id) of the request
+            err: Exception delivered to all waiters
+        """
+        future = self._pending_key_requests.pop(request_key, None)
+        if future is not None and not future.done():
+            # Withdrawn requests are routine (the user moved on)
+            _LOGGER.log(
+                logging.DEBUG if isinstance(err, CommandCancelled) else logging.WARNING,
+                "API: %s keys request for activity %s failed: %r",
+                request_key[0],
+                request_key[1],
+                err,
+            )
+            future.set_exception(err)
+
+    @staticmethod
+    def _key_request_done(future: asyncio.Future) -> None:
+        """Mark a failed key request as retrieved when nobody is waiting on it.
+
+        Args:
+            future: Completed key request future
+        """
+        if not future.cancelled():
+            future.exception()
+
+    @callback
+    def expect_message(self, topic_template: str) -> CALLBACK_TYPE:
+        """Keep messages on a topic from being dropped as duplicates.
+
+        Used while a caller waits for a push that may repeat an earlier one
+        byte for byte, e.g. the confirmation of switching an activity back
+        on within the duplicate window.
+
+        Args:
+            topic_template: Topic template with {mac} placeholder
+
+        Returns:
+            Callback ending the expectation
+        """
+        topic = self._get_topic(topic_template)
+        self._expected_messages[topic] = self._expected_messages.get(topic, 0) + 1
+
+        @callback
+        def unexpect() -> None:
+            """End the expectation."""
+            remaining = self._expected_messages.pop(topic, 1) - 1
+            if remaining:
+                self._expected_messages[topic] = remaining
+
+        return unexpect
+
+    def _is_awaited_response(self, topic: str) -> bool:
+        """Check if a request or caller is waiting for a message on this topic.
+
+        Args:
+            topic: MQTT topic the message arrived on
+
+        Returns:
+            True if an in-flight list or key request, a caller of
+            expect_message, or the command pipeline expects a message on the
+            topic
+        """
+        if topic in self._expected_messages:
+            return True
+        awaiting = self.pipeline.awaiting_response_key
+        if awaiting is not None and awaiting[0] == topic:
+            return True
+        if topic == self._get_topic(TOPIC_ACTIVITY_LIST_RESPONSE):
+            return self.retransmitter.in_flight(_ACTIVITY_LIST_REQUEST)
+        kind = self._key_response_kinds.get(topic)
+        return kind is not None and any(
+            pending_kind == kind for pending_kind, _ in self._pending_key_requests
+        )
+
+    @callback
+    def _resolve_key_request(self, topic: str, key_list: KeyList) -> None:
+        """Resolve the in-flight key request answered by a key list message.
+
+        Args:
+            topic: MQTT topic the message arrived on
+            key_list: Parsed key list
+        """
+        kind = self._key_response_kinds.get(topic)
+        if kind is None:
+            return
+        request_key = (kind, key_list.activity_id)
+        self.retransmitter.acknowledge(request_key)
+        future = self._pending_key_requests.pop(request_key, None)
+        if future is not None and not future.done():
+            future.set_result(key_list)
+
+    async def async_request_assigned_keys(self, activity_id: int) -> KeyList:
+        """Request assigned keys for specified Activity.
 
         Args:
             activity_id: Activity ID to request keys for
+
+        Returns:
+            Parsed key list of the keys_list message
         """
-        _LOGGER.info("API: Requesting assigned_keys for activity %s", activity_id)
-        _LOGGER.debug("API: Will publish to topic: %s", self._get_topic(TOPIC_ACTIVITY_KEYS_REQUEST))
-        _LOGGER.debug("API: Expecting response on topic: %s", self._get_topic(TOPIC_ACTIVITY_KEYS_LIST))
-        payload = {"data": {"activity_id": activity_id}}
-        await self._publish(TOPIC_ACTIVITY_KEYS_REQUEST, payload)
+        return await self.async_request_keys(KEY_KIND_ASSIGNED, activity_id)
 
-    async def async_request_macro_keys(self, activity_id: int) -> None:
-        """Publish request to get macro commands for specified Activity.
+    async def async_request_macro_keys(self, activity_id: int) -> KeyList:
+        """Request macro commands for specified Activity.
 
         Args:
             activity_id: Activity ID to request keys for
+
+        Returns:
+            Parsed key list of the macro_keys_list message
         """
-        _LOGGER.info("API: Requesting macro_keys for activity %s", activity_id)
-        _LOGGER.debug("API: Will publish to topic: %s", self._get_topic(TOPIC_ACTIVITY_MACRO_REQUEST))
-        _LOGGER.debug("API: Expecting response on topic: %s", self._get_topic(TOPIC_ACTIVITY_MACRO_LIST))
-        payload = {"data": {"activity_id": activity_id}}
-        await self._publish(TOPIC_ACTIVITY_MACRO_REQUEST, payload)
+        return await self.async_request_keys(KEY_KIND_MACROS, activity_id)
 
-    async def async_request_favorite_keys(self, activity_id: int) -> None:
-        """Publish request to get favorite commands for specified Activity.
+    async def async_request_favorite_keys(self, activity_id: int) -> KeyList:
+        """Request favorite commands for specified Activity.
 
         Args:
             activity_id: Activity ID to request keys for
+
+        Returns:
+            Parsed key list of the favorites_keys_list message
         """
-        _LOGGER.info("API: Requesting favorite_keys for activity %s", activity_id)
-        _LOGGER.debug("API: Will publish to topic: %s", self._get_topic(TOPIC_ACTIVITY_FAVORITES_REQUEST))
-        _LOGGER.debug("API: Expecting response on topic: %s", self._get_topic(TOPIC_ACTIVITY_FAVORITES_LIST))
-        payload = {"data": {"activity_id": activity_id}}
-        await self._publish(TOPIC_ACTIVITY_FAVORITES_REQUEST, payload)
+        return await self.async_request_keys(KEY_KIND_FAVORITES, activity_id)
 
     # DEVICE_DISABLED: Device functionality temporarily disabled
     # Uncomment below when re-enabling device support
@@ -237,32 +700,118 @@ class SofabatonHubApiClient:
         _LOGGER.info("Stopping activity %s", activity_id)
         await self.async_control_activity_state(activity_id, "off")
 
-    async def async_send_assigned_key(self, activity_id: int, key_id: int) -> None:
+    async def async_send_assigned_key(
+        self,
+        activity_id: int,
+        key_id: int,
+        pressed_at: float | None = None,
+        coalesce: bool = False,
+    ) -> None:
         """Publish command to send Activity assigned key.
 
         Args:
             activity_id: Activity ID
             key_id: Key ID to send
+            pressed_at: Monotonic time the press reached the integration, for latency statistics
+            coalesce: Merge into an identical press still waiting in the queue
         """
         _LOGGER.info("Sending assigned key: activity_id=%s, key_id=%s", activity_id, key_id)
         payload = {"data": {"activity_id": activity_id, "key_id": key_id}}
-        await self._publish(TOPIC_ACTIVITY_ASSIGNED_KEY_CONTROL, payload)
+        await self._publish_key_press(TOPIC_ACTIVITY_ASSIGNED_KEY_CONTROL, payload, pressed_at, coalesce)
         _LOGGER.debug(
             "Assigned key command published to topic: %s",
             self._get_topic(TOPIC_ACTIVITY_ASSIGNED_KEY_CONTROL),
         )
 
-    async def async_send_macro_key(self, activity_id: int, key_id: int) -> None:
+    async def async_send_key_presses(
+        self,
+        presses: Iterable[tuple[str, int, int]],
+        delay: float = 0.0,
+        pressed_at: float | None = None,
+    ) -> None:
+        """Publish a series of key presses spaced by a fixed delay.
+
+        All presses are queued at once with their due times, so the pipeline
+        schedules them instead of the caller sleeping between publishes.
+        Inside a channel hold they are submitted one after another by the
+        holding task.
+
+        Args:
+            presses: (key kind, activity ID or device ID for favorites, key ID) per press
+            delay: Time in seconds between consecutive presses
+            pressed_at: Monotonic time the presses reached the integration, for latency statistics
+        """
+        start = time.monotonic()
+        publishes = (
+            self._publish_key_press(
+                KEY_CONTROL_TOPICS[kind],
+                {"data": {"activity_id": target_id, "key_id": key_id}},
+                pressed_at,
+                not_before=start + index * delay if index else None,
+            )
+            for index, (kind, target_id, key_id) in enumerate(presses)
+        )
+        if self.pipeline.holds_channel():
+            for publish in publishes:
+                await publish
+            return
+        await asyncio.gather(*publishes)
+
+    async def async_hold_assigned_key(
+        self, activity_id: int, key_id: int, hold_secs: float, pressed_at: float | None = None
+    ) -> None:
+        """Press an assigned key and keep repeating it for a while.
+
+        Inside a channel hold the holding task sends the repeats itself, since
+        the repeater's task would queue behind the hold.
+
+        Args:
+            activity_id: Activity ID
+            key_id: Key ID to hold
+            hold_secs: Time in seconds the key is held
+            pressed_at: Monotonic time the press reached the integration, for latency statistics
+        """
+        await self.async_send_assigned_key(activity_id, key_id, pressed_at)
+        if self.pipeline.holds_channel():
+            started = time.monotonic()
+            due = started + self.repeater.interval
+            while due - started <= hold_secs:
+                await asyncio.sleep(max(0.0, due - time.monotonic()))
+                await self._async_send_repeat(activity_id, key_id, due)
+                due += self.repeater.interval
+            return
+        self.repeater.start(activity_id, key_id)
+        try:
+            await asyncio.sleep(hold_secs)
+        finally:
+            self.repeater.stop(activity_id, key_id)
+
+    async def _async_send_repeat(self, activity_id: int, key_id: int, due: float) -> None:
+        """Send one hold-to-repeat press of an assigned key.
+
+        Args:
+            activity_id: Activity ID
+            key_id: Key ID to send
+            due: Monotonic time the repeat was scheduled for
+        """
+        await self.async_send_assigned_key(activity_id, key_id, pressed_at=due, coalesce=True)
+
+    async def async_send_macro_key(
+        self, activity_id: int, key_id: int, pressed_at: float | None = None
+    ) -> None:
         """Publish command to send Activity macro command.
 
         Args:
             activity_id: Activity ID
             key_id: Macro key ID to send
+            pressed_at: Monotonic time the press reached the integration, for latency statistics
         """
         payload = {"data": {"activity_id": activity_id, "key_id": key_id}}
-        await self._publish(TOPIC_ACTIVITY_MACRO_KEY_CONTROL, payload)
+        await self._publish_key_press(TOPIC_ACTIVITY_MACRO_KEY_CONTROL, payload, pressed_at)
 
-    async def async_send_favorite_key(self, device_id: int, key_id: int) -> None:
+    async def async_send_favorite_key(
+        self, device_id: int, key_id: int, pressed_at: float | None = None
+    ) -> None:
         """Publish command to send Activity favorite command.
 
         Note: Due to firmware design issue, the device expects device_id in the
@@ -271,10 +820,11 @@ class SofabatonHubApiClient:
         Args:
             device_id: Device ID (will be sent as activity_id due to firmware issue)
             key_id: Favorite key ID to send
+            pressed_at: Monotonic time the press reached the integration, for latency statistics
         """
         # Firmware expects device_id in activity_id field
         payload = {"data": {"activity_id": device_id, "key_id": key_id}}
-        await self._publish(TOPIC_ACTIVITY_FAVORITES_CONTROL, payload)
+        await self._publish_key_press(TOPIC_ACTIVITY_FAVORITES_CONTROL, payload, pressed_at)
 
     # DEVICE_DISABLED: Device functionality temporarily disabled
     # Uncomment below when re-enabling device support
@@ -284,3 +834,40 @@ class SofabatonHubApiClient:
         payload = {"data": {"device_id": device_id, "key_id": key_id}}
         await self._publish(TOPIC_DEVICE_KEY_CONTROL, payload)
     """
+
+
+def _key_request_tag(activity_id: int) -> tuple[str, int]:
+    """Return the pipeline tag of the key list requests for an activity."""
+    return ("keys", activity_id)
+
+
+def _request_response_key(response_topic: str, payload: dict[str, Any]) -> tuple[str, Any]:
+    """Return the pipeline response key of a request.
+
+    The Hub answers on a fixed topic per request type and names the activity
+    the answer is about, so (topic, activity ID) tells answers apart.
+
+    Args:
+        response_topic: Concrete topic the Hub answers on
+        payload: Request payload
+    """
+    data = payload.get("data")
+    return (response_topic, data.get("activity_id") if isinstance(data, dict) else None)
+
+
+def _answer_response_key(topic: str, record: Any) -> tuple[str, Any] | None:
+    """Return the pipeline response key of a received message.
+
+    Args:
+        topic: Concrete topic the message arrived on
+        record: Parsed message
+
+    Returns:
+        Key matching _request_response_key of the request it answers, or
+        None for messages that answer no request
+    """
+    if isinstance(record, ActivityList):
+        return (topic, None)
+    if isinstance(record, (KeyList, ActivityStatus)):
+        return (topic, record.activity_id)
+    return None
@@ -0,0 +1,647 @@
+"""Direct MQTT connection to the broker, shared by the Hubs that use it.
+
+By default the integration publishes and subscribes through Home
+Assistant's MQTT integration, whose single client is shared with every
+other MQTT integration. In direct connection mode each broker (host, port,
+credentials and TLS from the config entry) gets one dedicated connection,
+pooled across the Hubs configured for it, so key presses are not queued
+behind unrelated MQTT traffic.
+
+The connection is a paho-mqtt client (the library Home Assistant's MQTT
+integration is built on) driven by the event loop: its socket is watched
+with add_reader/add_writer instead of a network thread. Lost connections
+are re-established with exponential backoff and the subscriptions are
+restored.
+"""
+from __future__ import annotations
+
+import asyncio
+from contextlib import suppress
+from dataclasses import dataclass
+import logging
+import random
+import secrets
+import socket
+import threading
+from typing import Any, Callable
+
+import paho.mqtt.client as paho
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util.ssl import client_context
+
+from .const import (
+    BROKER_CONNECT_TIMEOUT,
+    BROKER_KEEPALIVE,
+    BROKER_MISC_INTERVAL,
+    BROKER_RECONNECT_MAX,
+    BROKER_RECONNECT_MIN,
+    DATA_BROKERS,
+    DOMAIN,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# CONNACK return codes rejecting the credentials
+CONNACK_AUTH_ERRORS = (
+    paho.CONNACK_REFUSED_BAD_USERNAME_PASSWORD,
+    paho.CONNACK_REFUSED_NOT_AUTHORIZED,
+)
+
+
+class BrokerConnectionError(HomeAssistantError):
+    """The broker cannot be reached or the connection was lost."""
+
+
+class BrokerAuthError(BrokerConnectionError):
+    """The broker rejected the credentials."""
+
+
+@dataclass(slots=True)
+class BrokerMessage:
+    """A message received on the direct connection."""
+
+    topic: str
+    payload: bytes
+    qos: int
+    retain: bool
+
+
+async def async_acquire_connection(
+    hass: HomeAssistant,
+    host: str,
+    port: int,
+    username: str | None,
+    password: str | None,
+    tls: bool = False,
+) -> BrokerConnection:
+    """Return the pooled connection to a broker, connecting on first use.
+
+    Every acquire must be paired with BrokerConnection.async_release().
+
+    Args:
+        hass: Home Assistant instance
+        host: Broker host name or IP address
+        port: Broker port
+        username: User name, if the broker requires authentication
+        password: Password, if the broker requires authentication
+        tls: Encrypt the connection and verify the broker's certificate
+
+    Returns:
+        Connected broker connection
+
+    Raises:
+        BrokerConnectionError: The broker could not be reached in time
+        BrokerAuthError: The broker rejected the credentials
+    """
+    pool: dict[tuple, BrokerConnection] = hass.data.setdefault(DATA_BROKERS, {})
+    key = (host, port, username, password, tls)
+    connection = pool.get(key)
+    if connection is None:
+        connection = pool[key] = BrokerConnection(hass, host, port, username, password, tls=tls)
+        connection.pool_key = key
+    connection.refs += 1
+
+    try:
+        await connection.async_start()
+    except BrokerConnectionError:
+        await connection.async_release()
+        raise
+    return connection
+
+
+async def async_test_connection(
+    hass: HomeAssistant,
+    host: str,
+    port: int,
+    username: str | None,
+    password: str | None,
+    tls: bool = False,
+) -> None:
+    """Connect to a broker once and disconnect again.
+
+    Args:
+        hass: Home Assistant instance
+        host: Broker host name or IP address
+        port: Broker port
+        username: User name, if the broker requires authentication
+        password: Password, if the broker requires authentication
+        tls: Encrypt the connection and verify the broker's certificate
+
+    Raises:
+        BrokerConnectionError: The broker could not be reached in time
+        BrokerAuthError: The broker rejected the credentials
+    """
+    connection = BrokerConnection(hass, host, port, username, password, tls=tls)
+    try:
+        await connection.async_start()
+    finally:
+        await connection.async_stop()
+
+
+class BrokerConnection:
+    """Dedicated MQTT connection to one broker.
+
+    Subscriptions are made for concrete topics and routed in-process with
+    one dict lookup; they are restored after every reconnect. Publishing
+    while the connection is down fails at once instead of queuing, so the
+    command pipeline reports the failure to the caller.
+
+    Each connection attempt uses a fresh paho-mqtt client. Its blocking
+    connect (DNS, TCP and TLS handshake) runs in the executor; everything
+    else, including paho's callbacks, runs in the event loop.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        host: str,
+        port: int,
+        username: str | None = None,
+        password: str | None = None,
+        keepalive: float = BROKER_KEEPALIVE,
+        reconnect_min: float = BROKER_RECONNECT_MIN,
+        reconnect_max: float = BROKER_RECONNECT_MAX,
+        tls: bool = False,
+    ) -> None:
+        """Initialize the connection (call async_start to connect).
+
+        Args:
+            hass: Home Assistant instance
+            host: Broker host name or IP address
+            port: Broker port
+            username: User name, if the broker requires authentication
+            password: Password, if the broker requires authentication
+            keepalive: MQTT keepalive interval in seconds
+            reconnect_min: First reconnect delay in seconds
+            reconnect_max: Maximum reconnect delay in seconds
+            tls: Encrypt the connection and verify the broker's certificate
+        """
+        self.hass = hass
+        self.host = host
+        self.port = port
+        self._username = username or None
+        self._password = password or None
+        self._client_id = f"{DOMAIN}-{secrets.token_hex(4)}"
+        self.keepalive = keepalive
+        self.reconnect_min = reconnect_min
+        self.reconnect_max = reconnect_max
+        self.tls = tls
+
+        # Pool bookkeeping (see async_acquire_connection)
+        self.pool_key: tuple | None = None
+        self.refs = 0
+
+        # Client of the current connection attempt
+        self._client: paho.Client | None = None
+        self._loop_thread = threading.get_ident()
+        self._runner: asyncio.Task | None = None
+        # Resolved by the first connection attempt (result or error)
+        self._first_attempt: asyncio.Future | None = None
+        # Resolved by the broker's CONNACK, or failed if the attempt is lost before
+        self._connack: asyncio.Future | None = None
+        self._connected = asyncio.Event()
+        self._lost = asyncio.Event()
+        self._stopping = False
+
+        # Topic -> message callbacks
+        self._subscriptions: dict[str, list[Callable[[BrokerMessage], None]]] = {}
+        # Message ID -> future resolved by the matching PUBACK, SUBACK or UNSUBACK
+        self._inflight: dict[int, asyncio.Future] = {}
+
+        # Statistics
+        self._connects = 0
+        self._disconnects = 0
+        self._published = 0
+        self._received = 0
+        self._dropped = 0
+        self._last_error: str | None = None
+
+    @property
+    def connected(self) -> bool:
+        """Return True while the connection is up."""
+        return self._connected.is_set()
+
+    async def async_start(self) -> None:
+        """Start the connection and wait for the first connection attempt.
+
+        A failed first attempt is reported, but reconnecting continues in
+        the background until async_stop is called. Later calls wait for the
+        connection if it is down.
+
+        Raises:
+            BrokerConnectionError: The broker could not be reached in time
+            BrokerAuthError: The broker rejected the credentials
+        """
+        if self._runner is None:
+            self._first_attempt = self.hass.loop.create_future()
+            # The outcome is not retrieved if the caller timed out
+            self._first_attempt.add_done_callback(_retrieve_exception)
+            self._runner = self.hass.async_create_background_task(
+                self._async_run(), name=f"{DOMAIN} broker {self.host}:{self.port}"
+            )
+            try:
+                await asyncio.wait_for(asyncio.shield(self._first_attempt), BROKER_CONNECT_TIMEOUT)
+            except asyncio.TimeoutError:
+                raise BrokerConnectionError(
+                    f"Timed out connecting to MQTT broker {self.host}:{self.port}"
+                ) from None
+            return
+
+        try:
+            await asyncio.wait_for(self._connected.wait(), BROKER_CONNECT_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise BrokerConnectionError(
+                f"MQTT broker {self.host}:{self.port} is not connected: {self._last_error}"
+            ) from None
+
+    async def async_release(self) -> None:
+        """Release one reference; the last one closes the connection."""
+        self.refs -= 1
+        if self.refs > 0:
+            return
+        pool = self.hass.data.get(DATA_BROKERS, {})
+        if pool.get(self.pool_key) is self:
+            del pool[self.pool_key]
+        await self.async_stop()
+
+    async def async_stop(self) -> None:
+        """Disconnect and stop reconnecting."""
+        self._stopping = True
+        client = self._client
+        if client is not None and self.connected:
+            # Writes DISCONNECT and closes the socket
+            client.disconnect()
+            client.loop_write()
+        if self._runner is not None and not self._runner.done():
+            self._runner.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._runner
+        self._runner = None
+        self._close()
+
+    async def async_subscribe(
+        self, topics: list[str], message_callback: Callable[[BrokerMessage], None]
+    ) -> CALLBACK_TYPE:
+        """Subscribe to concrete topics (no wildcards).
+
+        Waits for the broker to confirm topics that were not subscribed yet.
+
+        Args:
+            topics: Concrete topics
+            message_callback: Callback receiving each message
+
+        Returns:
+            Callback that removes the subscriptions again
+        """
+        new_topics = []
+        for topic in topics:
+            callbacks = self._subscriptions.setdefault(topic, [])
+            if not callbacks:
+                new_topics.append(topic)
+            callbacks.append(message_callback)
+
+        if new_topics and self.connected:
+            await self._async_subscribe(new_topics)
+
+        @callback
+        def unsubscribe() -> None:
+            """Remove the callback and unsubscribe topics nobody listens to."""
+            unused = []
+            for topic in topics:
+                callbacks = self._subscriptions.get(topic, [])
+                if message_callback in callbacks:
+                    callbacks.remove(message_callback)
+                if not callbacks:
+                    self._subscriptions.pop(topic, None)
+                    unused.append(topic)
+            if unused and self.connected:
+                self.hass.async_create_background_task(
+                    self._async_unsubscribe(unused), name=f"{DOMAIN} broker unsubscribe"
+                )
+
+        return unsubscribe
+
+    async def async_publish(
+        self, topic: str, payload: str | bytes, qos: int = 0, retain: bool = False
+    ) -> None:
+        """Publish a message.
+
+        QoS 1 publishes return once the broker acknowledged them.
+
+        Args:
+            topic: Concrete topic
+            payload: Message payload
+            qos: 0 or 1
+            retain: Ask the broker to retain the message
+
+        Raises:
+            BrokerConnectionError: The connection is down
+        """
+        client = self._client
+        if client is None or not self.connected:
+            raise BrokerConnectionError(f"MQTT broker {self.host}:{self.port} is not connected")
+
+        info = client.publish(topic, payload, qos, retain)
+        if qos:
+            await self._async_acknowledged(info.rc, info.mid)
+        elif info.rc != paho.MQTT_ERR_SUCCESS:
+            raise BrokerConnectionError(f"Cannot publish to MQTT broker: {paho.error_string(info.rc)}")
+        self._published += 1
+
+    async def _async_subscribe(self, topics: list[str]) -> None:
+        """Subscribe topics at QoS 0 and wait for the broker's SUBACK.
+
+        Args:
+            topics: Concrete topics
+
+        Raises:
+            BrokerConnectionError: The connection is down or the broker did
+                not answer in time
+        """
+        assert self._client is not None
+        await self._async_acknowledged(*self._client.subscribe([(topic, 0) for topic in topics]))
+
+    async def _async_unsubscribe(self, topics: list[str]) -> None:
+        """Unsubscribe topics, ignoring a lost connection.
+
+        Args:
+            topics: Concrete topics
+        """
+        if self._client is None:
+            return
+        with suppress(BrokerConnectionError):
+            await self._async_acknowledged(*self._client.unsubscribe(topics))
+
+    async def _async_acknowledged(self, result: int, mid: int | None) -> None:
+        """Wait for the broker to acknowledge a packet paho queued.
+
+        Args:
+            result: Result code of the paho call that queued the packet
+            mid: Message ID of the packet
+
+        Raises:
+            BrokerConnectionError: The packet was not queued, the connection
+                was lost or the broker did not answer in time
+        """
+        if result != paho.MQTT_ERR_SUCCESS or mid is None:
+            raise BrokerConnectionError(f"MQTT broker request failed: {paho.error_string(result)}")
+        future = self._inflight[mid] = self.hass.loop.create_future()
+        try:
+            await asyncio.wait_for(future, BROKER_CONNECT_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise BrokerConnectionError(
+                f"No acknowledgement from MQTT broker {self.host}:{self.port}"
+            ) from None
+        finally:
+            self._inflight.pop(mid, None)
+
+    async def _async_run(self) -> None:
+        """Connect, serve the connection and reconnect with exponential backoff."""
+        delay = self.reconnect_min
+        while True:
+            try:
+                await self._async_connect()
+            except BrokerAuthError as err:
+                # Retrying with the same credentials does not help
+                self._last_error = str(err)
+                _LOGGER.error("%s", err)
+                self._close()
+                self._resolve_first_attempt(err)
+                return
+            except Exception as err:  # pylint: disable=broad-except
+                # Refused, reset or dropped before CONNACK, timed out, TLS errors...
+                self._last_error = str(err) or type(err).__name__
+                _LOGGER.warning(
+                    "Cannot connect to MQTT broker %s:%s (%s), retrying in %.1f s",
+                    self.host,
+                    self.port,
+                    self._last_error,
+                    delay,
+                )
+                self._close()
+                self._resolve_first_attempt(
+                    BrokerConnectionError(
+                        f"Cannot connect to MQTT broker {self.host}:{self.port}: {self._last_error}"
+                    )
+                )
+            else:
+                delay = self.reconnect_min
+                await self._async_connected()
+
+            if self._stopping:
+                return
+            # Jitter keeps Hubs sharing nothing but a broker from reconnecting in lockstep
+            await asyncio.sleep(delay * random.uniform(0.8, 1.2))
+            delay = min(delay * 2, self.reconnect_max)
+
+    async def _async_connect(self) -> None:
+        """Open the socket and wait for the broker's CONNACK.
+
+        Raises:
+            BrokerAuthError: The broker rejected the credentials
+            BrokerConnectionError: The broker refused or dropped the connection
+        """
+        self._lost.clear()
+        self._connack = self.hass.loop.create_future()
+        client = self._client = paho.Client(
+            client_id=self._client_id, clean_session=True, protocol=paho.MQTTv311
+        )
+        if self._username is not None:
+            client.username_pw_set(self._username, self._password)
+        if self.tls:
+            client.tls_set_context(client_context())
+        client.on_socket_open = self._on_socket_open
+        client.on_socket_close = self._on_socket_close
+        client.on_socket_register_write = self._on_socket_register_write
+        client.on_socket_unregister_write = self._on_socket_unregister_write
+        client.on_connect = self._on_connect
+        client.on_disconnect = self._on_disconnect
+        client.on_message = self._on_message
+        client.on_publish = self._on_acknowledged
+        client.on_subscribe = self._on_subscribe
+        client.on_unsubscribe = self._on_acknowledged
+
+        await self.hass.async_add_executor_job(client.connect, self.host, self.port, int(self.keepalive))
+        await asyncio.wait_for(asyncio.shield(self._connack), BROKER_CONNECT_TIMEOUT)
+
+    async def _async_connected(self) -> None:
+        """Serve an established connection until it is lost."""
+        client = self._client
+        assert client is not None
+        self._connects += 1
+        self._connected.set()
+        _LOGGER.info("Connected to MQTT broker %s:%s", self.host, self.port)
+
+        try:
+            # Restore the subscriptions of the previous connection
+            if self._subscriptions:
+                await self._async_subscribe(list(self._subscriptions))
+            self._resolve_first_attempt(None)
+            # paho sends keepalive pings and drops a silent broker from loop_misc
+            while not self._lost.is_set():
+                with suppress(asyncio.TimeoutError):
+                    async with asyncio.timeout(BROKER_MISC_INTERVAL):
+                        await self._lost.wait()
+                client.loop_misc()
+        except Exception as err:  # pylint: disable=broad-except
+            self._last_error = str(err) or type(err).__name__
+        finally:
+            self._connected.clear()
+            self._disconnects += 1
+            self._close()
+            if not self._stopping:
+                _LOGGER.warning(
+                    "Disconnected from MQTT broker %s:%s (%s)", self.host, self.port, self._last_error
+                )
+
+    def _call_in_loop(self, func: Callable[..., None], *args: Any) -> None:
+        """Run a socket callback in the event loop.
+
+        paho calls the socket callbacks from the thread that drives it: the
+        executor during connect, the event loop otherwise.
+
+        Args:
+            func: Callback
+            args: Callback arguments
+        """
+        if threading.get_ident() == self._loop_thread:
+            func(*args)
+        else:
+            self.hass.loop.call_soon_threadsafe(func, *args)
+
+    def _on_socket_open(self, client: paho.Client, _userdata: Any, sock: socket.socket) -> None:
+        """Watch a new socket for incoming data."""
+        self._call_in_loop(self._watch_socket, client, sock)
+
+    def _watch_socket(self, client: paho.Client, sock: socket.socket) -> None:
+        """Start reading a socket, or close it if its attempt was abandoned."""
+        if client is not self._client or sock.fileno() == -1:
+            sock.close()
+            return
+        self.hass.loop.add_reader(sock, client.loop_read)
+
+    def _on_socket_close(self, _client: paho.Client, _userdata: Any, sock: socket.socket) -> None:
+        """Stop watching a socket paho is about to close."""
+        # Sockets closed in the executor were never watched (see _watch_socket),
+        # and _close already stopped watching the ones it closed
+        if threading.get_ident() == self._loop_thread and sock.fileno() != -1:
+            self.hass.loop.remove_reader(sock)
+
+    def _on_socket_register_write(self, client: paho.Client, _userdata: Any, sock: socket.socket) -> None:
+        """Write queued packets once the socket is writable."""
+        self._call_in_loop(self._watch_writable, client, sock)
+
+    def _watch_writable(self, client: paho.Client, sock: socket.socket) -> None:
+        """Start writing to a socket of the current attempt."""
+        if client is self._client and sock.fileno() != -1:
+            self.hass.loop.add_writer(sock, client.loop_write)
+
+    def _on_socket_unregister_write(self, _client: paho.Client, _userdata: Any, sock: socket.socket) -> None:
+        """Stop writing once nothing is queued."""
+        if threading.get_ident() == self._loop_thread and sock.fileno() != -1:
+            self.hass.loop.remove_writer(sock)
+
+    def _on_connect(self, _client: paho.Client, _userdata: Any, _flags: dict, result: int) -> None:
+        """Resolve the connection attempt with the broker's CONNACK."""
+        if self._connack is None or self._connack.done():
+            return
+        if result in CONNACK_AUTH_ERRORS:
+            self._connack.set_exception(
+                BrokerAuthError(f"MQTT broker {self.host}:{self.port} rejected the credentials")
+            )
+        elif result != paho.CONNACK_ACCEPTED:
+            self._connack.set_exception(
+                BrokerConnectionError(f"MQTT broker refused the connection (code {result})")
+            )
+        else:
+            self._connack.set_result(None)
+
+    def _on_disconnect(self, _client: paho.Client, _userdata: Any, result: int) -> None:
+        """Fail a pending connection attempt or end the served connection."""
+        if result != paho.MQTT_ERR_SUCCESS:
+            self._last_error = paho.error_string(result)
+        if self._connack is not None and not self._connack.done():
+            self._connack.set_exception(
+                BrokerConnectionError(f"Connection closed before CONNACK ({self._last_error})")
+            )
+        self._lost.set()
+
+    def _on_message(self, _client: paho.Client, _userdata: Any, msg: paho.MQTTMessage) -> None:
+        """Route an incoming message to the callbacks of its topic.
+
+        paho acknowledges QoS 1 messages before calling back.
+        """
+        self._received += 1
+        callbacks = self._subscriptions.get(msg.topic)
+        if not callbacks:
+            self._dropped += 1
+            return
+        message = BrokerMessage(msg.topic, msg.payload, msg.qos, bool(msg.retain))
+        for message_callback in list(callbacks):
+            try:
+                message_callback(message)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error handling MQTT message on %s", msg.topic)
+
+    def _on_acknowledged(self, _client: paho.Client, _userdata: Any, mid: int) -> None:
+        """Resolve the request waiting for a PUBACK or UNSUBACK."""
+        future = self._inflight.get(mid)
+        if future is not None and not future.done():
+            future.set_result(None)
+
+    def _on_subscribe(
+        self, client: paho.Client, userdata: Any, mid: int, _granted_qos: tuple[int, ...]
+    ) -> None:
+        """Resolve the request waiting for a SUBACK."""
+        self._on_acknowledged(client, userdata, mid)
+
+    def _resolve_first_attempt(self, err: BaseException | None) -> None:
+        """Report the outcome of the first connection attempt to async_start.
+
+        Args:
+            err: Error of the attempt, or None if it succeeded
+        """
+        if self._first_attempt is None or self._first_attempt.done():
+            return
+        if err is None:
+            self._first_attempt.set_result(None)
+        else:
+            self._first_attempt.set_exception(err)
+
+    def _close(self) -> None:
+        """Drop the current client and fail requests awaiting an acknowledgement."""
+        client, self._client = self._client, None
+        if client is not None and (sock := client.socket()) is not None:
+            self.hass.loop.remove_reader(sock)
+            self.hass.loop.remove_writer(sock)
+            sock.close()
+        if self._connack is not None and not self._connack.done():
+            self._connack.cancel()
+        for future in self._inflight.values():
+            if not future.done():
+                future.set_exception(BrokerConnectionError("Lost connection to MQTT broker"))
+        self._inflight.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """Return connection statistics for diagnostics."""
+        return {
+            "broker": f"{self.host}:{self.port}",
+            "tls": self.tls,
+            "connected": self.connected,
+            "hubs": self.refs,
+            "connects": self._connects,
+            "disconnects": self._disconnects,
+            "subscriptions": len(self._subscriptions),
+            "published": self._published,
+            "received": self._received,
+            "dropped": self._dropped,
+            "last_error": self._last_error,
+        }
+
+
+def _retrieve_exception(future: asyncio.Future) -> None:
+    """Mark the exception of a future nobody awaits as retrieved."""
+    if not future.cancelled():
+        future.exception()
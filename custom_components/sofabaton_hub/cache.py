@@ -0,0 +1,144 @@
+"""Persistent key catalog cache for Sofabaton Hub."""
+from __future__ import annotations
+
+from collections import OrderedDict
+import logging
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, KEY_CACHE_SAVE_DELAY, KEY_CACHE_STORAGE_VERSION
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _store(hass: HomeAssistant, entry_id: str) -> Store[dict[str, Any]]:
+    """Return the storage helper for a config entry's key catalogs."""
+    return Store(hass, KEY_CACHE_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.keys")
+
+
+async def async_remove_key_cache(hass: HomeAssistant, entry_id: str) -> None:
+    """Remove the persisted key catalogs of a config entry.
+
+    Args:
+        hass: Home Assistant instance
+        entry_id: Config entry ID
+    """
+    await _store(hass, entry_id).async_remove()
+
+
+class KeyCatalogCache:
+    """Per-activity key catalogs persisted to Home Assistant storage.
+
+    Entries are kept in least-recently-used order and evicted once more than
+    ``max_entries`` activities are cached. Each catalog kind carries its own
+    timestamp so callers can tell fresh entries from stale ones.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry_id: str,
+        ttl: float,
+        max_entries: int,
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            hass: Home Assistant instance
+            entry_id: Config entry ID used to name the storage file
+            ttl: Seconds a cached catalog is considered fresh
+            max_entries: Maximum number of activities kept in the cache
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._store = _store(hass, entry_id)
+        # activity_id -> {kind: {"keys": [...], "updated": timestamp}}
+        self._entries: OrderedDict[int, dict[str, dict[str, Any]]] = OrderedDict()
+
+        # Statistics
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def async_load(self) -> None:
+        """Load cached catalogs from storage."""
+        stored = await self._store.async_load()
+        if not stored:
+            return
+
+        for activity_id, kinds in stored.get("activities", {}).items():
+            self._entries[int(activity_id)] = kinds
+        self._evict()
+        _LOGGER.debug("Loaded key catalog cache with %d activities", len(self._entries))
+
+    def get(self, activity_id: int, kind: str) -> tuple[list[Any], bool] | None:
+        """Return a cached catalog and whether it is still fresh.
+
+        Args:
+            activity_id: Activity ID
+            kind: Key catalog kind
+
+        Returns:
+            Tuple of (keys, is_fresh), or None if nothing is cached
+        """
+        entry = self._entries.get(activity_id, {}).get(kind)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(activity_id)
+        fresh = time.time() - entry["updated"] < self.ttl
+        if fresh:
+            self.hits += 1
+        else:
+            self.stale_hits += 1
+        return entry["keys"], fresh
+
+    @callback
+    def set(self, activity_id: int, kind: str, keys: list[Any]) -> None:
+        """Store a catalog received from the hub.
+
+        Args:
+            activity_id: Activity ID
+            kind: Key catalog kind
+            keys: Catalog as stored in coordinator data
+        """
+        self._entries.setdefault(activity_id, {})[kind] = {
+            "keys": keys,
+            "updated": time.time(),
+        }
+        self._entries.move_to_end(activity_id)
+        self._evict()
+        self._store.async_delay_save(self._data_to_save, KEY_CACHE_SAVE_DELAY)
+
+    def _evict(self) -> None:
+        """Evict least recently used activities above the size limit."""
+        while len(self._entries) > self.max_entries:
+            activity_id, _ = self._entries.popitem(last=False)
+            self.evictions += 1
+            _LOGGER.debug("Evicted key catalogs of activity %s from cache", activity_id)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return data to persist."""
+        return {
+            "activities": {
+                str(activity_id): kinds for activity_id, kinds in self._entries.items()
+            }
+        }
+
+    def stats(self) -> dict[str, Any]:
+        """Return cache statistics for diagnostics."""
+        return {
+            "activities": len(self._entries),
+            "ttl": self.ttl,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
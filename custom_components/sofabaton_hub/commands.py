@@ -0,0 +1,104 @@
+"""Command grammar for the Sofabaton Hub remote entity.
+
+``remote.send_command`` accepts two forms of command list:
+
+* A structured command: ``["type:send_assigned_key", "activity_id:1",
+  "key_id:5"]``. Values that look like integers are converted. A ``key``
+  argument naming an entry of REMOTE_KEYS is resolved to ``key_id``, e.g.
+  ``["type:send_assigned_key", "key:volume_up"]``.
+* Named keys: ``["volume_up", "volume_up", "mute"]``, each pressed in turn
+  as an assigned key of the current activity (the standard Home Assistant
+  remote usage).
+
+Automations and the cards send the same few command lists over and over,
+so compiled commands are cached per distinct list.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any
+
+from .const import COMMAND_CACHE_SIZE, REMOTE_KEYS
+
+# Command type of a named key list
+COMMAND_TYPE_NAMED_KEYS = "named_keys"
+
+# Key name -> key ID, built once
+KEY_IDS_BY_NAME: dict[str, int] = {name: key["id"] for name, key in REMOTE_KEYS.items()}
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledCommand:
+    """A send_command command list, parsed once and shared between calls.
+
+    Compiled commands are cached: ``args`` must not be mutated.
+    """
+
+    type: str | None
+    args: dict[str, Any] = field(default_factory=dict)
+    # Key IDs of a named key list, in press order
+    key_ids: tuple[int, ...] = ()
+
+
+def compile_command(command: tuple[str, ...]) -> CompiledCommand:
+    """Return the compiled form of a command list, from the cache if possible.
+
+    Args:
+        command: Command list as passed to remote.send_command
+
+    Returns:
+        Compiled command
+
+    Raises:
+        ValueError: The command list is malformed or names an unknown key
+    """
+    return _compile_command(command)
+
+
+@lru_cache(maxsize=COMMAND_CACHE_SIZE)
+def _compile_command(command: tuple[str, ...]) -> CompiledCommand:
+    """Compile a command list (cached; invalid lists are not cached)."""
+    if not command:
+        raise ValueError("Empty command")
+
+    if not any(item.startswith("type:") for item in command):
+        return CompiledCommand(COMMAND_TYPE_NAMED_KEYS, key_ids=tuple(_key_id(item) for item in command))
+
+    args: dict[str, Any] = {}
+    for item in command:
+        key, separator, value = item.partition(":")
+        if not separator:
+            raise ValueError(f"Invalid command format: {item}")
+        args[key] = int(value) if _is_int(value) else value
+
+    if "key" in args and "key_id" not in args:
+        args["key_id"] = _key_id(str(args.pop("key")))
+
+    return CompiledCommand(args.pop("type"), args)
+
+
+def _key_id(name: str) -> int:
+    """Return the key ID of a REMOTE_KEYS key name.
+
+    Args:
+        name: Key name, e.g. "volume_up"
+
+    Raises:
+        ValueError: The name is not in REMOTE_KEYS
+    """
+    try:
+        return KEY_IDS_BY_NAME[name]
+    except KeyError:
+        raise ValueError(f"Unknown key: {name}") from None
+
+
+def _is_int(value: str) -> bool:
+    """Return True if a command value is an integer literal."""
+    return value.lstrip("-").isdigit()
+
+
+def command_cache_info() -> dict[str, int]:
+    """Return compiled command cache statistics for diagnostics."""
+    info = _compile_command.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_size": info.maxsize}
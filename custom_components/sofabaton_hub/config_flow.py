@@ -8,18 +8,45 @@ from typing import Any
 import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.components import mqtt, zeroconf
+from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.helpers.device_registry import format_mac
 
+from .broker import BrokerAuthError, BrokerConnectionError, async_test_connection
 from .const import (
+    COMMAND_CLASS_ACTIVITY_CONTROL,
+    COMMAND_CLASS_KEY_PRESS,
+    COMMAND_CLASS_REQUEST,
+    CONF_ACTIVITY_CONTROL_GAP,
+    CONF_ATTRIBUTE_SIZE_BUDGET,
+    CONF_DIRECT_CONNECTION,
+    CONF_DIRECT_TLS,
+    CONF_FRONTEND_DEBUG,
     CONF_HOST,
+    CONF_KEY_CACHE_SIZE,
+    CONF_KEY_CACHE_TTL,
+    CONF_KEY_PRESS_GAP,
+    CONF_KEY_REPEAT_INTERVAL,
     CONF_MAC,
     CONF_PASSWORD,
     CONF_PORT,
+    CONF_REQUEST_GAP,
+    CONF_SHARED_SUBSCRIPTION,
     CONF_USERNAME,
+    DEFAULT_ATTRIBUTE_SIZE_BUDGET,
+    DEFAULT_COMMAND_MIN_GAPS,
+    DEFAULT_DIRECT_CONNECTION,
+    DEFAULT_DIRECT_TLS,
+    DEFAULT_FRONTEND_DEBUG,
+    DEFAULT_KEY_CACHE_SIZE,
+    DEFAULT_KEY_CACHE_TTL,
+    DEFAULT_KEY_REPEAT_INTERVAL,
     DEFAULT_NAME,
     DEFAULT_PORT,
+    DEFAULT_SHARED_SUBSCRIPTION,
     DOMAIN,
+    MAX_ATTRIBUTE_SIZE_BUDGET,
+    MIN_ATTRIBUTE_SIZE_BUDGET,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -98,6 +125,21 @@ class SofabatonHubConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         """Initialize the config flow."""
         self.discovery_info: dict[str, Any] | None = None
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> SofabatonHubOptionsFlow:
+        """Get the options flow for this handler.
+
+        Args:
+            config_entry: Config entry to create the options flow for
+
+        Returns:
+            Options flow instance
+        """
+        return SofabatonHubOptionsFlow(config_entry)
+
     async def async_step_user(self, user_input: dict[str, Any] | None = None) -> FlowResult:
         """Handle the initial step initiated by the user.
 
@@ -228,3 +270,106 @@ class SofabatonHubConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             description_placeholders={"name": self.discovery_info["name"]},
             errors=errors,
         )
+
+
+class SofabatonHubOptionsFlow(config_entries.OptionsFlow):
+    """Handle Sofabaton Hub options."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize the options flow.
+
+        Args:
+            config_entry: Config entry being configured
+        """
+        self._entry = config_entry
+
+    async def async_step_init(self, user_input: dict[str, Any] | None = None) -> FlowResult:
+        """Manage the options.
+
+        Args:
+            user_input: User input data from the options form
+
+        Returns:
+            FlowResult indicating entry update or form display
+        """
+        errors: dict[str, str] = {}
+
+        if user_input is not None:
+            # Check the broker before switching to a direct connection
+            if user_input.get(CONF_DIRECT_CONNECTION):
+                data = self._entry.data
+                try:
+                    await async_test_connection(
+                        self.hass,
+                        data[CONF_HOST],
+                        data[CONF_PORT],
+                        data.get(CONF_USERNAME),
+                        data.get(CONF_PASSWORD),
+                        tls=user_input.get(CONF_DIRECT_TLS, DEFAULT_DIRECT_TLS),
+                    )
+                except BrokerAuthError:
+                    errors["base"] = "invalid_auth"
+                except BrokerConnectionError:
+                    errors["base"] = "cannot_connect"
+            if not errors:
+                return self.async_create_entry(title="", data=user_input)
+
+        options = self._entry.options
+
+        def _gap_ms(option: str, command_class: str) -> int:
+            """Return current gap for a command class in milliseconds."""
+            return options.get(option, round(DEFAULT_COMMAND_MIN_GAPS[command_class] * 1000))
+
+        schema = vol.Schema(
+            {
+                vol.Required(
+                    CONF_KEY_PRESS_GAP,
+                    default=_gap_ms(CONF_KEY_PRESS_GAP, COMMAND_CLASS_KEY_PRESS),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=2000)),
+                vol.Required(
+                    CONF_ACTIVITY_CONTROL_GAP,
+                    default=_gap_ms(CONF_ACTIVITY_CONTROL_GAP, COMMAND_CLASS_ACTIVITY_CONTROL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=2000)),
+                vol.Required(
+                    CONF_REQUEST_GAP,
+                    default=_gap_ms(CONF_REQUEST_GAP, COMMAND_CLASS_REQUEST),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=2000)),
+                vol.Required(
+                    CONF_KEY_REPEAT_INTERVAL,
+                    default=options.get(CONF_KEY_REPEAT_INTERVAL, round(DEFAULT_KEY_REPEAT_INTERVAL * 1000)),
+                ): vol.All(vol.Coerce(int), vol.Range(min=50, max=2000)),
+                vol.Required(
+                    CONF_KEY_CACHE_TTL,
+                    default=options.get(CONF_KEY_CACHE_TTL, DEFAULT_KEY_CACHE_TTL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=86400)),
+                vol.Required(
+                    CONF_KEY_CACHE_SIZE,
+                    default=options.get(CONF_KEY_CACHE_SIZE, DEFAULT_KEY_CACHE_SIZE),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=500)),
+                vol.Required(
+                    CONF_SHARED_SUBSCRIPTION,
+                    default=options.get(CONF_SHARED_SUBSCRIPTION, DEFAULT_SHARED_SUBSCRIPTION),
+                ): bool,
+                vol.Required(
+                    CONF_DIRECT_CONNECTION,
+                    default=options.get(CONF_DIRECT_CONNECTION, DEFAULT_DIRECT_CONNECTION),
+                ): bool,
+                vol.Required(
+                    CONF_DIRECT_TLS,
+                    default=options.get(CONF_DIRECT_TLS, DEFAULT_DIRECT_TLS),
+                ): bool,
+                vol.Required(
+                    CONF_ATTRIBUTE_SIZE_BUDGET,
+                    default=options.get(CONF_ATTRIBUTE_SIZE_BUDGET, DEFAULT_ATTRIBUTE_SIZE_BUDGET),
+                ): vol.All(
+                    vol.Coerce(int),
+                    vol.Range(min=MIN_ATTRIBUTE_SIZE_BUDGET, max=MAX_ATTRIBUTE_SIZE_BUDGET),
+                ),
+                vol.Required(
+                    CONF_FRONTEND_DEBUG,
+                    default=options.get(CONF_FRONTEND_DEBUG, DEFAULT_FRONTEND_DEBUG),
+                ): bool,
+            }
+        )
+
+        return self.async_show_form(step_id="init", data_schema=schema, errors=errors)
@@ -23,9 +23,44 @@ CONF_PORT = "port"
 CONF_USERNAME = "username"
 CONF_PASSWORD = "password"
 
+# Options keys (outbound command pacing, in milliseconds)
+CONF_KEY_PRESS_GAP = "key_press_gap"
+CONF_ACTIVITY_CONTROL_GAP = "activity_control_gap"
+CONF_REQUEST_GAP = "request_gap"
+
+# Options keys (hold-to-repeat, in milliseconds)
+CONF_KEY_REPEAT_INTERVAL = "key_repeat_interval"
+
+# Options keys (key catalog cache)
+CONF_KEY_CACHE_TTL = "key_cache_ttl"
+CONF_KEY_CACHE_SIZE = "key_cache_size"
+
+# Options keys (MQTT subscriptions)
+CONF_SHARED_SUBSCRIPTION = "shared_subscription"
+
+# Options keys (MQTT connection)
+CONF_DIRECT_CONNECTION = "direct_connection"
+CONF_DIRECT_TLS = "direct_tls"
+
+# Options keys (entity state, in bytes)
+CONF_ATTRIBUTE_SIZE_BUDGET = "attribute_size_budget"
+
+# Options keys (frontend)
+CONF_FRONTEND_DEBUG = "frontend_debug"
+
 # Frontend card URLs
-CARD_URL_MAIN = f"/{DOMAIN}/www/main-card.js"
-CARD_URL_DETAIL = f"/{DOMAIN}/www/detail-card.js"
+CARD_URL_BASE = f"/{DOMAIN}/www"
+CARD_URL_MAIN = f"{CARD_URL_BASE}/main-card.js"
+CARD_URL_DETAIL = f"{CARD_URL_BASE}/detail-card.js"
+CARD_URL_PICKER = f"{CARD_URL_BASE}/cards.js"
+
+# Production card bundle (built by scripts/build_cards.mjs into www/dist)
+# build.json names the content-hashed bundle file. The source modules
+# (verbose console logging) are served instead in frontend debug mode.
+CARD_BUNDLE_DIR = "dist"
+CARD_BUNDLE_MANIFEST = "build.json"
+DATA_FRONTEND = f"{DOMAIN}_frontend"
+DEFAULT_FRONTEND_DEBUG = False
 
 # MQTT topic templates
 # Note: {mac} will be replaced with the actual MAC address at runtime
@@ -52,6 +87,212 @@ TOPIC_DEVICE_KEYS_REQUEST = "device/{mac}/keys_request"
 TOPIC_DEVICE_KEYS_LIST = "device/{mac}/keys_list"
 TOPIC_DEVICE_KEY_CONTROL = "device/{mac}/keys_control"
 
+# Outbound command classes
+# Each published topic belongs to one class, which decides its pacing
+COMMAND_CLASS_ACTIVITY_CONTROL = "activity_control"
+COMMAND_CLASS_KEY_PRESS = "key_press"
+COMMAND_CLASS_REQUEST = "request"
+
+# Default minimum gap (seconds) between the previous publish and a command of this class
+# Key presses go out back-to-back while the hub is idle. Commands the hub
+# answers (activity control, requests) are paced by the adaptive rate below;
+# a configured gap is a floor on top of it.
+DEFAULT_COMMAND_MIN_GAPS = {
+    COMMAND_CLASS_ACTIVITY_CONTROL: 0.0,
+    COMMAND_CLASS_KEY_PRESS: 0.0,
+    COMMAND_CLASS_REQUEST: 0.0,
+}
+
+# Adaptive pacing (AIMD) of commands the hub answers, learned per hub
+# The rate (commands per second) grows by the increase for every timely
+# answer and is multiplied by the decrease factor when an answer is missing
+# or slow, i.e. takes longer than the response timeout. The initial rate
+# matches the former fixed 200 ms gap.
+AIMD_INITIAL_RATE = 5.0
+AIMD_MIN_RATE = 0.5
+AIMD_MAX_RATE = 20.0
+AIMD_INCREASE = 1.0
+AIMD_DECREASE = 0.5
+AIMD_BACKOFF_HISTORY = 10  # back-off events kept for diagnostics
+
+# Outbound command priorities (lower is published first)
+# Control beats catalog fetches: an "all off" or a volume press must not wait
+# behind a key list request triggered by a dashboard
+PRIORITY_ACTIVITY_CONTROL = 0
+PRIORITY_KEY_PRESS = 1
+PRIORITY_STATE_QUERY = 2
+PRIORITY_CATALOG = 3
+# Starvation protection: a waiting command gains one priority level per
+# interval (seconds), so a catalog request waits at most about 1.5 s longer
+PRIORITY_AGING = 0.5
+
+# Time (seconds) the pipeline holds the next command while waiting for a hub
+# response. It starts at the default and then follows the hub's smoothed
+# round-trip time like the retransmission timeout (see RTO_K), within bounds.
+DEFAULT_RESPONSE_PACING_TIMEOUT = 0.5
+RESPONSE_TIMEOUT_MIN = 0.25
+RESPONSE_TIMEOUT_MAX = 2.0
+# Unanswered commands remembered for matching late answers
+RESPONSE_TRACKING_MAX = 32
+
+# Hold-to-repeat
+# A held key is pressed again every interval (seconds) until it is released.
+# A repeat whose stop command never arrives (closed card, lost connection)
+# ends on its own after the maximum duration (seconds).
+DEFAULT_KEY_REPEAT_INTERVAL = 0.2
+KEY_REPEAT_MAX_DURATION = 10.0
+
+# Published topic -> (command class, topic the hub answers on, or None)
+COMMAND_TOPICS = {
+    TOPIC_ACTIVITY_LIST_REQUEST: (COMMAND_CLASS_REQUEST, TOPIC_ACTIVITY_LIST_RESPONSE),
+    TOPIC_ACTIVITY_CONTROL_DOWN: (COMMAND_CLASS_ACTIVITY_CONTROL, TOPIC_ACTIVITY_CONTROL_UP),
+    TOPIC_ACTIVITY_KEYS_REQUEST: (COMMAND_CLASS_REQUEST, TOPIC_ACTIVITY_KEYS_LIST),
+    TOPIC_ACTIVITY_FAVORITES_REQUEST: (COMMAND_CLASS_REQUEST, TOPIC_ACTIVITY_FAVORITES_LIST),
+    TOPIC_ACTIVITY_MACRO_REQUEST: (COMMAND_CLASS_REQUEST, TOPIC_ACTIVITY_MACRO_LIST),
+    TOPIC_ACTIVITY_ASSIGNED_KEY_CONTROL: (COMMAND_CLASS_KEY_PRESS, None),
+    TOPIC_ACTIVITY_MACRO_KEY_CONTROL: (COMMAND_CLASS_KEY_PRESS, None),
+    TOPIC_ACTIVITY_FAVORITES_CONTROL: (COMMAND_CLASS_KEY_PRESS, None),
+    TOPIC_DEVICE_LIST_REQUEST: (COMMAND_CLASS_REQUEST, TOPIC_DEVICE_LIST_RESPONSE),
+    TOPIC_DEVICE_KEYS_REQUEST: (COMMAND_CLASS_REQUEST, TOPIC_DEVICE_KEYS_LIST),
+    TOPIC_DEVICE_KEY_CONTROL: (COMMAND_CLASS_KEY_PRESS, None),
+}
+
+# Published topic -> scheduling priority
+COMMAND_PRIORITIES = {
+    TOPIC_ACTIVITY_CONTROL_DOWN: PRIORITY_ACTIVITY_CONTROL,
+    TOPIC_ACTIVITY_ASSIGNED_KEY_CONTROL: PRIORITY_KEY_PRESS,
+    TOPIC_ACTIVITY_MACRO_KEY_CONTROL: PRIORITY_KEY_PRESS,
+    TOPIC_ACTIVITY_FAVORITES_CONTROL: PRIORITY_KEY_PRESS,
+    TOPIC_DEVICE_KEY_CONTROL: PRIORITY_KEY_PRESS,
+    TOPIC_ACTIVITY_LIST_REQUEST: PRIORITY_STATE_QUERY,
+    TOPIC_DEVICE_LIST_REQUEST: PRIORITY_STATE_QUERY,
+    TOPIC_ACTIVITY_KEYS_REQUEST: PRIORITY_CATALOG,
+    TOPIC_ACTIVITY_FAVORITES_REQUEST: PRIORITY_CATALOG,
+    TOPIC_ACTIVITY_MACRO_REQUEST: PRIORITY_CATALOG,
+    TOPIC_DEVICE_KEYS_REQUEST: PRIORITY_CATALOG,
+}
+
+# MQTT publish policy per published topic: (QoS, retain)
+# Key presses are latency-critical and fire-and-forget: a lost press is
+# pressed again by the user, a late one is worse than none. Activity control
+# must reach the Hub, and requests are answered only once they arrive, so
+# both are acknowledged by the broker. Commands and requests are never
+# retained: a retained message would be replayed to the Hub on every
+# reconnect.
+PUBLISH_QOS_FIRE_AND_FORGET = 0
+PUBLISH_QOS_AT_LEAST_ONCE = 1
+DEFAULT_PUBLISH_POLICY = (PUBLISH_QOS_FIRE_AND_FORGET, False)
+PUBLISH_POLICIES = {
+    TOPIC_ACTIVITY_LIST_REQUEST: (PUBLISH_QOS_AT_LEAST_ONCE, False),
+    TOPIC_ACTIVITY_CONTROL_DOWN: (PUBLISH_QOS_AT_LEAST_ONCE, False),
+    TOPIC_ACTIVITY_KEYS_REQUEST: (PUBLISH_QOS_AT_LEAST_ONCE, False),
+    TOPIC_ACTIVITY_FAVORITES_REQUEST: (PUBLISH_QOS_AT_LEAST_ONCE, False),
+    TOPIC_ACTIVITY_MACRO_REQUEST: (PUBLISH_QOS_AT_LEAST_ONCE, False),
+    TOPIC_ACTIVITY_ASSIGNED_KEY_CONTROL: (PUBLISH_QOS_FIRE_AND_FORGET, False),
+    TOPIC_ACTIVITY_MACRO_KEY_CONTROL: (PUBLISH_QOS_FIRE_AND_FORGET, False),
+    TOPIC_ACTIVITY_FAVORITES_CONTROL: (PUBLISH_QOS_FIRE_AND_FORGET, False),
+    TOPIC_DEVICE_LIST_REQUEST: (PUBLISH_QOS_AT_LEAST_ONCE, False),
+    TOPIC_DEVICE_KEYS_REQUEST: (PUBLISH_QOS_AT_LEAST_ONCE, False),
+    TOPIC_DEVICE_KEY_CONTROL: (PUBLISH_QOS_FIRE_AND_FORGET, False),
+}
+
+# Key catalog kinds (match the sub-keys of coordinator data["keys"])
+KEY_KIND_ASSIGNED = "assigned"
+KEY_KIND_MACROS = "macros"
+KEY_KIND_FAVORITES = "favorites"
+KEY_KINDS = (KEY_KIND_ASSIGNED, KEY_KIND_MACROS, KEY_KIND_FAVORITES)
+
+# Key catalog kind -> (request topic, response topic)
+KEY_REQUEST_TOPICS = {
+    KEY_KIND_ASSIGNED: (TOPIC_ACTIVITY_KEYS_REQUEST, TOPIC_ACTIVITY_KEYS_LIST),
+    KEY_KIND_MACROS: (TOPIC_ACTIVITY_MACRO_REQUEST, TOPIC_ACTIVITY_MACRO_LIST),
+    KEY_KIND_FAVORITES: (TOPIC_ACTIVITY_FAVORITES_REQUEST, TOPIC_ACTIVITY_FAVORITES_LIST),
+}
+
+# Key catalog kind -> topic a key of that catalog is pressed on
+# (favorites carry the device ID in the activity_id field)
+KEY_CONTROL_TOPICS = {
+    KEY_KIND_ASSIGNED: TOPIC_ACTIVITY_ASSIGNED_KEY_CONTROL,
+    KEY_KIND_MACROS: TOPIC_ACTIVITY_MACRO_KEY_CONTROL,
+    KEY_KIND_FAVORITES: TOPIC_ACTIVITY_FAVORITES_CONTROL,
+}
+
+# Compiled remote.send_command command lists kept (see commands.py)
+COMMAND_CACHE_SIZE = 128
+
+# send_sequence service: steps run while holding the Hub's command channel
+SERVICE_SEND_SEQUENCE = "send_sequence"
+ATTR_STEPS = "steps"
+SEQUENCE_MAX_STEPS = 50
+
+# Retransmission of unanswered list and key requests
+# The retransmission timeout (RTO) is derived per Hub from the smoothed
+# round-trip time and its variance, as in TCP (RFC 6298): RTO = SRTT +
+# RTO_K * RTTVAR, bounded to RTO_MIN..RTO_MAX. Each retry doubles it, and a
+# request is given up after REQUEST_MAX_RETRIES retries.
+RTO_INITIAL = 1.0  # seconds, before the first round trip was measured
+RTO_MIN = 0.5  # seconds
+RTO_MAX = 8.0  # seconds
+RTO_K = 4
+RTT_ALPHA = 0.125  # weight of a new sample in the smoothed RTT
+RTT_BETA = 0.25  # weight of a new sample in the RTT variance
+REQUEST_MAX_RETRIES = 3
+
+# Persisted activity list used to create entities before the Hub answers
+STATE_SNAPSHOT_STORAGE_VERSION = 1
+STATE_SNAPSHOT_SAVE_DELAY = 5  # seconds, coalesces bursts of status pushes
+
+# Maximum time (seconds) setup waits for the first activity list
+FIRST_REFRESH_TIMEOUT = 10.0
+
+# Optimistic activity control
+# An activity switch is shown at once and confirmed by the Hub's
+# activity_control_up push; without a push within this time (seconds) it is
+# rolled back and the activity list is requested
+ACTIVITY_CONFIRM_TIMEOUT = 5.0
+
+# Shared subscription mode: one wildcard subscription for all Hubs,
+# demultiplexed in-process by topic (hass.data[DATA_DEMUX])
+TOPIC_SHARED_SUBSCRIPTION = "activity/+/+"
+DATA_DEMUX = f"{DOMAIN}_demux"
+DEFAULT_SHARED_SUBSCRIPTION = False
+
+# Direct connection mode: a dedicated MQTT connection per broker (host, port
+# and credentials of the config entry), pooled across Hubs in
+# hass.data[DATA_BROKERS], instead of Home Assistant's shared MQTT client
+DATA_BROKERS = f"{DOMAIN}_brokers"
+DEFAULT_DIRECT_CONNECTION = False
+# Encrypt the direct connection and verify the broker's certificate
+DEFAULT_DIRECT_TLS = False
+BROKER_CONNECT_TIMEOUT = 10.0  # seconds, per connection attempt and acknowledgement
+BROKER_KEEPALIVE = 60  # seconds
+# Interval of paho's housekeeping (keepalive pings, silent broker detection)
+BROKER_MISC_INTERVAL = 1.0  # seconds
+# Reconnect delay doubles from the minimum up to the maximum (seconds)
+BROKER_RECONNECT_MIN = 1.0
+BROKER_RECONNECT_MAX = 60.0
+
+# Inbound message deduplication
+# Identical messages on the same topic within the window are dropped
+DEDUP_WINDOW = 5.0  # seconds
+DEDUP_MAX_ENTRIES = 256  # messages remembered before the oldest are evicted
+
+# Remote entity state attributes
+# Serialized attributes larger than the budget are trimmed (activities beyond
+# the budget are dropped, the current activity is always kept). The default
+# stays below the recorder's 16 KiB limit for state attributes.
+DEFAULT_ATTRIBUTE_SIZE_BUDGET = 8192  # bytes
+MIN_ATTRIBUTE_SIZE_BUDGET = 1024  # bytes
+MAX_ATTRIBUTE_SIZE_BUDGET = 65536  # bytes
+
+# Key catalog cache
+# Cached catalogs younger than the TTL are served without asking the hub,
+# older ones are served immediately and revalidated in the background
+DEFAULT_KEY_CACHE_TTL = 300  # seconds
+DEFAULT_KEY_CACHE_SIZE = 20  # activities kept before least recently used are evicted
+KEY_CACHE_STORAGE_VERSION = 1
+KEY_CACHE_SAVE_DELAY = 10  # seconds
+
 # Remote key definitions (27 keys total)
 # Note: key_id values should match your actual hardware configuration
 REMOTE_KEYS = {
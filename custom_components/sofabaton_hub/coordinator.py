@@ -2,19 +2,29 @@
 from __future__ import annotations
 
 import asyncio
-import copy
 import logging
 import time
-from typing import Any
+from typing import Any, Callable
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
 from .api import SofabatonHubApiClient
+from .cache import KeyCatalogCache
 from .const import (
+    ACTIVITY_CONFIRM_TIMEOUT,
+    CONF_KEY_CACHE_SIZE,
+    CONF_KEY_CACHE_TTL,
     CONF_MAC,
+    DEFAULT_KEY_CACHE_SIZE,
+    DEFAULT_KEY_CACHE_TTL,
     DOMAIN,
+    FIRST_REFRESH_TIMEOUT,
+    KEY_KIND_ASSIGNED,
+    KEY_KIND_FAVORITES,
+    KEY_KIND_MACROS,
     TOPIC_ACTIVITY_ASSIGNED_KEY_CONTROL,
     TOPIC_ACTIVITY_CONTROL_DOWN,
     TOPIC_ACTIVITY_CONTROL_UP,
@@ -34,6 +44,20 @@ from .const import (
     TOPIC_DEVICE_LIST_REQUEST,
     TOPIC_DEVICE_LIST_RESPONSE,
 )
+from .messages import ActivityList, ActivityStatus, KeyList
+from .pipeline import CommandCancelled
+from .snapshot import StateSnapshot
+from .state import (
+    ACTIVITY_ID_ALL_OFF,
+    ChangeSet,
+    apply_activity_list,
+    apply_activity_status,
+    apply_keys,
+    diff_state,
+    empty_state,
+    replace_keys,
+    restore_activities,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -57,10 +81,6 @@ class SofabatonHubDataUpdateCoordinator(DataUpdateCoordinator):
         self.entry = entry
         self.mac: str = entry.data[CONF_MAC]
 
-        # Message deduplication mechanism
-        self._processed_messages: dict[str, float] = {}  # Message ID -> timestamp
-        self._message_cache_duration = 5.0  # Cache messages for 5 seconds
-
         # Batch update mechanism
         self._pending_updates: set[str] = set()  # Pending update types
         self._update_debounce_timer = None  # Debounce timer
@@ -70,26 +90,55 @@ class SofabatonHubDataUpdateCoordinator(DataUpdateCoordinator):
         self._sequential_requests: dict[int, dict[str, Any]] = {}  # activity_id -> request state
         self._request_timeouts: dict[int, Any] = {}  # activity_id -> timeout handler
 
+        # Set by the first activity list; first refresh awaits it
+        self._activity_list_received = asyncio.Event()
+        # Setup timing: seconds from first refresh start until the Hub answered
+        self.ready_after: float | None = None
+        self.first_refresh_timed_out = False
+
         # Basic data sequential request mechanism
         self._basic_data_request_state = None  # Basic data request state
         self._basic_data_timeout = None  # Basic data request timeout
 
+        # Optimistic activity switch awaiting the Hub's activity_control_up push:
+        # activity_id, state, previous (snapshot to roll back to), timer
+        self._pending_activity: dict[str, Any] | None = None
+        self.activity_control_stats = {"confirmed": 0, "mismatched": 0, "timed_out": 0, "failed": 0}
+        entry.async_on_unload(self._clear_pending_activity)
+
+        # Persistent key catalog cache (loaded during entry setup)
+        self.key_cache = KeyCatalogCache(
+            hass,
+            entry.entry_id,
+            ttl=entry.options.get(CONF_KEY_CACHE_TTL, DEFAULT_KEY_CACHE_TTL),
+            max_entries=entry.options.get(CONF_KEY_CACHE_SIZE, DEFAULT_KEY_CACHE_SIZE),
+        )
+
+        # Activity ID -> number of cards showing its key lists
+        self._key_viewers: dict[int, int] = {}
+
+        # Persisted activity list for warm starts (restored during entry setup)
+        self.snapshot = StateSnapshot(hass, entry.entry_id, lambda: self.data)
+        self.restored_from_snapshot = False
+
+        # MQTT routing table: concrete topic -> (update type, handler, use debounce)
+        # Compiled once per hub so dispatching a message is a single dict lookup
+        self._routes: dict[str, tuple[str, Callable[[dict], None], bool]] = {}
+        self.register_topic(TOPIC_ACTIVITY_LIST_RESPONSE, "activity_list", self._handle_activity_list)  # Immediate update to avoid overwriting key data
+        self.register_topic(TOPIC_ACTIVITY_CONTROL_UP, "activity_status", self._handle_activity_status)  # Immediate update for real-time activity status
+        # DEVICE_DISABLED: Device functionality temporarily disabled
+        # Uncomment below when re-enabling device support
+        # self.register_topic(TOPIC_DEVICE_LIST_RESPONSE, "device_list", self._handle_device_list, use_debounce=True)
+        self.register_topic(TOPIC_ACTIVITY_KEYS_LIST, "assigned_keys", self._handle_assigned_keys)  # Immediate update, no debounce
+        self.register_topic(TOPIC_ACTIVITY_MACRO_LIST, "macro_keys", self._handle_macro_keys)  # Immediate update, no debounce
+        self.register_topic(TOPIC_ACTIVITY_FAVORITES_LIST, "favorite_keys", self._handle_favorite_keys)  # Immediate update, no debounce
+        # DEVICE_DISABLED: Device functionality temporarily disabled
+        # Uncomment below when re-enabling device support
+        # self.register_topic(TOPIC_DEVICE_KEYS_LIST, "device_keys", self._handle_device_keys)
+
         # Set MQTT message callback
         self.api_client.set_on_message_callback(self._handle_mqtt_message)
 
-        # Initialize data structure
-        self.data: dict[str, Any] = {
-            "activities": {},  # activity_id -> {name, id, state}
-            "devices": {},  # device_id -> {name, id}
-            "current_activity_id": None,  # Current activity ID
-            "keys": {
-                "assigned": {},  # activity_id -> [key_id, ...]
-                "macros": {},  # activity_id -> [{id, name}, ...]
-                "favorites": {},  # activity_id -> [{id, name, device_id}, ...]
-                "device_keys": {},  # device_id -> [{id, name}, ...]
-            },
-        }
-
         # Initialize parent class
         super().__init__(
             hass,
@@ -98,20 +147,32 @@ class SofabatonHubDataUpdateCoordinator(DataUpdateCoordinator):
             update_interval=None,  # No periodic polling, rely on MQTT push
         )
 
+        # Initialize data structure (after the parent class, which resets it to None)
+        # Snapshots are copy-on-write: never mutate self.data in place (see state.py)
+        self.data: dict[str, Any] = empty_state()
+
+        # Changes carried by the latest update, for entities to skip no-op writes
+        self.last_changes = ChangeSet()
+        self._published_data = self.data
+
+    @callback
+    def async_set_updated_data(self, data: dict[str, Any]) -> None:
+        """Publish a new snapshot together with its change set.
+
+        The change set is computed against the last published snapshot (not
+        self.data, which debounced handlers may already have replaced).
+
+        Args:
+            data: New snapshot
+        """
+        self.last_changes = diff_state(self._published_data, data)
+        self._published_data = data
+        super().async_set_updated_data(data)
+
     def _ensure_data_initialized(self) -> None:
         """Ensure self.data is initialized."""
         if self.data is None:
-            self.data = {
-                "activities": {},
-                "devices": {},
-                "current_activity_id": None,
-                "keys": {
-                    "assigned": {},
-                    "macros": {},
-                    "favorites": {},
-                    "device_keys": {},
-                },
-            }
+            self.data = empty_state()
 
     async def _async_update_data(self) -> dict[str, Any]:
         """Periodic data update (using sequential requests).
@@ -126,40 +187,58 @@ class SofabatonHubDataUpdateCoordinator(DataUpdateCoordinator):
 
         return self.data
 
+    async def async_restore_snapshot(self) -> bool:
+        """Restore the activity list persisted by the previous run.
+
+        Entities can then be created before the Hub answers; the live activity
+        list replaces the restored one when it arrives.
+
+        Returns:
+            True if a snapshot was restored
+        """
+        activities = await self.snapshot.async_load()
+        if not activities:
+            return False
+
+        self.data = apply_activity_list(self.data, activities)
+        self.restored_from_snapshot = True
+        _LOGGER.info(
+            "Restored %d activities for %s from snapshot, reconciling with the Hub",
+            len(activities),
+            self.mac,
+        )
+        return True
+
     async def async_config_entry_first_refresh(self) -> None:
-        """Special handling for first refresh (using sequential requests)."""
+        """Special handling for first refresh (using sequential requests).
+
+        Waits until the activity list handler signals that the Hub answered,
+        instead of polling the data, so setup finishes as soon as the Hub
+        responds and config entries do not hold each other up.
+        """
         _LOGGER.info("Starting sequential basic data request for %s", self.mac)
+        started = time.monotonic()
 
         # Use sequential request mechanism to get basic data
         await self.async_request_basic_data()
 
-        # Wait for activity list to be populated (with timeout)
-        max_wait = 10  # Maximum wait time in seconds
-        wait_interval = 0.5  # Check every 0.5 seconds
-        elapsed = 0
-
-        while elapsed < max_wait:
-            if self.data and self.data.get("activities"):
-                _LOGGER.info(
-                    "Activity list received for %s (%d activities) after %.1f seconds",
-                    self.mac,
-                    len(self.data.get("activities", {})),
-                    elapsed,
-                )
-                return
-
-            _LOGGER.debug(
-                "Waiting for activity list... (elapsed: %.1fs, data: %s)",
-                elapsed,
-                "None" if self.data is None else f"activities={len(self.data.get('activities', {}))}",
+        try:
+            await asyncio.wait_for(self._activity_list_received.wait(), FIRST_REFRESH_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.first_refresh_timed_out = True
+            _LOGGER.warning(
+                "Timeout waiting for activity list for %s (waited %d seconds)",
+                self.mac,
+                FIRST_REFRESH_TIMEOUT,
             )
-            await asyncio.sleep(wait_interval)
-            elapsed += wait_interval
+            return
 
-        _LOGGER.warning(
-            "Timeout waiting for activity list for %s (waited %d seconds)",
+        self.ready_after = time.monotonic() - started
+        _LOGGER.info(
+            "Activity list received for %s (%d activities) after %.3f seconds",
             self.mac,
-            max_wait,
+            len(self.data["activities"]),
+            self.ready_after,
         )
 
     # Basic data sequential request
@@ -273,78 +352,220 @@ class SofabatonHubDataUpdateCoordinator(DataUpdateCoordinator):
             _LOGGER.error("Unknown basic data step completed: %s", completed_step)
             self._cleanup_basic_data_request()
 
-    # Request activity key data (on-demand loading, always fetch latest)
-    async def async_request_assigned_keys(self, activity_id: int) -> None:
-        """Request assigned_keys separately (on-demand loading).
+    # Optimistic activity control
+    async def async_control_activity(self, activity_id: int, state: str) -> None:
+        """Switch an activity, publishing the expected state right away.
+
+        The expected state is confirmed by the Hub's activity_control_up push,
+        so no activity list is requested after the control command. A push
+        that disagrees is applied and followed by an activity list request;
+        without a push within ACTIVITY_CONFIRM_TIMEOUT the previous activity
+        states are restored and the activity list is requested.
 
         Args:
-            activity_id: Activity ID to request keys for
+            activity_id: Activity ID, or ACTIVITY_ID_ALL_OFF to stop all activities
+            state: Desired state ("on" or "off")
+
+        Raises:
+            Exception: Publishing the control command failed; the expected
+                state has been rolled back
         """
-        _LOGGER.info("Backend: Requesting assigned_keys for activity %s", activity_id)
+        self._ensure_data_initialized()
 
-        # Set flag to prevent activity_list updates from overwriting key data
-        self._is_requesting_keys = True
-        _LOGGER.debug("Set _is_requesting_keys flag to prevent activity_list interference")
+        previous = self.data
+        if self._pending_activity is not None:
+            # Switched again before the Hub confirmed: roll back to the state
+            # before the first unconfirmed switch
+            previous = self._pending_activity["previous"]
+            self._clear_pending_activity()
+
+        pending = {
+            "activity_id": activity_id,
+            "state": state,
+            "previous": previous,
+            "timer": self.hass.loop.call_later(
+                ACTIVITY_CONFIRM_TIMEOUT, self._handle_activity_confirm_timeout
+            ),
+            # Switching back within the duplicate window repeats an earlier
+            # push byte for byte; it must still confirm
+            "unexpect": self.api_client.expect_message(TOPIC_ACTIVITY_CONTROL_UP),
+        }
+        self._pending_activity = pending
+        _LOGGER.debug("Optimistic activity state for %s: activity_id=%s, state=%s", self.mac, activity_id, state)
+        self._publish_activities(apply_activity_status(self.data, activity_id, state))
 
-        # Ensure data structure is initialized
-        self._ensure_data_initialized()
+        try:
+            await self.api_client.async_control_activity_state(activity_id, state)
+        except Exception:
+            # Only roll back if no later switch has replaced this one
+            if self._pending_activity is pending:
+                self.activity_control_stats["failed"] += 1
+                self._rollback_pending_activity()
+            raise
 
-        # Clear all assigned_keys (only keep data for the activity being requested)
-        if self.data["keys"]["assigned"]:
-            _LOGGER.debug("Clearing all assigned_keys (had %d activities)", len(self.data["keys"]["assigned"]))
-        self.data["keys"]["assigned"] = {}
+    @callback
+    def _handle_activity_confirm_timeout(self) -> None:
+        """Roll back an unconfirmed activity switch and refresh the activity list."""
+        if self._pending_activity is None:
+            return
+        _LOGGER.warning(
+            "No activity status from %s within %.1f seconds of switching activity %s, refreshing activity list",
+            self.mac,
+            ACTIVITY_CONFIRM_TIMEOUT,
+            self._pending_activity["activity_id"],
+        )
+        self.activity_control_stats["timed_out"] += 1
+        self._rollback_pending_activity()
+        self.hass.async_create_task(self.async_request_basic_data())
 
-        # Send MQTT request
-        await self.api_client.async_request_assigned_keys(activity_id)
-        _LOGGER.debug("Sent MQTT request for assigned_keys, activity %s", activity_id)
+    @callback
+    def _rollback_pending_activity(self) -> None:
+        """Restore the activity states from before the pending switch."""
+        previous = self._pending_activity["previous"]
+        self._clear_pending_activity()
+        self._publish_activities(restore_activities(self.data, previous))
 
-    async def async_request_macro_keys(self, activity_id: int) -> None:
-        """Request macro_keys separately (on-demand loading).
+    @callback
+    def _clear_pending_activity(self) -> None:
+        """Forget the pending activity switch."""
+        if self._pending_activity is not None:
+            self._pending_activity["timer"].cancel()
+            self._pending_activity["unexpect"]()
+            self._pending_activity = None
+
+    @callback
+    def _publish_activities(self, data: dict[str, Any]) -> None:
+        """Publish a snapshot, persisting the activity list if it changed.
 
         Args:
-            activity_id: Activity ID to request keys for
+            data: New snapshot
         """
-        _LOGGER.info("Backend: Requesting macro_keys for activity %s", activity_id)
+        if data["activities"] is not self.data["activities"]:
+            self.snapshot.async_schedule_save()
+        self.async_set_updated_data(data)
+
+    # Request activity key data (on-demand loading, stale-while-revalidate)
+    async def async_request_keys(self, kind: str, activity_id: int) -> list[Any] | None:
+        """Request a key catalog for an activity (on-demand loading).
 
-        # Set flag to prevent activity_list updates from overwriting key data
-        self._is_requesting_keys = True
-        _LOGGER.debug("Set _is_requesting_keys flag to prevent activity_list interference")
+        A cached catalog is published immediately. Fresh cache entries need no
+        Hub round trip; stale ones are revalidated in the background. Without a
+        cache entry the Hub is asked and the call waits for its answer.
+
+        Args:
+            kind: Key catalog kind (assigned, macros or favorites)
+            activity_id: Activity ID to request keys for
+
+        Returns:
+            The catalog, or None if the Hub did not answer. Read it from here
+            rather than from self.data, which only keeps the activity
+            requested last.
+        """
+        _LOGGER.info("Backend: Requesting %s keys for activity %s", kind, activity_id)
 
         # Ensure data structure is initialized
         self._ensure_data_initialized()
 
-        # Clear all macro_keys (only keep data for the activity being requested)
-        if self.data["keys"]["macros"]:
-            _LOGGER.debug("Clearing all macro_keys (had %d activities)", len(self.data["keys"]["macros"]))
-        self.data["keys"]["macros"] = {}
+        cached = self.key_cache.get(activity_id, kind)
+        if cached is None:
+            # The key list handler publishes the catalog when it arrives
+            return await self._async_fetch_keys(kind, activity_id)
 
-        # Send MQTT request
-        await self.api_client.async_request_macro_keys(activity_id)
-        _LOGGER.debug("Sent MQTT request for macro_keys, activity %s", activity_id)
+        keys, fresh = cached
+        _LOGGER.debug(
+            "Serving cached %s keys for activity %s (%s)",
+            kind,
+            activity_id,
+            "fresh" if fresh else "stale, revalidating",
+        )
+        # Only keep data for the activity being requested
+        self.async_set_updated_data(replace_keys(self.data, kind, {activity_id: keys}))
 
-    async def async_request_favorite_keys(self, activity_id: int) -> None:
-        """Request favorite_keys separately (on-demand loading).
+        if not fresh:
+            self.hass.async_create_background_task(
+                self._async_fetch_keys(kind, activity_id),
+                name=f"{DOMAIN} revalidate {kind} keys {activity_id}",
+            )
+        return keys
+
+    @callback
+    def async_add_key_viewer(self, activity_id: int) -> CALLBACK_TYPE:
+        """Register a card showing the key lists of an activity.
+
+        When the last viewer of an activity goes away, its key list requests
+        that are still queued behind more urgent commands are withdrawn.
 
         Args:
+            activity_id: Activity whose key lists are shown
+
+        Returns:
+            Callback removing the viewer
+        """
+        self._key_viewers[activity_id] = self._key_viewers.get(activity_id, 0) + 1
+
+        @callback
+        def remove_viewer() -> None:
+            """Remove the viewer and withdraw requests nobody waits for."""
+            remaining = self._key_viewers.pop(activity_id, 1) - 1
+            if remaining:
+                self._key_viewers[activity_id] = remaining
+            else:
+                self.api_client.cancel_key_requests(activity_id)
+
+        return remove_viewer
+
+    async def _async_fetch_keys(self, kind: str, activity_id: int) -> list[Any] | None:
+        """Ask the Hub for a key catalog and wait for its answer.
+
+        The response itself is applied by the key list message handlers.
+
+        Args:
+            kind: Key catalog kind
             activity_id: Activity ID to request keys for
+
+        Returns:
+            The catalog the handlers stored, or None if the Hub did not answer
+            or the request could not be sent
         """
-        _LOGGER.info("Backend: Requesting favorite_keys for activity %s", activity_id)
+        try:
+            await self.api_client.async_request_keys(kind, activity_id)
+        except asyncio.TimeoutError:
+            _LOGGER.warning("Timed out waiting for %s keys of activity %s", kind, activity_id)
+            return None
+        except CommandCancelled:
+            _LOGGER.debug("Request for %s keys of activity %s withdrawn", kind, activity_id)
+            return None
+        except HomeAssistantError as err:
+            # MQTT or the direct broker connection is down
+            _LOGGER.warning("Could not request %s keys of activity %s: %s", kind, activity_id, err)
+            return None
+        _LOGGER.debug("Received MQTT response for %s keys, activity %s", kind, activity_id)
+        cached = self.key_cache.get(activity_id, kind)
+        return cached[0] if cached is not None else None
 
-        # Set flag to prevent activity_list updates from overwriting key data
-        self._is_requesting_keys = True
-        _LOGGER.debug("Set _is_requesting_keys flag to prevent activity_list interference")
+    async def async_request_assigned_keys(self, activity_id: int) -> None:
+        """Request assigned_keys separately (on-demand loading).
 
-        # Ensure data structure is initialized
-        self._ensure_data_initialized()
+        Args:
+            activity_id: Activity ID to request keys for
+        """
+        await self.async_request_keys(KEY_KIND_ASSIGNED, activity_id)
+
+    async def async_request_macro_keys(self, activity_id: int) -> None:
+        """Request macro_keys separately (on-demand loading).
+
+        Args:
+            activity_id: Activity ID to request keys for
+        """
+        await self.async_request_keys(KEY_KIND_MACROS, activity_id)
 
-        # Clear all favorite_keys (only keep data for the activity being requested)
-        if self.data["keys"]["favorites"]:
-            _LOGGER.debug("Clearing all favorite_keys (had %d activities)", len(self.data["keys"]["favorites"]))
-        self.data["keys"]["favorites"] = {}
+    async def async_request_favorite_keys(self, activity_id: int) -> None:
+        """Request favorite_keys separately (on-demand loading).
 
-        # Send MQTT request
-        await self.api_client.async_request_favorite_keys(activity_id)
-        _LOGGER.debug("Sent MQTT request for favorite_keys, activity %s", activity_id)
+        Args:
+            activity_id: Activity ID to request keys for
+        """
+        await self.async_request_keys(KEY_KIND_FAVORITES, activity_id)
 
     def _handle_request_timeout(self, activity_id: int) -> None:
         """Handle request timeout.
@@ -371,11 +592,6 @@ class SofabatonHubDataUpdateCoordinator(DataUpdateCoordinator):
                 pass
             del self._request_timeouts[activity_id]
 
-        # Clear key request flag to allow activity_list updates
-        if hasattr(self, "_is_requesting_keys"):
-            self._is_requesting_keys = False
-            _LOGGER.debug("Cleared _is_requesting_keys flag, activity_list updates allowed")
-
     async def _request_next_step(self, activity_id: int) -> None:
         """Execute next request step.
 
@@ -449,39 +665,6 @@ class SofabatonHubDataUpdateCoordinator(DataUpdateCoordinator):
             _LOGGER.error("Unknown completed step: %s", completed_step)
             self._cleanup_sequential_request(activity_id)
 
-    # Message deduplication check
-    def _is_duplicate_message(self, topic: str, payload: dict) -> bool:
-        """Check if message is a duplicate.
-
-        Args:
-            topic: MQTT topic
-            payload: Message payload
-
-        Returns:
-            True if message is a duplicate, False otherwise
-        """
-        # Generate unique message identifier
-        message_id = f"{topic}:{hash(str(payload))}"
-        current_time = time.time()
-
-        # Clean up expired message records
-        expired_keys = [
-            key
-            for key, timestamp in self._processed_messages.items()
-            if current_time - timestamp > self._message_cache_duration
-        ]
-        for key in expired_keys:
-            del self._processed_messages[key]
-
-        # Check if message is duplicate
-        if message_id in self._processed_messages:
-            _LOGGER.debug("Duplicate message detected for topic %s, ignoring", topic)
-            return True
-
-        # Record new message
-        self._processed_messages[message_id] = current_time
-        return False
-
     # Batch update debouncing
     @callback
     def _schedule_debounced_update(self, update_type: str) -> None:
@@ -511,54 +694,45 @@ class SofabatonHubDataUpdateCoordinator(DataUpdateCoordinator):
             self.async_set_updated_data(self.data)
 
     @callback
-    def _handle_mqtt_message(self, topic: str, payload: dict) -> None:
+    def _handle_mqtt_message(self, topic: str, message: Any) -> None:
         """Handle MQTT message received from API client.
 
+        Duplicates and malformed payloads are dropped by the API client, which
+        passes a parsed record (see messages.py).
+
         Args:
             topic: MQTT topic
-            payload: Message payload
+            message: Parsed message record
         """
-        try:
-            # Message deduplication check
-            if self._is_duplicate_message(topic, payload):
-                return
-
-            _LOGGER.debug("Processing unique message on topic '%s'", topic)
-
-            # Validate payload
-            if not isinstance(payload, dict):
-                _LOGGER.warning("Invalid payload format for topic %s: %s", topic, payload)
-                return
-
-        except Exception as err:  # pylint: disable=broad-except
-            _LOGGER.error("Error in MQTT message handling: %s", err)
-            return
-
-        # Dispatch to different handler functions based on topic
-        topic_map = {
-            self._get_topic(TOPIC_ACTIVITY_LIST_RESPONSE): ("activity_list", self._handle_activity_list, False),  # Immediate update to avoid overwriting key data
-            self._get_topic(TOPIC_ACTIVITY_CONTROL_UP): ("activity_status", self._handle_activity_status, False),  # Immediate update for real-time activity status
-            # DEVICE_DISABLED: Device functionality temporarily disabled
-            # Uncomment below when re-enabling device support
-            # self._get_topic(TOPIC_DEVICE_LIST_RESPONSE): ("device_list", self._handle_device_list, True),  # Use debounce
-            self._get_topic(TOPIC_ACTIVITY_KEYS_LIST): ("assigned_keys", self._handle_assigned_keys, False),  # Immediate update, no debounce
-            self._get_topic(TOPIC_ACTIVITY_MACRO_LIST): ("macro_keys", self._handle_macro_keys, False),  # Immediate update, no debounce
-            self._get_topic(TOPIC_ACTIVITY_FAVORITES_LIST): ("favorite_keys", self._handle_favorite_keys, False),  # Immediate update, no debounce
-            # DEVICE_DISABLED: Device functionality temporarily disabled
-            # Uncomment below when re-enabling device support
-            # self._get_topic(TOPIC_DEVICE_KEYS_LIST): ("device_keys", self._handle_device_keys, False),  # Immediate update, no debounce
-        }
-
-        handler_info = topic_map.get(topic)
-        if handler_info:
-            update_type, handler, use_debounce = handler_info
-            handler(payload)
+        # Dispatch to the handler compiled for this topic
+        route = self._routes.get(topic)
+        if route:
+            update_type, handler, use_debounce = route
+            handler(message)
             # Only use debounce update mechanism for messages that need it
             if use_debounce:
                 self._schedule_debounced_update(update_type)
         else:
             _LOGGER.warning("Unhandled MQTT topic: %s", topic)
 
+    @callback
+    def register_topic(
+        self,
+        topic_template: str,
+        update_type: str,
+        handler: Callable[[Any], None],
+        use_debounce: bool = False,
+    ) -> None:
+        """Register a handler for an inbound topic.
+
+        Args:
+            topic_template: Topic template with {mac} placeholder
+            update_type: Update type used for debounced updates and logging
+            handler: Function called with the parsed message record
+            use_debounce: Batch the entity update instead of updating at once
+        """
+        self._routes[self._get_topic(topic_template)] = (update_type, handler, use_debounce)
+
     def _get_topic(self, topic_template: str) -> str:
         """Generate complete topic from template.
 
@@ -572,122 +746,94 @@ class SofabatonHubDataUpdateCoordinator(DataUpdateCoordinator):
 
     # --- Message handler functions ---
 
-    def _handle_activity_list(self, payload: dict) -> None:
+    def _handle_activity_list(self, message: ActivityList) -> None:
         """Handle Activity list response.
 
         Args:
-            payload: MQTT message payload
+            message: Parsed activity list
         """
-        activities = payload.get("data", [])
+        activities = message.activities
         _LOGGER.info("Received activity list for %s: %d activities", self.mac, len(activities))
-        _LOGGER.debug("Raw activity list data: %s", activities)
 
         # Ensure self.data is initialized
         self._ensure_data_initialized()
 
-        # Check if key request is in progress
-        # If yes, we need to be careful not to clear keys data
-        is_requesting_keys = hasattr(self, "_is_requesting_keys") and self._is_requesting_keys
-
-        if is_requesting_keys:
-            _LOGGER.info("Keys request in progress, updating activities without clearing keys data")
-            # Preserve existing keys data
-            existing_keys = copy.deepcopy(self.data["keys"])
-
-        self.data["activities"].clear()  # Clear old data
-
-        # Reset current_activity_id, will be set if any activity is on
-        self.data["current_activity_id"] = None
-
-        for activity in activities:
-            activity_id = activity.get("activity_id")
-            if activity_id is not None:
-                self.data["activities"][activity_id] = {
-                    "id": activity_id,
-                    "name": activity.get("activity_name"),
-                    "state": activity.get("state", "off"),
-                }
-                # If this activity is on, update current activity ID
-                if activity.get("state") == "on":
-                    self.data["current_activity_id"] = activity_id
-        _LOGGER.debug("Updated activities: %s", self.data["activities"])
-        _LOGGER.debug("Current activity ID: %s", self.data["current_activity_id"])
+        # Key catalogs are shared with the previous snapshot, so a key request
+        # in progress cannot be overwritten by the activity list
+        data = apply_activity_list(self.data, activities)
+        _LOGGER.debug("Updated activities: %s", data["activities"])
+        _LOGGER.debug("Current activity ID: %s", data["current_activity_id"])
+
+        # The full list is authoritative and settles a pending activity switch
+        self._clear_pending_activity()
 
         # Trigger next step of basic data sequential request
         self._advance_basic_data_request("activity_list")
-
-        # If key request is in progress, restore keys data before updating state
-        if is_requesting_keys:
-            _LOGGER.info("Restoring keys data after activity_list update")
-            self.data["keys"] = existing_keys
+        # Release first refresh
+        self._activity_list_received.set()
 
         # Always update Home Assistant state to ensure frontend receives activity changes
         # Even if keys request is in progress, we need to update activity states
-        data_copy = copy.deepcopy(self.data)
         _LOGGER.info("Sending data update to Home Assistant (activity_list)")
         _LOGGER.debug(
             "Data snapshot: activities=%d, assigned_keys=%s, macro_keys=%s, favorite_keys=%s",
-            len(data_copy["activities"]),
-            list(data_copy["keys"]["assigned"].keys()),
-            list(data_copy["keys"]["macros"].keys()),
-            list(data_copy["keys"]["favorites"].keys()),
+            len(data["activities"]),
+            list(data["keys"]["assigned"].keys()),
+            list(data["keys"]["macros"].keys()),
+            list(data["keys"]["favorites"].keys()),
         )
-        self.async_set_updated_data(data_copy)
+        self._publish_activities(data)
 
-    def _handle_activity_status(self, payload: dict) -> None:
+    def _handle_activity_status(self, message: ActivityStatus) -> None:
         """Handle Activity status update.
 
         Args:
-            payload: MQTT message payload
+            message: Parsed activity status
         """
-        activity_id = payload.get("activity_id")
-        state = payload.get("state")
+        activity_id = message.activity_id
+        state = message.state
 
         _LOGGER.info(
-            "Received activity status update for %s: activity_id=%s, state=%s, full_payload=%s",
+            "Received activity status update for %s: activity_id=%s, state=%s",
             self.mac,
             activity_id,
             state,
-            payload,
         )
 
         # Ensure self.data is initialized
         self._ensure_data_initialized()
 
         # Handle Activity status according to MCU return rules
-        if activity_id == 0xFF or activity_id == 255:
+        if activity_id == ACTIVITY_ID_ALL_OFF:
             # ID 255 means close all activities (off button pressed)
             _LOGGER.info("Received close all activities command (activity_id=255)")
-            self.data["current_activity_id"] = None
-            for act_id in self.data["activities"]:
-                self.data["activities"][act_id]["state"] = "off"
         elif activity_id is not None and state == "on":
             # Switch activity: close others, open specified one
             _LOGGER.info("Switching to activity %s, closing all others", activity_id)
-            # Close all other activities
-            for act_id in self.data["activities"]:
-                self.data["activities"][act_id]["state"] = "off"
-            # Open specified activity
-            if activity_id in self.data["activities"]:
-                self.data["activities"][activity_id]["state"] = "on"
-                self.data["current_activity_id"] = activity_id
-            else:
+            if activity_id not in self.data["activities"]:
                 _LOGGER.warning("Received unknown activity_id: %s", activity_id)
         elif activity_id is not None and state == "off":
             # Individual activity closed (rare case)
             _LOGGER.info("Individual activity %s turned off", activity_id)
-            if activity_id in self.data["activities"]:
-                self.data["activities"][activity_id]["state"] = "off"
-                # If closing current activity, clear current_activity_id
-                if self.data["current_activity_id"] == activity_id:
-                    self.data["current_activity_id"] = None
         else:
             _LOGGER.warning("Unhandled activity status: activity_id=%s, state=%s", activity_id, state)
 
+        data = apply_activity_status(self.data, activity_id, state)
+
+        # Settle a pending optimistic switch: a push that changes nothing
+        # confirms it, anything else is applied and the list is re-requested
+        if self._pending_activity is not None:
+            self._clear_pending_activity()
+            if data is self.data:
+                self.activity_control_stats["confirmed"] += 1
+            else:
+                self.activity_control_stats["mismatched"] += 1
+                _LOGGER.info("Activity status from %s differs from the expected state, refreshing activity list", self.mac)
+                self.hass.async_create_task(self.async_request_basic_data())
+
         # Immediately update Home Assistant state to ensure frontend receives activity status changes in real-time
-        data_copy = copy.deepcopy(self.data)
         _LOGGER.info("Sending data update to Home Assistant (activity_status)")
-        self.async_set_updated_data(data_copy)
+        self._publish_activities(data)
 
     # DEVICE_DISABLED: Device functionality temporarily disabled
     # Uncomment below when re-enabling device support
@@ -700,104 +846,96 @@ class SofabatonHubDataUpdateCoordinator(DataUpdateCoordinator):
         # Ensure self.data is initialized
         self._ensure_data_initialized()
 
-        self.data["devices"].clear()
-        for device in devices:
-            device_id = device.get("device_id")
-            if device_id is not None:
-                self.data["devices"][device_id] = {
-                    "id": device_id,
-                    "name": device.get("device_name"),
-                }
+        # Copy-on-write: replace the devices subtree instead of mutating it
+        self.data = {
+            **self.data,
+            "devices": {
+                device["device_id"]: {"id": device["device_id"], "name": device.get("device_name")}
+                for device in devices
+                if device.get("device_id") is not None
+            },
+        }
         _LOGGER.debug("Updated devices: %s", self.data["devices"])
 
         # Trigger next step of basic data sequential request (device_list is last step)
         self._advance_basic_data_request("device_list")
     """
 
-    def _handle_assigned_keys(self, payload: dict) -> None:
+    def _handle_assigned_keys(self, message: KeyList) -> None:
         """Handle assigned keys list.
 
         Args:
-            payload: MQTT message payload
+            message: Parsed key list
         """
         _LOGGER.info("Received assigned_keys response from MQTT")
-        _LOGGER.debug("Payload: %s", payload)
 
-        activity_id = payload.get("activity_id")
-        keys = payload.get("data", [])
+        activity_id = message.activity_id
+        keys = message.keys
 
         # Ensure self.data is initialized
         self._ensure_data_initialized()
 
         if activity_id is not None:
-            self.data["keys"]["assigned"][activity_id] = [key.get("key_id") for key in keys]
-            _LOGGER.info("Updated assigned keys for activity %s: %d keys", activity_id, len(self.data["keys"]["assigned"][activity_id]))
+            assigned_keys = [key.key_id for key in keys]
+            self.key_cache.set(activity_id, KEY_KIND_ASSIGNED, assigned_keys)
+            _LOGGER.info("Updated assigned keys for activity %s: %d keys", activity_id, len(assigned_keys))
 
             # Immediately update Home Assistant state
-            data_copy = copy.deepcopy(self.data)
             _LOGGER.debug("Sending data update to Home Assistant (assigned_keys)")
-            self.async_set_updated_data(data_copy)
+            self.async_set_updated_data(
+                apply_keys(self.data, KEY_KIND_ASSIGNED, activity_id, assigned_keys)
+            )
 
-    def _handle_macro_keys(self, payload: dict) -> None:
+    def _handle_macro_keys(self, message: KeyList) -> None:
         """Handle macro command list.
 
         Args:
-            payload: MQTT message payload
+            message: Parsed key list
         """
         _LOGGER.info("Received macro_keys response from MQTT")
-        _LOGGER.debug("Payload: %s", payload)
 
-        activity_id = payload.get("activity_id")
-        keys = payload.get("data", [])
+        activity_id = message.activity_id
+        keys = message.keys
 
         # Ensure self.data is initialized
         self._ensure_data_initialized()
 
         if activity_id is not None:
-            self.data["keys"]["macros"][activity_id] = [
-                {"id": k.get("key_id"), "name": k.get("key_name")} for k in keys
-            ]
-            _LOGGER.info(
-                "Updated macro keys for activity %s: %d keys",
-                activity_id,
-                len(self.data["keys"]["macros"][activity_id]),
-            )
+            macro_keys = [{"id": k.key_id, "name": k.key_name} for k in keys]
+            self.key_cache.set(activity_id, KEY_KIND_MACROS, macro_keys)
+            _LOGGER.info("Updated macro keys for activity %s: %d keys", activity_id, len(macro_keys))
 
             # Immediately update Home Assistant state
-            data_copy = copy.deepcopy(self.data)
             _LOGGER.debug("Sending data update to Home Assistant (macro_keys)")
-            self.async_set_updated_data(data_copy)
+            self.async_set_updated_data(apply_keys(self.data, KEY_KIND_MACROS, activity_id, macro_keys))
 
-    def _handle_favorite_keys(self, payload: dict) -> None:
+    def _handle_favorite_keys(self, message: KeyList) -> None:
         """Handle favorite command list.
 
         Args:
-            payload: MQTT message payload
+            message: Parsed key list
         """
         _LOGGER.info("Received favorite_keys response from MQTT")
-        _LOGGER.debug("Payload: %s", payload)
 
-        activity_id = payload.get("activity_id")
-        keys = payload.get("data", [])
+        activity_id = message.activity_id
+        keys = message.keys
 
         # Ensure self.data is initialized
         self._ensure_data_initialized()
 
         if activity_id is not None:
-            self.data["keys"]["favorites"][activity_id] = [
-                {"id": k.get("key_id"), "name": k.get("key_name"), "device_id": k.get("device_id")}
+            favorite_keys = [
+                {"id": k.key_id, "name": k.key_name, "device_id": k.device_id}
                 for k in keys
             ]
-            _LOGGER.info(
-                "Updated favorite keys for activity %s: %d keys",
-                activity_id,
-                len(self.data["keys"]["favorites"][activity_id]),
-            )
+            self.key_cache.set(activity_id, KEY_KIND_FAVORITES, favorite_keys)
+            _LOGGER.info("Updated favorite keys for activity %s: %d keys", activity_id, len(favorite_keys))
 
             # Immediately update Home Assistant state
-            data_copy = copy.deepcopy(self.data)
             _LOGGER.debug("Sending data update to Home Assistant (favorite_keys)")
-            self.async_set_updated_data(data_copy)
+            self.async_set_updated_data(
+                apply_keys(self.data, KEY_KIND_FAVORITES, activity_id, favorite_keys)
+            )
 
     # DEVICE_DISABLED: Device functionality temporarily disabled
     # Uncomment below when re-enabling device support
@@ -811,8 +949,11 @@ class SofabatonHubDataUpdateCoordinator(DataUpdateCoordinator):
         self._ensure_data_initialized()
 
         if device_id is not None:
-            self.data["keys"]["device_keys"][device_id] = [
-                {"id": k.get("key_id"), "name": k.get("key_name")} for k in keys
-            ]
+            self.data = apply_keys(
+                self.data,
+                "device_keys",
+                device_id,
+                [{"id": k.get("key_id"), "name": k.get("key_name")} for k in keys],
+            )
             _LOGGER.debug("Updated keys for device %s", device_id)
     """
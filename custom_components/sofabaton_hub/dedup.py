@@ -0,0 +1,95 @@
+"""Duplicate MQTT message detection for Sofabaton Hub."""
+from __future__ import annotations
+
+from collections import deque
+import time
+from typing import Any
+
+
+class MessageDeduplicator:
+    """Detect repeated messages within a time window.
+
+    Messages are identified by topic and a hash of the raw payload bytes, so
+    no decoding or re-serialization is needed. Entries are kept in a deque in
+    arrival order next to a dict for O(1) lookups; expiry pops from the left
+    of the deque, which is amortized O(1) per message. The number of tracked
+    messages is capped, evicting the oldest entries first.
+    """
+
+    def __init__(self, window: float, max_entries: int) -> None:
+        """Initialize the deduplicator.
+
+        Args:
+            window: Seconds a message is remembered
+            max_entries: Maximum number of messages remembered
+        """
+        self.window = window
+        self.max_entries = max_entries
+        self._order: deque[tuple[float, tuple[str, int]]] = deque()
+        self._seen: dict[tuple[str, int], float] = {}
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        """Return number of remembered messages."""
+        return len(self._seen)
+
+    def is_duplicate(self, topic: str, payload: bytes | str, now: float | None = None) -> bool:
+        """Check a message and remember it if it is new.
+
+        Args:
+            topic: MQTT topic
+            payload: Raw message payload
+            now: Current monotonic time (defaults to time.monotonic())
+
+        Returns:
+            True if the same message was seen within the window
+        """
+        if now is None:
+            now = time.monotonic()
+        self._expire(now)
+
+        key = (topic, hash(payload))
+        if key in self._seen:
+            self.hits += 1
+            return True
+
+        self.misses += 1
+        self._seen[key] = now
+        self._order.append((now, key))
+
+        while len(self._seen) > self.max_entries:
+            _, oldest = self._order.popleft()
+            del self._seen[oldest]
+            self.evictions += 1
+
+        return False
+
+    def _expire(self, now: float) -> None:
+        """Forget messages older than the window.
+
+        Args:
+            now: Current monotonic time
+        """
+        cutoff = now - self.window
+        order = self._order
+        while order and order[0][0] <= cutoff:
+            _, key = order.popleft()
+            del self._seen[key]
+            self.expired += 1
+
+    def stats(self) -> dict[str, Any]:
+        """Return deduplication counters for diagnostics."""
+        return {
+            "tracked": len(self._seen),
+            "window": self.window,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,118 @@
+"""Shared MQTT subscription for all Sofabaton Hubs on the broker."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Callable
+
+from homeassistant.components import mqtt
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from .const import DATA_DEMUX, TOPIC_SHARED_SUBSCRIPTION
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_get_demultiplexer(hass: HomeAssistant) -> TopicDemultiplexer:
+    """Return the domain-wide demultiplexer, subscribing on first use.
+
+    Args:
+        hass: Home Assistant instance
+
+    Returns:
+        Shared demultiplexer instance
+    """
+    demux: TopicDemultiplexer | None = hass.data.get(DATA_DEMUX)
+    if demux is None:
+        demux = hass.data[DATA_DEMUX] = TopicDemultiplexer(hass)
+    await demux.async_start()
+    return demux
+
+
+class TopicDemultiplexer:
+    """Route messages of one wildcard subscription to the owning Hub.
+
+    Instead of every Hub subscribing to each of its topics, a single
+    ``activity/+/+`` subscription is made for the domain. Each Hub registers
+    the concrete topics it handles; messages are routed with one dict lookup
+    on the topic. Topics nobody registered (including our own outbound
+    requests, which match the wildcard too) are dropped without decoding.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the demultiplexer.
+
+        Args:
+            hass: Home Assistant instance
+        """
+        self.hass = hass
+        self._routes: dict[str, Callable[[mqtt.ReceiveMessage], None]] = {}
+        self._unsubscribe: CALLBACK_TYPE | None = None
+        # Hubs set up concurrently must not subscribe twice
+        self._subscribe_lock = asyncio.Lock()
+
+        # Statistics
+        self.routed = 0
+        self.dropped = 0
+
+    async def async_start(self) -> None:
+        """Subscribe to the shared wildcard topic if not subscribed yet."""
+        async with self._subscribe_lock:
+            if self._unsubscribe is None:
+                _LOGGER.info("Subscribing to shared topic: %s", TOPIC_SHARED_SUBSCRIPTION)
+                # Raw bytes: unrouted topics and dropped duplicates are never decoded
+                self._unsubscribe = await mqtt.async_subscribe(
+                    self.hass, TOPIC_SHARED_SUBSCRIPTION, self._message_received, encoding=None
+                )
+
+    @callback
+    def register(
+        self, topics: list[str], message_callback: Callable[[mqtt.ReceiveMessage], None]
+    ) -> CALLBACK_TYPE:
+        """Route messages on the given topics to a Hub.
+
+        Args:
+            topics: Concrete topics handled by the Hub
+            message_callback: Callback receiving the raw MQTT message
+
+        Returns:
+            Callback that removes the routes again
+        """
+        for topic in topics:
+            self._routes[topic] = message_callback
+
+        @callback
+        def unregister() -> None:
+            """Remove the Hub's routes and unsubscribe once no Hub is left."""
+            for topic in topics:
+                if self._routes.get(topic) is message_callback:
+                    del self._routes[topic]
+            if not self._routes and self._unsubscribe is not None:
+                _LOGGER.info("Unsubscribing from shared topic: %s", TOPIC_SHARED_SUBSCRIPTION)
+                self._unsubscribe()
+                self._unsubscribe = None
+                self.hass.data.pop(DATA_DEMUX, None)
+
+        return unregister
+
+    @callback
+    def _message_received(self, msg: mqtt.ReceiveMessage) -> None:
+        """Dispatch a message to the Hub that registered its topic.
+
+        Args:
+            msg: MQTT message object
+        """
+        message_callback = self._routes.get(msg.topic)
+        if message_callback is None:
+            self.dropped += 1
+            return
+        self.routed += 1
+        message_callback(msg)
+
+    def stats(self) -> dict[str, int]:
+        """Return routing counters for diagnostics."""
+        return {
+            "topics": len(self._routes),
+            "routed": self.routed,
+            "dropped": self.dropped,
+        }
@@ -5,9 +5,18 @@ from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.json import json_bytes
 
-from .const import DOMAIN
+from .const import (
+    CONF_ATTRIBUTE_SIZE_BUDGET,
+    DATA_DEMUX,
+    DEFAULT_ATTRIBUTE_SIZE_BUDGET,
+    DOMAIN,
+)
+from .commands import command_cache_info
 from .coordinator import SofabatonHubDataUpdateCoordinator
+from .messages import JSON_BACKEND
 
 
 async def async_get_config_entry_diagnostics(
@@ -22,7 +31,7 @@ async def async_get_config_entry_diagnostics(
     Returns:
         Dictionary containing diagnostic information with sensitive data redacted
     """
-    coordinator: SofabatonHubDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    coordinator: SofabatonHubDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
     
     # Get coordinator data
     data = coordinator.data or {}
@@ -32,7 +41,27 @@ async def async_get_config_entry_diagnostics(
         "config_entry": _get_config_entry_diagnostics(entry),
         "coordinator_data": _get_coordinator_data_diagnostics(data),
         "coordinator_state": _get_coordinator_state_diagnostics(coordinator),
+        "command_pipeline": coordinator.api_client.pipeline.stats(),
+        "request_retransmission": coordinator.api_client.retransmitter.stats(),
+        "publish_qos": {
+            f"qos_{qos}": count for qos, count in sorted(coordinator.api_client.publish_qos_counts.items())
+        },
+        "key_press_latency": coordinator.api_client.key_press_latency.as_dict(),
+        "key_repeat": coordinator.api_client.repeater.stats(),
+        "command_cache": command_cache_info(),
+        "message_dedup": coordinator.api_client.deduplicator.stats(),
+        "json_backend": JSON_BACKEND,
+        "key_cache": coordinator.key_cache.stats(),
+        "entity_attributes": _get_entity_attributes_diagnostics(hass, entry),
     }
+
+    # Shared subscription routing (only present when a Hub uses it)
+    if (demux := hass.data.get(DATA_DEMUX)) is not None:
+        diagnostics_data["shared_subscription"] = demux.stats()
+
+    # Direct broker connection (only present in direct connection mode)
+    if (broker := coordinator.api_client.broker) is not None:
+        diagnostics_data["direct_connection"] = broker.stats()
     
     return diagnostics_data
 
@@ -58,6 +87,27 @@ def _get_config_entry_diagnostics(entry: ConfigEntry) -> dict[str, Any]:
         "has_password": bool(entry.data.get("password")),
         "unique_id": entry.unique_id,
         "entry_id": entry.entry_id,
+        "options": dict(entry.options),
+    }
+
+
+def _get_entity_attributes_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Get serialized state attribute sizes of the entry's entities.
+
+    Args:
+        hass: Home Assistant instance
+        entry: Config entry
+
+    Returns:
+        Dictionary containing the attribute size budget and sizes in bytes
+    """
+    sizes = {}
+    for entity in er.async_entries_for_config_entry(er.async_get(hass), entry.entry_id):
+        if (state := hass.states.get(entity.entity_id)) is not None:
+            sizes[entity.entity_id] = len(json_bytes(state.attributes))
+    return {
+        "budget": entry.options.get(CONF_ATTRIBUTE_SIZE_BUDGET, DEFAULT_ATTRIBUTE_SIZE_BUDGET),
+        "sizes": sizes,
     }
 
 
@@ -158,18 +208,21 @@ def _get_coordinator_state_diagnostics(
             if coordinator.update_interval
             else None
         ),
+        # Setup timing
+        "restored_from_snapshot": coordinator.restored_from_snapshot,
+        "ready_after": coordinator.ready_after,
+        "first_refresh_timed_out": coordinator.first_refresh_timed_out,
+        # Optimistic activity switches: confirmed by the Hub's status push,
+        # contradicted by it, rolled back after the timeout or failed to send
+        "activity_control": coordinator.activity_control_stats,
         # Request state information
         "has_basic_data_request": bool(
             getattr(coordinator, "_basic_data_request_state", None)
         ),
-        "is_requesting_keys": getattr(coordinator, "_is_requesting_keys", False),
         "sequential_requests_count": len(
             getattr(coordinator, "_sequential_requests", {})
         ),
         # Message processing statistics
-        "processed_messages_count": len(
-            getattr(coordinator, "_processed_messages", {})
-        ),
         "pending_updates_count": len(getattr(coordinator, "_pending_updates", set())),
     }
 
@@ -0,0 +1,177 @@
+"""Decoding of inbound Sofabaton Hub MQTT messages.
+
+Payloads are decoded with orjson when it is installed (it ships with Home
+Assistant) and with the standard library otherwise. Known message shapes
+are parsed into compact, immutable records so handlers work with typed
+fields instead of probing nested dictionaries.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+import json
+from typing import Any, Callable
+
+from .const import (
+    TOPIC_ACTIVITY_CONTROL_UP,
+    TOPIC_ACTIVITY_FAVORITES_LIST,
+    TOPIC_ACTIVITY_KEYS_LIST,
+    TOPIC_ACTIVITY_LIST_RESPONSE,
+    TOPIC_ACTIVITY_MACRO_LIST,
+)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is a Home Assistant core requirement
+    orjson = None
+
+# Decoding errors of both backends are ValueError subclasses
+json_loads: Callable[[bytes | str], Any] = orjson.loads if orjson else json.loads
+JSON_BACKEND = "orjson" if orjson else "json"
+
+
+@dataclass(frozen=True, slots=True)
+class ActivityInfo:
+    """One entry of the activity list."""
+
+    activity_id: int
+    name: str | None
+    state: str
+
+
+@dataclass(frozen=True, slots=True)
+class ActivityList:
+    """Activity list response."""
+
+    activities: tuple[ActivityInfo, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class ActivityStatus:
+    """Activity status push (activity_control_up)."""
+
+    activity_id: int | None
+    state: str | None
+
+
+@dataclass(frozen=True, slots=True)
+class KeyInfo:
+    """One entry of a key list."""
+
+    key_id: int | None
+    key_name: str | None = None
+    device_id: int | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class KeyList:
+    """Key list response (assigned keys, macros or favorites)."""
+
+    activity_id: int | None
+    keys: tuple[KeyInfo, ...]
+
+
+def _as_object(payload: Any) -> dict[str, Any]:
+    """Return payload if it is a JSON object.
+
+    Args:
+        payload: Decoded JSON value
+
+    Returns:
+        The payload
+
+    Raises:
+        ValueError: If the payload is not a JSON object
+    """
+    if not isinstance(payload, dict):
+        raise ValueError(f"Expected JSON object, got {type(payload).__name__}")
+    return payload
+
+
+def parse_activity_list(payload: Any) -> ActivityList:
+    """Parse an activity list response.
+
+    Entries without an activity ID are skipped.
+
+    Args:
+        payload: Decoded JSON payload
+
+    Returns:
+        Parsed activity list
+    """
+    return ActivityList(
+        tuple(
+            ActivityInfo(item["activity_id"], item.get("activity_name"), item.get("state", "off"))
+            for item in _as_object(payload).get("data") or ()
+            if item.get("activity_id") is not None
+        )
+    )
+
+
+def parse_activity_status(payload: Any) -> ActivityStatus:
+    """Parse an activity status push.
+
+    Args:
+        payload: Decoded JSON payload
+
+    Returns:
+        Parsed activity status
+    """
+    payload = _as_object(payload)
+    return ActivityStatus(payload.get("activity_id"), payload.get("state"))
+
+
+def parse_key_list(payload: Any) -> KeyList:
+    """Parse a key list response.
+
+    Args:
+        payload: Decoded JSON payload
+
+    Returns:
+        Parsed key list
+    """
+    payload = _as_object(payload)
+    return KeyList(
+        payload.get("activity_id"),
+        tuple(
+            KeyInfo(item.get("key_id"), item.get("key_name"), item.get("device_id"))
+            for item in payload.get("data") or ()
+        ),
+    )
+
+
+# Inbound topic template -> parser
+# Messages on topics without a parser are dropped before decoding
+MESSAGE_PARSERS: dict[str, Callable[[Any], Any]] = {
+    TOPIC_ACTIVITY_LIST_RESPONSE: parse_activity_list,
+    TOPIC_ACTIVITY_CONTROL_UP: parse_activity_status,
+    TOPIC_ACTIVITY_KEYS_LIST: parse_key_list,
+    TOPIC_ACTIVITY_MACRO_LIST: parse_key_list,
+    TOPIC_ACTIVITY_FAVORITES_LIST: parse_key_list,
+    # DEVICE_DISABLED: Device functionality temporarily disabled
+    # Uncomment below when re-enabling device support (and add parsers)
+    # TOPIC_DEVICE_LIST_RESPONSE: parse_device_list,
+    # TOPIC_DEVICE_KEYS_LIST: parse_device_key_list,
+}
+
+
+def decode_message(topic: str, payload: bytes | str, parsers: dict[str, Callable[[Any], Any]]) -> Any:
+    """Decode and parse a message if its topic is handled.
+
+    Args:
+        topic: Concrete MQTT topic
+        payload: Raw message payload
+        parsers: Concrete topic -> parser
+
+    Returns:
+        Parsed record, or None if the topic is not handled
+
+    Raises:
+        ValueError: If the payload is not valid JSON or has an unexpected shape
+    """
+    parser = parsers.get(topic)
+    if parser is None:
+        return None
+    try:
+        return parser(json_loads(payload))
+    except (AttributeError, KeyError, TypeError) as err:
+        raise ValueError(f"Unexpected payload shape: {err}") from err
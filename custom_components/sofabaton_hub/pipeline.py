@@ -0,0 +1,739 @@
+"""Outbound command pipeline for Sofabaton Hub."""
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import AsyncIterator, Hashable
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass, field
+import logging
+import time
+from typing import Any, Awaitable, Callable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    AIMD_BACKOFF_HISTORY,
+    AIMD_DECREASE,
+    AIMD_INCREASE,
+    AIMD_INITIAL_RATE,
+    AIMD_MAX_RATE,
+    AIMD_MIN_RATE,
+    DEFAULT_COMMAND_MIN_GAPS,
+    DEFAULT_RESPONSE_PACING_TIMEOUT,
+    PRIORITY_AGING,
+    PRIORITY_KEY_PRESS,
+    RESPONSE_TIMEOUT_MAX,
+    RESPONSE_TIMEOUT_MIN,
+    RESPONSE_TRACKING_MAX,
+    RTO_INITIAL,
+    RTO_K,
+    RTO_MAX,
+    RTO_MIN,
+    RTT_ALPHA,
+    RTT_BETA,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CommandCancelled(Exception):
+    """A queued command was withdrawn before it was published."""
+
+
+@dataclass
+class OutboundCommand:
+    """A single MQTT publish waiting in the pipeline."""
+
+    topic: str
+    message: str
+    command_class: str
+    # Identifies the hub's answer (see CommandPipeline.notify_response), if any
+    response_key: Hashable | None
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+    # Monotonic time before which the command must not be published
+    not_before: float | None = None
+    # Lower values are published first
+    priority: int = PRIORITY_KEY_PRESS
+    # Groups commands that can be withdrawn together (see cancel)
+    tag: Hashable | None = None
+
+    @property
+    def due_at(self) -> float:
+        """Return the monotonic time from which the command may be published."""
+        return max(self.enqueued_at, self.not_before or 0.0)
+
+
+@dataclass
+class ChannelHold:
+    """A caller waiting in the pipeline for exclusive use of the channel."""
+
+    # Resolved when the hold is granted
+    future: asyncio.Future
+    # Resolved when the holder is done
+    released: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+    priority: int = PRIORITY_KEY_PRESS
+
+    @property
+    def due_at(self) -> float:
+        """Return the monotonic time from which the hold may be granted."""
+        return self.enqueued_at
+
+
+@dataclass(slots=True)
+class _Outstanding:
+    """A published command whose answer has not arrived yet."""
+
+    published_at: float
+    # Another command with the same response key was still unanswered when
+    # this one was published, so an answer may belong to either
+    ambiguous: bool = False
+    # The answer did not arrive within the threshold and was counted missing
+    missed: bool = False
+
+
+@dataclass
+class LatencyStats:
+    """Latency statistics for one command class (seconds)."""
+
+    count: int = 0
+    last: float = 0.0
+    total: float = 0.0
+    max: float = 0.0
+
+    def record(self, latency: float) -> None:
+        """Record one command latency.
+
+        Args:
+            latency: Time from enqueue to publish completion in seconds
+        """
+        self.count += 1
+        self.last = latency
+        self.total += latency
+        self.max = max(self.max, latency)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return statistics in milliseconds for diagnostics."""
+        return {
+            "count": self.count,
+            "last_ms": round(self.last * 1000, 1),
+            "avg_ms": round(self.total / self.count * 1000, 1) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 1),
+        }
+
+
+class RttEstimator:
+    """Estimate a hub's round-trip time and derive a timeout from it.
+
+    Follows the TCP estimator (RFC 6298): a smoothed RTT and its mean
+    deviation are updated from every unambiguous sample, and the timeout is
+    the smoothed RTT plus a multiple of the deviation, within bounds.
+    """
+
+    def __init__(
+        self,
+        initial: float = RTO_INITIAL,
+        minimum: float = RTO_MIN,
+        maximum: float = RTO_MAX,
+    ) -> None:
+        """Initialize the estimator with the initial timeout.
+
+        Args:
+            initial: Timeout in seconds before the first sample
+            minimum: Lower bound of the derived timeout in seconds
+            maximum: Upper bound of the derived timeout in seconds
+        """
+        self.srtt: float | None = None
+        self.rttvar: float | None = None
+        self.rto = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.samples = 0
+
+    def sample(self, rtt: float) -> None:
+        """Update the estimate with a measured round trip.
+
+        Args:
+            rtt: Time from publishing a request to its answer in seconds
+        """
+        self.samples += 1
+        if self.srtt is None or self.rttvar is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar += RTT_BETA * (abs(self.srtt - rtt) - self.rttvar)
+            self.srtt += RTT_ALPHA * (rtt - self.srtt)
+        self.rto = min(max(self.srtt + RTO_K * self.rttvar, self.minimum), self.maximum)
+
+    def stats(self) -> dict[str, Any]:
+        """Return the current estimate for diagnostics."""
+        return {
+            "srtt_ms": round(self.srtt * 1000, 1) if self.srtt is not None else None,
+            "rttvar_ms": round(self.rttvar * 1000, 1) if self.rttvar is not None else None,
+            "rto_ms": round(self.rto * 1000, 1),
+            "samples": self.samples,
+        }
+
+
+class AimdPacer:
+    """Learn the rate at which a hub answers commands (AIMD).
+
+    Every timely answer raises the rate additively; a missing or slow
+    answer halves it. An answer is missing or slow when it takes longer
+    than the threshold, which follows the hub's smoothed round-trip time.
+    The pipeline spaces commands the hub answers by the inverse of the rate.
+    """
+
+    def __init__(self, response_timeout: float = DEFAULT_RESPONSE_PACING_TIMEOUT) -> None:
+        """Initialize the pacer at the initial rate.
+
+        Args:
+            response_timeout: Threshold in seconds before the first answer
+        """
+        self.rate = AIMD_INITIAL_RATE
+        self.rtt = RttEstimator(response_timeout, RESPONSE_TIMEOUT_MIN, RESPONSE_TIMEOUT_MAX)
+        self.increases = 0
+        self.backoffs = 0
+        self.missing = 0
+        self.slow = 0
+        self.late = 0
+        self._backoff_events: deque[dict[str, Any]] = deque(maxlen=AIMD_BACKOFF_HISTORY)
+
+    @property
+    def gap(self) -> float:
+        """Return the learned gap in seconds before a command the hub answers."""
+        return 1.0 / self.rate
+
+    @property
+    def threshold(self) -> float:
+        """Return the time in seconds after which an answer is missing."""
+        return self.rtt.rto
+
+    def on_response(self, response_time: float) -> None:
+        """Record an answer matched to its command.
+
+        Args:
+            response_time: Time from publish to the answer in seconds
+        """
+        if response_time > self.threshold:
+            self.slow += 1
+            self._back_off("slow", response_time)
+        else:
+            self.increases += 1
+            self.rate = min(self.rate + AIMD_INCREASE, AIMD_MAX_RATE)
+        self.rtt.sample(response_time)
+
+    def on_late_response(self, response_time: float) -> None:
+        """Record an answer that arrived after it was counted missing.
+
+        The rate was already cut for it; only the RTT estimate learns.
+
+        Args:
+            response_time: Time from publish to the answer in seconds
+        """
+        self.late += 1
+        self.rtt.sample(response_time)
+
+    def on_missing(self) -> None:
+        """Record a command the hub did not answer within the threshold."""
+        self.missing += 1
+        self._back_off("missing", None)
+
+    def _back_off(self, reason: str, response_time: float | None) -> None:
+        """Cut the rate multiplicatively.
+
+        Args:
+            reason: "slow" or "missing"
+            response_time: Response time of a slow answer in seconds
+        """
+        self.backoffs += 1
+        self.rate = max(self.rate * AIMD_DECREASE, AIMD_MIN_RATE)
+        self._backoff_events.append(
+            {
+                "time": dt_util.utcnow().isoformat(),
+                "reason": reason,
+                "response_ms": round(response_time * 1000, 1) if response_time is not None else None,
+                "rate": round(self.rate, 2),
+            }
+        )
+
+    def stats(self) -> dict[str, Any]:
+        """Return the learned rate and back-off history for diagnostics."""
+        return {
+            "rate": round(self.rate, 2),
+            "gap_ms": round(self.gap * 1000, 1),
+            **self.rtt.stats(),
+            "increases": self.increases,
+            "backoffs": self.backoffs,
+            "missing": self.missing,
+            "slow": self.slow,
+            "late": self.late,
+            "recent_backoffs": list(self._backoff_events),
+        }
+
+
+class CommandPipeline:
+    """Serialize and pace outbound commands for one hub.
+
+    The hub processes commands one at a time. Instead of sleeping a fixed
+    interval after every publish, the pipeline holds the next command until
+    the hub has answered the previous request (bounded by the pacer's
+    threshold) and the minimum gap configured for the next command's class
+    has elapsed. Commands the hub answers are also spaced by the rate an
+    AimdPacer has learned from the hub's response times and missing answers.
+    Answers are matched to their command by response key, so pushes nobody
+    asked for and answers to earlier commands are not credited to the last
+    one.
+
+    Waiting commands are published by priority (activity control, key
+    presses, state queries, catalog requests), in submission order within a
+    priority. A command gains one priority level per PRIORITY_AGING seconds
+    it waits, so a steady stream of urgent commands cannot starve the rest.
+    Scheduled commands (not_before) take part only once they are due; until
+    then the queue keeps serving everything else.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        publish: Callable[[str, str], Awaitable[None]],
+        name: str,
+        min_gaps: dict[str, float] | None = None,
+        response_timeout: float = DEFAULT_RESPONSE_PACING_TIMEOUT,
+    ) -> None:
+        """Initialize the pipeline.
+
+        Args:
+            hass: Home Assistant instance
+            publish: Coroutine function that publishes a message to a topic
+            name: Name used for logging and the worker task
+            min_gaps: Minimum gap in seconds per command class
+            response_timeout: Time to hold the queue for a hub response until
+                the hub's round-trip time has been measured
+        """
+        self.hass = hass
+        self._publish = publish
+        self._name = name
+        self.min_gaps: dict[str, float] = {**DEFAULT_COMMAND_MIN_GAPS, **(min_gaps or {})}
+
+        self._queue: list[OutboundCommand | ChannelHold] = []
+        self._current: OutboundCommand | None = None
+        self._worker: asyncio.Task | None = None
+        # Wakes the worker while it waits for the next scheduled command
+        self._enqueued = asyncio.Event()
+
+        # Pacing state
+        self._last_publish: float | None = None
+        self._awaiting_key: Hashable | None = None
+        self._awaiting_response: asyncio.Future | None = None
+        # Response key -> published command still waiting for its answer
+        self._outstanding: dict[Hashable, _Outstanding] = {}
+        self.pacer = AimdPacer(response_timeout)
+
+        # Task holding the channel (see async_hold)
+        self._holder: asyncio.Task | None = None
+
+        # Statistics
+        self._latency: dict[str, LatencyStats] = {}
+        self._published = 0
+        self._failed = 0
+        self._coalesced = 0
+        self._holds = 0
+        self._cancelled = 0
+        # Commands published ahead of more urgent ones because they waited long
+        self._aged = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Return number of commands waiting to be published."""
+        return len(self._queue)
+
+    @property
+    def awaiting_response_key(self) -> Hashable | None:
+        """Return the response key of the answer the queue is held for, if any."""
+        if self._awaiting_response is None or self._awaiting_response.done():
+            return None
+        return self._awaiting_key
+
+    def holds_channel(self) -> bool:
+        """Check if the current task holds the channel.
+
+        Only the task that entered async_hold holds it; tasks and timers it
+        starts queue like any other caller.
+        """
+        return self._holder is not None and self._holder is asyncio.current_task()
+
+    async def async_submit(
+        self,
+        topic: str,
+        message: str,
+        command_class: str,
+        response_key: Hashable | None = None,
+        coalesce: bool = False,
+        not_before: float | None = None,
+        priority: int = PRIORITY_KEY_PRESS,
+        tag: Hashable | None = None,
+    ) -> None:
+        """Queue a command and wait until it has been published.
+
+        Args:
+            topic: Concrete MQTT topic
+            message: Serialized message payload
+            command_class: Command class used for pacing
+            response_key: Key identifying the hub's answer (reported with
+                notify_response), if the hub answers
+            coalesce: If an identical command is still waiting in the queue,
+                wait for that one instead of queuing another
+            not_before: Monotonic time before which the command is not
+                published; other commands are served until it is due
+            priority: Scheduling priority, lower values are published first
+            tag: Tag under which the command can be withdrawn with cancel
+
+        Raises:
+            CommandCancelled: The command was withdrawn before publishing
+            Exception: Whatever the underlying publish raised
+        """
+        command = OutboundCommand(
+            topic=topic,
+            message=message,
+            command_class=command_class,
+            response_key=response_key,
+            future=self.hass.loop.create_future(),
+            not_before=not_before,
+            priority=priority,
+            tag=tag,
+        )
+
+        if self.holds_channel():
+            # The caller holds the channel: publish directly, in call order
+            await self._async_wait_until_ready(command)
+            await self._async_publish_command(command)
+            await command.future
+            return
+
+        if coalesce:
+            for queued in self._queue:
+                if (
+                    isinstance(queued, OutboundCommand)
+                    and queued.topic == topic
+                    and queued.message == message
+                    and not queued.future.done()
+                ):
+                    self._coalesced += 1
+                    await asyncio.shield(queued.future)
+                    return
+
+        self._enqueue(command)
+        await command.future
+
+    @asynccontextmanager
+    async def async_hold(self, priority: int = PRIORITY_KEY_PRESS) -> AsyncIterator[None]:
+        """Hold the channel to the hub for a sequence of commands.
+
+        Waits until the more urgent commands queued before have been
+        published. Inside the block only commands submitted by the holding
+        task itself are published, in call order and with the usual pacing;
+        commands from other callers, including tasks and timers the holder
+        starts, queue up behind the hold.
+
+        Args:
+            priority: Scheduling priority of the hold itself
+        """
+        if self.holds_channel():
+            # Already holding (nested use)
+            yield
+            return
+
+        hold = ChannelHold(
+            future=self.hass.loop.create_future(),
+            released=self.hass.loop.create_future(),
+            priority=priority,
+        )
+        self._enqueue(hold)
+        try:
+            await hold.future
+        except BaseException:
+            # Cancelled while waiting, possibly right after the grant: hand the
+            # channel back so the worker does not wait for a holder that is gone
+            if hold in self._queue:
+                self._queue.remove(hold)
+            hold.future.cancel()
+            if not hold.released.done():
+                hold.released.set_result(None)
+            raise
+
+        self._holds += 1
+        self._holder = asyncio.current_task()
+        try:
+            yield
+        finally:
+            self._holder = None
+            if not hold.released.done():
+                hold.released.set_result(None)
+
+    @callback
+    def cancel(self, tag: Hashable) -> int:
+        """Withdraw queued commands with a tag before they are published.
+
+        Commands already published are not affected. Their submitters get
+        CommandCancelled.
+
+        Args:
+            tag: Tag the commands were submitted with
+
+        Returns:
+            Number of commands withdrawn
+        """
+        withdrawn = [
+            item
+            for item in self._queue
+            if isinstance(item, OutboundCommand) and item.tag == tag and not item.future.done()
+        ]
+        for command in withdrawn:
+            self._queue.remove(command)
+            command.future.set_exception(CommandCancelled(f"{command.topic} withdrawn"))
+        self._cancelled += len(withdrawn)
+        return len(withdrawn)
+
+    @callback
+    def notify_response(self, response_key: Hashable) -> None:
+        """Match an answer from the hub to its command.
+
+        Releases the pacing hold if the queue waits for this answer and feeds
+        the response time to the pacer. Answers nobody waits for are ignored,
+        and answers that may belong to either of two commands with the same
+        key are not measured (Karn's algorithm).
+
+        Args:
+            response_key: Key identifying the answer, as passed to async_submit
+        """
+        outstanding = self._outstanding.pop(response_key, None)
+        if outstanding is None:
+            return
+        if (
+            response_key == self._awaiting_key
+            and self._awaiting_response is not None
+            and not self._awaiting_response.done()
+        ):
+            self._awaiting_response.set_result(None)
+        if outstanding.ambiguous:
+            return
+        response_time = time.monotonic() - outstanding.published_at
+        if outstanding.missed:
+            self.pacer.on_late_response(response_time)
+        else:
+            self.pacer.on_response(response_time)
+
+    def _enqueue(self, item: OutboundCommand | ChannelHold) -> None:
+        """Queue an item and make sure the worker sees it.
+
+        Args:
+            item: Command or hold to queue
+        """
+        self._queue.append(item)
+        self._enqueued.set()
+        if self._worker is None or self._worker.done():
+            self._worker = self.hass.async_create_background_task(
+                self._async_run(), name=f"{self._name} command pipeline"
+            )
+
+    def _select_next(self) -> OutboundCommand | ChannelHold | None:
+        """Return the due queued item to publish next.
+
+        Among the items that are due (or abandoned, so they can be dropped),
+        the one with the lowest aged priority wins; ties go to the item queued
+        first. Scheduled commands age from their due time.
+        """
+        now = time.monotonic()
+        due = [item for item in self._queue if item.due_at <= now or item.future.done()]
+        if not due:
+            return None
+        return min(due, key=lambda item: item.priority - (now - item.due_at) / PRIORITY_AGING)
+
+    async def _async_wait_for_due(self) -> None:
+        """Wait until the first scheduled command is due or a new item is queued."""
+        self._enqueued.clear()
+        delay = min(item.due_at for item in self._queue) - time.monotonic()
+        if delay > 0:
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._enqueued.wait(), delay)
+
+    async def _async_run(self) -> None:
+        """Publish queued commands by priority until the queue is empty."""
+        while self._queue:
+            item = self._select_next()
+            if item is None:
+                # Only commands scheduled for later are waiting
+                await self._async_wait_for_due()
+                continue
+
+            if isinstance(item, ChannelHold):
+                self._queue.remove(item)
+                if not item.future.done():
+                    # Hand the channel to the holder until it is done
+                    item.future.set_result(None)
+                    await item.released
+                continue
+
+            if item.future.done():
+                # Submitter went away while the command was queued
+                self._queue.remove(item)
+                continue
+
+            await self._async_wait_until_ready(item)
+            if item.future.done():
+                # Withdrawn, or its submitter went away, while waiting for the hub
+                continue
+            if self._select_next() is not item:
+                # A more urgent command arrived while waiting
+                continue
+
+            self._queue.remove(item)
+            if any(other.priority < item.priority for other in self._queue):
+                self._aged += 1
+            self._current = item
+            try:
+                await self._async_publish_command(item)
+            finally:
+                self._current = None
+
+    async def _async_publish_command(self, command: OutboundCommand) -> None:
+        """Publish one command and update the pacing state.
+
+        The outcome is reported through the command's future.
+
+        Args:
+            command: Command to publish
+        """
+        try:
+            await self._publish(command.topic, command.message)
+        except Exception as err:  # pylint: disable=broad-except
+            self._failed += 1
+            if not command.future.done():
+                command.future.set_exception(err)
+            return
+
+        now = time.monotonic()
+        self._last_publish = now
+        self._published += 1
+        # Scheduled commands are measured from their due time
+        self._latency.setdefault(command.command_class, LatencyStats()).record(
+            now - command.due_at
+        )
+
+        if command.response_key is not None:
+            self._track_response(command.response_key, now)
+            self._awaiting_key = command.response_key
+            self._awaiting_response = self.hass.loop.create_future()
+        else:
+            self._awaiting_key = None
+            self._awaiting_response = None
+
+        if not command.future.done():
+            command.future.set_result(None)
+
+    def _track_response(self, response_key: Hashable, published_at: float) -> None:
+        """Remember a published command until its answer arrives.
+
+        Args:
+            response_key: Key identifying the answer
+            published_at: Monotonic time the command was published
+        """
+        previous = self._outstanding.pop(response_key, None)
+        # An answer to the previous command may still be on its way
+        ambiguous = previous is not None and published_at - previous.published_at < self.pacer.rtt.maximum
+        while len(self._outstanding) >= RESPONSE_TRACKING_MAX:
+            # Forget the oldest unanswered command
+            del self._outstanding[next(iter(self._outstanding))]
+        self._outstanding[response_key] = _Outstanding(published_at, ambiguous)
+
+    async def _async_wait_until_ready(self, command: OutboundCommand) -> None:
+        """Wait until the hub may receive the next command.
+
+        Args:
+            command: Command about to be published
+        """
+        # The worker only picks due commands; the channel holder publishes
+        # its own scheduled commands directly and waits for them here
+        if command.not_before is not None:
+            delay = command.not_before - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+        if self._last_publish is None:
+            return
+
+        # Hold the queue while the hub is still answering the previous request
+        if self._awaiting_response is not None and not self._awaiting_response.done():
+            threshold = self.pacer.threshold
+            remaining = self._last_publish + threshold - time.monotonic()
+            try:
+                if remaining <= 0:
+                    raise asyncio.TimeoutError
+                await asyncio.wait_for(
+                    asyncio.shield(self._awaiting_response), remaining
+                )
+            except asyncio.TimeoutError:
+                _LOGGER.debug(
+                    "%s: no response for %s within %.2fs, continuing",
+                    self._name,
+                    self._awaiting_key,
+                    threshold,
+                )
+                # Count the missing answer once; a late answer only updates the RTT
+                if (outstanding := self._outstanding.get(self._awaiting_key)) is not None:
+                    outstanding.missed = True
+                self.pacer.on_missing()
+                self._awaiting_response.set_result(None)
+
+        gap = self.min_gaps.get(command.command_class, 0.0)
+        # Commands the hub answers are spaced by the learned rate
+        if command.response_key is not None:
+            gap = max(gap, self.pacer.gap)
+        delay = self._last_publish + gap - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def async_shutdown(self) -> None:
+        """Stop the worker and fail all queued commands."""
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+
+        pending = list(self._queue)
+        if self._current is not None:
+            pending.append(self._current)
+        self._queue.clear()
+        self._current = None
+        for command in pending:
+            if not command.future.done():
+                command.future.cancel()
+            if isinstance(command, ChannelHold) and not command.released.done():
+                command.released.cancel()
+
+    def stats(self) -> dict[str, Any]:
+        """Return pipeline statistics for diagnostics."""
+        return {
+            "queue_depth": self.queue_depth,
+            "published": self._published,
+            "failed": self._failed,
+            "coalesced": self._coalesced,
+            "holds": self._holds,
+            "cancelled": self._cancelled,
+            "aged": self._aged,
+            "min_gaps": dict(self.min_gaps),
+            "response_timeout": round(self.pacer.threshold, 3),
+            "awaiting_answers": len(self._outstanding),
+            "latency": {
+                command_class: stats.as_dict()
+                for command_class, stats in self._latency.items()
+            },
+            "pacing": self.pacer.stats(),
+        }
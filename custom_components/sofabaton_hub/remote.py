@@ -1,20 +1,60 @@
 """Platform for Sofabaton Hub remote entity."""
 from __future__ import annotations
 
+import asyncio
 import logging
+import time
 from typing import Any, Iterable
 
-from homeassistant.components.remote import RemoteEntity
+import voluptuous as vol
+
+from homeassistant.components.remote import (
+    ATTR_DELAY_SECS,
+    ATTR_HOLD_SECS,
+    ATTR_NUM_REPEATS,
+    DEFAULT_DELAY_SECS,
+    DEFAULT_HOLD_SECS,
+    DEFAULT_NUM_REPEATS,
+    RemoteEntity,
+)
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.core import HomeAssistant, ServiceResponse, SupportsResponse, callback
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv, entity_platform
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.json import json_bytes
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN
+from .commands import COMMAND_TYPE_NAMED_KEYS, CompiledCommand, compile_command
+from .const import (
+    ATTR_STEPS,
+    CONF_ATTRIBUTE_SIZE_BUDGET,
+    DEFAULT_ATTRIBUTE_SIZE_BUDGET,
+    DOMAIN,
+    KEY_KIND_ASSIGNED,
+    KEY_KIND_FAVORITES,
+    KEY_KIND_MACROS,
+    SEQUENCE_MAX_STEPS,
+    SERVICE_SEND_SEQUENCE,
+)
 from .coordinator import SofabatonHubDataUpdateCoordinator
+from .state import ACTIVITY_ID_ALL_OFF
 
 _LOGGER = logging.getLogger(__name__)
 
+# One send_sequence step: a send_command command list; delay_secs spaces the
+# step's repeats and is waited after the step
+SEQUENCE_STEP_SCHEMA = vol.Schema(
+    {
+        vol.Required("command"): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(ATTR_NUM_REPEATS, default=DEFAULT_NUM_REPEATS): cv.positive_int,
+        vol.Optional(ATTR_DELAY_SECS, default=0): vol.All(vol.Coerce(float), vol.Range(min=0, max=60)),
+        vol.Optional(ATTR_HOLD_SECS, default=DEFAULT_HOLD_SECS): vol.All(
+            vol.Coerce(float), vol.Range(min=0, max=60)
+        ),
+    }
+)
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -33,10 +73,26 @@ async def async_setup_entry(
     # Create entity and add to HA
     async_add_entities([SofabatonHubRemote(coordinator, entry)])
 
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(
+        SERVICE_SEND_SEQUENCE,
+        {
+            vol.Required(ATTR_STEPS): vol.All(
+                cv.ensure_list, [SEQUENCE_STEP_SCHEMA], vol.Length(min=1, max=SEQUENCE_MAX_STEPS)
+            ),
+        },
+        "async_send_sequence",
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
 
 class SofabatonHubRemote(CoordinatorEntity[SofabatonHubDataUpdateCoordinator], RemoteEntity):
     """Sofabaton Hub Remote entity class."""
 
+    # The activity list is rewritten on every activity change and can be
+    # rebuilt from the Hub at any time, so it is not stored in the recorder
+    _unrecorded_attributes = frozenset({"activities"})
+
     def __init__(
         self,
         coordinator: SofabatonHubDataUpdateCoordinator,
@@ -66,11 +122,23 @@ class SofabatonHubRemote(CoordinatorEntity[SofabatonHubDataUpdateCoordinator], R
         # Store currently selected activity and device (mainly controlled by frontend card)
         self._selected_activity_id = None
         self._selected_device_id = None
+        # Attribute size budget (bytes) and memoized attributes
+        self._attribute_budget: int = entry.options.get(
+            CONF_ATTRIBUTE_SIZE_BUDGET, DEFAULT_ATTRIBUTE_SIZE_BUDGET
+        )
+        self._attributes: dict[str, Any] | None = None
+        self._attributes_source: dict[int, Any] | None = None
+        self._over_budget = False
 
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
-        _LOGGER.debug("_handle_coordinator_update called - forcing state write")
+        # Skip updates that did not change anything this entity renders
+        # (key catalogs are not part of the entity state)
+        changes = self.coordinator.last_changes
+        if not (changes.activity_ids or changes.current_activity_changed):
+            _LOGGER.debug("_handle_coordinator_update called - nothing changed, skipping state write")
+            return
         # Immediately write state to Home Assistant to ensure frontend receives updates
         self.async_write_ha_state()
 
@@ -90,7 +158,13 @@ class SofabatonHubRemote(CoordinatorEntity[SofabatonHubDataUpdateCoordinator], R
     def extra_state_attributes(self) -> dict[str, Any]:
         """Return extra state attributes for the entity.
 
-        Frontend cards will retrieve data from here.
+        Frontend cards will retrieve activity data from here. Key catalogs
+        are served by the websocket API (see websocket_api.py) so they are
+        not written to the state machine and the recorder.
+
+        The attributes are rebuilt only when the activities or the current
+        activity changed (coordinator data is copy-on-write, so an identity
+        check is enough) and are kept within the attribute size budget.
 
         Returns:
             Dictionary of extra state attributes
@@ -105,42 +179,88 @@ class SofabatonHubRemote(CoordinatorEntity[SofabatonHubDataUpdateCoordinator], R
                 # Uncomment below when re-enabling device support
                 # "devices": [],
                 "current_activity_id": None,
-                "assigned_keys": {},
-                "macro_keys": {},
-                "favorite_keys": {},
-                # DEVICE_DISABLED: Device functionality temporarily disabled
-                # Uncomment below when re-enabling device support
-                # "device_keys": {}
             }
 
-        # Debug logging: print complete data structure
-        _LOGGER.debug("extra_state_attributes: coordinator.data keys: %s", data.keys())
-        _LOGGER.debug("extra_state_attributes: coordinator.data['keys']: %s", data.get("keys"))
-
-        assigned_keys = data.get("keys", {}).get("assigned", {})
-        macro_keys = data.get("keys", {}).get("macros", {})
-        favorite_keys = data.get("keys", {}).get("favorites", {})
+        activities = data.get("activities", {})
+        current_activity_id = data.get("current_activity_id")
+        if (
+            self._attributes is None
+            or self._attributes_source is not activities
+            or self._attributes["current_activity_id"] != current_activity_id
+        ):
+            self._attributes_source = activities
+            self._attributes = self._fit_attribute_budget(
+                list(activities.values()), current_activity_id
+            )
+        return self._attributes
+
+    def _fit_attribute_budget(
+        self, activities: list[dict[str, Any]], current_activity_id: int | None
+    ) -> dict[str, Any]:
+        """Build the state attributes within the attribute size budget.
+
+        If the serialized attributes exceed the budget, activities are left
+        out (the current activity is always kept) and a warning is logged
+        once until the attributes fit again.
 
-        _LOGGER.debug("extra_state_attributes: assigned_keys = %s", assigned_keys)
-        _LOGGER.debug("extra_state_attributes: macro_keys = %s", macro_keys)
-        _LOGGER.debug("extra_state_attributes: favorite_keys = %s", favorite_keys)
+        Args:
+            activities: Activity entries in Hub order
+            current_activity_id: Current activity ID
 
-        result = {
-            "activities": list(data.get("activities", {}).values()),
+        Returns:
+            State attributes
+        """
+        attributes = {
+            "activities": activities,
             # DEVICE_DISABLED: Device functionality temporarily disabled
             # Uncomment below when re-enabling device support
             # "devices": list(data.get("devices", {}).values()),
-            "current_activity_id": data.get("current_activity_id"),
-            "assigned_keys": assigned_keys,
-            "macro_keys": macro_keys,
-            "favorite_keys": favorite_keys,
-            # DEVICE_DISABLED: Device functionality temporarily disabled
-            # Uncomment below when re-enabling device support
-            # "device_keys": data.get("keys", {}).get("device_keys", {})
+            "current_activity_id": current_activity_id,
         }
+        full_size = len(json_bytes(attributes))
+        if full_size <= self._attribute_budget:
+            if self._over_budget:
+                _LOGGER.info(
+                    "%s: state attributes fit the %d byte budget again",
+                    self.entity_id,
+                    self._attribute_budget,
+                )
+                self._over_budget = False
+            return attributes
+
+        # Size of everything but the entries, then add entries while they fit
+        # (each entry costs its own size plus a separating comma)
+        size = len(json_bytes({**attributes, "activities": []}))
+        entry_sizes = [len(json_bytes(activity)) + 1 for activity in activities]
+        kept: set[int] = set()
+        for index, activity in enumerate(activities):
+            if activity.get("id") == current_activity_id:
+                kept.add(index)
+                size += entry_sizes[index]
+        for index, entry_size in enumerate(entry_sizes):
+            if index not in kept and size + entry_size <= self._attribute_budget:
+                kept.add(index)
+                size += entry_size
+
+        dropped = len(activities) - len(kept)
+        if not self._over_budget:
+            _LOGGER.warning(
+                "%s: state attributes are %d bytes, over the %d byte budget; "
+                "%d of %d activities left out of the activities attribute",
+                self.entity_id,
+                full_size,
+                self._attribute_budget,
+                dropped,
+                len(activities),
+            )
+            self._over_budget = True
+        else:
+            _LOGGER.debug("%s: %d activities left out of the activities attribute", self.entity_id, dropped)
 
-        _LOGGER.debug("extra_state_attributes: returning %s", result)
-        return result
+        return {
+            **attributes,
+            "activities": [activity for index, activity in enumerate(activities) if index in kept],
+        }
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn on the remote.
@@ -170,64 +290,148 @@ class SofabatonHubRemote(CoordinatorEntity[SofabatonHubDataUpdateCoordinator], R
             return
         current_activity_id = self.coordinator.data.get("current_activity_id")
         if current_activity_id:
-            # Send stop command, use 0xFF to stop all
-            await self.coordinator.api_client.async_control_activity_state(0xFF, "off")
-            # Request basic data to update activity states in frontend
-            await self.coordinator.async_request_basic_data()
+            # Send stop command, use 0xFF to stop all (confirmed by the Hub's status push)
+            await self.coordinator.async_control_activity(ACTIVITY_ID_ALL_OFF, "off")
 
     async def async_send_command(self, command: Iterable[str], **kwargs: Any) -> None:
         """Send a command to the device.
 
+        Key presses honour the standard num_repeats, delay_secs and
+        hold_secs arguments; see commands.py for the command grammar.
+
         Args:
-            command: List of command strings in format ["type:action", "id:value"]
-            **kwargs: Additional arguments
+            command: List of command strings in format ["type:action", "id:value"],
+                or a list of key names from REMOTE_KEYS
+            **kwargs: Additional arguments (num_repeats, delay_secs, hold_secs)
         """
+        # Start of the press-to-publish latency measurement
+        pressed_at = time.monotonic()
         _LOGGER.info("Backend: Received send_command request")
         _LOGGER.debug("  command: %s", command)
         _LOGGER.debug("  kwargs: %s", kwargs)
 
-        # command is a list of strings, we parse it to determine what operation to execute
-        # Format: ["type:action", "id:value", "extra_id:value"]
+        # command is a list of strings, compiled once per distinct list
+        # Format: ["type:action", "id:value", "extra_id:value"] or ["key_name", ...]
         # Example: ["type:start_activity", "activity_id:1"]
         # Example: ["type:send_assigned_key", "activity_id:1", "key_id:5"]
+        # Example: ["volume_up", "volume_up"]
+        try:
+            compiled = compile_command(tuple(command))
+        except ValueError as err:
+            _LOGGER.warning("Invalid command %s: %s", command, err)
+            return
+
+        presses = {
+            "num_repeats": kwargs.get(ATTR_NUM_REPEATS, DEFAULT_NUM_REPEATS),
+            "delay_secs": kwargs.get(ATTR_DELAY_SECS, DEFAULT_DELAY_SECS),
+            "hold_secs": kwargs.get(ATTR_HOLD_SECS, DEFAULT_HOLD_SECS),
+            "pressed_at": pressed_at,
+        }
+        _LOGGER.info("Backend: Parsed command type: %s", compiled.type)
+        _LOGGER.debug("Backend: Parsed command dict: %s", compiled.args)
+
+        await self._async_dispatch(command, compiled, presses)
+
+    async def async_send_sequence(self, steps: list[dict[str, Any]]) -> ServiceResponse:
+        """Run a sequence of commands while holding the Hub's command channel.
+
+        Commands of other callers wait until the sequence is done, so the
+        timing between steps is deterministic. Every step is compiled before
+        anything is sent.
+
+        Args:
+            steps: Validated steps (command, num_repeats, delay_secs, hold_secs)
+
+        Returns:
+            Total and per-step execution time in milliseconds
 
-        cmd_dict = {}
-        # Parse command list into dictionary
-        for item in command:
+        Raises:
+            ServiceValidationError: A step's command is invalid
+        """
+        compiled_steps = []
+        for index, step in enumerate(steps):
             try:
-                key, value = item.split(":", 1)
-                # Try to convert value to integer
-                try:
-                    cmd_dict[key] = int(value)
-                except ValueError:
-                    cmd_dict[key] = value  # If not an integer, keep as string
-            except ValueError:
-                _LOGGER.warning("Invalid command format: %s", item)
-                return
+                compiled_steps.append(compile_command(tuple(step["command"])))
+            except ValueError as err:
+                raise ServiceValidationError(f"Invalid command in step {index + 1}: {err}") from err
+
+        api = self.coordinator.api_client
+        timings = []
+        started = time.monotonic()
+        async with api.pipeline.async_hold():
+            held = time.monotonic()
+            for index, (step, compiled) in enumerate(zip(steps, compiled_steps)):
+                step_started = time.monotonic()
+                await self._async_dispatch(
+                    step["command"],
+                    compiled,
+                    {
+                        "num_repeats": step[ATTR_NUM_REPEATS],
+                        "delay_secs": step[ATTR_DELAY_SECS],
+                        "hold_secs": step[ATTR_HOLD_SECS],
+                        "pressed_at": step_started,
+                    },
+                )
+                timings.append(
+                    {
+                        "command": step["command"],
+                        "started_ms": round((step_started - held) * 1000, 1),
+                        "duration_ms": round((time.monotonic() - step_started) * 1000, 1),
+                    }
+                )
+                # No need to hold the channel after the last step
+                if step[ATTR_DELAY_SECS] and index < len(steps) - 1:
+                    await asyncio.sleep(step[ATTR_DELAY_SECS])
+        finished = time.monotonic()
+
+        _LOGGER.info(
+            "Sequence of %d steps sent in %.3f seconds (waited %.3f seconds for the channel)",
+            len(steps),
+            finished - held,
+            held - started,
+        )
+        return {
+            "total_ms": round((finished - held) * 1000, 1),
+            "channel_wait_ms": round((held - started) * 1000, 1),
+            "steps": timings,
+        }
 
-        cmd_type = cmd_dict.get("type")  # Get command type
-        _LOGGER.info("Backend: Parsed command type: %s", cmd_type)
-        _LOGGER.debug("Backend: Parsed command dict: %s", cmd_dict)
+    async def _async_dispatch(
+        self, command: Iterable[str], compiled: CompiledCommand, presses: dict[str, Any]
+    ) -> None:
+        """Execute a compiled command.
 
+        Args:
+            command: Command list as received, for logging
+            compiled: Compiled command
+            presses: Key press arguments for _async_press_keys (num_repeats,
+                delay_secs, hold_secs, pressed_at)
+        """
+        # Shared with other calls of the same command list: read only
+        cmd_dict = compiled.args
+        cmd_type = compiled.type
         api = self.coordinator.api_client  # Get API client
 
         # Call different API methods based on command type
-        if cmd_type == "start_activity":
+        if cmd_type == COMMAND_TYPE_NAMED_KEYS:
+            # Standard remote usage: key names pressed in the current activity
+            activity_id = self.coordinator.data.get("current_activity_id")
+            if activity_id is None:
+                _LOGGER.warning("Cannot send %s: no activity is running", command)
+                return
+            await self._async_press_keys(KEY_KIND_ASSIGNED, activity_id, compiled.key_ids, **presses)
+        elif cmd_type == "start_activity":
             _LOGGER.info("Backend: Starting activity %s", cmd_dict["activity_id"])
-            await api.async_control_activity_state(cmd_dict["activity_id"], "on")
-            # Request basic data to update activity states in frontend
-            await self.coordinator.async_request_basic_data()
+            await self.coordinator.async_control_activity(cmd_dict["activity_id"], "on")
         elif cmd_type == "stop_activity":
             _LOGGER.info("Backend: Stopping activity %s", cmd_dict["activity_id"])
-            await api.async_control_activity_state(cmd_dict["activity_id"], "off")
-            # Request basic data to update activity states in frontend
-            await self.coordinator.async_request_basic_data()
+            await self.coordinator.async_control_activity(cmd_dict["activity_id"], "off")
         elif cmd_type == "request_assigned_keys":
             # Request assigned_keys (page 1)
             activity_id = cmd_dict.get("activity_id")
             _LOGGER.info("Backend: Requesting assigned_keys for activity %s", activity_id)
             if activity_id:
-                await self.coordinator.async_request_assigned_keys(activity_id)
+                await self._async_request_keys(KEY_KIND_ASSIGNED, activity_id)
             else:
                 _LOGGER.error("Backend: No activity_id provided for request_assigned_keys command")
         elif cmd_type == "request_macro_keys":
@@ -235,7 +439,7 @@ class SofabatonHubRemote(CoordinatorEntity[SofabatonHubDataUpdateCoordinator], R
             activity_id = cmd_dict.get("activity_id")
             _LOGGER.info("Backend: Requesting macro_keys for activity %s", activity_id)
             if activity_id:
-                await self.coordinator.async_request_macro_keys(activity_id)
+                await self._async_request_keys(KEY_KIND_MACROS, activity_id)
             else:
                 _LOGGER.error("Backend: No activity_id provided for request_macro_keys command")
         elif cmd_type == "request_favorite_keys":
@@ -243,7 +447,7 @@ class SofabatonHubRemote(CoordinatorEntity[SofabatonHubDataUpdateCoordinator], R
             activity_id = cmd_dict.get("activity_id")
             _LOGGER.info("Backend: Requesting favorite_keys for activity %s", activity_id)
             if activity_id:
-                await self.coordinator.async_request_favorite_keys(activity_id)
+                await self._async_request_keys(KEY_KIND_FAVORITES, activity_id)
             else:
                 _LOGGER.error("Backend: No activity_id provided for request_favorite_keys command")
         elif cmd_type == "request_basic_data":
@@ -251,20 +455,9 @@ class SofabatonHubRemote(CoordinatorEntity[SofabatonHubDataUpdateCoordinator], R
             # Note: If request is already in progress, this will be skipped
             await self.coordinator.async_request_basic_data()
         elif cmd_type == "clear_requesting_keys_flag":
-            # Clear key request flag to allow activity_list updates
-            _LOGGER.info("Backend: Clearing _is_requesting_keys flag (detail dialog closed)")
-            if hasattr(self.coordinator, "_is_requesting_keys"):
-                self.coordinator._is_requesting_keys = False
-
-            # Clear all keys cache to force fresh data on next dialog open
-            _LOGGER.info("Backend: Clearing all keys cache (detail dialog closed)")
-            self.coordinator.data["keys"]["assigned"] = {}
-            self.coordinator.data["keys"]["macros"] = {}
-            self.coordinator.data["keys"]["favorites"] = {}
-
-            # Notify frontend that state has been updated
-            import copy
-            self.coordinator.async_set_updated_data(copy.deepcopy(self.coordinator.data))
+            # No-op kept for cards of older versions, which send it when the
+            # detail dialog closes; key requests no longer hold activity list updates
+            _LOGGER.debug("Backend: Ignoring obsolete clear_requesting_keys_flag command")
         # DEVICE_DISABLED: Device functionality temporarily disabled
         # Uncomment below when re-enabling device support
         # elif cmd_type == "request_device_keys":
@@ -273,18 +466,90 @@ class SofabatonHubRemote(CoordinatorEntity[SofabatonHubDataUpdateCoordinator], R
         #         await api.async_request_device_keys(device_id)
         elif cmd_type == "send_assigned_key":
             _LOGGER.info("Processing send_assigned_key command: %s", cmd_dict)
-            await api.async_send_assigned_key(cmd_dict["activity_id"], cmd_dict["key_id"])
+            # Without activity_id the key is pressed in the current activity
+            activity_id = cmd_dict.get("activity_id", self.coordinator.data.get("current_activity_id"))
+            if activity_id is None:
+                _LOGGER.warning("Cannot send %s: no activity_id and no activity is running", command)
+                return
+            await self._async_press_keys(KEY_KIND_ASSIGNED, activity_id, (cmd_dict["key_id"],), **presses)
+        elif cmd_type == "repeat_start":
+            # Hold-to-repeat: the key was pressed (send_assigned_key) and is still held
+            api.repeater.start(cmd_dict["activity_id"], cmd_dict["key_id"])
+        elif cmd_type == "repeat_stop":
+            # Key released; without IDs any repeating key is stopped
+            api.repeater.stop(cmd_dict.get("activity_id"), cmd_dict.get("key_id"))
         elif cmd_type == "send_macro_key":
-            await api.async_send_macro_key(cmd_dict["activity_id"], cmd_dict["key_id"])
+            await self._async_press_keys(
+                KEY_KIND_MACROS, cmd_dict["activity_id"], (cmd_dict["key_id"],), **presses
+            )
         elif cmd_type == "send_favorite_key":
             # Note: Due to firmware design issue, device expects device_id in activity_id field
             device_id = cmd_dict.get("device_id")
             key_id = cmd_dict.get("key_id")
             _LOGGER.info("Backend: Sending favorite key - device_id: %s, key_id: %s", device_id, key_id)
-            await api.async_send_favorite_key(device_id, key_id)
+            await self._async_press_keys(KEY_KIND_FAVORITES, device_id, (key_id,), **presses)
         # DEVICE_DISABLED: Device functionality temporarily disabled
         # Uncomment below when re-enabling device support
         # elif cmd_type == "send_device_key":
         #     await api.async_send_device_key(cmd_dict["device_id"], cmd_dict["key_id"])
         else:
             _LOGGER.error("Unknown command type received: %s", cmd_type)
+
+    async def _async_request_keys(self, kind: str, activity_id: int) -> None:
+        """Request a key catalog for an activity.
+
+        Inside a sequence the answer is not waited for: the sequence holds the
+        Hub's channel, so every other command of the Hub would wait with it.
+        The request is then sent once the sequence has released the channel.
+
+        Args:
+            kind: Key catalog kind (assigned, macros or favorites)
+            activity_id: Activity ID to request keys for
+        """
+        if self.coordinator.api_client.pipeline.holds_channel():
+            self.coordinator.hass.async_create_background_task(
+                self.coordinator.async_request_keys(kind, activity_id),
+                name=f"{DOMAIN} request {kind} keys {activity_id}",
+            )
+            return
+        await self.coordinator.async_request_keys(kind, activity_id)
+
+    async def _async_press_keys(
+        self,
+        kind: str,
+        target_id: int,
+        key_ids: tuple[int, ...],
+        num_repeats: int,
+        delay_secs: float,
+        hold_secs: float,
+        pressed_at: float,
+    ) -> None:
+        """Press keys with remote.send_command repeat semantics.
+
+        The key sequence is sent num_repeats times with delay_secs between
+        presses. Presses are queued with their due times and scheduled by the
+        API client's command pipeline. With hold_secs, each assigned key is
+        held (repeated by the API client's repeater) for that long instead.
+
+        Args:
+            kind: Key catalog kind (assigned, macros or favorites)
+            target_id: Activity ID, or device ID for favorites
+            key_ids: Key IDs pressed in order
+            num_repeats: Number of times the sequence is sent
+            delay_secs: Time in seconds between presses
+            hold_secs: Time in seconds each assigned key is held
+            pressed_at: Monotonic time the command was received
+        """
+        api = self.coordinator.api_client
+        sequence = key_ids * num_repeats
+
+        if hold_secs and kind == KEY_KIND_ASSIGNED:
+            for index, key_id in enumerate(sequence):
+                if index:
+                    await asyncio.sleep(delay_secs)
+                await api.async_hold_assigned_key(target_id, key_id, hold_secs, pressed_at)
+            return
+
+        await api.async_send_key_presses(
+            ((kind, target_id, key_id) for key_id in sequence), delay_secs, pressed_at
+        )
@@ -0,0 +1,180 @@
+"""Hold-to-repeat engine for Sofabaton Hub key presses."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DEFAULT_KEY_REPEAT_INTERVAL, KEY_REPEAT_MAX_DURATION
+from .pipeline import LatencyStats
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class KeyRepeater:
+    """Repeat a held key at a fixed rate until it is released.
+
+    The Hub has no notion of a held key, so holding volume-up means sending
+    the same press over and over. Instead of the card calling a service for
+    every repeat, it starts a repeat here and stops it on release. At most
+    one key repeats per Hub, like on a physical remote.
+
+    Repeats are scheduled from the start time, so publish latency does not
+    stretch the rate. Each repeat is submitted with coalescing: when the Hub
+    is slow and the previous repeat is still queued, the new one merges into
+    it instead of building up a backlog that keeps going after release.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        press: Callable[[int, int, float], Awaitable[None]],
+        name: str,
+        interval: float = DEFAULT_KEY_REPEAT_INTERVAL,
+        max_duration: float = KEY_REPEAT_MAX_DURATION,
+    ) -> None:
+        """Initialize the repeater.
+
+        Args:
+            hass: Home Assistant instance
+            press: Coroutine function sending one coalescing press, called with
+                activity ID, key ID and the monotonic time the repeat was due
+            name: Name used for logging and the repeat task
+            interval: Time between repeats in seconds
+            max_duration: Time after which a repeat that was never stopped ends
+        """
+        self.hass = hass
+        self._press = press
+        self._name = name
+        self.interval = interval
+        self.max_duration = max_duration
+
+        self._active: tuple[int, int] | None = None
+        self._task: asyncio.Task | None = None
+        self._presses: set[asyncio.Task] = set()
+
+        # Statistics
+        self._started = 0
+        self._timed_out = 0
+        self._repeats = 0
+        self._failed = 0
+        self._schedule_lag = LatencyStats()
+
+    @property
+    def active(self) -> tuple[int, int] | None:
+        """Return (activity ID, key ID) of the repeating key, if any."""
+        return self._active
+
+    @callback
+    def start(self, activity_id: int, key_id: int) -> None:
+        """Start repeating a key, replacing any key already repeating.
+
+        The first repeat is sent one interval after the call; the initial
+        press is sent separately when the key goes down.
+
+        Args:
+            activity_id: Activity ID
+            key_id: Assigned key ID
+        """
+        self.stop()
+        self._active = (activity_id, key_id)
+        self._started += 1
+        self._task = self.hass.async_create_background_task(
+            self._async_run(activity_id, key_id), name=f"{self._name} key repeat"
+        )
+        _LOGGER.debug("%s: repeating key %s of activity %s every %.3fs", self._name, key_id, activity_id, self.interval)
+
+    @callback
+    def stop(self, activity_id: int | None = None, key_id: int | None = None) -> bool:
+        """Stop the repeating key.
+
+        Args:
+            activity_id: Only stop if this activity's key is repeating
+            key_id: Only stop if this key is repeating
+
+        Returns:
+            True if a repeat was stopped
+        """
+        if self._active is None:
+            return False
+        if activity_id is not None and self._active[0] != activity_id:
+            return False
+        if key_id is not None and self._active[1] != key_id:
+            return False
+
+        _LOGGER.debug("%s: stopping repeat of key %s", self._name, self._active[1])
+        self._active = None
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        return True
+
+    async def _async_run(self, activity_id: int, key_id: int) -> None:
+        """Send repeats on a fixed schedule until stopped or timed out.
+
+        Args:
+            activity_id: Activity ID
+            key_id: Assigned key ID
+        """
+        started = time.monotonic()
+        due = started + self.interval
+        while due - started <= self.max_duration:
+            await asyncio.sleep(max(0.0, due - time.monotonic()))
+            self._schedule_lag.record(time.monotonic() - due)
+            self._repeats += 1
+            # Not awaited: the next repeat keeps its schedule while this one is
+            # queued, and coalesces into it if it is still waiting
+            task = self.hass.async_create_task(self._async_press(activity_id, key_id, due))
+            self._presses.add(task)
+            task.add_done_callback(self._presses.discard)
+            due += self.interval
+
+        _LOGGER.warning(
+            "%s: key %s of activity %s repeated for %.0f seconds without a stop command, stopping",
+            self._name,
+            key_id,
+            activity_id,
+            self.max_duration,
+        )
+        self._timed_out += 1
+        self._active = None
+        self._task = None
+
+    async def _async_press(self, activity_id: int, key_id: int, due: float) -> None:
+        """Send one repeat, logging instead of raising on failure.
+
+        Args:
+            activity_id: Activity ID
+            key_id: Assigned key ID
+            due: Monotonic time the repeat was scheduled for
+        """
+        try:
+            await self._press(activity_id, key_id, due)
+        except asyncio.CancelledError:
+            raise
+        except Exception as err:  # pylint: disable=broad-except
+            self._failed += 1
+            _LOGGER.warning("%s: failed to send repeat of key %s: %s", self._name, key_id, err)
+
+    async def async_shutdown(self) -> None:
+        """Stop repeating and cancel repeats that have not been sent."""
+        self.stop()
+        for task in list(self._presses):
+            task.cancel()
+
+    def stats(self) -> dict[str, Any]:
+        """Return repeat statistics for diagnostics."""
+        return {
+            "interval_ms": round(self.interval * 1000),
+            "max_duration": self.max_duration,
+            "active": list(self._active) if self._active else None,
+            "started": self._started,
+            "timed_out": self._timed_out,
+            "repeats": self._repeats,
+            "failed": self._failed,
+            # Timer lateness of the repeat schedule
+            "schedule_lag": self._schedule_lag.as_dict(),
+        }
@@ -0,0 +1,251 @@
+"""Retransmission of unanswered Sofabaton Hub requests."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Hashable
+from contextlib import suppress
+from dataclasses import dataclass
+from datetime import datetime
+from functools import partial
+import logging
+import time
+from typing import Any, Awaitable, Callable
+
+from homeassistant.core import CALLBACK_TYPE, HassJob, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import REQUEST_MAX_RETRIES, RTO_MAX
+from .pipeline import RttEstimator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class _Request:
+    """A request waiting for the Hub's answer."""
+
+    send: Callable[[], Awaitable[None]]
+    on_failed: Callable[[BaseException], None]
+    attempts: int = 0
+    sent_at: float | None = None
+    queued: bool = False
+    cancel_timer: CALLBACK_TYPE | None = None
+
+
+class RequestRetransmitter:
+    """Resend list and key requests the Hub did not answer.
+
+    MQTT delivery to the Hub is not guaranteed end to end: a request or its
+    answer is sometimes lost. Each request is resent when no answer arrived
+    within the retransmission timeout, which doubles with every retry, and
+    given up after a bounded number of retries. A lost request therefore
+    costs about one round trip instead of the caller's whole timeout.
+
+    Only answers to requests that were sent once are used as RTT samples;
+    after a retry it is unknown which copy was answered (Karn's algorithm).
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        name: str,
+        max_retries: int = REQUEST_MAX_RETRIES,
+    ) -> None:
+        """Initialize the retransmitter.
+
+        Args:
+            hass: Home Assistant instance
+            name: Name used for logging
+            max_retries: Retries before a request is given up
+        """
+        self.hass = hass
+        self._name = name
+        self.max_retries = max_retries
+        self.rtt = RttEstimator()
+        self._requests: dict[Hashable, _Request] = {}
+
+        # Statistics
+        self._retransmits = 0
+        self._recovered = 0
+        self._gave_up = 0
+
+    def in_flight(self, key: Hashable) -> bool:
+        """Check if a request is waiting for its answer.
+
+        Args:
+            key: Key identifying the request
+        """
+        return key in self._requests
+
+    async def async_send(
+        self,
+        key: Hashable,
+        send: Callable[[], Awaitable[None]],
+        on_failed: Callable[[BaseException], None],
+    ) -> None:
+        """Send a request and resend it until it is answered.
+
+        The first copy is published by the calling task; resent copies are
+        published from tasks of their own. The retransmission timer runs from
+        the moment a copy is queued, so the request is given up on time even
+        when its copies cannot be published.
+
+        Args:
+            key: Key identifying the request; acknowledge() with the same key
+                when its answer arrives
+            send: Coroutine function publishing the request once
+            on_failed: Called with the error when a publish fails, or with
+                asyncio.TimeoutError when the request is given up
+
+        Raises:
+            Exception: Whatever publishing the first copy raised (also passed
+                to on_failed)
+        """
+        self.cancel(key)
+        request = self._requests[key] = _Request(send, on_failed)
+        await self._async_transmit(key, request)
+
+    @callback
+    def acknowledge(self, key: Hashable) -> bool:
+        """Stop resending a request because its answer arrived.
+
+        Args:
+            key: Key identifying the request
+
+        Returns:
+            True if the request was waiting for the answer
+        """
+        request = self._requests.pop(key, None)
+        if request is None:
+            return False
+        if request.cancel_timer is not None:
+            request.cancel_timer()
+        if request.attempts > 1:
+            self._recovered += 1
+        elif request.sent_at is not None:
+            self.rtt.sample(time.monotonic() - request.sent_at)
+        return True
+
+    @callback
+    def cancel(self, key: Hashable) -> None:
+        """Stop resending a request without waiting for its answer.
+
+        Args:
+            key: Key identifying the request
+        """
+        request = self._requests.pop(key, None)
+        if request is not None and request.cancel_timer is not None:
+            request.cancel_timer()
+
+    async def _async_transmit(self, key: Hashable, request: _Request) -> None:
+        """Start the retransmission timer and publish one copy of a request.
+
+        Args:
+            key: Key identifying the request
+            request: Request to publish
+
+        Raises:
+            Exception: Whatever the publish raised, after on_failed was called
+        """
+        request.attempts += 1
+        self._start_timer(key, request)
+        request.queued = True
+        try:
+            await request.send()
+        except BaseException as err:
+            if self._requests.get(key) is request:
+                self.cancel(key)
+                request.on_failed(err)
+            raise
+        finally:
+            request.queued = False
+        if self._requests.get(key) is request:
+            request.sent_at = time.monotonic()
+
+    @callback
+    def _start_timer(self, key: Hashable, request: _Request) -> None:
+        """Start the timer resending or giving up the request's latest copy.
+
+        Args:
+            key: Key identifying the request
+            request: Request waiting for its answer
+        """
+        delay = min(self.rtt.rto * 2 ** (request.attempts - 1), RTO_MAX)
+        request.cancel_timer = async_call_later(
+            self.hass,
+            delay,
+            HassJob(
+                partial(self._expired, key, request),
+                f"{self._name} request retransmission",
+                cancel_on_shutdown=True,
+            ),
+        )
+
+    @callback
+    def _expired(self, key: Hashable, request: _Request, _now: datetime) -> None:
+        """Resend an unanswered request, or give it up.
+
+        Args:
+            key: Key identifying the request
+            request: Unanswered request
+            _now: Time the timer fired
+        """
+        if self._requests.get(key) is not request:
+            return
+        request.cancel_timer = None
+
+        if request.attempts > self.max_retries:
+            _LOGGER.warning(
+                "%s: request %s unanswered after %d retries, giving up",
+                self._name,
+                key,
+                self.max_retries,
+            )
+            self._gave_up += 1
+            del self._requests[key]
+            request.on_failed(asyncio.TimeoutError())
+            return
+
+        if request.queued:
+            # The previous copy still waits behind other commands: count the
+            # attempt without queueing another copy
+            request.attempts += 1
+            self._start_timer(key, request)
+            return
+
+        _LOGGER.debug(
+            "%s: no answer to request %s within %.2fs, resending",
+            self._name,
+            key,
+            time.monotonic() - (request.sent_at or 0.0),
+        )
+        self._retransmits += 1
+        self.hass.async_create_task(self._async_retransmit(key, request))
+
+    async def _async_retransmit(self, key: Hashable, request: _Request) -> None:
+        """Publish another copy of a request; failures go to on_failed.
+
+        Args:
+            key: Key identifying the request
+            request: Unanswered request
+        """
+        with suppress(Exception):
+            await self._async_transmit(key, request)
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Stop resending all requests."""
+        for key in list(self._requests):
+            self.cancel(key)
+
+    def stats(self) -> dict[str, Any]:
+        """Return RTT estimate and retransmission statistics for diagnostics."""
+        return {
+            **self.rtt.stats(),
+            "max_retries": self.max_retries,
+            "in_flight": len(self._requests),
+            "retransmits": self._retransmits,
+            # Requests answered after at least one retransmission
+            "recovered": self._recovered,
+            "gave_up": self._gave_up,
+        }
@@ -0,0 +1,82 @@
+"""Persisted coordinator state snapshot for Sofabaton Hub warm starts."""
+from __future__ import annotations
+
+import logging
+from typing import Any, Callable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, STATE_SNAPSHOT_SAVE_DELAY, STATE_SNAPSHOT_STORAGE_VERSION
+from .messages import ActivityInfo
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _store(hass: HomeAssistant, entry_id: str) -> Store[dict[str, Any]]:
+    """Return the storage helper for a config entry's state snapshot."""
+    return Store(hass, STATE_SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.state")
+
+
+async def async_remove_state_snapshot(hass: HomeAssistant, entry_id: str) -> None:
+    """Remove the persisted state snapshot of a config entry.
+
+    Args:
+        hass: Home Assistant instance
+        entry_id: Config entry ID
+    """
+    await _store(hass, entry_id).async_remove()
+
+
+class StateSnapshot:
+    """Activity list and current activity persisted across restarts.
+
+    The snapshot is stored in a compact form (one [id, name, state] row per
+    activity). Writes are debounced so bursts of status pushes result in a
+    single write. Key catalogs are persisted separately by KeyCatalogCache.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry_id: str,
+        get_data: Callable[[], dict[str, Any]],
+    ) -> None:
+        """Initialize the snapshot store.
+
+        Args:
+            hass: Home Assistant instance
+            entry_id: Config entry ID used to name the storage file
+            get_data: Returns the current coordinator data when a write happens
+        """
+        self._store = _store(hass, entry_id)
+        self._get_data = get_data
+
+    async def async_load(self) -> list[ActivityInfo] | None:
+        """Load the persisted activity list.
+
+        Returns:
+            Activity list of the last run, or None if nothing was stored
+        """
+        stored = await self._store.async_load()
+        if not stored:
+            return None
+
+        activities = [ActivityInfo(*row) for row in stored.get("activities", [])]
+        _LOGGER.debug("Loaded state snapshot with %d activities", len(activities))
+        return activities
+
+    @callback
+    def async_schedule_save(self) -> None:
+        """Schedule a debounced write of the current coordinator data."""
+        self._store.async_delay_save(self._data_to_save, STATE_SNAPSHOT_SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return data to persist."""
+        return {
+            "activities": [
+                [activity["id"], activity["name"], activity["state"]]
+                for activity in self._get_data()["activities"].values()
+            ]
+        }
@@ -0,0 +1,244 @@
+"""Copy-on-write state model for Sofabaton Hub coordinator data.
+
+Coordinator data is treated as immutable once published. Every update builds
+a new top-level dictionary that copies only the path that changed and shares
+all other subtrees (most importantly the key catalogs) with the previous
+snapshot. Nothing in a published snapshot may be mutated in place.
+
+This module only depends on the standard library so it can be benchmarked
+outside Home Assistant (see scripts/benchmark_state.py).
+"""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any
+
+# Activity ID the hub uses for "all activities off"
+ACTIVITY_ID_ALL_OFF = 0xFF
+
+
+def empty_state() -> dict[str, Any]:
+    """Return an empty coordinator data snapshot."""
+    return {
+        "activities": {},  # activity_id -> {name, id, state}
+        "devices": {},  # device_id -> {name, id}
+        "current_activity_id": None,  # Current activity ID
+        "keys": {
+            "assigned": {},  # activity_id -> [key_id, ...]
+            "macros": {},  # activity_id -> [{id, name}, ...]
+            "favorites": {},  # activity_id -> [{id, name, device_id}, ...]
+            "device_keys": {},  # device_id -> [{id, name}, ...]
+        },
+    }
+
+
+def apply_activity_list(state: dict[str, Any], activities: Iterable[Any]) -> dict[str, Any]:
+    """Return a snapshot with the activity list replaced.
+
+    Activity entries whose content did not change keep their identity, so
+    consumers can detect changes with an ``is`` comparison.
+
+    Args:
+        state: Current snapshot
+        activities: Parsed activity list entries (activity_id, name, state attributes)
+
+    Returns:
+        New snapshot sharing the key catalogs with ``state``
+    """
+    previous = state["activities"]
+    new_activities: dict[int, dict[str, Any]] = {}
+    current_activity_id = None
+
+    for activity in activities:
+        activity_id = activity.activity_id
+        entry = {
+            "id": activity_id,
+            "name": activity.name,
+            "state": activity.state,
+        }
+        old = previous.get(activity_id)
+        new_activities[activity_id] = old if old == entry else entry
+        # If this activity is on, update current activity ID
+        if activity.state == "on":
+            current_activity_id = activity_id
+
+    return {**state, "activities": new_activities, "current_activity_id": current_activity_id}
+
+
+def _with_activity_states(
+    state: dict[str, Any], states: dict[int, str], current_activity_id: int | None
+) -> dict[str, Any]:
+    """Return a snapshot with the given activity states applied.
+
+    Args:
+        state: Current snapshot
+        states: activity_id -> new state for activities that may change
+        current_activity_id: New current activity ID
+
+    Returns:
+        New snapshot (or ``state`` itself when nothing changed)
+    """
+    activities = state["activities"]
+    changed = {
+        activity_id: {**activities[activity_id], "state": new_state}
+        for activity_id, new_state in states.items()
+        if activity_id in activities and activities[activity_id].get("state") != new_state
+    }
+    if not changed and current_activity_id == state["current_activity_id"]:
+        return state
+    return {
+        **state,
+        "activities": {**activities, **changed} if changed else activities,
+        "current_activity_id": current_activity_id,
+    }
+
+
+def apply_activity_status(
+    state: dict[str, Any], activity_id: int | None, activity_state: str | None
+) -> dict[str, Any]:
+    """Return a snapshot with an activity status push applied.
+
+    Follows the hub rules: ID 255 turns every activity off, "on" switches to
+    the given activity and turns all others off, "off" turns one activity off.
+
+    Args:
+        state: Current snapshot
+        activity_id: Activity ID from the activity_control_up message
+        activity_state: "on" or "off"
+
+    Returns:
+        New snapshot (or ``state`` itself when nothing changed)
+    """
+    activities = state["activities"]
+    current_activity_id = state["current_activity_id"]
+
+    if activity_id == ACTIVITY_ID_ALL_OFF:
+        return _with_activity_states(state, dict.fromkeys(activities, "off"), None)
+
+    if activity_id is not None and activity_state == "on":
+        states = dict.fromkeys(activities, "off")
+        if activity_id in activities:
+            states[activity_id] = "on"
+            current_activity_id = activity_id
+        return _with_activity_states(state, states, current_activity_id)
+
+    if activity_id is not None and activity_state == "off":
+        if activity_id not in activities:
+            return state
+        if current_activity_id == activity_id:
+            current_activity_id = None
+        return _with_activity_states(state, {activity_id: "off"}, current_activity_id)
+
+    return state
+
+
+def restore_activities(state: dict[str, Any], previous: dict[str, Any]) -> dict[str, Any]:
+    """Return a snapshot with the activities of an earlier snapshot.
+
+    Used to roll back an optimistic activity switch. Key catalogs and devices
+    are taken from ``state``.
+
+    Args:
+        state: Current snapshot
+        previous: Snapshot whose activities and current activity are restored
+
+    Returns:
+        New snapshot (or ``state`` itself when the activities are the same)
+    """
+    if (
+        state["activities"] is previous["activities"]
+        and state["current_activity_id"] == previous["current_activity_id"]
+    ):
+        return state
+    return {
+        **state,
+        "activities": previous["activities"],
+        "current_activity_id": previous["current_activity_id"],
+    }
+
+
+def apply_keys(state: dict[str, Any], kind: str, activity_id: int, keys: list[Any]) -> dict[str, Any]:
+    """Return a snapshot with one activity's key catalog set.
+
+    Only the ``keys`` dictionary and the ``kind`` dictionary are copied; the
+    catalogs of other kinds and activities are shared.
+
+    Args:
+        state: Current snapshot
+        kind: Key catalog kind (assigned, macros or favorites)
+        activity_id: Activity ID
+        keys: New catalog
+
+    Returns:
+        New snapshot
+    """
+    return replace_keys(state, kind, {**state["keys"][kind], activity_id: keys})
+
+
+def replace_keys(state: dict[str, Any], kind: str, catalogs: dict[int, list[Any]]) -> dict[str, Any]:
+    """Return a snapshot with all catalogs of one kind replaced.
+
+    Args:
+        state: Current snapshot
+        kind: Key catalog kind
+        catalogs: activity_id -> catalog
+
+    Returns:
+        New snapshot
+    """
+    return {**state, "keys": {**state["keys"], kind: catalogs}}
+
+
+@dataclass(frozen=True, slots=True)
+class ChangeSet:
+    """What changed between two published snapshots."""
+
+    # Activities added, removed or with a changed entry
+    activity_ids: frozenset[int] = frozenset()
+    current_activity_changed: bool = False
+    # Key catalog kinds with any changed catalog
+    key_kinds: frozenset[str] = frozenset()
+
+    def __bool__(self) -> bool:
+        """Return True if anything changed."""
+        return bool(self.activity_ids or self.current_activity_changed or self.key_kinds)
+
+
+def diff_state(old: dict[str, Any], new: dict[str, Any]) -> ChangeSet:
+    """Return the changes between two snapshots.
+
+    Relies on copy-on-write: unchanged subtrees are the same objects, so the
+    diff is a handful of identity checks unless activities actually changed.
+
+    Args:
+        old: Previously published snapshot
+        new: Snapshot being published
+
+    Returns:
+        Change set (empty if ``new`` is ``old``)
+    """
+    if old is new:
+        return ChangeSet()
+
+    old_activities = old["activities"]
+    new_activities = new["activities"]
+    activity_ids: frozenset[int] = frozenset()
+    if old_activities is not new_activities:
+        activity_ids = frozenset(
+            activity_id
+            for activity_id in old_activities.keys() | new_activities.keys()
+            if old_activities.get(activity_id) is not new_activities.get(activity_id)
+        )
+
+    old_keys = old["keys"]
+    new_keys = new["keys"]
+    key_kinds: frozenset[str] = frozenset()
+    if old_keys is not new_keys:
+        key_kinds = frozenset(kind for kind in new_keys if old_keys.get(kind) is not new_keys[kind])
+
+    return ChangeSet(
+        activity_ids,
+        old["current_activity_id"] != new["current_activity_id"],
+        key_kinds,
+    )
@@ -108,6 +108,10 @@ async def async_setup_entry(
 class SofabatonActivitySwitch(CoordinatorEntity, SwitchEntity):
     """Representation of a Sofabaton Activity as a Switch."""
 
+    # The activity ID never changes and the state attribute duplicates the
+    # entity state, so neither is worth storing in the recorder
+    _unrecorded_attributes = frozenset({"activity_id", "state"})
+
     def __init__(
         self,
         coordinator,
@@ -245,14 +249,11 @@ class SofabatonActivitySwitch(CoordinatorEntity, SwitchEntity):
         )
 
         try:
-            await self.coordinator.api_client.async_start_activity(self._activity_id)
+            # Shows the activity as started right away; the Hub's status push
+            # confirms it (the activity list is only re-requested on mismatch)
+            await self.coordinator.async_control_activity(self._activity_id, "on")
             _LOGGER.info("Successfully sent start command for activity %s", self._activity_id)
 
-            # Request basic data to update activity states
-            # This will trigger MQTT request and update the coordinator data
-            # Note: If request is already in progress, this will be skipped
-            await self.coordinator.async_request_basic_data()
-
         except Exception as err:
             _LOGGER.error(
                 "Error turning on activity %s: %s",
@@ -270,14 +271,11 @@ class SofabatonActivitySwitch(CoordinatorEntity, SwitchEntity):
         )
 
         try:
-            await self.coordinator.api_client.async_stop_activity(self._activity_id)
+            # Shows the activity as stopped right away; the Hub's status push
+            # confirms it (the activity list is only re-requested on mismatch)
+            await self.coordinator.async_control_activity(self._activity_id, "off")
             _LOGGER.info("Successfully sent stop command for activity %s", self._activity_id)
 
-            # Request basic data to update activity states
-            # This will trigger MQTT request and update the coordinator data
-            # Note: If request is already in progress, this will be skipped
-            await self.coordinator.async_request_basic_data()
-
         except Exception as err:
             _LOGGER.error(
                 "Error turning off activity %s: %s",
@@ -288,7 +286,13 @@ class SofabatonActivitySwitch(CoordinatorEntity, SwitchEntity):
 
     @callback
     def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
+        """Handle updated data from the coordinator.
+
+        Only writes state when this activity was added, removed or changed;
+        key list responses and other activities' changes leave it untouched.
+        """
+        if self._activity_id not in self.coordinator.last_changes.activity_ids:
+            return
         _LOGGER.debug(
             "Coordinator update received for activity switch %s (activity_id=%s)",
             self._attr_name,
@@ -0,0 +1,178 @@
+"""Websocket API for Sofabaton Hub key catalogs.
+
+Key catalogs are too large to live in entity state attributes, where every
+change would be written to the state machine, the recorder and every
+connected frontend. Cards fetch them on demand with ``sofabaton_hub/keys``
+and can follow changes with ``sofabaton_hub/subscribe_keys``.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv, entity_registry as er
+
+from .const import DOMAIN, KEY_KINDS
+from .coordinator import SofabatonHubDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@callback
+def async_setup(hass: HomeAssistant) -> None:
+    """Register the websocket commands.
+
+    Args:
+        hass: Home Assistant instance
+    """
+    websocket_api.async_register_command(hass, websocket_get_keys)
+    websocket_api.async_register_command(hass, websocket_subscribe_keys)
+
+
+@callback
+def _async_get_coordinator(
+    hass: HomeAssistant, entity_id: str
+) -> SofabatonHubDataUpdateCoordinator | None:
+    """Return the coordinator of the config entry owning an entity.
+
+    Args:
+        hass: Home Assistant instance
+        entity_id: Remote entity ID
+
+    Returns:
+        Coordinator, or None if the entity does not belong to a loaded hub
+    """
+    entity = er.async_get(hass).async_get(entity_id)
+    if entity is None or entity.platform != DOMAIN:
+        return None
+    entry_data = hass.data.get(DOMAIN, {}).get(entity.config_entry_id)
+    if entry_data is None:
+        return None
+    return entry_data["coordinator"]
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/keys",
+        vol.Required("entity_id"): cv.entity_id,
+        vol.Required("activity_id"): vol.Coerce(int),
+        vol.Optional("kind"): vol.In(KEY_KINDS),
+    }
+)
+@websocket_api.async_response
+async def websocket_get_keys(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Return the key catalogs of one activity, asking the Hub if needed.
+
+    Without ``kind`` all three catalogs are returned. A catalog the Hub did
+    not answer for in time, or that could not be requested, is returned as
+    None.
+
+    Args:
+        hass: Home Assistant instance
+        connection: Websocket connection
+        msg: Command message
+    """
+    coordinator = _async_get_coordinator(hass, msg["entity_id"])
+    if coordinator is None:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, "Sofabaton Hub entity not found")
+        return
+
+    activity_id = msg["activity_id"]
+    kinds = (msg["kind"],) if "kind" in msg else KEY_KINDS
+    # coordinator.data only keeps the activity requested last: use the returned catalogs
+    catalogs = await asyncio.gather(
+        *(coordinator.async_request_keys(kind, activity_id) for kind in kinds)
+    )
+    connection.send_result(
+        msg["id"],
+        {
+            "activity_id": activity_id,
+            "keys": dict(zip(kinds, catalogs)),
+        },
+    )
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/subscribe_keys",
+        vol.Required("entity_id"): cv.entity_id,
+        vol.Optional("activity_id"): vol.Coerce(int),
+        vol.Optional("kind"): vol.In(KEY_KINDS),
+    }
+)
+@callback
+def websocket_subscribe_keys(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Subscribe to key catalog changes.
+
+    The catalogs currently known are sent right after the subscription is
+    confirmed; afterwards an event is sent for every catalog that changes.
+    Subscribing does not ask the Hub for anything, use ``sofabaton_hub/keys``
+    for that. Unsubscribing from an activity withdraws its key list requests
+    that have not been sent to the Hub yet, unless another card still shows
+    the activity.
+
+    Args:
+        hass: Home Assistant instance
+        connection: Websocket connection
+        msg: Command message
+    """
+    coordinator = _async_get_coordinator(hass, msg["entity_id"])
+    if coordinator is None:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, "Sofabaton Hub entity not found")
+        return
+
+    msg_id = msg["id"]
+    activity_filter = msg.get("activity_id")
+    kind_filter = msg.get("kind")
+    # (kind, activity_id) -> last catalog sent, compared by identity
+    sent: dict[tuple[str, int], Any] = {}
+
+    @callback
+    def send_changes(kinds: frozenset[str] | tuple[str, ...]) -> None:
+        """Send catalogs of the given kinds that changed since the last event."""
+        keys = coordinator.data["keys"]
+        for kind in kinds:
+            if kind_filter is not None and kind != kind_filter:
+                continue
+            for activity_id, catalog in keys[kind].items():
+                if activity_filter is not None and activity_id != activity_filter:
+                    continue
+                if sent.get((kind, activity_id)) is catalog:
+                    continue
+                sent[(kind, activity_id)] = catalog
+                connection.send_message(
+                    websocket_api.event_message(
+                        msg_id, {"kind": kind, "activity_id": activity_id, "keys": catalog}
+                    )
+                )
+
+    @callback
+    def coordinator_updated() -> None:
+        """Forward key catalog changes of the last coordinator update."""
+        if key_kinds := coordinator.last_changes.key_kinds:
+            send_changes(key_kinds)
+
+    unsubscribe = coordinator.async_add_listener(coordinator_updated)
+    if activity_filter is not None:
+        remove_viewer = coordinator.async_add_key_viewer(activity_filter)
+
+        @callback
+        def unsubscribe_and_leave() -> None:
+            """Stop the events and drop the activity's stale key requests."""
+            unsubscribe()
+            remove_viewer()
+
+        connection.subscriptions[msg_id] = unsubscribe_and_leave
+    else:
+        connection.subscriptions[msg_id] = unsubscribe
+    connection.send_result(msg_id)
+    send_changes(KEY_KINDS)
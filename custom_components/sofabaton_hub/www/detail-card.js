@@ -30,10 +30,6 @@ function checkIfSofabatonHub(entityId, hass) {
     attributes.devices !== undefined ||
     // Check for current_activity_id attribute
     attributes.current_activity_id !== undefined ||
-    // Check for assigned_keys and other key-related attributes
-    attributes.assigned_keys !== undefined ||
-    attributes.macro_keys !== undefined ||
-    attributes.favorite_keys !== undefined ||
     // Check integration attribute (if exists)
     attributes.integration === 'sofabaton_hub' ||
     // Check device_class or other identifiers
@@ -116,6 +112,25 @@ const REMOTE_KEYS = {
     "c": {"id": 151, "text": "C"}
 };
 
+// Detail card page -> key catalog kind (sofabaton_hub/keys websocket command)
+const PAGE_KEY_KINDS = {
+    1: "assigned",
+    2: "macros",
+    3: "favorites"
+};
+
+// Macro and favorite catalogs longer than the threshold are rendered one
+// window at a time; the window grows when its end scrolls into view
+const LIST_WINDOW_THRESHOLD = 48;
+const LIST_WINDOW_SIZE = 36;
+
+// Memoized page templates kept per (page, activity)
+const PAGE_TEMPLATE_CACHE_SIZE = 12;
+
+// Direction and volume/channel keys held longer than this (ms) are repeated
+// by the integration (repeat_start) until released (repeat_stop)
+const KEY_HOLD_DELAY = 400;
+
 // Detail card class
 class SofabatonDetailCard extends LitElement {
 
@@ -599,6 +614,11 @@ class SofabatonDetailCard extends LitElement {
         }
       }
       
+      /* End of a windowed macro/favorite list */
+      .list-sentinel {
+        height: 1px;
+      }
+
       @media (max-width: 320px) {
         .macro-grid, .favorite-grid {
           grid-template-columns: 1fr;
@@ -622,6 +642,8 @@ class SofabatonDetailCard extends LitElement {
       _isRequestingPage1: { type: Boolean, state: true }, // Page 1 (assigned_keys) request state
       _isRequestingPage2: { type: Boolean, state: true }, // Page 2 (macro_keys) request state
       _isRequestingPage3: { type: Boolean, state: true }, // Page 3 (favorite_keys) request state
+      _keys: { type: Object, state: true }, // Key catalogs from the websocket API: kind -> {activityId: keys}
+      _listWindow: { type: Number, state: true }, // Entries rendered of long macro/favorite catalogs
     };
   }
 
@@ -632,7 +654,12 @@ class SofabatonDetailCard extends LitElement {
     this._isRequestingPage1 = false; // Page 1 request state
     this._isRequestingPage2 = false; // Page 2 request state
     this._isRequestingPage3 = false; // Page 3 request state
-    this._isRefreshingState = false; // Flag to prevent infinite refresh loops
+    this._keys = { assigned: {}, macros: {}, favorites: {} }; // Key catalogs by kind and activity
+    this._keyVersions = { assigned: {}, macros: {}, favorites: {} }; // Catalog versions by kind and activity
+    this._pageTemplates = new Map(); // "page:activityId" -> {inputs, template}
+    this._listWindow = LIST_WINDOW_SIZE;
+    this._renderedLastUpdated = null; // last_updated of the entity state last rendered
+    this._heldKey = null; // {activityId, keyId, timer, repeating} while a repeatable key is down
   }
 
   // Get the latest state object from hass.states
@@ -687,9 +714,6 @@ class SofabatonDetailCard extends LitElement {
     // Always force refresh when dialog opens to get latest data
     this._requestKeysForCurrentPage(true);
 
-    // Monitor hass.states changes for debugging
-    this._monitorStateChanges();
-
     // If initial request failed due to missing hass/stateObj, retry after a short delay
     if (!this.hass || !this.stateObj) {
       console.log("⏰ Initial request failed, will retry in 100ms");
@@ -726,46 +750,18 @@ class SofabatonDetailCard extends LitElement {
       this._activityChangeListener = null;
     }
 
-    // Clean up periodic state check intervals for all pages
-    if (this._stateCheckIntervalPage1) {
-      console.log("🧹 Clearing page 1 periodic state check interval");
-      clearInterval(this._stateCheckIntervalPage1);
-      this._stateCheckIntervalPage1 = null;
-    }
-    if (this._stateCheckIntervalPage2) {
-      console.log("🧹 Clearing page 2 periodic state check interval");
-      clearInterval(this._stateCheckIntervalPage2);
-      this._stateCheckIntervalPage2 = null;
-    }
-    if (this._stateCheckIntervalPage3) {
-      console.log("🧹 Clearing page 3 periodic state check interval");
-      clearInterval(this._stateCheckIntervalPage3);
-      this._stateCheckIntervalPage3 = null;
-    }
+    // Stop key catalog push updates
+    this._unsubscribeKeys();
 
-    // Clean up state monitor interval
-    if (this._stateMonitorInterval) {
-      console.log("🧹 Clearing state monitor interval");
-      clearInterval(this._stateMonitorInterval);
-      this._stateMonitorInterval = null;
-    }
+    // Release a held key so the integration stops repeating it
+    this._releaseKey();
 
-    // Clean up all pending timeouts for all pages
-    if (this._requestTimeoutPage1) {
-      console.log("🧹 Clearing page 1 request timeout");
-      clearTimeout(this._requestTimeoutPage1);
-      this._requestTimeoutPage1 = null;
-    }
-    if (this._requestTimeoutPage2) {
-      console.log("🧹 Clearing page 2 request timeout");
-      clearTimeout(this._requestTimeoutPage2);
-      this._requestTimeoutPage2 = null;
-    }
-    if (this._requestTimeoutPage3) {
-      console.log("🧹 Clearing page 3 request timeout");
-      clearTimeout(this._requestTimeoutPage3);
-      this._requestTimeoutPage3 = null;
+    // Stop watching the end of long lists
+    if (this._listObserver) {
+      this._listObserver.disconnect();
+      this._listObserver = null;
     }
+    this._observedSentinel = null;
 
     // Clean up retry timeout
     if (this._retryTimeout) {
@@ -774,28 +770,11 @@ class SofabatonDetailCard extends LitElement {
       this._retryTimeout = null;
     }
 
-    // Notify backend to clear _is_requesting_keys flag
-    // This allows activity_list updates to proceed normally after dialog is closed
-    if (this.hass && this.stateObj) {
-      console.log("🔓 Notifying backend to clear _is_requesting_keys flag");
-      this.hass.callService("remote", "send_command", {
-        entity_id: ensureEntityIdIsString(this.stateObj.entity_id),
-        command: ["type:clear_requesting_keys_flag"],
-      }).catch(error => {
-        console.error("❌ Error clearing _is_requesting_keys flag:", error);
-      });
-    }
-
     console.log("🔌 Detail card disconnected - cleaned up all resources");
   }
 
   // Decide whether update is needed
   shouldUpdate(changedProperties) {
-    // Always update if hass or stateObj changes
-    if (changedProperties.has('hass') || changedProperties.has('stateObj')) {
-      return true;
-    }
-    
     // Update if selectedActivityId changes
     if (changedProperties.has('selectedActivityId')) {
       const oldValue = changedProperties.get('selectedActivityId');
@@ -805,20 +784,47 @@ class SofabatonDetailCard extends LitElement {
       // Only request fresh data if the value actually changed
       if (oldValue !== newValue && newValue) {
         console.log("🎯 Requesting fresh data for new selectedActivityId:", newValue);
-        this._requestKeysForCurrentActivity();
+        this._requestKeysForCurrentPage();
       }
       return true;
     }
-    
-    // Also update if internal state changes
-    if (changedProperties.has('_currentPage') ||
-        changedProperties.has('_isRequestingPage1') ||
-        changedProperties.has('_isRequestingPage2') ||
-        changedProperties.has('_isRequestingPage3')) {
-      return true;
+
+    // hass is replaced whenever any entity in Home Assistant changes, but
+    // only this entity's state is rendered: skip updates that did not touch it
+    if (changedProperties.size === 1 && changedProperties.has('hass')) {
+      const latestState = this._getLatestStateObj();
+      return !!latestState && latestState.last_updated !== this._renderedLastUpdated;
     }
-    
-    return super.shouldUpdate(changedProperties);
+
+    return true;
+  }
+
+  // Prepare state for the coming render
+  willUpdate(changedProperties) {
+    // Keep stateObj in sync with hass.states (without another update cycle)
+    if (changedProperties.has('hass') && this.stateObj) {
+      const latestState = this._getLatestStateObj();
+      if (latestState && latestState !== this.stateObj && latestState.entity_id === this.stateObj.entity_id) {
+        this.stateObj = latestState;
+      }
+    }
+
+    // Start long lists from the top on another page or activity
+    if (changedProperties.has('_currentPage') || changedProperties.has('selectedActivityId')) {
+      this._listWindow = LIST_WINDOW_SIZE;
+    }
+  }
+
+  // Measure update (render + commit) time when the frame-time harness is loaded
+  update(changedProperties) {
+    const stats = window.sofabatonFrameStats;
+    if (!stats) {
+      super.update(changedProperties);
+      return;
+    }
+    const start = performance.now();
+    super.update(changedProperties);
+    stats.record(performance.now() - start);
   }
 
   // Helper method to get current state from hass
@@ -844,296 +850,36 @@ class SofabatonDetailCard extends LitElement {
       console.log("🔍   Last updated:", lastUpdatedTime.toISOString());
     }
 
-    console.log("🔍   latestState.attributes.assigned_keys:", latestState.attributes?.assigned_keys);
-
     return latestState;
   }
 
-  // Force refresh the entity state from Home Assistant
-  async _forceRefreshState() {
-    if (!this.hass || !this.stateObj) return;
-
-    // Prevent infinite refresh loops
-    if (this._isRefreshingState) {
-      console.log("🔄 Already refreshing state, skipping...");
-      return;
-    }
-
-    this._isRefreshingState = true;
-
-    try {
-      // Method 1: Call the update_entity service
-      console.log("🔄 Calling homeassistant.update_entity for:", this.stateObj.entity_id);
-      await this.hass.callService('homeassistant', 'update_entity', {
-        entity_id: this.stateObj.entity_id
-      });
-      console.log("✅ Entity state refresh requested");
-
-      // Wait a bit for the state to update
-      await new Promise(resolve => setTimeout(resolve, 300));
-
-      // Method 2: Directly fetch the latest state from Home Assistant
-      if (this.hass.connection) {
-        console.log("🔄 Fetching latest state directly from Home Assistant...");
-        const states = await this.hass.connection.sendMessagePromise({
-          type: 'get_states'
-        });
-
-        const latestState = states.find(s => s.entity_id === this.stateObj.entity_id);
-        if (latestState) {
-          console.log("✅ Got latest state from Home Assistant:");
-          console.log("   last_updated:", latestState.last_updated);
-          console.log("   assigned_keys:", latestState.attributes?.assigned_keys);
-
-          // Update our stateObj with the latest state
-          this.stateObj = latestState;
-
-          // Also update hass.states to keep it in sync
-          this.hass.states[this.stateObj.entity_id] = latestState;
-        } else {
-          console.log("⚠️ Could not find entity in states response");
-        }
-      }
-
-      // Trigger a re-render to pick up the new state
-      this.requestUpdate();
-      console.log("🔄 Re-render triggered after state refresh");
-    } catch (error) {
-      console.error("❌ Error refreshing entity state:", error);
-    } finally {
-      this._isRefreshingState = false;
-    }
-  }
-
   // Called when properties are updated
   updated(changedProperties) {
     super.updated(changedProperties);
 
-    console.log("🔍 updated() called - changed properties:", Array.from(changedProperties.keys()));
-
-    if (changedProperties.has('stateObj')) {
-      console.log("� Frontend received stateObj update");
-      console.log("� stateObj reference:", this.stateObj);
-      console.log("� stateObj.entity_id:", this.stateObj?.entity_id);
-      console.log("� stateObj.state:", this.stateObj?.state);
-      console.log("� stateObj.attributes:", this.stateObj?.attributes);
-      console.log("📥 Current stateObj.attributes.assigned_keys:", this.stateObj?.attributes?.assigned_keys);
-      console.log("� Current stateObj.attributes.macro_keys:", this.stateObj?.attributes?.macro_keys);
-      console.log("� Current stateObj.attributes.favorite_keys:", this.stateObj?.attributes?.favorite_keys);
-    }
-
-    if (changedProperties.has('hass')) {
-      console.log("📥 Frontend received hass update");
-      console.log("📥 hass timestamp:", new Date().toISOString());
-
-      // Get the latest state from hass.states
-      const currentState = this._getCurrentState();
-      if (currentState) {
-        console.log("📥 Current state from hass.states:");
-        console.log("📥   last_updated:", currentState.last_updated);
-        console.log("📥   assigned_keys:", currentState.attributes?.assigned_keys);
-        console.log("📥   macro_keys:", currentState.attributes?.macro_keys);
-        console.log("📥   favorite_keys:", currentState.attributes?.favorite_keys);
-
-        // Update stateObj with the latest state from hass.states
-        // This ensures we always have the most up-to-date data
-        if (this.stateObj && currentState.entity_id === this.stateObj.entity_id) {
-          const oldLastUpdated = this.stateObj.last_updated;
-          const newLastUpdated = currentState.last_updated;
-          const oldAssignedKeys = this.stateObj.attributes?.assigned_keys;
-          const newAssignedKeys = currentState.attributes?.assigned_keys;
-
-          console.log("📥 Comparing states:");
-          console.log("📥   Old last_updated:", oldLastUpdated);
-          console.log("📥   New last_updated:", newLastUpdated);
-          console.log("📥   Old assigned_keys:", oldAssignedKeys);
-          console.log("📥   New assigned_keys:", newAssignedKeys);
-
-          // Check if state has actually changed
-          if (newLastUpdated !== oldLastUpdated ||
-              JSON.stringify(oldAssignedKeys) !== JSON.stringify(newAssignedKeys)) {
-            console.log("� Frontend: State changed! Updating stateObj");
-            console.log("�   last_updated changed:", newLastUpdated !== oldLastUpdated);
-            console.log("�   assigned_keys changed:", JSON.stringify(oldAssignedKeys) !== JSON.stringify(newAssignedKeys));
-
-            // Update stateObj with the latest state
-            this.stateObj = currentState;
-          } else {
-            console.log("⏰ No state change detected in hass update");
-          }
-        }
-      } else {
-        console.warn("⚠️ Entity state not found in hass.states");
-      }
-
-      // Check request completion whenever hass updates
-      const isRequesting = this._isRequestingPage1 || this._isRequestingPage2 || this._isRequestingPage3;
-      if (isRequesting) {
-        console.log("📥 hass updated while requesting - checking completion");
-        this._checkRequestCompletion();
-      }
-    }
-  }
-
-  // Check if request is completed
-  async _checkRequestCompletion() {
-    // Skip if component is disconnected
-    if (this._isDisconnected) {
-      console.log("🔍 _checkRequestCompletion - skipping, component is disconnected");
+    // Extend the rendered window when the end of a long list comes into view
+    // (observe again after every extension: the callback reports the
+    // current intersection, so a short window keeps growing until it fills)
+    const sentinel = this.renderRoot.querySelector(".list-sentinel");
+    if (sentinel === this._observedSentinel && !changedProperties.has('_listWindow')) {
       return;
     }
-
-    console.log("🔍 _checkRequestCompletion called");
-    const isRequesting = this._isRequestingPage1 || this._isRequestingPage2 || this._isRequestingPage3;
-    console.log("🔍   isRequesting:", isRequesting, "page:", this._currentPage);
-
-    if (!isRequesting) {
-      console.log("🔍   Skipping - not requesting");
-      return;
-    }
-
-    // Get the latest state from hass.states (no need to force refresh, hass updates automatically)
-    const currentState = this._getCurrentState();
-    if (!currentState) {
-      console.log("�   Skipping - no current state");
-      return;
+    if (this._listObserver) {
+      this._listObserver.disconnect();
     }
-
-    console.log("�   Current state:", currentState);
-    console.log("Checking request completion - page:", this._currentPage);
-
-    const attributes = currentState.attributes;
-    console.log("🔍   attributes:", attributes);
-    console.log("🔍   attributes.assigned_keys:", attributes.assigned_keys);
-
-    const currentActivityId = attributes.current_activity_id;
-    const activities = attributes.activities || [];
-
-    // Check if there's a running activity
-    const activeActivity = activities.find(a => a.state === 'on');
-    // 优先使用从main-card传递的selectedActivityId，其次使用currentActivityId，最后使用运行中的活动
-    const effectiveActivityId = this.selectedActivityId || currentActivityId || (activeActivity ? activeActivity.id : null);
-
-    console.log("Request completion check - selectedActivityId:", this.selectedActivityId, "effectiveActivityId:", effectiveActivityId);
-
-    if (effectiveActivityId) {
-      const assignedKeys = attributes.assigned_keys?.[effectiveActivityId];
-      const macroKeys = attributes.macro_keys?.[effectiveActivityId];
-      const favoriteKeys = attributes.favorite_keys?.[effectiveActivityId];
-
-      console.log("Checking completion for activity", effectiveActivityId, "page", this._currentPage);
-      console.log("  assigned_keys:", assignedKeys?.length || 0, "keys");
-      console.log("  macro_keys:", macroKeys?.length || 0, "keys");
-      console.log("  favorite_keys:", favoriteKeys?.length || 0, "keys");
-
-      // Check completion based on current page
-      // Must check both: data exists AND data was updated after request was sent
-      let hasResponse = false;
-      let keyType = '';
-
-      if (this._currentPage === 1) {
-        const hasData = attributes.assigned_keys && attributes.assigned_keys.hasOwnProperty(effectiveActivityId);
-        const requestTimestamp = this._requestTimestampPage1;
-        const dataUpdatedAfterRequest = requestTimestamp && currentState.last_updated > requestTimestamp;
-        hasResponse = hasData && dataUpdatedAfterRequest;
-        keyType = 'assigned_keys';
-        console.log(`🔍 Page 1 completion check:`, {
-          'hasData': hasData,
-          'requestTimestamp': requestTimestamp,
-          'last_updated': currentState.last_updated,
-          'dataUpdatedAfterRequest': dataUpdatedAfterRequest,
-          'hasResponse': hasResponse
-        });
-      } else if (this._currentPage === 2) {
-        const hasData = attributes.macro_keys && attributes.macro_keys.hasOwnProperty(effectiveActivityId);
-        const requestTimestamp = this._requestTimestampPage2;
-        const dataUpdatedAfterRequest = requestTimestamp && currentState.last_updated > requestTimestamp;
-        hasResponse = hasData && dataUpdatedAfterRequest;
-        keyType = 'macro_keys';
-        console.log(`🔍 Page 2 completion check:`, {
-          'hasData': hasData,
-          'requestTimestamp': requestTimestamp,
-          'last_updated': currentState.last_updated,
-          'dataUpdatedAfterRequest': dataUpdatedAfterRequest,
-          'hasResponse': hasResponse
-        });
-      } else if (this._currentPage === 3) {
-        const hasData = attributes.favorite_keys && attributes.favorite_keys.hasOwnProperty(effectiveActivityId);
-        const requestTimestamp = this._requestTimestampPage3;
-        const dataUpdatedAfterRequest = requestTimestamp && currentState.last_updated > requestTimestamp;
-        hasResponse = hasData && dataUpdatedAfterRequest;
-        keyType = 'favorite_keys';
-        console.log(`🔍 Page 3 completion check:`, {
-          'hasData': hasData,
-          'requestTimestamp': requestTimestamp,
-          'last_updated': currentState.last_updated,
-          'dataUpdatedAfterRequest': dataUpdatedAfterRequest,
-          'hasResponse': hasResponse
-        });
-      }
-
-      console.log(`Check completion - page ${this._currentPage}, keyType: ${keyType}, hasResponse: ${hasResponse}`);
-
-      if (hasResponse) {
-        console.log(`✅ Frontend: Page ${this._currentPage} request completed for activity ${effectiveActivityId}`);
-
-        // Clear requesting state for current page
-        if (this._currentPage === 1) {
-          this._isRequestingPage1 = false;
-        } else if (this._currentPage === 2) {
-          this._isRequestingPage2 = false;
-        } else if (this._currentPage === 3) {
-          this._isRequestingPage3 = false;
-        }
-
-        // Clean up periodic state check for this page
-        const intervalKey = `_stateCheckIntervalPage${this._currentPage}`;
-        if (this[intervalKey]) {
-          console.log(`🔄 Cleaning up periodic state check for page ${this._currentPage}`);
-          clearInterval(this[intervalKey]);
-          this[intervalKey] = null;
-        }
-
-        this.requestUpdate(); // Trigger re-render
-      } else {
-        console.log(`⏳ Frontend: Still waiting for ${keyType} response for activity ${effectiveActivityId}`);
+    this._observedSentinel = sentinel;
+    if (sentinel) {
+      if (!this._listObserver) {
+        this._listObserver = new IntersectionObserver((entries) => {
+          if (entries.some(entry => entry.isIntersecting)) {
+            this._listWindow += LIST_WINDOW_SIZE;
+          }
+        }, { rootMargin: "200px" });
       }
-    } else {
-      console.log("❌ No effective activity ID found, cannot complete request");
+      this._listObserver.observe(sentinel);
     }
   }
 
-  // Monitor hass.states changes for debugging
-  _monitorStateChanges() {
-    if (!this.hass || !this.stateObj) {
-      return;
-    }
-
-    const entityId = this.stateObj.entity_id;
-    const initialState = this.hass.states[entityId];
-    const initialLastUpdated = initialState?.last_updated;
-
-    console.log(`🔍 Starting state monitoring for ${entityId}`);
-    console.log(`🔍 Initial last_updated: ${initialLastUpdated}`);
-
-    // Check every 1 second for state changes
-    this._stateMonitorInterval = setInterval(() => {
-      if (this._isDisconnected) {
-        clearInterval(this._stateMonitorInterval);
-        return;
-      }
-
-      const currentState = this.hass.states[entityId];
-      const currentLastUpdated = currentState?.last_updated;
-
-      if (currentLastUpdated !== initialLastUpdated) {
-        console.log(`🎉 STATE CHANGED! last_updated changed from ${initialLastUpdated} to ${currentLastUpdated}`);
-        console.log(`🎉 New assigned_keys:`, currentState.attributes.assigned_keys);
-        clearInterval(this._stateMonitorInterval);
-      }
-    }, 1000);
-  }
-
   // Request key data for current page (on-demand loading)
   _requestKeysForCurrentPage(forceRefresh = false) {
     // Skip if component is disconnected
@@ -1165,28 +911,19 @@ class SofabatonDetailCard extends LitElement {
       return;
     }
 
-    // Determine which request to make based on current page
-    let requestType, isRequesting, hasData;
-    if (this._currentPage === 1) {
-      requestType = 'request_assigned_keys';
-      isRequesting = this._isRequestingPage1;
-      hasData = attributes.assigned_keys && attributes.assigned_keys.hasOwnProperty(effectiveActivityId);
-      console.log(`🔍 Page 1 check - hasData: ${hasData}, assigned_keys:`, attributes.assigned_keys, `effectiveActivityId: ${effectiveActivityId}`);
-    } else if (this._currentPage === 2) {
-      requestType = 'request_macro_keys';
-      isRequesting = this._isRequestingPage2;
-      hasData = attributes.macro_keys && attributes.macro_keys.hasOwnProperty(effectiveActivityId);
-      console.log(`🔍 Page 2 check - hasData: ${hasData}, macro_keys:`, attributes.macro_keys, `effectiveActivityId: ${effectiveActivityId}`);
-    } else if (this._currentPage === 3) {
-      requestType = 'request_favorite_keys';
-      isRequesting = this._isRequestingPage3;
-      hasData = attributes.favorite_keys && attributes.favorite_keys.hasOwnProperty(effectiveActivityId);
-      console.log(`🔍 Page 3 check - hasData: ${hasData}, favorite_keys:`, attributes.favorite_keys, `effectiveActivityId: ${effectiveActivityId}`);
-    }
+    // Follow catalog changes of this activity (cached catalogs arrive right away)
+    this._subscribeKeys(effectiveActivityId);
+
+    // Determine which key catalog the current page shows
+    const page = this._currentPage;
+    const kind = PAGE_KEY_KINDS[page];
+    const requestingKey = `_isRequestingPage${page}`;
+    const hasData = this._keys[kind].hasOwnProperty(effectiveActivityId);
+    console.log(`🔍 Page ${page} check - hasData: ${hasData}, ${kind}:`, this._keys[kind], `effectiveActivityId: ${effectiveActivityId}`);
 
     // Skip if data already exists for this page (unless force refresh)
     if (hasData && !forceRefresh) {
-      console.log(`✅ Page ${this._currentPage} data already exists for activity ${effectiveActivityId}, skipping request`);
+      console.log(`✅ Page ${page} data already exists for activity ${effectiveActivityId}, skipping request`);
       return;
     }
 
@@ -1195,181 +932,90 @@ class SofabatonDetailCard extends LitElement {
     }
 
     // Skip if already requesting for this page
-    if (isRequesting) {
-      console.log(`❌ Page ${this._currentPage} request already in progress, skipping duplicate request`);
+    if (this[requestingKey]) {
+      console.log(`❌ Page ${page} request already in progress, skipping duplicate request`);
       return;
     }
 
-    console.log(`🚀 Frontend: Requesting ${requestType} for activity ${effectiveActivityId} (page ${this._currentPage})`);
-
-    // Set requesting state for current page and record request timestamp
-    if (this._currentPage === 1) {
-      this._isRequestingPage1 = true;
-      this._requestTimestampPage1 = new Date().toISOString();
-      console.log(`📝 Recording request timestamp for page 1: ${this._requestTimestampPage1}`);
-    } else if (this._currentPage === 2) {
-      this._isRequestingPage2 = true;
-      this._requestTimestampPage2 = new Date().toISOString();
-      console.log(`📝 Recording request timestamp for page 2: ${this._requestTimestampPage2}`);
-    } else if (this._currentPage === 3) {
-      this._isRequestingPage3 = true;
-      this._requestTimestampPage3 = new Date().toISOString();
-      console.log(`📝 Recording request timestamp for page 3: ${this._requestTimestampPage3}`);
-    }
-
-    this.requestUpdate(); // Trigger re-render to show loading state
-
-    // Start periodic state checking while request is active
-    this._startPeriodicStateCheck(effectiveActivityId, this._currentPage);
+    console.log(`🚀 Frontend: Requesting ${kind} keys for activity ${effectiveActivityId} (page ${page})`);
 
-    // Send request
-    console.log("📤 Frontend: Calling send_command service");
-    console.log("📤   entity_id:", ensureEntityIdIsString(this.stateObj.entity_id));
-    console.log("📤   command:", [`type:${requestType}`, `activity_id:${effectiveActivityId}`]);
+    // Set requesting state for current page (shows the loading hint)
+    this[requestingKey] = true;
 
-    this.hass.callService("remote", "send_command", {
+    // The backend answers from its key cache or waits for the Hub's response,
+    // so the result of this call is the complete catalog
+    this.hass.callWS({
+      type: "sofabaton_hub/keys",
       entity_id: ensureEntityIdIsString(this.stateObj.entity_id),
-      command: [`type:${requestType}`, `activity_id:${effectiveActivityId}`],
-    }).then(() => {
-      console.log(`✅ ${requestType} service called successfully`);
+      activity_id: effectiveActivityId,
+      kind: kind,
+    }).then(result => {
+      const keys = result.keys[kind];
+      console.log(`✅ Received ${kind} keys for activity ${effectiveActivityId}:`, keys);
+      // null means the Hub did not answer in time
+      if (keys !== null && !this._isDisconnected) {
+        this._storeKeys(kind, effectiveActivityId, keys);
+      }
     }).catch(error => {
-      console.error(`❌ Error calling ${requestType} service:`, error);
-      // Clear requesting state on error
-      if (this._currentPage === 1) {
-        this._isRequestingPage1 = false;
-      } else if (this._currentPage === 2) {
-        this._isRequestingPage2 = false;
-      } else if (this._currentPage === 3) {
-        this._isRequestingPage3 = false;
-      }
-      this.requestUpdate();
+      console.error(`❌ Error requesting ${kind} keys:`, error);
+    }).finally(() => {
+      this[requestingKey] = false;
     });
+  }
 
-    // Set a timeout to stop requesting state after 30 seconds
-    const timeoutKey = `_requestTimeoutPage${this._currentPage}`;
-    if (this[timeoutKey]) {
-      clearTimeout(this[timeoutKey]);
+  // Subscribe to key catalog changes of one activity (replaces the previous subscription)
+  _subscribeKeys(activityId) {
+    if (this._keysSubscriptionActivityId === activityId || !this.hass?.connection) {
+      return;
     }
-
-    this[timeoutKey] = setTimeout(() => {
-      if (this._isDisconnected) {
-        console.log(`⏰ Page ${this._currentPage} timeout callback - skipping, component is disconnected`);
-        this[timeoutKey] = null;
-        return;
-      }
-
-      const stillRequesting = (this._currentPage === 1 && this._isRequestingPage1) ||
-                              (this._currentPage === 2 && this._isRequestingPage2) ||
-                              (this._currentPage === 3 && this._isRequestingPage3);
-
-      if (stillRequesting) {
-        console.warn(`⏰ Page ${this._currentPage} request timeout after 15 seconds - giving up`);
-        if (this._currentPage === 1) {
-          this._isRequestingPage1 = false;
-        } else if (this._currentPage === 2) {
-          this._isRequestingPage2 = false;
-        } else if (this._currentPage === 3) {
-          this._isRequestingPage3 = false;
-        }
-        this.requestUpdate();
+    this._unsubscribeKeys();
+    this._keysSubscriptionActivityId = activityId;
+
+    console.log("📡 Subscribing to key catalog changes for activity", activityId);
+    const subscription = this.hass.connection.subscribeMessage(
+      (event) => {
+        console.log(`📡 Received ${event.kind} keys for activity ${event.activity_id}:`, event.keys);
+        this._storeKeys(event.kind, event.activity_id, event.keys);
+      },
+      {
+        type: "sofabaton_hub/subscribe_keys",
+        entity_id: ensureEntityIdIsString(this.stateObj.entity_id),
+        activity_id: activityId,
       }
-      this[timeoutKey] = null;
-    }, 15000); // 15 seconds timeout (reduced from 30s with faster 2s refresh interval)
+    );
+    subscription.catch(error => {
+      console.error("❌ Error subscribing to key catalog changes:", error);
+      if (this._keysSubscription === subscription) {
+        this._keysSubscription = null;
+        this._keysSubscriptionActivityId = null;
+      }
+    });
+    this._keysSubscription = subscription;
   }
-  
-  // Start periodic state checking to catch async updates
-  _startPeriodicStateCheck(activityId, page) {
-    // Skip if component is disconnected
-    if (this._isDisconnected) {
-      console.log("🔄 _startPeriodicStateCheck - skipping, component is disconnected");
-      return;
-    }
 
-    // Clear any existing interval for this page
-    const intervalKey = `_stateCheckIntervalPage${page}`;
-    if (this[intervalKey]) {
-      clearInterval(this[intervalKey]);
+  // Stop the key catalog subscription
+  _unsubscribeKeys() {
+    if (this._keysSubscription) {
+      this._keysSubscription.then(unsubscribe => unsubscribe()).catch(() => {});
+      this._keysSubscription = null;
     }
+    this._keysSubscriptionActivityId = null;
+  }
 
-    console.log(`🔄 Starting periodic state check for activity ${activityId}, page ${page}`);
-
-    this[intervalKey] = setInterval(async () => {
-      // Stop if component is disconnected
-      if (this._isDisconnected) {
-        console.log(`🔄 Component disconnected, stopping periodic state check for page ${page}`);
-        clearInterval(this[intervalKey]);
-        this[intervalKey] = null;
-        return;
-      }
-
-      // Check if request for this page is still active
-      const isRequesting = (page === 1 && this._isRequestingPage1) ||
-                           (page === 2 && this._isRequestingPage2) ||
-                           (page === 3 && this._isRequestingPage3);
-
-      if (!isRequesting) {
-        console.log(`🔄 Page ${page} request completed, stopping periodic state check`);
-        clearInterval(this[intervalKey]);
-        this[intervalKey] = null;
-        return;
-      }
-
-      console.log("🔄 Periodic state check - forcing state refresh");
-
-      // Force refresh the entity state from backend
-      // Add a small delay (1 second) to allow backend sequential requests to complete
-      // This prevents activity_list updates from overwriting favorite_keys
-      await new Promise(resolve => setTimeout(resolve, 1000));
-
-      this._forceRefreshState().then(() => {
-        // After forcing refresh, check if state has changed
-        if (this.hass && this.stateObj && this.stateObj.entity_id) {
-          const latestState = this.hass.states[this.stateObj.entity_id];
-          if (latestState) {
-            const latestAssignedKeys = latestState.attributes?.assigned_keys;
-            const currentAssignedKeys = this.stateObj.attributes?.assigned_keys;
-            const latestMacroKeys = latestState.attributes?.macro_keys;
-            const currentMacroKeys = this.stateObj.attributes?.macro_keys;
-            const latestFavoriteKeys = latestState.attributes?.favorite_keys;
-            const currentFavoriteKeys = this.stateObj.attributes?.favorite_keys;
-
-            console.log("🔄 Comparing keys:");
-            console.log("🔄   assigned_keys - Current:", currentAssignedKeys, "Latest:", latestAssignedKeys);
-            console.log("🔄   macro_keys - Current:", currentMacroKeys, "Latest:", latestMacroKeys);
-            console.log("🔄   favorite_keys - Current:", currentFavoriteKeys, "Latest:", latestFavoriteKeys);
-            console.log("🔄   Current last_updated:", this.stateObj.last_updated);
-            console.log("🔄   Latest last_updated:", latestState.last_updated);
-
-            // Check if any keys have been updated
-            const assignedKeysChanged = JSON.stringify(latestAssignedKeys) !== JSON.stringify(currentAssignedKeys);
-            const macroKeysChanged = JSON.stringify(latestMacroKeys) !== JSON.stringify(currentMacroKeys);
-            const favoriteKeysChanged = JSON.stringify(latestFavoriteKeys) !== JSON.stringify(currentFavoriteKeys);
-
-            if (assignedKeysChanged || macroKeysChanged || favoriteKeysChanged) {
-              console.log("Detected keys update via periodic check!");
-              if (assignedKeysChanged) console.log("assigned_keys changed");
-              if (macroKeysChanged) console.log("macro_keys changed");
-              if (favoriteKeysChanged) console.log("favorite_keys changed");
-
-              // Update stateObj and trigger completion check
-              this.stateObj = latestState;
-              this._checkRequestCompletion();
-            } else if (latestState.last_updated !== this.stateObj.last_updated) {
-              console.log("🔔 Detected state update (last_updated changed)");
-              this.stateObj = latestState;
-              this._checkRequestCompletion();
-            } else {
-              console.log("⏰ No state change detected yet");
-              // Even if no change, check if we already have the data we need
-              // This handles the case where data was loaded before the dialog opened
-              this._checkRequestCompletion();
-            }
-          }
-        }
-      });
-    }, 2000); // Check every 2 seconds (with _is_requesting_keys protection, we can check more frequently)
+  // Store a key catalog and stop showing the loading hint for its page
+  _storeKeys(kind, activityId, keys) {
+    if (this._isDisconnected || !(kind in this._keys)) {
+      return;
+    }
+    this._keys = {
+      ...this._keys,
+      [kind]: { ...this._keys[kind], [activityId]: keys },
+    };
+    this._keyVersions[kind][activityId] = (this._keyVersions[kind][activityId] || 0) + 1;
+    const page = Object.keys(PAGE_KEY_KINDS).find(p => PAGE_KEY_KINDS[p] === kind);
+    this[`_isRequestingPage${page}`] = false;
   }
-  
+
   // Render function
   render() {
     // Skip rendering if component is disconnected
@@ -1397,7 +1043,7 @@ class SofabatonDetailCard extends LitElement {
 
     console.log("🎨   currentState:", currentState);
     console.log("🎨   currentState.entity_id:", currentState.entity_id);
-    console.log("🎨   currentState.attributes.assigned_keys:", currentState.attributes?.assigned_keys);
+    this._renderedLastUpdated = currentState.last_updated;
 
     const attributes = currentState.attributes;
     const currentActivityId = attributes.current_activity_id;
@@ -1416,20 +1062,7 @@ class SofabatonDetailCard extends LitElement {
     const keyMatchActivityId = this.selectedActivityId || effectiveActivityId || (activities.length > 0 ? activities[0].id : null);
     
     // 根据当前页面渲染不同的内容（始终使用keyMatchActivityId进行按键匹配）
-    let pageContent;
-    switch(this._currentPage) {
-        case 1:
-            pageContent = this._renderAssignedKeys(attributes, keyMatchActivityId, effectiveActivityId);
-            break;
-        case 2:
-            pageContent = this._renderMacroKeys(attributes, keyMatchActivityId, effectiveActivityId);
-            break;
-        case 3:
-            pageContent = this._renderFavoriteKeys(attributes, keyMatchActivityId, effectiveActivityId);
-            break;
-        default:
-            pageContent = this._renderAssignedKeys(attributes, keyMatchActivityId, effectiveActivityId);
-    }
+    const pageContent = this._renderPage(attributes, keyMatchActivityId, effectiveActivityId);
 
     // 获取当前活动名称和状态
     const currentActivity = activities.find(a => a.id === effectiveActivityId);
@@ -1496,9 +1129,61 @@ class SofabatonDetailCard extends LitElement {
     `;
   }
 
+  // Render the current page, reusing its template while the inputs are unchanged
+  // (page, activity, catalog version, activity running, loading state, list window)
+  _renderPage(attributes, keyMatchActivityId, effectiveActivityId) {
+    const page = this._currentPage;
+    const kind = PAGE_KEY_KINDS[page] || PAGE_KEY_KINDS[1];
+    const cacheKey = `${page}:${keyMatchActivityId}`;
+    const inputs = [
+      this._keyVersions[kind][keyMatchActivityId] || 0,
+      !!effectiveActivityId,
+      !!this[`_isRequestingPage${page}`],
+      page === 1 ? 0 : this._listWindow,
+    ].join("|");
+
+    const cached = this._pageTemplates.get(cacheKey);
+    if (cached && cached.inputs === inputs) {
+      return cached.template;
+    }
+
+    let template;
+    switch(page) {
+        case 2:
+            template = this._renderMacroKeys(attributes, keyMatchActivityId, effectiveActivityId);
+            break;
+        case 3:
+            template = this._renderFavoriteKeys(attributes, keyMatchActivityId, effectiveActivityId);
+            break;
+        default:
+            template = this._renderAssignedKeys(attributes, keyMatchActivityId, effectiveActivityId);
+    }
+
+    // Map keeps insertion order: re-insert as most recent, drop the oldest
+    this._pageTemplates.delete(cacheKey);
+    this._pageTemplates.set(cacheKey, { inputs, template });
+    if (this._pageTemplates.size > PAGE_TEMPLATE_CACHE_SIZE) {
+      this._pageTemplates.delete(this._pageTemplates.keys().next().value);
+    }
+    return template;
+  }
+
+  // Entries of a catalog to render (long catalogs are rendered one window at a time)
+  _windowedKeys(keys) {
+    return keys.length > LIST_WINDOW_THRESHOLD ? keys.slice(0, this._listWindow) : keys;
+  }
+
+  // Marker after a windowed list; extends the window when it scrolls into view
+  _renderListSentinel(keys) {
+    if (keys.length <= LIST_WINDOW_THRESHOLD || this._listWindow >= keys.length) {
+      return '';
+    }
+    return html`<div class="list-sentinel"></div>`;
+  }
+
   // Render assigned keys page (remote control)
   _renderAssignedKeys(attributes, keyMatchActivityId, effectiveActivityId) {
-    const assignedKeyIds = attributes.assigned_keys?.[keyMatchActivityId] || [];
+    const assignedKeyIds = this._keys.assigned[keyMatchActivityId] || [];
     console.log("🎨 Frontend: Rendering assigned keys for activity", keyMatchActivityId, "assigned keys:", assignedKeyIds);
     console.log("🎨 Frontend: _isRequestingPage1 =", this._isRequestingPage1);
 
@@ -1507,11 +1192,9 @@ class SofabatonDetailCard extends LitElement {
 
     // Show loading hint when requesting OR when no data and no previous response received
     // Check if we have ever received a response for this activity
-    const hasReceivedResponse = attributes.assigned_keys &&
-                               attributes.assigned_keys.hasOwnProperty(keyMatchActivityId);
+    const hasReceivedResponse = this._keys.assigned.hasOwnProperty(keyMatchActivityId);
 
     console.log(`Render logic - keyMatchActivityId: ${keyMatchActivityId}, hasReceivedResponse: ${hasReceivedResponse}, assignedKeyIds.length: ${assignedKeyIds.length}, _isRequestingPage1: ${this._isRequestingPage1}`);
-    console.log("🔍 Full attributes.assigned_keys:", attributes.assigned_keys);
 
     const showLoadingHint = (assignedKeyIds.length === 0) &&
                            (this._isRequestingPage1 || !hasReceivedResponse);
@@ -1575,7 +1258,11 @@ class SofabatonDetailCard extends LitElement {
                     return html`
                     <div class="key-wrapper ${is_partial ? 'partial-enabled' : ''}" style="grid-area: ${k.grid};">
                         <ha-icon-button 
-                            @click=${(e) => this._sendAssignedKey(keyMatchActivityId, key_info.id, e)}
+                            @pointerdown=${(e) => this._pressKey(keyMatchActivityId, key_info.id, e)}
+                            @pointerup=${() => this._releaseKey()}
+                            @pointerleave=${() => this._releaseKey()}
+                            @pointercancel=${() => this._releaseKey()}
+                            @click=${(e) => e.detail === 0 && this._sendAssignedKey(keyMatchActivityId, key_info.id, e)}
                             .disabled=${!is_assigned}
                             class="${is_partial ? 'partial' : ''}"
                             title="${k.key}${is_partial ? ' (Activity needs to be started)' : ''}"
@@ -1607,7 +1294,11 @@ class SofabatonDetailCard extends LitElement {
                     return html`
                     <div class="key-wrapper ${is_partial ? 'partial-enabled' : ''}" style="grid-area: ${k.grid};">
                         <ha-icon-button 
-                            @click=${(e) => this._sendAssignedKey(keyMatchActivityId, key_info.id, e)}
+                            @pointerdown=${(e) => this._pressKey(keyMatchActivityId, key_info.id, e)}
+                            @pointerup=${() => this._releaseKey()}
+                            @pointerleave=${() => this._releaseKey()}
+                            @pointercancel=${() => this._releaseKey()}
+                            @click=${(e) => e.detail === 0 && this._sendAssignedKey(keyMatchActivityId, key_info.id, e)}
                             .disabled=${!is_assigned}
                             class="${is_partial ? 'partial' : ''}"
                             title="${k.key}${is_partial ? ' (Activity needs to be started)' : ''}"
@@ -1642,7 +1333,7 @@ class SofabatonDetailCard extends LitElement {
 
   // Render macro commands page
   _renderMacroKeys(attributes, keyMatchActivityId, effectiveActivityId) {
-    const macroKeys = attributes.macro_keys?.[keyMatchActivityId] || [];
+    const macroKeys = this._keys.macros[keyMatchActivityId] || [];
     console.log("Rendering macro keys for activity", keyMatchActivityId, ":", macroKeys);
     console.log("🎨 Frontend: _isRequestingPage2 =", this._isRequestingPage2);
 
@@ -1662,7 +1353,7 @@ class SofabatonDetailCard extends LitElement {
 
     return html`
       <div class="macro-grid">
-        ${macroKeys.map(key => html`
+        ${this._windowedKeys(macroKeys).map(key => html`
           <button
             class="macro-button"
             @click=${(e) => this._sendMacroKey(keyMatchActivityId, key.id, e)}
@@ -1672,12 +1363,13 @@ class SofabatonDetailCard extends LitElement {
           </button>
         `)}
       </div>
+      ${this._renderListSentinel(macroKeys)}
     `;
   }
 
   // Render favorite commands page
   _renderFavoriteKeys(attributes, keyMatchActivityId, effectiveActivityId) {
-    const favoriteKeys = attributes.favorite_keys?.[keyMatchActivityId] || [];
+    const favoriteKeys = this._keys.favorites[keyMatchActivityId] || [];
     console.log("Rendering favorite keys for activity", keyMatchActivityId, ":", favoriteKeys);
     console.log("🎨 Frontend: _isRequestingPage3 =", this._isRequestingPage3);
 
@@ -1697,7 +1389,7 @@ class SofabatonDetailCard extends LitElement {
 
      return html`
       <div class="favorite-grid">
-        ${favoriteKeys.map(key => html`
+        ${this._windowedKeys(favoriteKeys).map(key => html`
           <button
             class="favorite-button"
             @click=${(e) => this._sendFavoriteKey(keyMatchActivityId, key.id, key.device_id, e)}
@@ -1707,6 +1399,7 @@ class SofabatonDetailCard extends LitElement {
           </button>
         `)}
       </div>
+      ${this._renderListSentinel(favoriteKeys)}
     `;
   }
   
@@ -1742,6 +1435,37 @@ class SofabatonDetailCard extends LitElement {
     });
   }
 
+  // Repeatable key down: press once, and let the integration repeat it if still held
+  _pressKey(activityId, keyId, event) {
+    if (event.button > 0) return;
+    this._releaseKey();
+    this._sendAssignedKey(activityId, keyId, event);
+
+    const held = { activityId, keyId, repeating: false };
+    held.timer = setTimeout(() => {
+      held.repeating = true;
+      this.hass.callService("remote", "send_command", {
+          entity_id: ensureEntityIdIsString(this.stateObj.entity_id),
+          command: [`type:repeat_start`, `activity_id:${activityId}`, `key_id:${keyId}`],
+      });
+    }, KEY_HOLD_DELAY);
+    this._heldKey = held;
+  }
+
+  // Repeatable key up (or pointer gone): stop the repeat if it was started
+  _releaseKey() {
+    const held = this._heldKey;
+    if (!held) return;
+    this._heldKey = null;
+    clearTimeout(held.timer);
+    if (held.repeating && this.hass && this.stateObj) {
+      this.hass.callService("remote", "send_command", {
+          entity_id: ensureEntityIdIsString(this.stateObj.entity_id),
+          command: [`type:repeat_stop`, `activity_id:${held.activityId}`, `key_id:${held.keyId}`],
+      });
+    }
+  }
+
   // Add ripple effect
   _addRippleEffect(event) {
     const button = event.target.closest('.key-wrapper');
@@ -1800,9 +1524,10 @@ class SofabatonDetailCard extends LitElement {
 
   // Refresh data
   _refreshData() {
-    // Trigger entity data refresh
-    this.hass.callService("homeassistant", "update_entity", {
+    // Ask the Hub for the activity list; the entity state updates when it answers
+    this.hass.callService("remote", "send_command", {
         entity_id: ensureEntityIdIsString(this.stateObj.entity_id),
+        command: ["type:request_basic_data"],
     });
   }
 
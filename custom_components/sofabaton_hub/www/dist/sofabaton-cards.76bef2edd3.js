@@ -0,0 +1,1862 @@
+import { LitElement, html, css } from "https://unpkg.com/lit@2.8.0/index.js?module";
+{
+window.customCards = window.customCards || [];
+window.customCards.push({
+type: "sofabaton-main-card",
+name: "Sofabaton Hub",
+preview: true,
+description: "Smart remote control card for managing Sofabaton Hub activities and devices",
+configurable: true,
+documentationURL: "https://github.com/sofabaton/ha-integration"
+});
+}
+{
+function ensureEntityIdIsString(entityId) {
+if (Array.isArray(entityId)) {
+return entityId[0];
+}
+return entityId;
+}
+function checkIfSofabatonHub(entityId, hass) {
+if (!hass || !entityId) return false;
+const stateObj = hass.states[entityId];
+if (!stateObj) return false;
+const attributes = stateObj.attributes;
+return (
+attributes.activities !== undefined ||
+attributes.devices !== undefined ||
+attributes.current_activity_id !== undefined ||
+attributes.integration === 'sofabaton_hub' ||
+attributes.device_class === 'sofabaton' ||
+(attributes.friendly_name &&
+attributes.friendly_name.toLowerCase().includes('sofabaton'))
+);
+}
+class SofabatonMainCard extends LitElement {
+static get properties() {
+return {
+hass: { type: Object }, 
+config: { type: Object }, 
+_selectedActivityId: { type: Number, state: true }, 
+_selectedDeviceId: { type: Number, state: true }, 
+_lastCurrentActivityId: { type: Number, state: true }, 
+};
+}
+setConfig(config) {
+if (!config || !config.entity) {
+throw new Error("You need to define an entity. Please select a Sofabaton Hub remote entity in the card configuration.");
+}
+this.config = config;
+}
+connectedCallback() {
+super.connectedCallback();
+if (this.hass && this.config) {
+const stateObj = this.hass.states[this.config.entity];
+if (stateObj && stateObj.attributes.current_activity_id) {
+this._selectedActivityId = stateObj.attributes.current_activity_id;
+}
+this._checkAndRefreshData();
+}
+}
+_checkAndRefreshData() {
+if (!this.hass || !this.config) return;
+const stateObj = this.hass.states[this.config.entity];
+if (!stateObj) return;
+const attributes = stateObj.attributes;
+const activities = attributes.activities || {};
+const devices = attributes.devices || {};
+const needRefresh = Object.keys(activities).length === 0 || Object.keys(devices).length === 0;
+if (needRefresh) {
+this._requestBasicData();
+}
+}
+_requestBasicData() {
+if (!this.hass || !this.config) {
+return;
+}
+this.hass.callService("remote", "send_command", {
+entity_id: this.config.entity,
+command: ["type:request_basic_data"],
+}).then(() => {
+}).catch(error => {
+console.error("Main card: Error calling request_basic_data service:", error);
+});
+}
+shouldUpdate(changedProperties) {
+if (changedProperties.has('hass') || changedProperties.has('config')) {
+if (changedProperties.has('hass')) {
+const oldHass = changedProperties.get('hass');
+const newHass = this.hass;
+if (oldHass && newHass && this.config) {
+const oldStateObj = oldHass.states[this.config.entity];
+const newStateObj = newHass.states[this.config.entity];
+const oldActivityId = oldStateObj?.attributes?.current_activity_id;
+const newActivityId = newStateObj?.attributes?.current_activity_id;
+if (oldActivityId !== newActivityId) {
+}
+}
+}
+return true;
+}
+if (changedProperties.has('_selectedActivityId') ||
+changedProperties.has('_selectedDeviceId') ||
+changedProperties.has('_lastCurrentActivityId')) {
+return true;
+}
+return super.shouldUpdate(changedProperties);
+}
+updated(changedProperties) {
+if (changedProperties.has('hass') && this.hass && this.config) {
+const stateObj = this.hass.states[this.config.entity];
+if (stateObj) {
+const currentActivityId = stateObj.attributes.current_activity_id;
+let needsUpdate = false; 
+if (changedProperties.has('hass')) {
+const oldHass = changedProperties.get('hass');
+if (oldHass && this.config) {
+const oldStateObj = oldHass.states[this.config.entity];
+const oldActivityId = oldStateObj?.attributes?.current_activity_id;
+if (oldActivityId !== currentActivityId) {
+needsUpdate = true;
+}
+}
+}
+if (currentActivityId && this._selectedActivityId !== currentActivityId) {
+this._selectedActivityId = currentActivityId;
+this._notifyActivityChanged(); 
+needsUpdate = true;
+} else if (!currentActivityId && this._selectedActivityId) {
+this._selectedActivityId = null;
+this._notifyActivityChanged(); 
+needsUpdate = true;
+}
+const attributes = stateObj.attributes;
+const activities = attributes.activities || [];
+const hasNewData = activities.length > 0;
+if (hasNewData || this._lastCurrentActivityId !== currentActivityId) {
+this._lastCurrentActivityId = currentActivityId;
+needsUpdate = true;
+}
+if (needsUpdate) {
+this.requestUpdate();
+this.updateComplete.then(() => {
+});
+}
+}
+}
+}
+render() {
+if (!this.hass || !this.config) {
+return html``;
+}
+const stateObj = this.hass.states[this.config.entity];
+if (!stateObj) {
+return html`
+<ha-card header="Sofabaton Hub">
+<div class="card-content">
+Entity not found: ${this.config.entity}
+</div>
+</ha-card>
+`;
+}
+const attributes = stateObj.attributes;
+const activities = attributes.activities || [];
+const hasActivities = Object.keys(activities).length > 0;
+const isDataLoading = !hasActivities;
+const selectedActivity = activities.find(a => a.id === this._selectedActivityId);
+const currentActivityId = stateObj.attributes.current_activity_id;
+const isSelectedActivityRunning = currentActivityId === this._selectedActivityId;
+const hasRunningActivity = currentActivityId && currentActivityId !== 255;
+let shouldShowBasedOnSelection = false;
+if (this._selectedActivityId) {
+shouldShowBasedOnSelection = isSelectedActivityRunning;
+} else {
+shouldShowBasedOnSelection = hasRunningActivity;
+}
+const shouldShowMoreInfo = hasRunningActivity && shouldShowBasedOnSelection;
+return html`
+<ha-card>
+<div class="card-header">
+<div class="name">
+<ha-icon icon="mdi:remote-tv"></ha-icon>
+Sofabaton
+</div>
+<div class="header-buttons">
+<ha-icon-button
+.label=${"Refresh Data"}
+@click=${this._handleRefresh}
+class="refresh-button"
+title="Refresh Data"
+>
+<ha-icon icon="mdi:refresh"></ha-icon>
+</ha-icon-button>
+${shouldShowMoreInfo ? html`
+<ha-icon-button
+.label=${"More Info"}
+@click=${this._handleMoreInfo}
+class="more-info"
+>
+<ha-icon icon="mdi:dots-vertical"></ha-icon>
+</ha-icon-button>
+` : ''}
+</div>
+</div>
+
+<div class="card-content">
+<!-- Data loading status indicator -->
+${isDataLoading ? html`
+<div class="loading-status">
+<ha-icon icon="mdi:loading" class="spinning"></ha-icon>
+<!-- DEVICE_DISABLED: Temporarily disable device functionality - when restoring change to: ${!hasActivities ? 'Activity List' : 'Device List'} -->
+<span>Loading data in sequence... Activity List</span>
+</div>
+` : ''}
+
+<!-- Activity Section -->
+<div class="section">
+<div class="section-header">
+<ha-icon class="section-icon" icon="mdi:pulse"></ha-icon>
+<div class="section-title">Activity</div>
+</div>
+${selectedActivity ? html`
+<div class="activity-control">
+<span>${selectedActivity.name}</span>
+<ha-switch
+.checked=${isSelectedActivityRunning}
+@change=${this._handleActivityToggle}
+></ha-switch>
+</div>
+` : ''}
+<ha-select
+.label=${selectedActivity ? "" : "Select Activity"}
+.value=${this._selectedActivityId || ''}
+@selected=${this._handleActivitySelect}
+@closed=${(e) => e.stopPropagation()}
+>
+${activities.map(
+(activity) => html`
+<ha-list-item .value=${activity.id}>
+${activity.name}
+</ha-list-item>
+`
+)}
+</ha-select>
+</div>
+
+${ ''}
+</div>
+</ha-card>
+`;
+}
+_handleActivitySelect(e) {
+let value = e.target.value;
+if (Array.isArray(value)) {
+value = value[0];
+}
+const selectedId = parseInt(value, 10);
+if (!selectedId || selectedId === this._selectedActivityId) return;
+this._selectedActivityId = selectedId;
+this._notifyActivityChanged(); 
+this.requestUpdate();
+}
+_handleActivityToggle(e) {
+if (!this._selectedActivityId) return;
+const turnOn = e.target.checked;
+const command = turnOn ? "start_activity" : "stop_activity";
+this.hass.callService("remote", "send_command", {
+entity_id: ensureEntityIdIsString(this.config.entity),
+command: [`type:${command}`, `activity_id:${this._selectedActivityId}`],
+});
+}
+_handleMoreInfo() {
+const event = new Event("hass-more-info", {
+bubbles: true,
+composed: true,
+});
+event.detail = {
+entityId: this.config.entity,
+selectedActivityId: this._selectedActivityId 
+};
+this.dispatchEvent(event);
+}
+_notifyActivityChanged() {
+const event = new CustomEvent("sofabaton-activity-changed", {
+bubbles: true,
+composed: true,
+detail: {
+entityId: this.config.entity,
+selectedActivityId: this._selectedActivityId
+}
+});
+document.dispatchEvent(event);
+}
+_handleRefresh() {
+this._requestBasicData();
+const refreshButton = this.shadowRoot.querySelector('.refresh-button');
+if (refreshButton) {
+refreshButton.classList.add('spinning');
+setTimeout(() => {
+refreshButton.classList.remove('spinning');
+}, 2000); 
+}
+}
+static get styles() {
+return css`
+.card-header {
+display: flex;
+justify-content: space-between;
+align-items: center;
+padding: 16px;
+}
+.name {
+display: flex;
+align-items: center;
+font-size: 1.2rem;
+font-weight: 500;
+}
+.name ha-icon {
+margin-right: 8px;
+color: var(--state-icon-color);
+}
+.header-buttons {
+display: flex;
+align-items: center;
+gap: 4px;
+}
+.refresh-button ha-icon {
+transition: transform 0.3s ease;
+}
+.refresh-button.spinning ha-icon {
+animation: spin 1s linear infinite;
+}
+@keyframes spin {
+from { transform: rotate(0deg); }
+to { transform: rotate(360deg); }
+}
+.loading-status {
+display: flex;
+align-items: center;
+gap: 8px;
+padding: 12px 16px;
+background: rgba(33, 150, 243, 0.1);
+border: 1px solid rgba(33, 150, 243, 0.3);
+border-radius: 6px;
+margin: 8px 16px;
+font-size: 14px;
+opacity: 0.8;
+}
+.loading-status ha-icon {
+color: var(--primary-color);
+}
+.spinning {
+animation: spin 1s linear infinite;
+}
+.section {
+padding: 8px 16px;
+}
+.section-header {
+display: flex;
+align-items: center;
+margin-bottom: 8px;
+}
+.section-icon {
+color: var(--secondary-text-color);
+}
+.section-title {
+font-weight: 500;
+margin-left: 8px;
+}
+ha-select {
+width: 100%;
+margin-top: 8px;
+}
+.activity-control {
+display: flex;
+justify-content: space-between;
+align-items: center;
+padding: 8px 0;
+font-size: 1rem;
+}
+`;
+}
+static getConfigElement() {
+return document.createElement("sofabaton-main-card-editor");
+}
+static getStubConfig() {
+return {
+type: "custom:sofabaton-main-card",
+entity: ""
+};
+}
+}
+class SofabatonMainCardEditor extends LitElement {
+static get properties() {
+return {
+hass: {},
+config: {},
+};
+}
+setConfig(config) {
+this.config = config || {};
+if (!this.config.entity) {
+this.config.entity = "";
+}
+}
+get _entity() {
+return this.config.entity || "";
+}
+render() {
+if (!this.hass) {
+return html``;
+}
+const allRemoteEntities = Object.keys(this.hass.states).filter((eid) =>
+eid.startsWith("remote.")
+);
+const sofabatonEntities = allRemoteEntities.filter((eid) =>
+checkIfSofabatonHub(eid, this.hass)
+);
+const otherRemoteEntities = allRemoteEntities.filter((eid) =>
+!checkIfSofabatonHub(eid, this.hass)
+);
+const entities = [...sofabatonEntities, ...otherRemoteEntities];
+return html`
+<div class="card-config">
+<div class="option">
+<ha-select
+label="Entity (Required)"
+.value=${this._entity}
+.configValue=${"entity"}
+@selected=${this._valueChanged}
+@closed=${(ev) => ev.stopPropagation()}
+>
+${entities.length === 0
+? html`<ha-list-item disabled>No remote entities found</ha-list-item>`
+: entities.map((entity) => {
+const isSofabaton = checkIfSofabatonHub(entity, this.hass);
+const friendlyName = this.hass.states[entity]?.attributes?.friendly_name || entity;
+return html`
+<ha-list-item .value=${entity}>
+${isSofabaton ? '🎮 ' : '📡 '}${friendlyName}
+<span slot="secondary">${entity}</span>
+</ha-list-item>
+`;
+})
+}
+</ha-select>
+</div>
+${entities.length === 0
+? html`<div class="warning">
+<ha-icon icon="mdi:alert"></ha-icon>
+No Sofabaton Hub entities found. Please ensure your integration is properly configured.
+</div>`
+: ''
+}
+</div>
+`;
+}
+_valueChanged(ev) {
+if (!this.config || !this.hass) {
+return;
+}
+const target = ev.target;
+const configValue = target.configValue;
+let value = target.value;
+if (Array.isArray(value)) {
+value = value[0]; 
+}
+if (this[`_${configValue}`] === value) {
+return;
+}
+const newConfig = {
+...this.config,
+[configValue]: value,
+};
+const messageEvent = new Event("config-changed", {
+bubbles: true,
+composed: true,
+});
+messageEvent.detail = { config: newConfig };
+this.dispatchEvent(messageEvent);
+}
+static get styles() {
+return css`
+.card-config {
+padding: 16px;
+}
+.option {
+padding: 4px 0;
+}
+ha-select {
+width: 100%;
+}
+.warning {
+padding: 12px;
+margin: 8px 0;
+background: var(--warning-color, #ff9800);
+color: var(--text-primary-color);
+border-radius: 4px;
+display: flex;
+align-items: center;
+gap: 8px;
+}
+`;
+}
+}
+customElements.define("sofabaton-main-card", SofabatonMainCard);
+customElements.define("sofabaton-main-card-editor", SofabatonMainCardEditor);
+}
+{
+function ensureEntityIdIsString(entityId) {
+if (Array.isArray(entityId)) {
+return entityId[0];
+}
+return entityId;
+}
+function checkIfSofabatonHub(entityId, hass) {
+if (!hass || !entityId) return false;
+const stateObj = hass.states[entityId];
+if (!stateObj) return false;
+const attributes = stateObj.attributes;
+return (
+attributes.activities !== undefined ||
+attributes.devices !== undefined ||
+attributes.current_activity_id !== undefined ||
+attributes.integration === 'sofabaton_hub' ||
+attributes.device_class === 'sofabaton' ||
+(attributes.friendly_name &&
+attributes.friendly_name.toLowerCase().includes('sofabaton'))
+);
+}
+const REMOTE_LAYOUT = {
+dpad: [
+{key: 'up', grid: '1 / 2 / 2 / 3'},
+{key: 'left', grid: '2 / 1 / 3 / 2'},
+{key: 'ok', grid: '2 / 2 / 3 / 3'},
+{key: 'right', grid: '2 / 3 / 3 / 4'},
+{key: 'down', grid: '3 / 2 / 4 / 3'}
+],
+functions: [ {key: 'back'}, {key: 'home'}, {key: 'menu'} ],
+volume_channel: [
+{key: 'volume_up', grid: '1 / 1 / 2 / 2'},
+{key: 'guide', grid: '1 / 2 / 2 / 3'},
+{key: 'channel_up', grid: '1 / 3 / 2 / 4'},
+{key: 'volume_down', grid: '2 / 1 / 3 / 2'},
+{key: 'mute', grid: '2 / 2 / 3 / 3'},
+{key: 'channel_down', grid: '2 / 3 / 3 / 4'}
+],
+transport: [ {key: 'rewind'}, {key: 'play'}, {key: 'fast_forward'} ],
+transport_extra: [ {key: 'dvr'}, {key: 'pause'}, {key: 'exit'} ],
+colors: [ {key: 'red'}, {key: 'green'}, {key: 'yellow'}, {key: 'blue'} ],
+customs: [ {key: 'a'}, {key: 'b'}, {key: 'c'} ]
+};
+const REMOTE_KEYS = {
+"up": {"id": 174, "icon": "mdi:arrow-up"},
+"down": {"id": 178, "icon": "mdi:arrow-down"},
+"left": {"id": 175, "icon": "mdi:arrow-left"},
+"right": {"id": 177, "icon": "mdi:arrow-right"},
+"ok": {"id": 176, "icon": "mdi:checkbox-blank-circle-outline"},
+"back": {"id": 179, "icon": "mdi:arrow-u-left-top"},
+"home": {"id": 180, "icon": "mdi:home"},
+"menu": {"id": 181, "icon": "mdi:menu"},
+"volume_up": {"id": 182, "icon": "mdi:volume-plus"},
+"volume_down": {"id": 185, "icon": "mdi:volume-minus"},
+"channel_up": {"id": 183, "icon": "mdi:chevron-up"},
+"channel_down": {"id": 186, "icon": "mdi:chevron-down"},
+"mute": {"id": 184, "icon": "mdi:volume-mute"},
+"guide": {"id": 157, "icon": "mdi:television-guide"},
+"rewind": {"id": 187, "icon": "mdi:rewind"},
+"play": {"id": 156, "icon": "mdi:play"},
+"fast_forward": {"id": 189, "icon": "mdi:fast-forward"},
+"dvr": {"id": 155, "text": "DVR"},
+"pause": {"id": 188, "icon": "mdi:pause"},
+"exit": {"id": 154, "text": "Exit"},
+"red": {"id": 190, "color": "red"},
+"green": {"id": 191, "color": "green"},
+"yellow": {"id": 192, "color": "yellow"},
+"blue": {"id": 193, "color": "blue"},
+"a": {"id": 153, "text": "A"},
+"b": {"id": 152, "text": "B"},
+"c": {"id": 151, "text": "C"}
+};
+const PAGE_KEY_KINDS = {
+1: "assigned",
+2: "macros",
+3: "favorites"
+};
+const LIST_WINDOW_THRESHOLD = 48;
+const LIST_WINDOW_SIZE = 36;
+const PAGE_TEMPLATE_CACHE_SIZE = 12;
+const KEY_HOLD_DELAY = 400;
+class SofabatonDetailCard extends LitElement {
+static get styles() {
+return css`
+/* Overall container */
+.container {
+padding: 16px;
+}
+
+/* Current activity info styles */
+.current-activity {
+display: flex;
+align-items: center;
+justify-content: center;
+gap: 8px;
+padding: 12px;
+background: var(--primary-color);
+color: var(--text-primary-color);
+border-radius: 8px;
+margin-bottom: 16px;
+text-align: center;
+}
+
+/* Page navigation styles */
+.page-nav {
+display: flex;
+justify-content: center;
+align-items: center;
+margin-bottom: 16px;
+gap: 20px;
+}
+
+.page-nav ha-icon-button {
+--mdc-icon-button-size: 40px;
+}
+
+.page-nav span {
+font-weight: 500;
+min-width: 120px;
+text-align: center;
+}
+
+/* No activity state styles */
+.no-activity {
+text-align: center;
+padding: 32px;
+color: var(--secondary-text-color);
+}
+
+.no-activity ha-icon {
+font-size: 48px;
+margin-bottom: 16px;
+}
+
+.available-activities {
+margin-top: 24px;
+text-align: left;
+}
+
+.activity-item {
+display: flex;
+justify-content: space-between;
+align-items: center;
+padding: 8px;
+margin: 8px 0;
+background: var(--card-background-color);
+border-radius: 8px;
+}
+
+/* Main remote control container */
+.remote-layout {
+display: flex;
+flex-direction: column;
+gap: 20px;
+align-items: center;
+background: linear-gradient(145deg, #2c2c2c, #1a1a1a);
+border-radius: 20px;
+padding: 24px;
+box-shadow: 
+0 8px 32px rgba(0, 0, 0, 0.3),
+inset 0 1px 0 rgba(255, 255, 255, 0.1);
+border: 1px solid rgba(255, 255, 255, 0.1);
+}
+
+/* Button base styles */
+.key-wrapper {
+position: relative;
+}
+
+/* Icon and content centering styles */
+.key-wrapper ha-icon-button ha-icon {
+display: flex;
+align-items: center;
+justify-content: center;
+width: 100%;
+height: 100%;
+margin: 0;
+padding: 0;
+}
+
+/* Ensure all content within buttons is centered */
+.key-wrapper ha-icon-button > * {
+display: flex;
+align-items: center;
+justify-content: center;
+margin: 0;
+}
+
+.key-wrapper ha-icon-button {
+background: linear-gradient(145deg, #3a3a3a, #2a2a2a);
+border-radius: 50%;
+--mdc-icon-button-size: 48px;
+box-shadow: 
+0 4px 8px rgba(0, 0, 0, 0.3),
+inset 0 1px 0 rgba(255, 255, 255, 0.1),
+inset 0 -1px 0 rgba(0, 0, 0, 0.2);
+border: 1px solid rgba(255, 255, 255, 0.1);
+transition: all 0.15s ease;
+color: #ffffff;
+display: flex;
+align-items: center;
+justify-content: center;
+}
+
+.key-wrapper ha-icon-button:not([disabled]):hover {
+background: linear-gradient(145deg, #4a4a4a, #3a3a3a);
+transform: translateY(-1px);
+box-shadow: 
+0 6px 12px rgba(0, 0, 0, 0.4),
+inset 0 1px 0 rgba(255, 255, 255, 0.2);
+}
+
+.key-wrapper ha-icon-button:not([disabled]):active {
+background: linear-gradient(145deg, #2a2a2a, #1a1a1a);
+transform: translateY(1px);
+box-shadow: 
+0 2px 4px rgba(0, 0, 0, 0.2),
+inset 0 2px 4px rgba(0, 0, 0, 0.3);
+}
+
+.key-wrapper ha-icon-button[disabled] {
+background: linear-gradient(145deg, #1a1a1a, #0a0a0a);
+opacity: 0.3;
+cursor: not-allowed;
+box-shadow: inset 0 2px 4px rgba(0, 0, 0, 0.2);
+}
+
+/* Direction key grid - cross layout */
+.dpad-grid {
+display: grid;
+grid-template-columns: 60px 60px 60px;
+grid-template-rows: 60px 60px 60px;
+place-items: center;
+gap: 4px;
+background: linear-gradient(145deg, #1a1a1a, #0a0a0a);
+border-radius: 16px;
+padding: 8px;
+box-shadow: inset 0 2px 8px rgba(0, 0, 0, 0.3);
+}
+
+/* OK button special styles */
+.key-wrapper[title="ok"] ha-icon-button { 
+--mdc-icon-button-size: 56px;
+background: linear-gradient(145deg, #4CAF50, #388E3C);
+color: white;
+display: flex;
+align-items: center;
+justify-content: center;
+}
+.key-wrapper[title="ok"] ha-icon-button:not([disabled]):hover {
+background: linear-gradient(145deg, #66BB6A, #4CAF50);
+}
+
+/* Function key group */
+.key-group {
+display: flex;
+justify-content: center;
+gap: 12px;
+flex-wrap: wrap;
+}
+
+/* Volume channel area - 2x3 grid symmetric layout */
+.volume-channel-grid {
+display: grid;
+grid-template-columns: repeat(3, 1fr);
+grid-template-rows: repeat(2, 1fr);
+gap: 12px;
+width: 100%;
+max-width: 240px;
+background: linear-gradient(145deg, #1a1a1a, #0a0a0a);
+border-radius: 12px;
+padding: 16px;
+box-shadow: inset 0 2px 6px rgba(0, 0, 0, 0.3);
+place-items: center;
+}
+.volume-channel-grid .key-wrapper {
+display: flex;
+justify-content: center;
+align-items: center;
+}
+
+/* Function key group styles */
+.key-group:nth-of-type(2) {
+background: linear-gradient(145deg, #1a1a1a, #0a0a0a);
+border-radius: 12px;
+padding: 12px;
+box-shadow: inset 0 2px 6px rgba(0, 0, 0, 0.3);
+}
+
+/* Volume button special styles */
+.key-wrapper[title="volume_up"] ha-icon-button:not([disabled]),
+.key-wrapper[title="volume_down"] ha-icon-button:not([disabled]) {
+background: linear-gradient(145deg, #9C27B0, #7B1FA2);
+}
+.key-wrapper[title="volume_up"] ha-icon-button:not([disabled]):hover,
+.key-wrapper[title="volume_down"] ha-icon-button:not([disabled]):hover {
+background: linear-gradient(145deg, #BA68C8, #9C27B0);
+}
+
+/* Channel button special styles */
+.key-wrapper[title="channel_up"] ha-icon-button:not([disabled]),
+.key-wrapper[title="channel_down"] ha-icon-button:not([disabled]) {
+background: linear-gradient(145deg, #FF5722, #D84315);
+}
+.key-wrapper[title="channel_up"] ha-icon-button:not([disabled]):hover,
+.key-wrapper[title="channel_down"] ha-icon-button:not([disabled]):hover {
+background: linear-gradient(145deg, #FF7043, #FF5722);
+}
+
+/* Guide button special styles */
+.key-wrapper[title="guide"] ha-icon-button:not([disabled]) {
+background: linear-gradient(145deg, #607D8B, #455A64);
+}
+.key-wrapper[title="guide"] ha-icon-button:not([disabled]):hover {
+background: linear-gradient(145deg, #78909C, #607D8B);
+}
+
+/* Mute button */
+.key-wrapper[title="mute"] ha-icon-button:not([disabled]) {
+background: linear-gradient(145deg, #F44336, #D32F2F);
+}
+.key-wrapper[title="mute"] ha-icon-button:not([disabled]):hover {
+background: linear-gradient(145deg, #EF5350, #F44336);
+}
+
+/* Media control key styles */
+.key-wrapper[title="play"] ha-icon-button:not([disabled]) {
+background: linear-gradient(145deg, #2196F3, #1976D2);
+}
+.key-wrapper[title="play"] ha-icon-button:not([disabled]):hover {
+background: linear-gradient(145deg, #42A5F5, #2196F3);
+}
+
+.key-wrapper[title="pause"] ha-icon-button:not([disabled]) {
+background: linear-gradient(145deg, #FF9800, #F57C00);
+}
+.key-wrapper[title="pause"] ha-icon-button:not([disabled]):hover {
+background: linear-gradient(145deg, #FFB74D, #FF9800);
+}
+
+/* Partially enabled button styles */
+.key-wrapper.partial-enabled ha-icon-button {
+background: linear-gradient(145deg, #3a3a3a, #2a2a2a);
+opacity: 0.7;
+box-shadow: 
+0 2px 4px rgba(0, 0, 0, 0.2),
+inset 0 1px 0 rgba(255, 255, 255, 0.05);
+}
+.key-wrapper.partial-enabled ha-icon-button:hover {
+background: linear-gradient(145deg, #4a4a4a, #3a3a3a);
+opacity: 0.85;
+}
+
+/* Text button styles */
+.text-key {
+font-weight: bold;
+font-size: 12px;
+text-shadow: 0 1px 2px rgba(0, 0, 0, 0.5);
+letter-spacing: 0.5px;
+display: flex;
+align-items: center;
+justify-content: center;
+height: 100%;
+width: 100%;
+}
+
+/* Color button enhancement */
+.key-wrapper[title="red"] ha-icon-button {
+position: relative;
+}
+.key-wrapper[title="green"] ha-icon-button {
+position: relative;
+}
+.key-wrapper[title="yellow"] ha-icon-button {
+position: relative;
+}
+.key-wrapper[title="blue"] ha-icon-button {
+position: relative;
+}
+
+.key-wrapper[title="red"] .color-key {
+background: linear-gradient(145deg, #f44336, #d32f2f);
+box-shadow: 0 0 8px rgba(244, 67, 54, 0.5);
+}
+.key-wrapper[title="green"] .color-key {
+background: linear-gradient(145deg, #4caf50, #388e3c);
+box-shadow: 0 0 8px rgba(76, 175, 80, 0.5);
+}
+.key-wrapper[title="yellow"] .color-key {
+background: linear-gradient(145deg, #ffeb3b, #fbc02d);
+box-shadow: 0 0 8px rgba(255, 235, 59, 0.5);
+}
+.key-wrapper[title="blue"] .color-key {
+background: linear-gradient(145deg, #2196f3, #1976d2);
+box-shadow: 0 0 8px rgba(33, 150, 243, 0.5);
+}
+
+.color-key {
+width: 28px;
+height: 28px;
+border-radius: 50%;
+border: 2px solid rgba(255, 255, 255, 0.3);
+box-shadow: 
+0 2px 4px rgba(0, 0, 0, 0.3),
+inset 0 1px 2px rgba(255, 255, 255, 0.2);
+position: absolute;
+top: 50%;
+left: 50%;
+transform: translate(-50%, -50%);
+}
+
+/* Status message styles */
+.status-message {
+margin: 16px 0;
+}
+.warning-message, .info-message {
+display: flex;
+align-items: center;
+gap: 12px;
+padding: 12px 16px;
+border-radius: 8px;
+background: rgba(255, 193, 7, 0.1);
+border: 1px solid rgba(255, 193, 7, 0.3);
+}
+.warning-message {
+background: rgba(244, 67, 54, 0.1);
+border-color: rgba(244, 67, 54, 0.3);
+}
+
+/* Loading hint styles */
+.loading-hint {
+display: flex;
+align-items: center;
+gap: 8px;
+padding: 8px 12px;
+margin-bottom: 12px;
+background: rgba(33, 150, 243, 0.1);
+border: 1px solid rgba(33, 150, 243, 0.3);
+border-radius: 6px;
+font-size: 14px;
+opacity: 0.8;
+}
+.remote-layout.loading {
+opacity: 0.6;
+}
+
+/* Loading message styles */
+.loading-message {
+display: flex;
+flex-direction: column;
+align-items: center;
+gap: 12px;
+padding: 32px;
+text-align: center;
+color: var(--secondary-text-color);
+}
+
+.loading-message ha-icon {
+font-size: 48px;
+margin-bottom: 8px;
+}
+
+/* Rotation animation */
+.spinning {
+animation: spin 1s linear infinite;
+}
+
+@keyframes spin {
+from { transform: rotate(0deg); }
+to { transform: rotate(360deg); }
+}
+
+/* Macro and favorite command grid layout */
+.macro-grid, .favorite-grid {
+display: grid;
+grid-template-columns: repeat(3, 1fr);
+gap: 16px;
+padding: 20px;
+background: linear-gradient(145deg, #2c2c2c, #1a1a1a);
+border-radius: 16px;
+box-shadow: 
+0 8px 24px rgba(0, 0, 0, 0.3),
+inset 0 1px 0 rgba(255, 255, 255, 0.1);
+border: 1px solid rgba(255, 255, 255, 0.1);
+}
+
+/* Macro button styles */
+.macro-button, .favorite-button {
+aspect-ratio: 2.5 / 1;  /* Rectangle aspect ratio */
+min-height: 50px;
+background: #ffffff;  /* White background */
+border: 2px solid #e0e0e0;
+border-radius: 8px;  /* Rounded rectangle */
+color: #333333;  /* Black text */
+font-weight: 500;
+font-size: 14px;
+cursor: pointer;
+transition: all 0.2s ease;
+box-shadow: 
+0 2px 4px rgba(0, 0, 0, 0.1),
+0 1px 2px rgba(0, 0, 0, 0.06);
+display: flex;
+align-items: center;
+justify-content: center;
+text-align: center;
+padding: 12px 16px;
+word-wrap: break-word;
+hyphens: auto;
+}
+
+.macro-button:hover, .favorite-button:hover {
+background: #f5f5f5;  /* Light gray hover */
+border-color: #d0d0d0;
+transform: translateY(-1px);
+box-shadow: 
+0 4px 8px rgba(0, 0, 0, 0.15),
+0 2px 4px rgba(0, 0, 0, 0.1);
+}
+
+.macro-button:active, .favorite-button:active {
+background: #e8e8e8;  /* Darker gray pressed */
+border-color: #c0c0c0;
+transform: translateY(0px);
+box-shadow: 
+0 1px 2px rgba(0, 0, 0, 0.1),
+inset 0 1px 2px rgba(0, 0, 0, 0.1);
+}
+
+/* Button click ripple effect */
+.macro-button::before, .favorite-button::before {
+content: '';
+position: absolute;
+top: 50%;
+left: 50%;
+width: 0;
+height: 0;
+border-radius: 50%;
+background: rgba(0, 0, 0, 0.1);  /* Black ripple suitable for white background */
+transform: translate(-50%, -50%);
+transition: width 0.3s, height 0.3s;
+}
+
+.macro-button.ripple::before, .favorite-button.ripple::before {
+width: 100px;
+height: 100px;
+}
+
+/* Responsive design */
+@media (max-width: 480px) {
+.macro-grid, .favorite-grid {
+grid-template-columns: repeat(2, 1fr);
+gap: 12px;
+padding: 16px;
+}
+.macro-button, .favorite-button {
+min-height: 45px;
+font-size: 12px;
+padding: 8px 12px;
+}
+}
+
+/* End of a windowed macro/favorite list */
+.list-sentinel {
+height: 1px;
+}
+
+@media (max-width: 320px) {
+.macro-grid, .favorite-grid {
+grid-template-columns: 1fr;
+}
+.macro-button, .favorite-button {
+min-height: 40px;
+font-size: 11px;
+}
+}
+`;
+}
+static get properties() {
+return {
+hass: { type: Object },
+stateObj: { type: Object, attribute: false }, 
+entityId: { type: String }, 
+selectedActivityId: { type: Number }, 
+_currentPage: { type: Number, state: true }, 
+_isRequestingPage1: { type: Boolean, state: true }, 
+_isRequestingPage2: { type: Boolean, state: true }, 
+_isRequestingPage3: { type: Boolean, state: true }, 
+_keys: { type: Object, state: true }, 
+_listWindow: { type: Number, state: true }, 
+};
+}
+constructor() {
+super();
+this._currentPage = 1; 
+this._isRequestingPage1 = false; 
+this._isRequestingPage2 = false; 
+this._isRequestingPage3 = false; 
+this._keys = { assigned: {}, macros: {}, favorites: {} }; 
+this._keyVersions = { assigned: {}, macros: {}, favorites: {} }; 
+this._pageTemplates = new Map(); 
+this._listWindow = LIST_WINDOW_SIZE;
+this._renderedLastUpdated = null; 
+this._heldKey = null; 
+}
+_getLatestStateObj() {
+if (this.entityId && this.hass && this.hass.states) {
+const latestState = this.hass.states[this.entityId];
+if (latestState) {
+return latestState;
+}
+}
+return this.stateObj;
+}
+connectedCallback() {
+super.connectedCallback();
+this._isDisconnected = false;
+if (this.stateObj && this.stateObj.entity_id) {
+this.entityId = this.stateObj.entity_id;
+}
+this._activityChangeListener = (e) => {
+if (e.detail && e.detail.entityId === this.entityId) {
+const oldActivityId = this.selectedActivityId;
+this.selectedActivityId = e.detail.selectedActivityId;
+if (oldActivityId !== this.selectedActivityId) {
+this._requestKeysForCurrentPage();
+}
+}
+};
+document.addEventListener("sofabaton-activity-changed", this._activityChangeListener);
+this._requestKeysForCurrentPage(true);
+if (!this.hass || !this.stateObj) {
+this._retryTimeout = setTimeout(() => {
+if (this._isDisconnected) {
+this._retryTimeout = null;
+return;
+}
+this._requestKeysForCurrentPage();
+this._retryTimeout = null;
+}, 100);
+}
+}
+disconnectedCallback() {
+super.disconnectedCallback();
+this._isDisconnected = true;
+this._isRequestingPage1 = false;
+this._isRequestingPage2 = false;
+this._isRequestingPage3 = false;
+if (this._activityChangeListener) {
+document.removeEventListener("sofabaton-activity-changed", this._activityChangeListener);
+this._activityChangeListener = null;
+}
+this._unsubscribeKeys();
+this._releaseKey();
+if (this._listObserver) {
+this._listObserver.disconnect();
+this._listObserver = null;
+}
+this._observedSentinel = null;
+if (this._retryTimeout) {
+clearTimeout(this._retryTimeout);
+this._retryTimeout = null;
+}
+}
+shouldUpdate(changedProperties) {
+if (changedProperties.has('selectedActivityId')) {
+const oldValue = changedProperties.get('selectedActivityId');
+const newValue = this.selectedActivityId;
+if (oldValue !== newValue && newValue) {
+this._requestKeysForCurrentPage();
+}
+return true;
+}
+if (changedProperties.size === 1 && changedProperties.has('hass')) {
+const latestState = this._getLatestStateObj();
+return !!latestState && latestState.last_updated !== this._renderedLastUpdated;
+}
+return true;
+}
+willUpdate(changedProperties) {
+if (changedProperties.has('hass') && this.stateObj) {
+const latestState = this._getLatestStateObj();
+if (latestState && latestState !== this.stateObj && latestState.entity_id === this.stateObj.entity_id) {
+this.stateObj = latestState;
+}
+}
+if (changedProperties.has('_currentPage') || changedProperties.has('selectedActivityId')) {
+this._listWindow = LIST_WINDOW_SIZE;
+}
+}
+update(changedProperties) {
+const stats = window.sofabatonFrameStats;
+if (!stats) {
+super.update(changedProperties);
+return;
+}
+const start = performance.now();
+super.update(changedProperties);
+stats.record(performance.now() - start);
+}
+_getCurrentState() {
+const latestState = this._getLatestStateObj();
+if (!latestState) return null;
+if (latestState.last_updated) {
+const lastUpdatedTime = new Date(latestState.last_updated);
+const now = new Date();
+const ageSeconds = (now - lastUpdatedTime) / 1000;
+}
+return latestState;
+}
+updated(changedProperties) {
+super.updated(changedProperties);
+const sentinel = this.renderRoot.querySelector(".list-sentinel");
+if (sentinel === this._observedSentinel && !changedProperties.has('_listWindow')) {
+return;
+}
+if (this._listObserver) {
+this._listObserver.disconnect();
+}
+this._observedSentinel = sentinel;
+if (sentinel) {
+if (!this._listObserver) {
+this._listObserver = new IntersectionObserver((entries) => {
+if (entries.some(entry => entry.isIntersecting)) {
+this._listWindow += LIST_WINDOW_SIZE;
+}
+}, { rootMargin: "200px" });
+}
+this._listObserver.observe(sentinel);
+}
+}
+_requestKeysForCurrentPage(forceRefresh = false) {
+if (this._isDisconnected) {
+return;
+}
+if (!this.hass || !this.stateObj) {
+return;
+}
+const attributes = this.stateObj.attributes;
+const currentActivityId = attributes.current_activity_id;
+const activities = attributes.activities || [];
+const activeActivity = activities.find(a => a.state === 'on');
+const effectiveActivityId = this.selectedActivityId || currentActivityId || (activeActivity ? activeActivity.id : null);
+if (!effectiveActivityId) {
+return;
+}
+this._subscribeKeys(effectiveActivityId);
+const page = this._currentPage;
+const kind = PAGE_KEY_KINDS[page];
+const requestingKey = `_isRequestingPage${page}`;
+const hasData = this._keys[kind].hasOwnProperty(effectiveActivityId);
+if (hasData && !forceRefresh) {
+return;
+}
+if (forceRefresh && hasData) {
+}
+if (this[requestingKey]) {
+return;
+}
+this[requestingKey] = true;
+this.hass.callWS({
+type: "sofabaton_hub/keys",
+entity_id: ensureEntityIdIsString(this.stateObj.entity_id),
+activity_id: effectiveActivityId,
+kind: kind,
+}).then(result => {
+const keys = result.keys[kind];
+if (keys !== null && !this._isDisconnected) {
+this._storeKeys(kind, effectiveActivityId, keys);
+}
+}).catch(error => {
+console.error(`❌ Error requesting ${kind} keys:`, error);
+}).finally(() => {
+this[requestingKey] = false;
+});
+}
+_subscribeKeys(activityId) {
+if (this._keysSubscriptionActivityId === activityId || !this.hass?.connection) {
+return;
+}
+this._unsubscribeKeys();
+this._keysSubscriptionActivityId = activityId;
+const subscription = this.hass.connection.subscribeMessage(
+(event) => {
+this._storeKeys(event.kind, event.activity_id, event.keys);
+},
+{
+type: "sofabaton_hub/subscribe_keys",
+entity_id: ensureEntityIdIsString(this.stateObj.entity_id),
+activity_id: activityId,
+}
+);
+subscription.catch(error => {
+console.error("❌ Error subscribing to key catalog changes:", error);
+if (this._keysSubscription === subscription) {
+this._keysSubscription = null;
+this._keysSubscriptionActivityId = null;
+}
+});
+this._keysSubscription = subscription;
+}
+_unsubscribeKeys() {
+if (this._keysSubscription) {
+this._keysSubscription.then(unsubscribe => unsubscribe()).catch(() => {});
+this._keysSubscription = null;
+}
+this._keysSubscriptionActivityId = null;
+}
+_storeKeys(kind, activityId, keys) {
+if (this._isDisconnected || !(kind in this._keys)) {
+return;
+}
+this._keys = {
+...this._keys,
+[kind]: { ...this._keys[kind], [activityId]: keys },
+};
+this._keyVersions[kind][activityId] = (this._keyVersions[kind][activityId] || 0) + 1;
+const page = Object.keys(PAGE_KEY_KINDS).find(p => PAGE_KEY_KINDS[p] === kind);
+this[`_isRequestingPage${page}`] = false;
+}
+render() {
+if (this._isDisconnected) {
+return html``;
+}
+const isRequesting = (this._currentPage === 1 && this._isRequestingPage1) ||
+(this._currentPage === 2 && this._isRequestingPage2) ||
+(this._currentPage === 3 && this._isRequestingPage3);
+if (!this.hass || !this.stateObj) {
+return html``;
+}
+const currentState = this._getCurrentState();
+if (!currentState) {
+return html``;
+}
+this._renderedLastUpdated = currentState.last_updated;
+const attributes = currentState.attributes;
+const currentActivityId = attributes.current_activity_id;
+const activities = attributes.activities || [];
+const activeActivity = activities.find(a => a.state === 'on');
+const effectiveActivityId = this.selectedActivityId || currentActivityId || (activeActivity ? activeActivity.id : null);
+const showStatusMessage = !effectiveActivityId;
+const hasActivities = activities.length > 0;
+const keyMatchActivityId = this.selectedActivityId || effectiveActivityId || (activities.length > 0 ? activities[0].id : null);
+const pageContent = this._renderPage(attributes, keyMatchActivityId, effectiveActivityId);
+const currentActivity = activities.find(a => a.id === effectiveActivityId);
+const keyMatchActivity = activities.find(a => a.id === keyMatchActivityId);
+let activityName, activityStatus;
+if (currentActivity) {
+activityName = currentActivity.name;
+activityStatus = currentActivity.state === 'on' ? 'Running' : 'Selected';
+} else if (keyMatchActivity && !effectiveActivityId) {
+activityName = keyMatchActivity.name;
+activityStatus = 'Not Started';
+} else {
+activityName = keyMatchActivityId ? `Activity ${keyMatchActivityId}` : 'No Activity';
+activityStatus = 'Unknown Status';
+}
+return html`
+<div class="container">
+<!-- Current activity info -->
+<div class="current-activity">
+<ha-icon icon="${currentActivity && currentActivity.state === 'on' ? 'mdi:play-circle' : 'mdi:pause-circle'}"></ha-icon>
+<span>${activityName} - ${activityStatus}</span>
+<!-- Start/stop button removed, please manage activity status on main card -->
+</div>
+
+<!-- Page navigation -->
+<div class="page-nav">
+<ha-icon-button @click=${() => this._changePage(-1)} .disabled=${this._currentPage === 1}>
+<ha-icon icon="mdi:chevron-left"></ha-icon>
+</ha-icon-button>
+<span>${this._getPageTitle()} (${this._currentPage}/3)</span>
+<ha-icon-button @click=${() => this._changePage(1)} .disabled=${this._currentPage === 3}>
+<ha-icon icon="mdi:chevron-right"></ha-icon>
+</ha-icon-button>
+</div>
+<!-- Status message -->
+${showStatusMessage ? html`
+<div class="status-message">
+${!hasActivities ? html`
+<div class="warning-message">
+<ha-icon icon="mdi:alert-circle-outline"></ha-icon>
+<span>No activities found, please check Hub connection</span>
+<ha-button @click=${this._refreshData} size="small">
+<ha-icon icon="mdi:refresh"></ha-icon>
+Refresh
+</ha-button>
+</div>
+` : html`
+<div class="info-message">
+<ha-icon icon="mdi:information-outline"></ha-icon>
+<span>Please start an activity on the main card to fully control corresponding keys</span>
+<!-- Quick start button removed, please manage activity status on main card -->
+</div>
+`}
+</div>
+` : ''}
+
+<!-- Page content -->
+<div class="page-content">
+${pageContent}
+</div>
+</div>
+`;
+}
+_renderPage(attributes, keyMatchActivityId, effectiveActivityId) {
+const page = this._currentPage;
+const kind = PAGE_KEY_KINDS[page] || PAGE_KEY_KINDS[1];
+const cacheKey = `${page}:${keyMatchActivityId}`;
+const inputs = [
+this._keyVersions[kind][keyMatchActivityId] || 0,
+!!effectiveActivityId,
+!!this[`_isRequestingPage${page}`],
+page === 1 ? 0 : this._listWindow,
+].join("|");
+const cached = this._pageTemplates.get(cacheKey);
+if (cached && cached.inputs === inputs) {
+return cached.template;
+}
+let template;
+switch(page) {
+case 2:
+template = this._renderMacroKeys(attributes, keyMatchActivityId, effectiveActivityId);
+break;
+case 3:
+template = this._renderFavoriteKeys(attributes, keyMatchActivityId, effectiveActivityId);
+break;
+default:
+template = this._renderAssignedKeys(attributes, keyMatchActivityId, effectiveActivityId);
+}
+this._pageTemplates.delete(cacheKey);
+this._pageTemplates.set(cacheKey, { inputs, template });
+if (this._pageTemplates.size > PAGE_TEMPLATE_CACHE_SIZE) {
+this._pageTemplates.delete(this._pageTemplates.keys().next().value);
+}
+return template;
+}
+_windowedKeys(keys) {
+return keys.length > LIST_WINDOW_THRESHOLD ? keys.slice(0, this._listWindow) : keys;
+}
+_renderListSentinel(keys) {
+if (keys.length <= LIST_WINDOW_THRESHOLD || this._listWindow >= keys.length) {
+return '';
+}
+return html`<div class="list-sentinel"></div>`;
+}
+_renderAssignedKeys(attributes, keyMatchActivityId, effectiveActivityId) {
+const assignedKeyIds = this._keys.assigned[keyMatchActivityId] || [];
+const hasActiveActivity = !!effectiveActivityId;
+const hasReceivedResponse = this._keys.assigned.hasOwnProperty(keyMatchActivityId);
+const showLoadingHint = (assignedKeyIds.length === 0) &&
+(this._isRequestingPage1 || !hasReceivedResponse);
+const isRequesting = this._isRequestingPage1;
+const renderKeyGroup = (group) => html`
+<div class="key-group">
+${group.map(k => {
+const key_info = REMOTE_KEYS[k.key];
+const is_assigned = assignedKeyIds.includes(key_info.id);
+const is_enabled = is_assigned && hasActiveActivity;
+const is_partial = is_assigned && !hasActiveActivity;
+return html`
+<div class="key-wrapper ${is_partial ? 'partial-enabled' : ''}" style="grid-area: ${k.grid || 'auto'};">
+<ha-icon-button 
+@click=${(e) => this._sendAssignedKey(keyMatchActivityId, key_info.id, e)}
+.disabled=${!is_assigned}
+class="${is_partial ? 'partial' : ''}"
+title="${k.key}${is_partial ? ' (Activity needs to be started)' : ''}"
+>
+${key_info.icon ? html`<ha-icon icon="${key_info.icon}"></ha-icon>` : ''}
+${key_info.text ? html`<span class="text-key">${key_info.text}</span>` : ''}
+${key_info.color ? html`<div class="color-key" style="background-color: ${key_info.color};"></div>` : ''}
+</ha-icon-button>
+</div>
+`
+})}
+</div>
+`;
+return html`
+${showLoadingHint ? html`
+<div class="loading-hint">
+<ha-icon icon="${isRequesting ? 'mdi:loading' : 'mdi:information-outline'}" 
+class="${isRequesting ? 'spinning' : ''}"></ha-icon>
+<span>${isRequesting ?
+'Loading remote control data...' :
+'No remote control keys available for this activity'}</span>
+</div>
+` : ''}
+
+${hasReceivedResponse && assignedKeyIds.length > 0 ? html`
+<div class="remote-layout">
+<!-- Direction keys - cross layout -->
+<div class="dpad-grid">
+${REMOTE_LAYOUT.dpad.map(k => {
+const key_info = REMOTE_KEYS[k.key];
+if (!key_info) {
+console.warn('Key info not found for:', k.key);
+return '';
+}
+const is_assigned = assignedKeyIds.includes(key_info.id);
+const is_enabled = is_assigned && hasActiveActivity;
+const is_partial = is_assigned && !hasActiveActivity;
+return html`
+<div class="key-wrapper ${is_partial ? 'partial-enabled' : ''}" style="grid-area: ${k.grid};">
+<ha-icon-button 
+@pointerdown=${(e) => this._pressKey(keyMatchActivityId, key_info.id, e)}
+@pointerup=${() => this._releaseKey()}
+@pointerleave=${() => this._releaseKey()}
+@pointercancel=${() => this._releaseKey()}
+@click=${(e) => e.detail === 0 && this._sendAssignedKey(keyMatchActivityId, key_info.id, e)}
+.disabled=${!is_assigned}
+class="${is_partial ? 'partial' : ''}"
+title="${k.key}${is_partial ? ' (Activity needs to be started)' : ''}"
+>
+${key_info.icon ? html`<ha-icon icon="${key_info.icon}"></ha-icon>` : ''}
+${key_info.text ? html`<span class="text-key">${key_info.text}</span>` : ''}
+${key_info.color ? html`<div class="color-key" style="background-color: ${key_info.color};"></div>` : ''}
+</ha-icon-button>
+</div>
+`;
+})}
+</div>
+
+<!-- Function keys - horizontal layout -->
+${renderKeyGroup(REMOTE_LAYOUT.functions)}
+
+<!-- Volume channel area - 2x3 grid symmetric layout -->
+<div class="volume-channel-grid">
+${REMOTE_LAYOUT.volume_channel.map(k => {
+const key_info = REMOTE_KEYS[k.key];
+if (!key_info) {
+console.warn('Key info not found for:', k.key);
+return '';
+}
+const is_assigned = assignedKeyIds.includes(key_info.id);
+const is_enabled = is_assigned && hasActiveActivity;
+const is_partial = is_assigned && !hasActiveActivity;
+return html`
+<div class="key-wrapper ${is_partial ? 'partial-enabled' : ''}" style="grid-area: ${k.grid};">
+<ha-icon-button 
+@pointerdown=${(e) => this._pressKey(keyMatchActivityId, key_info.id, e)}
+@pointerup=${() => this._releaseKey()}
+@pointerleave=${() => this._releaseKey()}
+@pointercancel=${() => this._releaseKey()}
+@click=${(e) => e.detail === 0 && this._sendAssignedKey(keyMatchActivityId, key_info.id, e)}
+.disabled=${!is_assigned}
+class="${is_partial ? 'partial' : ''}"
+title="${k.key}${is_partial ? ' (Activity needs to be started)' : ''}"
+>
+${key_info.icon ? html`<ha-icon icon="${key_info.icon}"></ha-icon>` : ''}
+${key_info.text ? html`<span class="text-key">${key_info.text}</span>` : ''}
+${key_info.color ? html`<div class="color-key" style="background-color: ${key_info.color};"></div>` : ''}
+</ha-icon-button>
+</div>
+`;
+})}
+</div>
+
+<!-- Media control keys -->
+${renderKeyGroup(REMOTE_LAYOUT.transport)}
+${renderKeyGroup(REMOTE_LAYOUT.transport_extra)}
+
+<!-- Color keys -->
+${renderKeyGroup(REMOTE_LAYOUT.colors)}
+
+<!-- Custom keys -->
+${renderKeyGroup(REMOTE_LAYOUT.customs)}
+</div>
+` : hasReceivedResponse ? html`
+<div class="info-message">
+<ha-icon icon="mdi:information-outline"></ha-icon>
+<span>No remote control keys available for this activity</span>
+</div>
+` : ''}
+`;
+}
+_renderMacroKeys(attributes, keyMatchActivityId, effectiveActivityId) {
+const macroKeys = this._keys.macros[keyMatchActivityId] || [];
+const isRequesting = this._isRequestingPage2;
+if (macroKeys.length === 0) {
+return html`
+<div class="loading-message">
+<ha-icon icon="${isRequesting ? 'mdi:loading' : 'mdi:information-outline'}" 
+class="${isRequesting ? 'spinning' : ''}"></ha-icon>
+<p>${isRequesting ? 'Loading macro commands...' : 'No macro commands available for this activity'}</p>
+${isRequesting ? html`<p>Please wait while macro commands are being loaded.</p>` : ''}
+</div>
+`;
+}
+return html`
+<div class="macro-grid">
+${this._windowedKeys(macroKeys).map(key => html`
+<button
+class="macro-button"
+@click=${(e) => this._sendMacroKey(keyMatchActivityId, key.id, e)}
+title="${key.name}"
+>
+${key.name}
+</button>
+`)}
+</div>
+${this._renderListSentinel(macroKeys)}
+`;
+}
+_renderFavoriteKeys(attributes, keyMatchActivityId, effectiveActivityId) {
+const favoriteKeys = this._keys.favorites[keyMatchActivityId] || [];
+const isRequesting = this._isRequestingPage3;
+if (favoriteKeys.length === 0) {
+return html`
+<div class="loading-message">
+<ha-icon icon="${isRequesting ? 'mdi:loading' : 'mdi:information-outline'}" 
+class="${isRequesting ? 'spinning' : ''}"></ha-icon>
+<p>${isRequesting ? 'Loading favorite commands...' : 'No favorite commands available for this activity'}</p>
+${isRequesting ? html`<p>Please wait while favorite commands are being loaded.</p>` : ''}
+</div>
+`;
+}
+return html`
+<div class="favorite-grid">
+${this._windowedKeys(favoriteKeys).map(key => html`
+<button
+class="favorite-button"
+@click=${(e) => this._sendFavoriteKey(keyMatchActivityId, key.id, key.device_id, e)}
+title="${key.name}"
+>
+${key.name}
+</button>
+`)}
+</div>
+${this._renderListSentinel(favoriteKeys)}
+`;
+}
+_changePage(direction) {
+const newPage = this._currentPage + direction;
+if (newPage >= 1 && newPage <= 3) {
+this._currentPage = newPage;
+this._requestKeysForCurrentPage();
+}
+}
+_getPageTitle() {
+switch(this._currentPage) {
+case 1: return "Assigned Keys";
+case 2: return "Macro Commands";
+case 3: return "Favorite Commands";
+default: return "";
+}
+}
+_sendAssignedKey(activityId, keyId, event) {
+this._addRippleEffect(event);
+this.hass.callService("remote", "send_command", {
+entity_id: ensureEntityIdIsString(this.stateObj.entity_id),
+command: [`type:send_assigned_key`, `activity_id:${activityId}`, `key_id:${keyId}`],
+});
+}
+_pressKey(activityId, keyId, event) {
+if (event.button > 0) return;
+this._releaseKey();
+this._sendAssignedKey(activityId, keyId, event);
+const held = { activityId, keyId, repeating: false };
+held.timer = setTimeout(() => {
+held.repeating = true;
+this.hass.callService("remote", "send_command", {
+entity_id: ensureEntityIdIsString(this.stateObj.entity_id),
+command: [`type:repeat_start`, `activity_id:${activityId}`, `key_id:${keyId}`],
+});
+}, KEY_HOLD_DELAY);
+this._heldKey = held;
+}
+_releaseKey() {
+const held = this._heldKey;
+if (!held) return;
+this._heldKey = null;
+clearTimeout(held.timer);
+if (held.repeating && this.hass && this.stateObj) {
+this.hass.callService("remote", "send_command", {
+entity_id: ensureEntityIdIsString(this.stateObj.entity_id),
+command: [`type:repeat_stop`, `activity_id:${held.activityId}`, `key_id:${held.keyId}`],
+});
+}
+}
+_addRippleEffect(event) {
+const button = event.target.closest('.key-wrapper');
+if (!button) return;
+button.classList.remove('ripple');
+button.offsetHeight;
+button.classList.add('ripple');
+setTimeout(() => {
+button.classList.remove('ripple');
+}, 600);
+}
+_sendMacroKey(activityId, keyId, event) {
+if (event) this._addRippleEffect(event);
+this.hass.callService("remote", "send_command", {
+entity_id: ensureEntityIdIsString(this.stateObj.entity_id),
+command: [`type:send_macro_key`, `activity_id:${activityId}`, `key_id:${keyId}`],
+});
+}
+_sendFavoriteKey(activityId, keyId, deviceId, event) {
+if (event) this._addRippleEffect(event);
+this.hass.callService("remote", "send_command", {
+entity_id: ensureEntityIdIsString(this.stateObj.entity_id),
+command: [`type:send_favorite_key`, `activity_id:${activityId}`, `key_id:${keyId}`, `device_id:${deviceId}`],
+});
+}
+_startActivity(activityId) {
+this.hass.callService("remote", "send_command", {
+entity_id: ensureEntityIdIsString(this.stateObj.entity_id),
+command: [`type:start_activity`, `activity_id:${activityId}`],
+});
+}
+_stopCurrentActivity() {
+this.hass.callService("remote", "send_command", {
+entity_id: ensureEntityIdIsString(this.stateObj.entity_id),
+command: [`type:stop_activity`, `activity_id:${this.stateObj.attributes.current_activity_id}`],
+});
+}
+_refreshData() {
+this.hass.callService("remote", "send_command", {
+entity_id: ensureEntityIdIsString(this.stateObj.entity_id),
+command: ["type:request_basic_data"],
+});
+}
+}
+customElements.define("sofabaton-detail-card", SofabatonDetailCard);
+let currentSofabatonDialog = null;
+document.addEventListener("click", (e) => {
+if (e.target && e.target.closest && e.target.closest("ha-icon-button") &&
+e.target.closest(".more-info")) {
+const sofabatonCard = e.target.closest("sofabaton-main-card");
+if (sofabatonCard) {
+setTimeout(() => {
+const otherDialogs = document.querySelectorAll("ha-more-info-dialog:not([data-sofabaton-dialog])");
+otherDialogs.forEach(dialog => {
+if (dialog.close) dialog.close();
+});
+}, 50);
+}
+}
+});
+document.addEventListener("hass-more-info", (e) => {
+const entityId = e.detail.entityId;
+const selectedActivityId = e.detail.selectedActivityId; 
+void 0;
+const isSofabatonHub = entityId?.startsWith("remote.") &&
+checkIfSofabatonHub(entityId, document.querySelector("home-assistant")?.hass);
+if (isSofabatonHub) {
+e.stopPropagation();
+e.stopImmediatePropagation();
+e.preventDefault();
+const homeAssistant = document.querySelector("home-assistant");
+if (!homeAssistant || !homeAssistant.hass) {
+console.error("Could not find Home Assistant instance");
+return false;
+}
+const hass = homeAssistant.hass;
+const stateObj = hass.states[entityId];
+if (!stateObj) {
+console.error("Could not find state object for entity:", entityId);
+return false;
+}
+showSofabatonDialog(hass, stateObj, selectedActivityId);
+return false; 
+}
+}, true); 
+document.addEventListener("show-dialog", (e) => {
+if (e.detail && e.detail.dialogTag === "ha-more-info-dialog") {
+const entityId = e.detail.dialogParams?.entityId;
+const isSofabatonHub = entityId?.startsWith("remote.") &&
+checkIfSofabatonHub(entityId, document.querySelector("home-assistant")?.hass);
+if (isSofabatonHub) {
+e.stopPropagation();
+e.stopImmediatePropagation();
+e.preventDefault();
+return false;
+}
+}
+}, true);
+function showSofabatonDialog(hass, stateObj, selectedActivityId) {
+if (currentSofabatonDialog && currentSofabatonDialog.close) {
+currentSofabatonDialog.close();
+currentSofabatonDialog = null;
+}
+const existingDialogs = document.querySelectorAll('ha-dialog[data-sofabaton-dialog="true"]');
+existingDialogs.forEach(dialog => {
+if (dialog.close) dialog.close();
+if (dialog.parentNode) dialog.parentNode.removeChild(dialog);
+});
+const dialog = document.createElement("ha-dialog");
+dialog.setAttribute("open", "");
+dialog.setAttribute("hide-actions", "");
+dialog.setAttribute("data-sofabaton-dialog", "true");
+dialog.heading = `${stateObj.attributes.friendly_name || "Sofabaton Hub"} - Remote Control`;
+const card = document.createElement("sofabaton-detail-card");
+card.hass = hass;
+card.stateObj = stateObj;
+card.entityId = stateObj.entity_id; 
+card.selectedActivityId = selectedActivityId; 
+void 0;
+dialog.appendChild(card);
+const closeButton = document.createElement("ha-icon-button");
+closeButton.setAttribute("slot", "heading");
+closeButton.setAttribute("title", "Close");
+closeButton.style.marginLeft = "auto";
+closeButton.style.cursor = "pointer";
+const closeIcon = document.createElement("ha-icon");
+closeIcon.setAttribute("icon", "mdi:close");
+closeButton.appendChild(closeIcon);
+const closeHandler = (e) => {
+e.preventDefault();
+e.stopPropagation();
+e.stopImmediatePropagation();
+const detailCard = dialog.querySelector("sofabaton-detail-card");
+if (detailCard) {
+detailCard._isRequesting = false;
+detailCard.requestUpdate(); 
+}
+dialog.close();
+return false;
+};
+closeButton.addEventListener("click", closeHandler, true);
+closeButton.addEventListener("mousedown", closeHandler, true);
+closeButton.addEventListener("touchstart", closeHandler, true);
+closeIcon.addEventListener("click", closeHandler, true);
+closeIcon.addEventListener("mousedown", closeHandler, true);
+dialog.appendChild(closeButton);
+dialog.style.setProperty("--mdc-dialog-min-width", "400px");
+dialog.style.setProperty("--mdc-dialog-max-width", "90vw");
+dialog.style.setProperty("--mdc-dialog-min-height", "60vh");
+dialog.style.setProperty("z-index", "9999");
+dialog.addEventListener("closed", () => {
+const detailCard = dialog.querySelector("sofabaton-detail-card");
+if (detailCard) {
+detailCard._isRequesting = false;
+}
+if (dialog.parentNode) {
+dialog.parentNode.removeChild(dialog);
+}
+if (currentSofabatonDialog === dialog) {
+currentSofabatonDialog = null;
+}
+});
+dialog.addEventListener("keydown", (e) => {
+if (e.key === "Escape") {
+e.preventDefault();
+const detailCard = dialog.querySelector("sofabaton-detail-card");
+if (detailCard) {
+detailCard._isRequesting = false;
+detailCard.requestUpdate(); 
+}
+dialog.close();
+}
+});
+currentSofabatonDialog = dialog;
+document.body.appendChild(dialog);
+}
+}
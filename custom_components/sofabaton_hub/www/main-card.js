@@ -30,10 +30,6 @@ function checkIfSofabatonHub(entityId, hass) {
     attributes.devices !== undefined ||
     // Check for current_activity_id attribute
     attributes.current_activity_id !== undefined ||
-    // Check for assigned_keys and other key-related attributes
-    attributes.assigned_keys !== undefined ||
-    attributes.macro_keys !== undefined ||
-    attributes.favorite_keys !== undefined ||
     // Check integration attribute (if exists)
     attributes.integration === 'sofabaton_hub' ||
     // Check device_class or other identifiers
@@ -0,0 +1,86 @@
+"""Microbenchmark: inbound MQTT topic dispatch throughput.
+
+Compares the former dispatch (rebuild the topic -> handler map with
+str.format for every message) with the routing table compiled once per hub
+that the coordinator now uses.
+
+Usage:
+    python scripts/benchmark_dispatch.py
+"""
+from __future__ import annotations
+
+import importlib.util
+from pathlib import Path
+import timeit
+
+CONST_PATH = Path(__file__).parent.parent / "custom_components" / "sofabaton_hub" / "const.py"
+
+# const.py is stdlib-only, load it without importing Home Assistant
+_spec = importlib.util.spec_from_file_location("sofabaton_const", CONST_PATH)
+const = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(const)
+
+MAC = "AABBCCDDEEFF"
+
+# (topic template, update type, use debounce) as registered by the coordinator
+ROUTES = (
+    (const.TOPIC_ACTIVITY_LIST_RESPONSE, "activity_list", False),
+    (const.TOPIC_ACTIVITY_CONTROL_UP, "activity_status", False),
+    (const.TOPIC_ACTIVITY_KEYS_LIST, "assigned_keys", False),
+    (const.TOPIC_ACTIVITY_MACRO_LIST, "macro_keys", False),
+    (const.TOPIC_ACTIVITY_FAVORITES_LIST, "favorite_keys", False),
+)
+
+
+def handler(payload: dict) -> None:
+    """Stand-in for a coordinator message handler."""
+
+
+def get_topic(topic_template: str) -> str:
+    """Former coordinator._get_topic."""
+    return topic_template.format(mac=MAC)
+
+
+def dispatch_rebuild(topic: str, payload: dict) -> None:
+    """Former _handle_mqtt_message: build the map, then look up the topic."""
+    topic_map = {
+        get_topic(template): (update_type, handler, use_debounce)
+        for template, update_type, use_debounce in ROUTES
+    }
+    handler_info = topic_map.get(topic)
+    if handler_info:
+        handler_info[1](payload)
+
+
+COMPILED = {get_topic(template): (update_type, handler, use_debounce) for template, update_type, use_debounce in ROUTES}
+
+
+def dispatch_compiled(topic: str, payload: dict) -> None:
+    """Current _handle_mqtt_message: single lookup in the compiled table."""
+    route = COMPILED.get(topic)
+    if route:
+        route[1](payload)
+
+
+def throughput(func, topic: str) -> float:
+    """Return dispatched messages per second."""
+    payload = {"activity_id": 101, "state": "on"}
+    number, total = timeit.Timer(lambda: func(topic, payload)).autorange()
+    return number / total
+
+
+def main() -> None:
+    """Run the benchmark and print dispatch throughput."""
+    print(f"{'topic':>24} | {'rebuild map':>14} | {'compiled':>14} | {'speedup':>7}")
+    print("-" * 72)
+    for template in (const.TOPIC_ACTIVITY_CONTROL_UP, const.TOPIC_ACTIVITY_FAVORITES_LIST):
+        topic = get_topic(template)
+        before = throughput(dispatch_rebuild, topic)
+        after = throughput(dispatch_compiled, topic)
+        print(
+            f"{topic.rsplit('/', 1)[-1]:>24} | {before:>12,.0f}/s | {after:>12,.0f}/s | {after / before:>6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Microbenchmark: per-message cost of coordinator state updates.
+
+Compares the former approach (mutate, then copy.deepcopy the whole state
+before async_set_updated_data) with the copy-on-write helpers in state.py
+as the key catalogs grow.
+
+Usage:
+    python scripts/benchmark_state.py
+"""
+from __future__ import annotations
+
+import copy
+import importlib.util
+from pathlib import Path
+import sys
+import timeit
+from typing import NamedTuple
+
+STATE_PATH = Path(__file__).parent.parent / "custom_components" / "sofabaton_hub" / "state.py"
+
+# state.py is stdlib-only, load it without importing Home Assistant
+_spec = importlib.util.spec_from_file_location("sofabaton_state", STATE_PATH)
+state = importlib.util.module_from_spec(_spec)
+# Dataclasses look their module up in sys.modules while the class is created
+sys.modules[_spec.name] = state
+_spec.loader.exec_module(state)
+
+
+class Activity(NamedTuple):
+    """Stand-in for messages.ActivityInfo (which needs the package to import)."""
+
+    activity_id: int
+    name: str
+    state: str
+
+
+ACTIVITIES = 30
+CATALOG_SIZES = (10, 50, 200, 1000)
+
+
+def build_state(keys_per_catalog: int) -> dict:
+    """Build a snapshot with cached catalogs for every activity."""
+    data = state.apply_activity_list(
+        state.empty_state(),
+        [Activity(i, f"Activity {i}", "off") for i in range(1, ACTIVITIES + 1)],
+    )
+    for activity_id in range(1, ACTIVITIES + 1):
+        data = state.apply_keys(data, "assigned", activity_id, list(range(keys_per_catalog)))
+        data = state.apply_keys(
+            data,
+            "macros",
+            activity_id,
+            [{"id": k, "name": f"Macro {k}"} for k in range(keys_per_catalog)],
+        )
+        data = state.apply_keys(
+            data,
+            "favorites",
+            activity_id,
+            [{"id": k, "name": f"Favorite {k}", "device_id": 1} for k in range(keys_per_catalog)],
+        )
+    return data
+
+
+def deepcopy_status(data: dict) -> dict:
+    """Former activity_control_up handling: mutate then deepcopy."""
+    for activity in data["activities"].values():
+        activity["state"] = "off"
+    data["activities"][1]["state"] = "on"
+    data["current_activity_id"] = 1
+    return copy.deepcopy(data)
+
+
+def deepcopy_keys(data: dict, catalog: list) -> dict:
+    """Former favorites_keys_list handling: mutate then deepcopy."""
+    data["keys"]["favorites"][1] = catalog
+    return copy.deepcopy(data)
+
+
+def per_call(func) -> float:
+    """Return the average cost of one call in microseconds."""
+    number, total = timeit.Timer(func).autorange()
+    return total / number * 1e6
+
+
+def main() -> None:
+    """Run the benchmark and print per-message cost in microseconds."""
+    print(f"{ACTIVITIES} activities, 3 catalogs per activity, cost per message")
+    print(f"{'keys/catalog':>12} | {'status deepcopy':>15} | {'status COW':>10} | {'keys deepcopy':>13} | {'keys COW':>8}")
+    print("-" * 72)
+
+    for size in CATALOG_SIZES:
+        data = build_state(size)
+        catalog = [{"id": k, "name": f"Favorite {k}", "device_id": 1} for k in range(size)]
+        us = [
+            per_call(lambda: deepcopy_status(data)),
+            per_call(lambda: state.apply_activity_status(data, 2, "on")),
+            per_call(lambda: deepcopy_keys(data, catalog)),
+            per_call(lambda: state.apply_keys(data, "favorites", 1, catalog)),
+        ]
+        print(f"{size:>12} | {us[0]:>13.1f}us | {us[1]:>8.1f}us | {us[2]:>11.1f}us | {us[3]:>6.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+// Production build of the Sofabaton Hub Lovelace cards.
+//
+// Bundles cards.js (picker registration), main-card.js and detail-card.js
+// into one ES module with a single lit import, strips console.log and
+// console.debug calls, removes comments and indentation, and writes it to
+// www/dist/ under a content-hashed file name. www/dist/build.json names
+// the current bundle; __init__.py registers it instead of the source files
+// unless the "frontend_debug" option is on.
+//
+// Identifiers are not mangled: the build has no dependencies (Node.js
+// only), so it only performs transformations that need no parser beyond
+// a tokenizer for strings, template literals and comments.
+//
+// Usage:
+//     node scripts/build_cards.mjs
+
+import { createHash } from "node:crypto";
+import { readFileSync, writeFileSync, mkdirSync, readdirSync, unlinkSync } from "node:fs";
+import { dirname, join } from "node:path";
+import { fileURLToPath } from "node:url";
+
+const WWW = join(dirname(fileURLToPath(import.meta.url)), "..", "custom_components", "sofabaton_hub", "www");
+const DIST = join(WWW, "dist");
+const BUNDLE_PREFIX = "sofabaton-cards.";
+
+// Sources in load order; cards.js is cut at the module loader, which only
+// exists to load the unbundled card files
+const SOURCES = ["cards.js", "main-card.js", "detail-card.js"];
+const CARDS_LOADER_MARKER = "// Function to dynamically load ES6 module scripts";
+
+// Console methods removed from the bundle (warnings and errors are kept)
+const STRIPPED_CONSOLE = ["console.log(", "console.debug("];
+
+const IMPORT_RE = /^import\s*\{([^}]*)\}\s*from\s*"([^"]+)";\s*$/gm;
+
+// Split the source into code, string literal, template literal text and
+// comment regions, so edits are only made to code
+function tokenize(source) {
+  // Each entry: [start, end, kind, tag] with kind "code", "string", "template"
+  // or "comment"; tag is the template literal tag (html, css) if any
+  const regions = [];
+  let i = 0;
+  let start = 0;
+  // Stack of open template literals: tag and open braces of the current ${ } expression
+  const templates = [];
+
+  const push = (end, kind, tag = null) => {
+    if (end > start) regions.push([start, end, kind, tag]);
+    start = end;
+  };
+  const top = () => templates[templates.length - 1];
+
+  while (i < source.length) {
+    const ch = source[i];
+    const next = source[i + 1];
+
+    if (ch === "/" && next === "/") {
+      push(i, "code");
+      const end = source.indexOf("\n", i);
+      i = end === -1 ? source.length : end;
+      push(i, "comment");
+    } else if (ch === "/" && next === "*") {
+      push(i, "code");
+      i = source.indexOf("*/", i + 2) + 2;
+      push(i, "comment");
+    } else if (ch === "'" || ch === '"') {
+      push(i, "code");
+      i += 1;
+      while (source[i] !== ch) i += source[i] === "\\" ? 2 : 1;
+      i += 1;
+      push(i, "string");
+    } else if (ch === "`" || (ch === "}" && templates.length && top().depth === 0)) {
+      // Template literal text, from the opening backtick or the end of a ${ } expression
+      const tag = ch === "}" ? templates.pop().tag : (/(html|css)\s*$/.exec(source.slice(start, i)) || [])[1] || null;
+      push(i, "code");
+      i += 1;
+      while (source[i] !== "`" && !(source[i] === "$" && source[i + 1] === "{")) {
+        i += source[i] === "\\" ? 2 : 1;
+      }
+      if (source[i] === "`") {
+        i += 1;
+      } else {
+        i += 2;
+        templates.push({ tag, depth: 0 });
+      }
+      push(i, "template", tag);
+    } else {
+      if (templates.length) {
+        if (ch === "{") top().depth += 1;
+        else if (ch === "}") top().depth -= 1;
+      }
+      i += 1;
+    }
+  }
+  push(source.length, "code");
+  return regions;
+}
+
+// Index just after the parenthesis closing the call that opens at `open`
+function closingParen(source, regions, open) {
+  let depth = 0;
+  for (const [start, end, kind] of regions) {
+    if (end <= open || kind !== "code") continue;
+    for (let i = Math.max(start, open); i < end; i++) {
+      if (source[i] === "(") depth += 1;
+      else if (source[i] === ")" && --depth === 0) return i + 1;
+    }
+  }
+  throw new Error(`Unbalanced call at offset ${open}`);
+}
+
+// Replace stripped console calls with `void 0` (valid in statement and expression position)
+function stripConsole(source) {
+  const regions = tokenize(source);
+  const edits = [];
+  for (const [start, end, kind] of regions) {
+    if (kind !== "code") continue;
+    const code = source.slice(start, end);
+    for (const call of STRIPPED_CONSOLE) {
+      for (let at = code.indexOf(call); at !== -1; at = code.indexOf(call, at + 1)) {
+        const open = start + at + call.length - 1;
+        edits.push([start + at, closingParen(source, regions, open)]);
+      }
+    }
+  }
+  edits.sort((a, b) => b[0] - a[0]);
+  for (const [from, to] of edits) {
+    source = source.slice(0, from) + "void 0" + source.slice(to);
+  }
+  return { source, removed: edits.length };
+}
+
+// Drop comments and indentation (outside literals and inside html/css
+// templates); keep line breaks for ASI
+function minify(source) {
+  let out = "";
+  for (const [start, end, kind, tag] of tokenize(source)) {
+    const text = source.slice(start, end);
+    if (kind === "comment") continue;
+    if (kind !== "code") {
+      // Indentation inside html and css templates is insignificant whitespace
+      out += tag ? text.replace(/\n[ \t]+/g, "\n") : text;
+      continue;
+    }
+    let code = text.replace(/[ \t]*\n[ \t\n]*/g, "\n").replace(/[ \t]{2,}/g, " ");
+    // Blank lines left where comments were removed
+    if (out.endsWith("\n")) code = code.replace(/^\n+/, "");
+    out += code;
+  }
+  // Statements emptied by console stripping (only after a complete
+  // statement or block, never as the body of a braceless if/else)
+  return out.replace(/(?<=[;{}]\n)void 0;\n/g, "").trim() + "\n";
+}
+
+function build() {
+  const imports = new Map();
+  const bodies = [];
+  let removed = 0;
+
+  for (const name of SOURCES) {
+    let source = readFileSync(join(WWW, name), "utf8");
+    if (name === "cards.js") {
+      source = source.slice(0, source.indexOf(CARDS_LOADER_MARKER));
+    }
+    source = source.replace(IMPORT_RE, (_, names, specifier) => {
+      const set = imports.get(specifier) || new Set();
+      names.split(",").map(n => n.trim()).filter(Boolean).forEach(n => set.add(n));
+      imports.set(specifier, set);
+      return "";
+    });
+    const stripped = stripConsole(source);
+    removed += stripped.removed;
+    // Block scope per file: the cards declare the same helper functions
+    bodies.push(`// ${name}\n{\n${stripped.source}\n}`);
+  }
+
+  const header = [...imports]
+    .map(([specifier, names]) => `import { ${[...names].join(", ")} } from "${specifier}";`)
+    .join("\n");
+  const bundle = minify(`${header}\n${bodies.join("\n")}`);
+  const hash = createHash("sha256").update(bundle).digest("hex").slice(0, 10);
+  const fileName = `${BUNDLE_PREFIX}${hash}.js`;
+
+  mkdirSync(DIST, { recursive: true });
+  for (const old of readdirSync(DIST)) {
+    if (old.startsWith(BUNDLE_PREFIX) && old !== fileName) unlinkSync(join(DIST, old));
+  }
+  writeFileSync(join(DIST, fileName), bundle);
+  writeFileSync(join(DIST, "build.json"), JSON.stringify({ module: fileName }, null, 2) + "\n");
+
+  const sourceBytes = SOURCES.reduce((total, name) => total + readFileSync(join(WWW, name)).length, 0);
+  console.log(`${fileName}: ${bundle.length} bytes (sources ${sourceBytes} bytes), ${removed} console calls removed`);
+}
+
+build();
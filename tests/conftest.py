@@ -2,6 +2,8 @@
 from __future__ import annotations
 
 from collections.abc import Generator
+import json
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -9,6 +11,7 @@ from homeassistant.components.mqtt import DOMAIN as MQTT_DOMAIN
 from homeassistant.const import CONF_NAME
 from homeassistant.core import HomeAssistant
 
+from custom_components.sofabaton_hub.api import SofabatonHubApiClient
 from custom_components.sofabaton_hub.const import (
     CONF_HOST,
     CONF_MAC,
@@ -23,6 +26,11 @@ from custom_components.sofabaton_hub.const import (
 pytest_plugins = "pytest_homeassistant_custom_component"
 
 
+def mqtt_message(topic: str, payload: dict) -> SimpleNamespace:
+    """Build a received MQTT message with a raw JSON payload."""
+    return SimpleNamespace(topic=topic, payload=json.dumps(payload).encode())
+
+
 @pytest.fixture(autouse=True)
 def auto_enable_custom_integrations(enable_custom_integrations):
     """Enable custom integrations for all tests."""
@@ -64,6 +72,14 @@ def mock_config_entry():
     )
 
 
+@pytest.fixture
+def api_client(hass: HomeAssistant, mock_config_entry, mock_mqtt_client) -> SofabatonHubApiClient:
+    """Return an API client with a message callback registered."""
+    client = SofabatonHubApiClient(hass, mock_config_entry)
+    client.set_on_message_callback(MagicMock())
+    return client
+
+
 @pytest.fixture
 def mock_api_client():
     """Mock API client."""
@@ -0,0 +1,115 @@
+"""Test Sofabaton Hub optimistic activity control."""
+from __future__ import annotations
+
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.sofabaton_hub.api import SofabatonHubApiClient
+from custom_components.sofabaton_hub.coordinator import (
+    SofabatonHubDataUpdateCoordinator,
+)
+from custom_components.sofabaton_hub.messages import ActivityInfo, ActivityList, ActivityStatus
+
+
+def _coordinator(hass: HomeAssistant, mock_config_entry) -> SofabatonHubDataUpdateCoordinator:
+    """Return a coordinator with activity 101 running."""
+    api_client = MagicMock()
+    api_client.async_control_activity_state = AsyncMock()
+    api_client.async_request_activity_list = AsyncMock()
+    coordinator = SofabatonHubDataUpdateCoordinator(hass, api_client, mock_config_entry)
+    coordinator._handle_activity_list(
+        ActivityList((ActivityInfo(101, "Watch TV", "on"), ActivityInfo(102, "Watch Movie", "off")))
+    )
+    return coordinator
+
+
+async def test_switch_confirmed_by_status_push(hass: HomeAssistant, mock_config_entry) -> None:
+    """Test the expected state is shown at once and confirmed without a list request."""
+    coordinator = _coordinator(hass, mock_config_entry)
+
+    await coordinator.async_control_activity(102, "on")
+    coordinator.api_client.async_control_activity_state.assert_awaited_once_with(102, "on")
+    assert coordinator.data["current_activity_id"] == 102
+    assert coordinator.last_changes.activity_ids == {101, 102}
+
+    coordinator._handle_activity_status(ActivityStatus(102, "on"))
+    await hass.async_block_till_done()
+    assert coordinator.activity_control_stats["confirmed"] == 1
+    assert coordinator._pending_activity is None
+    coordinator.api_client.async_request_activity_list.assert_not_called()
+
+
+async def test_mismatch_requests_activity_list(hass: HomeAssistant, mock_config_entry) -> None:
+    """Test a push contradicting the expected state wins and refreshes the list."""
+    coordinator = _coordinator(hass, mock_config_entry)
+
+    await coordinator.async_control_activity(102, "on")
+    coordinator._handle_activity_status(ActivityStatus(101, "on"))
+    await hass.async_block_till_done()
+
+    assert coordinator.data["current_activity_id"] == 101
+    assert coordinator.activity_control_stats["mismatched"] == 1
+    coordinator.api_client.async_request_activity_list.assert_awaited_once()
+    coordinator._cleanup_basic_data_request()
+
+
+async def test_timeout_rolls_back(hass: HomeAssistant, mock_config_entry) -> None:
+    """Test an unconfirmed switch is rolled back and the list re-requested."""
+    coordinator = _coordinator(hass, mock_config_entry)
+    before = coordinator.data["activities"]
+
+    with patch("custom_components.sofabaton_hub.coordinator.ACTIVITY_CONFIRM_TIMEOUT", 0.01):
+        await coordinator.async_control_activity(0xFF, "off")
+        # A second switch before confirmation still rolls back to the first state
+        await coordinator.async_control_activity(102, "on")
+    assert coordinator.data["current_activity_id"] == 102
+
+    await asyncio.sleep(0.05)
+    await hass.async_block_till_done()
+    assert coordinator.data["activities"] is before
+    assert coordinator.data["current_activity_id"] == 101
+    assert coordinator.activity_control_stats["timed_out"] == 1
+    coordinator.api_client.async_request_activity_list.assert_awaited_once()
+    coordinator._cleanup_basic_data_request()
+
+
+async def test_publish_failure_rolls_back(hass: HomeAssistant, mock_config_entry) -> None:
+    """Test the expected state is rolled back when the command cannot be sent."""
+    coordinator = _coordinator(hass, mock_config_entry)
+    coordinator.api_client.async_control_activity_state.side_effect = ConnectionError
+
+    with pytest.raises(ConnectionError):
+        await coordinator.async_control_activity(102, "on")
+
+    assert coordinator.data["current_activity_id"] == 101
+    assert coordinator._pending_activity is None
+    assert coordinator.activity_control_stats["failed"] == 1
+
+
+async def test_repeated_confirmation_is_not_deduplicated(
+    hass: HomeAssistant, mock_config_entry, mock_mqtt_client
+) -> None:
+    """Test switching back within the duplicate window is confirmed by an identical push."""
+    api_client = SofabatonHubApiClient(hass, mock_config_entry)
+    coordinator = SofabatonHubDataUpdateCoordinator(hass, api_client, mock_config_entry)
+    coordinator._handle_activity_list(ActivityList((ActivityInfo(102, "Watch Movie", "off"),)))
+
+    for state in ("on", "off", "on"):
+        await coordinator.async_control_activity(102, state)
+        api_client._message_received(
+            SimpleNamespace(
+                topic="activity/AABBCCDDEEFF/activity_control_up",
+                payload=json.dumps({"activity_id": 102, "state": state}).encode(),
+            )
+        )
+        assert coordinator._pending_activity is None
+
+    assert coordinator.activity_control_stats["confirmed"] == 3
+    # Outside a pending switch, repeated pushes are dropped again
+    assert not api_client._expected_messages
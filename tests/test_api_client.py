@@ -0,0 +1,190 @@
+"""Test the Sofabaton Hub API client request handling."""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+
+import pytest
+from homeassistant.core import HomeAssistant
+
+from custom_components.sofabaton_hub.api import SofabatonHubApiClient
+from custom_components.sofabaton_hub.const import KEY_KIND_ASSIGNED, KEY_KIND_MACROS
+from custom_components.sofabaton_hub.messages import parse_key_list
+
+from .conftest import mqtt_message
+
+
+async def test_request_keys_resolved_by_response(
+    hass: HomeAssistant, api_client: SofabatonHubApiClient, mock_mqtt_client
+) -> None:
+    """Test the awaitable resolves with the matching parsed key list."""
+    request = asyncio.ensure_future(api_client.async_request_keys(KEY_KIND_ASSIGNED, 101))
+    await asyncio.sleep(0.01)
+
+    topic, message = mock_mqtt_client.async_publish.call_args[0][1:3]
+    assert topic == "activity/AABBCCDDEEFF/keys_request"
+    assert json.loads(message) == {"data": {"activity_id": 101}}
+
+    # Response for another activity does not resolve the request
+    api_client._message_received(
+        mqtt_message("activity/AABBCCDDEEFF/keys_list", {"activity_id": 102, "data": []})
+    )
+    await asyncio.sleep(0)
+    assert not request.done()
+
+    payload = {"activity_id": 101, "data": [{"key_id": 1}]}
+    api_client._message_received(mqtt_message("activity/AABBCCDDEEFF/keys_list", payload))
+
+    assert await asyncio.wait_for(request, 1.0) == parse_key_list(payload)
+
+
+async def test_answers_matched_to_request_for_pacing(
+    hass: HomeAssistant, api_client: SofabatonHubApiClient, mock_mqtt_client
+) -> None:
+    """Test only the answer for the requested activity releases the pacing hold."""
+    request = asyncio.ensure_future(api_client.async_request_keys(KEY_KIND_ASSIGNED, 101))
+    await asyncio.sleep(0.01)
+    pipeline = api_client.pipeline
+    assert pipeline.awaiting_response_key == ("activity/AABBCCDDEEFF/keys_list", 101)
+
+    # Unsolicited status push and the key list of another activity
+    api_client._message_received(
+        mqtt_message("activity/AABBCCDDEEFF/activity_control_up", {"data": {"activity_id": 101, "state": "on"}})
+    )
+    api_client._message_received(
+        mqtt_message("activity/AABBCCDDEEFF/keys_list", {"activity_id": 102, "data": []})
+    )
+    assert pipeline.awaiting_response_key == ("activity/AABBCCDDEEFF/keys_list", 101)
+    assert pipeline.stats()["pacing"]["samples"] == 0
+
+    api_client._message_received(
+        mqtt_message("activity/AABBCCDDEEFF/keys_list", {"activity_id": 101, "data": []})
+    )
+    await asyncio.wait_for(request, 1.0)
+    assert pipeline.awaiting_response_key is None
+    assert pipeline.stats()["pacing"]["samples"] == 1
+
+
+async def test_request_keys_coalesced(
+    hass: HomeAssistant, api_client: SofabatonHubApiClient, mock_mqtt_client
+) -> None:
+    """Test concurrent requests for the same activity share one publish."""
+    first = asyncio.ensure_future(api_client.async_request_keys(KEY_KIND_MACROS, 101))
+    second = asyncio.ensure_future(api_client.async_request_keys(KEY_KIND_MACROS, 101))
+    await asyncio.sleep(0.01)
+
+    assert mock_mqtt_client.async_publish.call_count == 1
+
+    payload = {"activity_id": 101, "data": []}
+    api_client._message_received(mqtt_message("activity/AABBCCDDEEFF/macro_keys_list", payload))
+
+    assert await asyncio.wait_for(first, 1.0) == parse_key_list(payload)
+    assert await asyncio.wait_for(second, 1.0) == parse_key_list(payload)
+
+
+async def test_request_keys_timeout(
+    hass: HomeAssistant, api_client: SofabatonHubApiClient
+) -> None:
+    """Test the request raises TimeoutError when the hub does not answer."""
+    with pytest.raises(asyncio.TimeoutError):
+        await api_client.async_request_keys(KEY_KIND_ASSIGNED, 101, timeout=0.05)
+
+    # Timed-out request is forgotten so the next call publishes again
+    assert not api_client._pending_key_requests
+
+
+async def test_request_keys_cancel_one_waiter(
+    hass: HomeAssistant, api_client: SofabatonHubApiClient
+) -> None:
+    """Test cancelling one caller leaves the shared request for others."""
+    first = asyncio.ensure_future(api_client.async_request_keys(KEY_KIND_ASSIGNED, 101))
+    second = asyncio.ensure_future(api_client.async_request_keys(KEY_KIND_ASSIGNED, 101))
+    await asyncio.sleep(0.01)
+
+    first.cancel()
+    await asyncio.sleep(0)
+
+    payload = {"activity_id": 101, "data": []}
+    api_client._message_received(mqtt_message("activity/AABBCCDDEEFF/keys_list", payload))
+
+    assert await asyncio.wait_for(second, 1.0) == parse_key_list(payload)
+    assert first.cancelled()
+
+
+async def test_subscriptions_receive_raw_bytes(
+    hass: HomeAssistant, api_client: SofabatonHubApiClient, mock_mqtt_client
+) -> None:
+    """Test topics are subscribed without payload decoding."""
+    await api_client.async_subscribe_to_topics()
+
+    assert mock_mqtt_client.async_subscribe.call_count == 5
+    for call in mock_mqtt_client.async_subscribe.call_args_list:
+        assert call.kwargs["encoding"] is None
+
+
+async def test_duplicate_message_dropped(hass: HomeAssistant, api_client: SofabatonHubApiClient) -> None:
+    """Test repeated deliveries are dropped before reaching the coordinator."""
+    message = mqtt_message("activity/AABBCCDDEEFF/activity_control_up", {"activity_id": 101, "state": "on"})
+
+    api_client._message_received(message)
+    api_client._message_received(message)
+
+    api_client._on_message_callback.assert_called_once()
+    assert api_client.deduplicator.stats()["hits"] == 1
+
+
+async def test_duplicate_response_resolves_pending_request(
+    hass: HomeAssistant, api_client: SofabatonHubApiClient
+) -> None:
+    """Test an identical catalog still answers a new request for it."""
+    payload = {"activity_id": 101, "data": [{"key_id": 1}]}
+    api_client._message_received(mqtt_message("activity/AABBCCDDEEFF/keys_list", payload))
+
+    request = asyncio.ensure_future(api_client.async_request_keys(KEY_KIND_ASSIGNED, 101))
+    await asyncio.sleep(0.01)
+    api_client._message_received(mqtt_message("activity/AABBCCDDEEFF/keys_list", payload))
+
+    assert await asyncio.wait_for(request, 1.0) == parse_key_list(payload)
+    assert api_client._on_message_callback.call_count == 2
+
+
+async def test_key_press_latency_recorded(hass: HomeAssistant, api_client: SofabatonHubApiClient) -> None:
+    """Test presses with a press time feed the press-to-publish latency."""
+    await api_client.async_send_assigned_key(101, 7, pressed_at=time.monotonic())
+    await api_client.async_send_assigned_key(101, 7)
+
+    assert api_client.key_press_latency.count == 1
+    await api_client.async_shutdown()
+
+
+async def test_key_presses_scheduled_by_pipeline(
+    hass: HomeAssistant, api_client: SofabatonHubApiClient, mock_mqtt_client
+) -> None:
+    """Test a repeated key sequence is spaced by the pipeline."""
+    published: list[float] = []
+    mock_mqtt_client.async_publish.side_effect = lambda *args: published.append(time.monotonic())
+
+    await api_client.async_send_key_presses([("assigned", 101, 182)] * 3, delay=0.05)
+
+    assert len(published) == 3
+    assert all(later - earlier >= 0.045 for earlier, later in zip(published, published[1:]))
+    await api_client.async_shutdown()
+
+
+async def test_publish_policy(
+    hass: HomeAssistant, api_client: SofabatonHubApiClient, mock_mqtt_client
+) -> None:
+    """Test QoS and retain follow the topic's publish policy and are counted."""
+    await api_client.async_send_assigned_key(101, 176)
+    await api_client.async_control_activity_state(101, "on")
+    await api_client.async_send_macro_key(101, 5)
+
+    calls = [call[0][1:] for call in mock_mqtt_client.async_publish.call_args_list]
+    assert [(topic, qos, retain) for topic, _, qos, retain in calls] == [
+        ("activity/AABBCCDDEEFF/keys_control", 0, False),
+        ("activity/AABBCCDDEEFF/activity_control_down", 1, False),
+        ("activity/AABBCCDDEEFF/macro_keys_control", 0, False),
+    ]
+    assert api_client.publish_qos_counts == {0: 2, 1: 1}
+    await api_client.async_shutdown()
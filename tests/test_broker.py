@@ -0,0 +1,294 @@
+"""Test the Sofabaton Hub direct MQTT connection against a stand-in broker."""
+from __future__ import annotations
+
+import asyncio
+import json
+import struct
+
+import pytest
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from custom_components.sofabaton_hub.api import SofabatonHubApiClient
+from custom_components.sofabaton_hub.broker import (
+    BrokerAuthError,
+    BrokerConnection,
+    BrokerConnectionError,
+    async_acquire_connection,
+    async_test_connection,
+)
+from custom_components.sofabaton_hub.const import (
+    CONF_DIRECT_CONNECTION,
+    CONF_HOST,
+    CONF_MAC,
+    CONF_PASSWORD,
+    CONF_PORT,
+    CONF_USERNAME,
+    DATA_BROKERS,
+    DOMAIN,
+)
+
+
+class StandInBroker:
+    """Minimal MQTT 3.1.1 broker: exact topic routing, QoS 0 delivery."""
+
+    def __init__(self, username: str | None = None, password: str | None = None) -> None:
+        self.username = username
+        self.password = password
+        self.port = 0
+        self.connects = 0
+        # Connections closed on CONNECT without a CONNACK before one is accepted
+        self.drop_connects = 0
+        # (topic, payload, qos, retain) of every publish received from clients
+        self.published: list[tuple[str, bytes, int, bool]] = []
+        self._server: asyncio.AbstractServer | None = None
+        self._clients: dict[asyncio.StreamWriter, set[str]] = {}
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle_client, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        self.drop_clients()
+        self._server.close()
+        await self._server.wait_closed()
+
+    def drop_clients(self) -> None:
+        """Close all client connections (simulates a broker restart)."""
+        for writer in list(self._clients):
+            writer.close()
+        self._clients.clear()
+
+    def send(self, topic: str, payload: bytes) -> None:
+        """Deliver a message to the clients subscribed to the topic."""
+        for writer, topics in self._clients.items():
+            if topic in topics:
+                writer.write(_packet(0x30, _string(topic) + payload))
+
+    def subscribed(self) -> set[str]:
+        return set().union(*self._clients.values()) if self._clients else set()
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                packet_type, body = await _read_packet(reader)
+                kind = packet_type & 0xF0
+                if kind == 0x10 and self.drop_connects:
+                    self.drop_connects -= 1
+                    break
+                if kind == 0x10:
+                    writer.write(_packet(0x20, bytes((0, self._check_credentials(body)))))
+                    if self._check_credentials(body) == 0:
+                        self.connects += 1
+                        self._clients[writer] = set()
+                elif kind == 0x80:
+                    topics, offset = [], 2
+                    while offset < len(body):
+                        (length,) = struct.unpack_from("!H", body, offset)
+                        topics.append(body[offset + 2 : offset + 2 + length].decode())
+                        offset += 3 + length
+                    self._clients[writer].update(topics)
+                    writer.write(_packet(0x90, body[:2] + bytes(len(topics))))
+                elif kind == 0xA0:
+                    writer.write(_packet(0xB0, body[:2]))
+                elif kind == 0x30:
+                    (length,) = struct.unpack_from("!H", body)
+                    topic = body[2 : 2 + length].decode()
+                    offset = 2 + length
+                    qos = (packet_type >> 1) & 0x03
+                    if qos:
+                        writer.write(_packet(0x40, body[offset : offset + 2]))
+                        offset += 2
+                    self.published.append((topic, body[offset:], qos, bool(packet_type & 0x01)))
+                    self.send(topic, body[offset:])
+                elif kind == 0xC0:
+                    writer.write(bytes((0xD0, 0)))
+                elif kind == 0xE0:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._clients.pop(writer, None)
+            writer.close()
+
+    def _check_credentials(self, body: bytes) -> int:
+        """Return the CONNACK return code for a CONNECT packet."""
+        if self.username is None:
+            return 0
+        flags = body[7]
+        fields, offset = [], 10
+        while offset < len(body):
+            (length,) = struct.unpack_from("!H", body, offset)
+            fields.append(body[offset + 2 : offset + 2 + length].decode())
+            offset += 2 + length
+        username = fields[1] if flags & 0x80 else None
+        password = fields[2] if flags & 0x40 else None
+        return 0 if (username, password) == (self.username, self.password) else 4
+
+
+def _string(value: str) -> bytes:
+    data = value.encode()
+    return struct.pack("!H", len(data)) + data
+
+
+def _packet(packet_type: int, body: bytes) -> bytes:
+    assert len(body) < 128
+    return bytes((packet_type, len(body))) + body
+
+
+async def _read_packet(reader: asyncio.StreamReader) -> tuple[int, bytes]:
+    header = await reader.readexactly(1)
+    length, shift = 0, 0
+    while True:
+        (byte,) = await reader.readexactly(1)
+        length |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            break
+    return header[0], await reader.readexactly(length)
+
+
+@pytest.fixture
+async def broker(socket_enabled):
+    """Run a stand-in broker on a local port."""
+    stand_in = StandInBroker("hub_user", "hub_pass")
+    await stand_in.start()
+    yield stand_in
+    await stand_in.stop()
+
+
+async def _wait_for(condition, timeout: float = 2.0) -> None:
+    """Wait until a condition holds."""
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+async def test_publish_and_subscribe(hass: HomeAssistant, broker: StandInBroker) -> None:
+    """Test messages are published and routed to subscribers by topic."""
+    connection = await async_acquire_connection(hass, "127.0.0.1", broker.port, "hub_user", "hub_pass")
+    received = []
+    unsubscribe = await connection.async_subscribe(["activity/AABB/list_response"], received.append)
+    assert broker.subscribed() == {"activity/AABB/list_response"}
+
+    await connection.async_publish("activity/AABB/list_response", '{"data": []}')
+    await connection.async_publish("activity/AABB/activity_control_down", b"on", qos=1)
+    await _wait_for(lambda: received)
+
+    assert received[0].topic == "activity/AABB/list_response"
+    assert received[0].payload == b'{"data": []}'
+    assert broker.published[1] == ("activity/AABB/activity_control_down", b"on", 1, False)
+
+    unsubscribe()
+    await connection.async_release()
+    assert not connection.connected
+    assert hass.data[DATA_BROKERS] == {}
+
+
+async def test_connections_are_pooled(hass: HomeAssistant, broker: StandInBroker) -> None:
+    """Test Hubs on the same broker share one connection."""
+    first = await async_acquire_connection(hass, "127.0.0.1", broker.port, "hub_user", "hub_pass")
+    second = await async_acquire_connection(hass, "127.0.0.1", broker.port, "hub_user", "hub_pass")
+    assert first is second
+    assert broker.connects == 1
+    assert first.stats()["hubs"] == 2
+
+    await first.async_release()
+    assert second.connected
+    await second.async_release()
+    assert not second.connected
+    assert hass.data[DATA_BROKERS] == {}
+
+
+async def test_reconnect_restores_subscriptions(hass: HomeAssistant, broker: StandInBroker) -> None:
+    """Test a lost connection is re-established and subscriptions are restored."""
+    connection = BrokerConnection(
+        hass, "127.0.0.1", broker.port, "hub_user", "hub_pass", reconnect_min=0.2
+    )
+    await connection.async_start()
+    received = []
+    await connection.async_subscribe(["activity/AABB/keys_list"], received.append)
+
+    broker.drop_clients()
+    await _wait_for(lambda: not connection.connected)
+    # Publishing fails at once while the connection is down
+    with pytest.raises(BrokerConnectionError):
+        await connection.async_publish("activity/AABB/keys_control", "1")
+
+    await _wait_for(lambda: broker.connects == 2 and broker.subscribed())
+    broker.send("activity/AABB/keys_list", b"[]")
+    await _wait_for(lambda: received)
+    assert connection.stats()["connects"] == 2
+    assert connection.stats()["disconnects"] == 1
+    await connection.async_stop()
+
+
+async def test_connection_errors(hass: HomeAssistant, broker: StandInBroker) -> None:
+    """Test rejected credentials and unreachable brokers are reported."""
+    with pytest.raises(BrokerAuthError):
+        await async_test_connection(hass, "127.0.0.1", broker.port, "hub_user", "wrong")
+
+    await broker.stop()
+    with pytest.raises(BrokerConnectionError):
+        await async_acquire_connection(hass, "127.0.0.1", broker.port, "hub_user", "hub_pass")
+    assert hass.data[DATA_BROKERS] == {}
+    await broker.start()
+
+
+async def test_connection_dropped_before_connack(hass: HomeAssistant, broker: StandInBroker) -> None:
+    """Test a broker closing the connection before CONNACK is retried until it accepts."""
+    broker.drop_connects = 2
+    connection = BrokerConnection(
+        hass, "127.0.0.1", broker.port, "hub_user", "hub_pass", reconnect_min=0.05
+    )
+    # The first attempt is reported, reconnecting continues in the background
+    with pytest.raises(BrokerConnectionError):
+        await connection.async_start()
+
+    await _wait_for(lambda: connection.connected)
+    assert broker.drop_connects == 0
+    assert broker.connects == 1
+    assert connection.stats()["connects"] == 1
+    await connection.async_stop()
+
+
+async def test_api_client_direct_connection(hass: HomeAssistant, broker: StandInBroker) -> None:
+    """Test the API client publishes and receives through the direct connection."""
+    entry = ConfigEntry(
+        version=1,
+        minor_version=0,
+        domain=DOMAIN,
+        title="Sofabaton Hub",
+        data={
+            CONF_MAC: "AABBCCDDEEFF",
+            CONF_HOST: "127.0.0.1",
+            CONF_PORT: broker.port,
+            CONF_USERNAME: "hub_user",
+            CONF_PASSWORD: "hub_pass",
+        },
+        options={CONF_DIRECT_CONNECTION: True},
+        source="user",
+        entry_id="test_entry_id",
+    )
+    api_client = SofabatonHubApiClient(hass, entry)
+    received = []
+    api_client.set_on_message_callback(lambda topic, record: received.append(topic))
+
+    await api_client.async_connect()
+    await api_client.async_subscribe_to_topics()
+    await api_client.async_request_activity_list()
+    await _wait_for(lambda: broker.published)
+    assert broker.published[0][0] == "activity/AABBCCDDEEFF/list_request"
+    # Requests are published with QoS 1 and never retained
+    assert broker.published[0][2:] == (1, False)
+
+    broker.send(
+        "activity/AABBCCDDEEFF/list",
+        json.dumps({"data": [{"activity_id": 1, "activity_name": "TV", "state": "off"}]}).encode(),
+    )
+    await _wait_for(lambda: received)
+    assert received == ["activity/AABBCCDDEEFF/list"]
+
+    await api_client.async_shutdown()
+    assert api_client.broker is None
+    assert hass.data[DATA_BROKERS] == {}
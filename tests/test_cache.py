@@ -0,0 +1,125 @@
+"""Test the Sofabaton Hub key catalog cache."""
+from __future__ import annotations
+
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.sofabaton_hub.cache import KeyCatalogCache
+from custom_components.sofabaton_hub.const import (
+    KEY_KIND_ASSIGNED,
+    KEY_KIND_FAVORITES,
+    KEY_KIND_MACROS,
+)
+from custom_components.sofabaton_hub.coordinator import (
+    SofabatonHubDataUpdateCoordinator,
+)
+from custom_components.sofabaton_hub.messages import parse_key_list
+from custom_components.sofabaton_hub.remote import SofabatonHubRemote
+
+
+async def test_cache_fresh_and_stale(hass: HomeAssistant) -> None:
+    """Test entries are fresh within the TTL and stale after it."""
+    cache = KeyCatalogCache(hass, "test_entry_id", ttl=60, max_entries=5)
+
+    assert cache.get(101, KEY_KIND_ASSIGNED) is None
+
+    cache.set(101, KEY_KIND_ASSIGNED, [1, 2])
+    assert cache.get(101, KEY_KIND_ASSIGNED) == ([1, 2], True)
+
+    with patch("custom_components.sofabaton_hub.cache.time.time", return_value=1e12):
+        assert cache.get(101, KEY_KIND_ASSIGNED) == ([1, 2], False)
+
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["stale_hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+async def test_cache_lru_eviction(hass: HomeAssistant) -> None:
+    """Test least recently used activities are evicted first."""
+    cache = KeyCatalogCache(hass, "test_entry_id", ttl=60, max_entries=2)
+
+    cache.set(101, KEY_KIND_ASSIGNED, [1])
+    cache.set(102, KEY_KIND_ASSIGNED, [2])
+    # Touch 101 so 102 becomes least recently used
+    cache.get(101, KEY_KIND_ASSIGNED)
+    cache.set(103, KEY_KIND_ASSIGNED, [3])
+
+    assert cache.get(102, KEY_KIND_ASSIGNED) is None
+    assert cache.get(101, KEY_KIND_ASSIGNED) is not None
+    assert cache.stats()["evictions"] == 1
+
+
+async def test_cache_persisted(hass: HomeAssistant, hass_storage: dict[str, Any]) -> None:
+    """Test cached catalogs survive a restart."""
+    hass_storage["sofabaton_hub.test_entry_id.keys"] = {
+        "version": 1,
+        "key": "sofabaton_hub.test_entry_id.keys",
+        "data": {
+            "activities": {
+                "101": {KEY_KIND_MACROS: {"keys": [{"id": 1, "name": "Netflix"}], "updated": 0}}
+            }
+        },
+    }
+
+    cache = KeyCatalogCache(hass, "test_entry_id", ttl=60, max_entries=5)
+    await cache.async_load()
+
+    keys, fresh = cache.get(101, KEY_KIND_MACROS)
+    assert keys == [{"id": 1, "name": "Netflix"}]
+    assert not fresh
+
+
+async def test_coordinator_serves_cache_and_revalidates(
+    hass: HomeAssistant, mock_config_entry
+) -> None:
+    """Test stale catalogs are published at once and refreshed in the background."""
+    api_client = MagicMock()
+    api_client.async_request_keys = AsyncMock()
+    coordinator = SofabatonHubDataUpdateCoordinator(hass, api_client, mock_config_entry)
+
+    coordinator.key_cache.set(101, KEY_KIND_FAVORITES, [{"id": 7, "name": "CNN", "device_id": 3}])
+
+    # Fresh entry: served without asking the hub
+    await coordinator.async_request_favorite_keys(101)
+    assert coordinator.data["keys"][KEY_KIND_FAVORITES] == {
+        101: [{"id": 7, "name": "CNN", "device_id": 3}]
+    }
+    api_client.async_request_keys.assert_not_called()
+
+    # Stale entry: served and revalidated
+    coordinator.key_cache.ttl = 0
+    await coordinator.async_request_favorite_keys(101)
+    await hass.async_block_till_done()
+    assert coordinator.data["keys"][KEY_KIND_FAVORITES][101][0]["name"] == "CNN"
+    api_client.async_request_keys.assert_called_once_with(KEY_KIND_FAVORITES, 101)
+
+
+async def test_coordinator_cache_miss_leaves_data_alone(
+    hass: HomeAssistant, mock_config_entry
+) -> None:
+    """Test a cache miss does not change coordinator data behind its listeners' back."""
+    api_client = MagicMock()
+    api_client.async_request_keys = AsyncMock()
+    coordinator = SofabatonHubDataUpdateCoordinator(hass, api_client, mock_config_entry)
+    coordinator._handle_assigned_keys(parse_key_list({"activity_id": 101, "data": [{"key_id": 1}]}))
+    data = coordinator.data
+
+    assert await coordinator.async_request_keys(KEY_KIND_ASSIGNED, 102) is None
+
+    api_client.async_request_keys.assert_called_once_with(KEY_KIND_ASSIGNED, 102)
+    assert coordinator.data is data
+
+
+async def test_coordinator_keeps_cache_when_dialog_closes(
+    hass: HomeAssistant, mock_config_entry
+) -> None:
+    """Test the dialog-close command of older cards no longer wipes cached catalogs."""
+    coordinator = SofabatonHubDataUpdateCoordinator(hass, MagicMock(), mock_config_entry)
+    coordinator._handle_assigned_keys(parse_key_list({"activity_id": 101, "data": [{"key_id": 1}]}))
+    remote = SofabatonHubRemote(coordinator, mock_config_entry)
+
+    await remote.async_send_command(["type:clear_requesting_keys_flag"])
+
+    assert coordinator.key_cache.get(101, KEY_KIND_ASSIGNED) == ([1], True)
@@ -0,0 +1,66 @@
+"""Test the Sofabaton Hub remote command grammar."""
+from __future__ import annotations
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from homeassistant.core import HomeAssistant
+
+from custom_components.sofabaton_hub.commands import (
+    COMMAND_TYPE_NAMED_KEYS,
+    compile_command,
+)
+from custom_components.sofabaton_hub.coordinator import (
+    SofabatonHubDataUpdateCoordinator,
+)
+from custom_components.sofabaton_hub.messages import ActivityInfo, ActivityList
+from custom_components.sofabaton_hub.remote import SofabatonHubRemote
+
+
+def test_compile_structured_command() -> None:
+    """Test structured commands are parsed once and cached."""
+    compiled = compile_command(("type:send_assigned_key", "activity_id:101", "key:volume_up"))
+
+    assert compiled.type == "send_assigned_key"
+    assert compiled.args == {"activity_id": 101, "key_id": 182}
+    assert compile_command(("type:send_assigned_key", "activity_id:101", "key:volume_up")) is compiled
+
+
+def test_compile_named_keys() -> None:
+    """Test a list of key names compiles to key IDs."""
+    compiled = compile_command(("volume_up", "volume_up", "mute"))
+
+    assert compiled.type == COMMAND_TYPE_NAMED_KEYS
+    assert compiled.key_ids == (182, 182, 184)
+
+
+@pytest.mark.parametrize(
+    "command",
+    [(), ("volume_sideways",), ("type:send_assigned_key", "key_id"), ("type:send_assigned_key", "key:nope")],
+)
+def test_compile_invalid(command: tuple[str, ...]) -> None:
+    """Test malformed commands and unknown key names are rejected."""
+    with pytest.raises(ValueError):
+        compile_command(command)
+
+
+async def test_send_command_repeats(hass: HomeAssistant, mock_config_entry) -> None:
+    """Test num_repeats, delay_secs and hold_secs are passed to the API client."""
+    api_client = MagicMock()
+    api_client.async_send_key_presses = AsyncMock()
+    api_client.async_hold_assigned_key = AsyncMock()
+    coordinator = SofabatonHubDataUpdateCoordinator(hass, api_client, mock_config_entry)
+    coordinator._handle_activity_list(ActivityList((ActivityInfo(101, "Watch TV", "on"),)))
+    remote = SofabatonHubRemote(coordinator, mock_config_entry)
+
+    await remote.async_send_command(["volume_up", "mute"], num_repeats=2, delay_secs=0.1, hold_secs=0)
+    presses, delay, _ = api_client.async_send_key_presses.await_args.args
+    assert list(presses) == [("assigned", 101, 182), ("assigned", 101, 184)] * 2
+    assert delay == 0.1
+
+    await remote.async_send_command(["type:send_assigned_key", "key:up"], num_repeats=1, delay_secs=0.4, hold_secs=1.5)
+    assert api_client.async_hold_assigned_key.await_args.args[:3] == (101, 174, 1.5)
+
+    # Unknown key names are rejected before anything is sent
+    await remote.async_send_command(["volume_sideways"])
+    assert api_client.async_send_key_presses.await_count == 1
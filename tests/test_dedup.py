@@ -0,0 +1,48 @@
+"""Test the Sofabaton Hub message deduplicator."""
+from __future__ import annotations
+
+from custom_components.sofabaton_hub.dedup import MessageDeduplicator
+
+TOPIC = "activity/AABBCCDDEEFF/activity_control_up"
+
+
+def test_duplicate_within_window() -> None:
+    """Test a repeated payload is a duplicate until the window expires."""
+    dedup = MessageDeduplicator(window=5.0, max_entries=10)
+    payload = b'{"activity_id": 101, "state": "on"}'
+
+    assert not dedup.is_duplicate(TOPIC, payload, now=0.0)
+    assert dedup.is_duplicate(TOPIC, payload, now=4.9)
+    # Same payload on another topic is not a duplicate
+    assert not dedup.is_duplicate("activity/AABBCCDDEEFF/keys_list", payload, now=4.9)
+    # Window is measured from the first delivery
+    assert not dedup.is_duplicate(TOPIC, payload, now=5.0)
+
+    stats = dedup.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+    assert stats["expired"] == 1
+
+
+def test_expiry_is_incremental() -> None:
+    """Test expired entries are dropped as time advances."""
+    dedup = MessageDeduplicator(window=1.0, max_entries=100)
+    for index in range(10):
+        dedup.is_duplicate(TOPIC, str(index).encode(), now=index * 0.5)
+
+    # Only messages from the last second are still remembered
+    assert len(dedup) == 2
+    assert dedup.stats()["expired"] == 8
+
+
+def test_max_entries_evicts_oldest() -> None:
+    """Test the number of remembered messages is capped."""
+    dedup = MessageDeduplicator(window=60.0, max_entries=3)
+    for index in range(5):
+        dedup.is_duplicate(TOPIC, str(index).encode(), now=0.0)
+
+    assert len(dedup) == 3
+    assert dedup.stats()["evictions"] == 2
+    # Evicted messages are no longer detected, recent ones still are
+    assert not dedup.is_duplicate(TOPIC, b"0", now=1.0)
+    assert dedup.is_duplicate(TOPIC, b"4", now=1.0)
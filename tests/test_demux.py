@@ -0,0 +1,84 @@
+"""Test the Sofabaton Hub shared subscription demultiplexer."""
+from __future__ import annotations
+
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.sofabaton_hub.api import SofabatonHubApiClient
+from custom_components.sofabaton_hub.const import (
+    CONF_MAC,
+    CONF_SHARED_SUBSCRIPTION,
+    DATA_DEMUX,
+    DOMAIN,
+)
+
+
+def _client(hass: HomeAssistant, mac: str, shared: bool) -> SofabatonHubApiClient:
+    """Create an API client for a Hub with a message callback registered."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_MAC: mac},
+        options={CONF_SHARED_SUBSCRIPTION: shared},
+        unique_id=mac,
+    )
+    client = SofabatonHubApiClient(hass, entry)
+    client.set_on_message_callback(MagicMock())
+    return client
+
+
+def _message(topic: str) -> SimpleNamespace:
+    """Build a received MQTT message."""
+    return SimpleNamespace(topic=topic, payload=json.dumps({"activity_id": 101, "state": "on"}).encode())
+
+
+async def test_shared_subscription_routes_by_topic(hass: HomeAssistant) -> None:
+    """Test Hubs share one wildcard subscription and get only their own messages."""
+    unsubscribe = MagicMock()
+    with patch(
+        "custom_components.sofabaton_hub.demux.mqtt.async_subscribe",
+        AsyncMock(return_value=unsubscribe),
+    ) as async_subscribe:
+        first = _client(hass, "AABBCCDDEEFF", shared=True)
+        second = _client(hass, "112233445566", shared=True)
+        await first.async_subscribe_to_topics()
+        await second.async_subscribe_to_topics()
+
+    async_subscribe.assert_called_once()
+    assert async_subscribe.call_args[0][1] == "activity/+/+"
+    assert async_subscribe.call_args.kwargs["encoding"] is None
+
+    demux = hass.data[DATA_DEMUX]
+    demux._message_received(_message("activity/112233445566/activity_control_up"))
+    first._on_message_callback.assert_not_called()
+    second._on_message_callback.assert_called_once()
+
+    # Our own outbound request topics match the wildcard and are dropped
+    demux._message_received(_message("activity/AABBCCDDEEFF/activity_control_down"))
+    first._on_message_callback.assert_not_called()
+    assert demux.stats() == {"topics": 10, "routed": 1, "dropped": 1}
+
+    # Unsubscribed once the last Hub is gone
+    await first.async_shutdown()
+    unsubscribe.assert_not_called()
+    await second.async_shutdown()
+    unsubscribe.assert_called_once()
+    assert DATA_DEMUX not in hass.data
+
+
+async def test_per_topic_subscriptions_removed_on_shutdown(hass: HomeAssistant) -> None:
+    """Test per-topic subscriptions are kept and released on shutdown."""
+    unsubscribe = MagicMock()
+    with patch(
+        "custom_components.sofabaton_hub.api.mqtt.async_subscribe",
+        AsyncMock(return_value=unsubscribe),
+    ) as async_subscribe:
+        client = _client(hass, "AABBCCDDEEFF", shared=False)
+        await client.async_subscribe_to_topics()
+
+    assert async_subscribe.call_count == 5
+    await client.async_shutdown()
+    assert unsubscribe.call_count == 5
@@ -0,0 +1,44 @@
+"""Test the Sofabaton Hub coordinator topic routing."""
+from __future__ import annotations
+
+from unittest.mock import MagicMock
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.sofabaton_hub.coordinator import (
+    SofabatonHubDataUpdateCoordinator,
+)
+from custom_components.sofabaton_hub.messages import parse_activity_list
+
+
+async def test_routes_compiled_per_hub(hass: HomeAssistant, mock_config_entry) -> None:
+    """Test inbound topics are resolved to concrete strings once at init."""
+    coordinator = SofabatonHubDataUpdateCoordinator(hass, MagicMock(), mock_config_entry)
+
+    assert set(coordinator._routes) == {
+        "activity/AABBCCDDEEFF/list",
+        "activity/AABBCCDDEEFF/activity_control_up",
+        "activity/AABBCCDDEEFF/keys_list",
+        "activity/AABBCCDDEEFF/macro_keys_list",
+        "activity/AABBCCDDEEFF/favorites_keys_list",
+    }
+
+    coordinator._handle_mqtt_message(
+        "activity/AABBCCDDEEFF/list",
+        parse_activity_list({"data": [{"activity_id": 101, "activity_name": "Watch TV", "state": "on"}]}),
+    )
+    assert coordinator.data["current_activity_id"] == 101
+
+
+async def test_register_topic(hass: HomeAssistant, mock_config_entry) -> None:
+    """Test additional topics can be registered with a debounce policy."""
+    coordinator = SofabatonHubDataUpdateCoordinator(hass, MagicMock(), mock_config_entry)
+    handler = MagicMock()
+    coordinator.register_topic("device/{mac}/list", "device_list", handler, use_debounce=True)
+
+    message = object()
+    coordinator._handle_mqtt_message("device/AABBCCDDEEFF/list", message)
+
+    handler.assert_called_once_with(message)
+    assert coordinator._pending_updates == {"device_list"}
+    coordinator._update_debounce_timer.cancel()
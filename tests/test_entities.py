@@ -0,0 +1,89 @@
+"""Test Sofabaton Hub entity state writes."""
+from __future__ import annotations
+
+from unittest.mock import MagicMock, patch
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.json import json_bytes
+
+from custom_components.sofabaton_hub.coordinator import (
+    SofabatonHubDataUpdateCoordinator,
+)
+from custom_components.sofabaton_hub.messages import (
+    ActivityInfo,
+    ActivityList,
+    ActivityStatus,
+    parse_key_list,
+)
+from custom_components.sofabaton_hub.remote import SofabatonHubRemote
+from custom_components.sofabaton_hub.switch import SofabatonActivitySwitch
+
+
+async def test_only_affected_entities_write_state(hass: HomeAssistant, mock_config_entry) -> None:
+    """Test entities write state only when something they render changed."""
+    coordinator = SofabatonHubDataUpdateCoordinator(hass, MagicMock(), mock_config_entry)
+    coordinator._handle_activity_list(
+        ActivityList(tuple(ActivityInfo(i, f"Activity {i}", "off") for i in range(1, 31)))
+    )
+    switches = [
+        SofabatonActivitySwitch(coordinator, activity_id, activity)
+        for activity_id, activity in coordinator.data["activities"].items()
+    ]
+    remote = SofabatonHubRemote(coordinator, mock_config_entry)
+    entities = [*switches, remote]
+
+    with patch.object(SofabatonActivitySwitch, "async_write_ha_state") as switch_write, patch.object(
+        SofabatonHubRemote, "async_write_ha_state"
+    ) as remote_write:
+
+        def notify() -> None:
+            for entity in entities:
+                entity._handle_coordinator_update()
+
+        # Favorites response: key catalogs are not part of any entity state
+        coordinator._handle_favorite_keys(
+            parse_key_list({"activity_id": 1, "data": [{"key_id": 7, "key_name": "CNN"}]})
+        )
+        notify()
+        assert switch_write.call_count == 0
+        assert remote_write.call_count == 0
+
+        # Starting activity 2 touches only switch 2
+        coordinator._handle_activity_status(ActivityStatus(2, "on"))
+        notify()
+        assert switch_write.call_count == 1
+        assert remote_write.call_count == 1
+
+        # Switching to activity 3 touches switches 2 and 3
+        coordinator._handle_activity_status(ActivityStatus(3, "on"))
+        notify()
+        assert switch_write.call_count == 3
+
+        # Repeated status push changes nothing
+        coordinator._handle_activity_status(ActivityStatus(3, "on"))
+        notify()
+        assert switch_write.call_count == 3
+        assert remote_write.call_count == 2
+
+
+async def test_remote_attribute_budget(hass: HomeAssistant, mock_config_entry) -> None:
+    """Test remote attributes are memoized and trimmed to the size budget."""
+    coordinator = SofabatonHubDataUpdateCoordinator(hass, MagicMock(), mock_config_entry)
+    coordinator._handle_activity_list(
+        ActivityList(tuple(ActivityInfo(i, f"Activity {i}", "off") for i in range(1, 101)))
+    )
+    coordinator._handle_activity_status(ActivityStatus(100, "on"))
+    remote = SofabatonHubRemote(coordinator, mock_config_entry)
+    remote.entity_id = "remote.sofabaton_hub"
+
+    assert "activities" in SofabatonHubRemote._unrecorded_attributes
+    assert len(remote.extra_state_attributes["activities"]) == 100
+    assert remote.extra_state_attributes is remote.extra_state_attributes
+
+    remote._attribute_budget = 1024
+    remote._attributes = None
+    attributes = remote.extra_state_attributes
+    assert len(json_bytes(attributes)) <= 1024
+    assert 0 < len(attributes["activities"]) < 100
+    # The current activity is always kept
+    assert attributes["activities"][-1]["id"] == 100
@@ -0,0 +1,51 @@
+"""Test the Sofabaton Hub coordinator first refresh."""
+from __future__ import annotations
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.sofabaton_hub.coordinator import (
+    SofabatonHubDataUpdateCoordinator,
+)
+from custom_components.sofabaton_hub.messages import ActivityInfo, ActivityList
+
+
+async def test_first_refresh_returns_when_hub_answers(
+    hass: HomeAssistant, mock_config_entry
+) -> None:
+    """Test first refresh completes on the activity list, not on a polling tick."""
+    api_client = MagicMock()
+    coordinator = SofabatonHubDataUpdateCoordinator(hass, api_client, mock_config_entry)
+
+    async def answer() -> None:
+        """Simulate the Hub answering the activity list request right away."""
+        hass.loop.call_soon(
+            coordinator._handle_activity_list,
+            ActivityList((ActivityInfo(101, "Watch TV", "on"),)),
+        )
+
+    api_client.async_request_activity_list = AsyncMock(side_effect=answer)
+
+    await coordinator.async_config_entry_first_refresh()
+
+    assert coordinator.data["current_activity_id"] == 101
+    assert not coordinator.first_refresh_timed_out
+    assert coordinator.ready_after is not None
+    # Previously the first check happened after a 0.5 s sleep
+    assert coordinator.ready_after < 0.5
+    coordinator._cleanup_basic_data_request()
+
+
+async def test_first_refresh_timeout(hass: HomeAssistant, mock_config_entry) -> None:
+    """Test first refresh gives up when the Hub does not answer."""
+    api_client = MagicMock()
+    api_client.async_request_activity_list = AsyncMock()
+    coordinator = SofabatonHubDataUpdateCoordinator(hass, api_client, mock_config_entry)
+
+    with patch("custom_components.sofabaton_hub.coordinator.FIRST_REFRESH_TIMEOUT", 0.01):
+        await coordinator.async_config_entry_first_refresh()
+
+    assert coordinator.first_refresh_timed_out
+    assert coordinator.ready_after is None
+    coordinator._cleanup_basic_data_request()
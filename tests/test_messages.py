@@ -0,0 +1,63 @@
+"""Test decoding of Sofabaton Hub MQTT messages."""
+from __future__ import annotations
+
+import pytest
+
+from custom_components.sofabaton_hub.messages import (
+    ActivityInfo,
+    ActivityList,
+    ActivityStatus,
+    KeyInfo,
+    KeyList,
+    decode_message,
+    parse_activity_list,
+    parse_activity_status,
+    parse_key_list,
+)
+
+PARSERS = {
+    "activity/AABBCCDDEEFF/list": parse_activity_list,
+    "activity/AABBCCDDEEFF/activity_control_up": parse_activity_status,
+    "activity/AABBCCDDEEFF/favorites_keys_list": parse_key_list,
+}
+
+
+def test_decode_known_shapes() -> None:
+    """Test known payloads are parsed into records."""
+    assert decode_message(
+        "activity/AABBCCDDEEFF/list",
+        b'{"data": [{"activity_id": 101, "activity_name": "Watch TV", "state": "on"},'
+        b' {"activity_name": "No ID"}, {"activity_id": 102, "activity_name": "Watch Movie"}]}',
+        PARSERS,
+    ) == ActivityList(
+        (ActivityInfo(101, "Watch TV", "on"), ActivityInfo(102, "Watch Movie", "off"))
+    )
+    assert decode_message(
+        "activity/AABBCCDDEEFF/activity_control_up",
+        b'{"activity_id": 255, "state": "off"}',
+        PARSERS,
+    ) == ActivityStatus(255, "off")
+    assert decode_message(
+        "activity/AABBCCDDEEFF/favorites_keys_list",
+        b'{"activity_id": 101, "data": [{"key_id": 7, "key_name": "CNN", "device_id": 3}]}',
+        PARSERS,
+    ) == KeyList(101, (KeyInfo(7, "CNN", 3),))
+
+
+def test_unhandled_topic_not_decoded() -> None:
+    """Test payloads on topics without a parser are not decoded at all."""
+    assert decode_message("activity/AABBCCDDEEFF/keys_request", b"not json", PARSERS) is None
+
+
+@pytest.mark.parametrize(
+    ("topic", "payload"),
+    [
+        ("activity/AABBCCDDEEFF/list", b"not json"),
+        ("activity/AABBCCDDEEFF/list", b'{"data": ["oops"]}'),
+        ("activity/AABBCCDDEEFF/activity_control_up", b"[1, 2]"),
+    ],
+)
+def test_malformed_payload(topic: str, payload: bytes) -> None:
+    """Test invalid JSON and unexpected shapes raise ValueError."""
+    with pytest.raises(ValueError):
+        decode_message(topic, payload, PARSERS)
@@ -0,0 +1,484 @@
+"""Test the Sofabaton Hub outbound command pipeline."""
+from __future__ import annotations
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from homeassistant.core import HomeAssistant
+
+from custom_components.sofabaton_hub.const import (
+    AIMD_INITIAL_RATE,
+    AIMD_MIN_RATE,
+    COMMAND_CLASS_ACTIVITY_CONTROL,
+    COMMAND_CLASS_KEY_PRESS,
+    COMMAND_CLASS_REQUEST,
+    PRIORITY_ACTIVITY_CONTROL,
+    PRIORITY_CATALOG,
+    PRIORITY_KEY_PRESS,
+    PRIORITY_STATE_QUERY,
+    RESPONSE_TIMEOUT_MIN,
+)
+from custom_components.sofabaton_hub.pipeline import AimdPacer, CommandCancelled, CommandPipeline
+
+
+async def test_pipeline_publishes_in_order(hass: HomeAssistant) -> None:
+    """Test queued commands are published in submission order."""
+    published: list[str] = []
+
+    async def _publish(topic: str, message: str) -> None:
+        published.append(message)
+
+    pipeline = CommandPipeline(hass, _publish, "test")
+
+    await asyncio.gather(
+        *(
+            pipeline.async_submit("activity/AABBCCDDEEFF/keys_control", str(i), COMMAND_CLASS_KEY_PRESS)
+            for i in range(5)
+        )
+    )
+
+    assert published == ["0", "1", "2", "3", "4"]
+    assert pipeline.queue_depth == 0
+
+
+async def test_pipeline_key_presses_back_to_back(hass: HomeAssistant) -> None:
+    """Test key presses are not delayed while the hub is idle."""
+    pipeline = CommandPipeline(hass, AsyncMock(), "test")
+
+    start = time.monotonic()
+    for _ in range(10):
+        await pipeline.async_submit("activity/AABBCCDDEEFF/keys_control", "{}", COMMAND_CLASS_KEY_PRESS)
+
+    # Ten presses used to take 2 seconds with the fixed 200 ms sleep
+    assert time.monotonic() - start < 0.2
+
+
+async def test_pipeline_min_gap_per_class(hass: HomeAssistant) -> None:
+    """Test the minimum gap is applied for the configured command class."""
+    pipeline = CommandPipeline(
+        hass, AsyncMock(), "test", min_gaps={COMMAND_CLASS_ACTIVITY_CONTROL: 0.1}
+    )
+
+    await pipeline.async_submit("activity/AABBCCDDEEFF/keys_control", "{}", COMMAND_CLASS_KEY_PRESS)
+    start = time.monotonic()
+    await pipeline.async_submit(
+        "activity/AABBCCDDEEFF/activity_control_down", "{}", COMMAND_CLASS_ACTIVITY_CONTROL
+    )
+
+    assert time.monotonic() - start >= 0.09
+
+
+async def test_pipeline_holds_until_response(hass: HomeAssistant) -> None:
+    """Test the next command waits for the hub response and is released by it."""
+    pipeline = CommandPipeline(
+        hass,
+        AsyncMock(),
+        "test",
+        min_gaps={COMMAND_CLASS_REQUEST: 0.0},
+        response_timeout=5.0,
+    )
+
+    await pipeline.async_submit(
+        "activity/AABBCCDDEEFF/list_request",
+        "{}",
+        COMMAND_CLASS_REQUEST,
+        "activity/AABBCCDDEEFF/list",
+    )
+    next_command = asyncio.ensure_future(
+        pipeline.async_submit("activity/AABBCCDDEEFF/keys_control", "{}", COMMAND_CLASS_KEY_PRESS)
+    )
+    await asyncio.sleep(0.05)
+    assert not next_command.done()
+
+    # Unrelated topics do not release the hold
+    pipeline.notify_response("activity/AABBCCDDEEFF/keys_list")
+    await asyncio.sleep(0.05)
+    assert not next_command.done()
+
+    pipeline.notify_response("activity/AABBCCDDEEFF/list")
+    await asyncio.wait_for(next_command, 1.0)
+
+
+async def test_pipeline_response_timeout(hass: HomeAssistant) -> None:
+    """Test a missing hub response only holds the queue for the response timeout."""
+    pipeline = CommandPipeline(
+        hass,
+        AsyncMock(),
+        "test",
+        min_gaps={COMMAND_CLASS_REQUEST: 0.0},
+        response_timeout=0.1,
+    )
+
+    await pipeline.async_submit(
+        "activity/AABBCCDDEEFF/list_request",
+        "{}",
+        COMMAND_CLASS_REQUEST,
+        "activity/AABBCCDDEEFF/list",
+    )
+    await asyncio.wait_for(
+        pipeline.async_submit("activity/AABBCCDDEEFF/keys_control", "{}", COMMAND_CLASS_KEY_PRESS),
+        1.0,
+    )
+
+
+async def test_pipeline_publish_error_propagates(hass: HomeAssistant) -> None:
+    """Test a failed publish raises for the submitter and the pipeline continues."""
+    publish = AsyncMock(side_effect=[Exception("MQTT error"), None])
+    pipeline = CommandPipeline(hass, publish, "test")
+
+    with pytest.raises(Exception, match="MQTT error"):
+        await pipeline.async_submit("activity/AABBCCDDEEFF/keys_control", "{}", COMMAND_CLASS_KEY_PRESS)
+
+    await pipeline.async_submit("activity/AABBCCDDEEFF/keys_control", "{}", COMMAND_CLASS_KEY_PRESS)
+
+    stats = pipeline.stats()
+    assert stats["failed"] == 1
+    assert stats["published"] == 1
+
+
+async def test_pipeline_stats(hass: HomeAssistant) -> None:
+    """Test queue depth and per-class latency are reported."""
+    pipeline = CommandPipeline(hass, AsyncMock(), "test")
+
+    await pipeline.async_submit("activity/AABBCCDDEEFF/keys_control", "{}", COMMAND_CLASS_KEY_PRESS)
+    await pipeline.async_submit("activity/AABBCCDDEEFF/keys_control", "{}", COMMAND_CLASS_KEY_PRESS)
+
+    stats = pipeline.stats()
+    assert stats["queue_depth"] == 0
+    assert stats["latency"][COMMAND_CLASS_KEY_PRESS]["count"] == 2
+    assert "avg_ms" in stats["latency"][COMMAND_CLASS_KEY_PRESS]
+
+
+async def test_pipeline_shutdown_cancels_queued(hass: HomeAssistant) -> None:
+    """Test shutdown cancels commands that were not published yet."""
+    pipeline = CommandPipeline(
+        hass, AsyncMock(), "test", min_gaps={COMMAND_CLASS_REQUEST: 10.0}
+    )
+
+    await pipeline.async_submit("activity/AABBCCDDEEFF/keys_control", "{}", COMMAND_CLASS_KEY_PRESS)
+    queued = asyncio.ensure_future(
+        pipeline.async_submit("activity/AABBCCDDEEFF/list_request", "{}", COMMAND_CLASS_REQUEST)
+    )
+    await asyncio.sleep(0)
+
+    await pipeline.async_shutdown()
+
+    with pytest.raises(asyncio.CancelledError):
+        await queued
+
+
+async def test_pipeline_coalesces_queued_duplicates(hass: HomeAssistant) -> None:
+    """Test a coalescing submit merges into an identical queued command."""
+    published: list[str] = []
+
+    async def _publish(topic: str, message: str) -> None:
+        published.append(message)
+
+    pipeline = CommandPipeline(hass, _publish, "test", min_gaps={COMMAND_CLASS_KEY_PRESS: 0.05})
+    topic = "activity/AABBCCDDEEFF/keys_control"
+
+    await pipeline.async_submit(topic, "up", COMMAND_CLASS_KEY_PRESS)
+    # "up" waits for the gap; the second "up" merges into it, "down" does not
+    await asyncio.gather(
+        pipeline.async_submit(topic, "up", COMMAND_CLASS_KEY_PRESS, coalesce=True),
+        pipeline.async_submit(topic, "up", COMMAND_CLASS_KEY_PRESS, coalesce=True),
+        pipeline.async_submit(topic, "down", COMMAND_CLASS_KEY_PRESS, coalesce=True),
+        # Plain presses are never merged
+        pipeline.async_submit(topic, "down", COMMAND_CLASS_KEY_PRESS),
+    )
+
+    assert published == ["up", "up", "down", "down"]
+    assert pipeline.stats()["coalesced"] == 1
+
+
+async def test_pipeline_hold_keeps_other_callers_out(hass: HomeAssistant) -> None:
+    """Test commands of other callers wait until the holder is done."""
+    published: list[str] = []
+
+    async def _publish(topic: str, message: str) -> None:
+        published.append(message)
+
+    pipeline = CommandPipeline(hass, _publish, "test")
+    topic = "activity/AABBCCDDEEFF/keys_control"
+
+    held = asyncio.Event()
+
+    async def sequence() -> None:
+        async with pipeline.async_hold():
+            await pipeline.async_submit(topic, "seq 1", COMMAND_CLASS_KEY_PRESS)
+            held.set()
+            # Work the holder starts does not inherit the hold
+            hass.async_create_task(pipeline.async_submit(topic, "spawned", COMMAND_CLASS_KEY_PRESS))
+            await asyncio.sleep(0.02)
+            await pipeline.async_submit(topic, "seq 2", COMMAND_CLASS_KEY_PRESS)
+            await pipeline.async_submit(topic, "seq 3", COMMAND_CLASS_KEY_PRESS)
+
+    await pipeline.async_submit(topic, "before", COMMAND_CLASS_KEY_PRESS)
+    task = asyncio.ensure_future(sequence())
+    await held.wait()
+    # Another caller submits while the channel is held
+    await pipeline.async_submit(topic, "other", COMMAND_CLASS_KEY_PRESS)
+    await task
+    await hass.async_block_till_done()
+
+    assert published[:4] == ["before", "seq 1", "seq 2", "seq 3"]
+    assert sorted(published[4:]) == ["other", "spawned"]
+    assert not pipeline.holds_channel()
+    assert pipeline.stats()["holds"] == 1
+
+
+async def test_pipeline_hold_cancelled_when_granted(hass: HomeAssistant) -> None:
+    """Test a sequence cancelled right after the grant does not block the channel."""
+    published: list[str] = []
+
+    async def _publish(topic: str, message: str) -> None:
+        published.append(message)
+
+    pipeline = CommandPipeline(hass, _publish, "test")
+    topic = "activity/AABBCCDDEEFF/keys_control"
+
+    async def sequence() -> None:
+        async with pipeline.async_hold():
+            await pipeline.async_submit(topic, "seq", COMMAND_CLASS_KEY_PRESS)
+
+    task = asyncio.ensure_future(sequence())
+    # Let the sequence queue its hold and the worker grant it
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert not task.done()
+    # Cancelled before it resumes from the grant
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    await asyncio.wait_for(
+        pipeline.async_submit(topic, "after", COMMAND_CLASS_KEY_PRESS), 1.0
+    )
+    assert published == ["after"]
+    assert not pipeline.holds_channel()
+
+
+def _blocking_pipeline(hass: HomeAssistant, published: list[str]) -> tuple[CommandPipeline, asyncio.Event]:
+    """Return a pipeline whose first publish blocks until the event is set."""
+    gate = asyncio.Event()
+
+    async def _publish(topic: str, message: str) -> None:
+        published.append(message)
+        if message == "busy":
+            await gate.wait()
+
+    return CommandPipeline(hass, _publish, "test"), gate
+
+
+async def test_pipeline_priorities(hass: HomeAssistant) -> None:
+    """Test urgent commands overtake queued catalog requests, which can be withdrawn."""
+    published: list[str] = []
+    pipeline, gate = _blocking_pipeline(hass, published)
+    topic = "activity/AABBCCDDEEFF/keys_control"
+
+    busy = asyncio.ensure_future(pipeline.async_submit(topic, "busy", COMMAND_CLASS_KEY_PRESS))
+    await asyncio.sleep(0)
+    submitted = [
+        asyncio.ensure_future(
+            pipeline.async_submit(topic, message, COMMAND_CLASS_KEY_PRESS, priority=priority, tag=tag)
+        )
+        for message, priority, tag in (
+            ("catalog 101", PRIORITY_CATALOG, ("keys", 101)),
+            ("catalog 102", PRIORITY_CATALOG, ("keys", 102)),
+            ("list", PRIORITY_STATE_QUERY, None),
+            ("key", PRIORITY_KEY_PRESS, None),
+            ("all off", PRIORITY_ACTIVITY_CONTROL, None),
+        )
+    ]
+    await asyncio.sleep(0)
+
+    # The user left activity 101 before its request was sent
+    assert pipeline.cancel(("keys", 101)) == 1
+    gate.set()
+    results = await asyncio.gather(busy, *submitted, return_exceptions=True)
+
+    assert published == ["busy", "all off", "key", "list", "catalog 102"]
+    assert isinstance(results[1], CommandCancelled)
+    assert pipeline.stats()["cancelled"] == 1
+    assert pipeline.stats()["aged"] == 0
+
+
+async def test_pipeline_drops_command_abandoned_while_waiting(hass: HomeAssistant) -> None:
+    """Test a command whose submitter went away while the hub was answering is not sent."""
+    published: list[str] = []
+    pipeline = CommandPipeline(
+        hass,
+        AsyncMock(side_effect=lambda topic, message: published.append(message)),
+        "test",
+        min_gaps={COMMAND_CLASS_REQUEST: 0.0},
+        response_timeout=5.0,
+    )
+    topic = "activity/AABBCCDDEEFF/keys_control"
+
+    await pipeline.async_submit(
+        "activity/AABBCCDDEEFF/list_request", "request", COMMAND_CLASS_REQUEST, "activity/AABBCCDDEEFF/list"
+    )
+    abandoned = asyncio.ensure_future(pipeline.async_submit(topic, "abandoned", COMMAND_CLASS_KEY_PRESS))
+    await asyncio.sleep(0.05)
+    # The automation sending the key was restarted while the queue was held
+    abandoned.cancel()
+    await asyncio.sleep(0)
+    pipeline.notify_response("activity/AABBCCDDEEFF/list")
+
+    await asyncio.wait_for(pipeline.async_submit(topic, "next", COMMAND_CLASS_KEY_PRESS), 1.0)
+    assert published == ["request", "next"]
+    assert pipeline.stats()["published"] == 2
+
+
+async def test_pipeline_priority_aging(hass: HomeAssistant) -> None:
+    """Test a long-waiting catalog request is not starved by urgent commands."""
+    published: list[str] = []
+    pipeline, gate = _blocking_pipeline(hass, published)
+    topic = "activity/AABBCCDDEEFF/keys_control"
+
+    with patch("custom_components.sofabaton_hub.pipeline.PRIORITY_AGING", 0.01):
+        busy = asyncio.ensure_future(pipeline.async_submit(topic, "busy", COMMAND_CLASS_KEY_PRESS))
+        await asyncio.sleep(0)
+        old = asyncio.ensure_future(
+            pipeline.async_submit(topic, "catalog", COMMAND_CLASS_REQUEST, priority=PRIORITY_CATALOG)
+        )
+        await asyncio.sleep(0.05)
+        new = asyncio.ensure_future(
+            pipeline.async_submit(topic, "control", COMMAND_CLASS_KEY_PRESS, priority=PRIORITY_ACTIVITY_CONTROL)
+        )
+        await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(busy, old, new)
+
+    assert published == ["busy", "catalog", "control"]
+    assert pipeline.stats()["aged"] == 1
+
+
+async def test_pipeline_scheduled_commands_do_not_block(hass: HomeAssistant) -> None:
+    """Test commands scheduled for later leave the channel to commands that are due."""
+    published: list[tuple[str, float]] = []
+    start = time.monotonic()
+
+    async def _publish(topic: str, message: str) -> None:
+        published.append((message, time.monotonic() - start))
+
+    pipeline = CommandPipeline(hass, _publish, "test")
+    presses = [
+        asyncio.ensure_future(
+            pipeline.async_submit(
+                "activity/AABBCCDDEEFF/keys_control",
+                f"press {index}",
+                COMMAND_CLASS_KEY_PRESS,
+                not_before=start + index * 0.3,
+            )
+        )
+        for index in range(3)
+    ]
+    await asyncio.sleep(0.05)
+    await pipeline.async_submit(
+        "activity/AABBCCDDEEFF/activity_control_down",
+        "control",
+        COMMAND_CLASS_ACTIVITY_CONTROL,
+        priority=PRIORITY_ACTIVITY_CONTROL,
+    )
+    await pipeline.async_submit("activity/AABBCCDDEEFF/keys_control", "other", COMMAND_CLASS_KEY_PRESS)
+    await asyncio.gather(*presses)
+
+    assert [message for message, _ in published] == ["press 0", "control", "other", "press 1", "press 2"]
+    times = dict(published)
+    assert times["other"] < 0.2
+    assert times["press 1"] >= 0.29
+    assert times["press 2"] >= 0.59
+
+
+async def test_pipeline_pacing_learns_from_responses(hass: HomeAssistant) -> None:
+    """Test answered requests raise the rate and a missing answer halves it."""
+    pipeline = CommandPipeline(hass, AsyncMock(), "test", response_timeout=0.1)
+
+    for _ in range(3):
+        await pipeline.async_submit(
+            "activity/AABBCCDDEEFF/list_request",
+            "{}",
+            COMMAND_CLASS_REQUEST,
+            "activity/AABBCCDDEEFF/list",
+        )
+        pipeline.notify_response("activity/AABBCCDDEEFF/list")
+    pacing = pipeline.stats()["pacing"]
+    assert pacing["rate"] == AIMD_INITIAL_RATE + 3
+    assert pacing["increases"] == 3
+
+    # The last request is never answered: the next one finds it missing
+    await pipeline.async_submit(
+        "activity/AABBCCDDEEFF/list_request",
+        "{}",
+        COMMAND_CLASS_REQUEST,
+        "activity/AABBCCDDEEFF/list",
+    )
+    await pipeline.async_submit(
+        "activity/AABBCCDDEEFF/list_request",
+        "{}",
+        COMMAND_CLASS_REQUEST,
+        "activity/AABBCCDDEEFF/list",
+    )
+    pacing = pipeline.stats()["pacing"]
+    assert pacing["rate"] == (AIMD_INITIAL_RATE + 3) / 2
+    assert pacing["missing"] == 1
+    assert pacing["recent_backoffs"][0]["reason"] == "missing"
+    await pipeline.async_shutdown()
+
+
+async def test_pipeline_pacing_matches_answers(hass: HomeAssistant) -> None:
+    """Test answers are credited to their own command, and a late one only updates the RTT."""
+    pipeline = CommandPipeline(hass, AsyncMock(), "test", response_timeout=0.1)
+    topic = "activity/AABBCCDDEEFF/keys_request"
+
+    await pipeline.async_submit(topic, "101", COMMAND_CLASS_REQUEST, ("keys_list", 101))
+    # Answers to nothing that was asked are ignored
+    pipeline.notify_response(("activity_control_up", 101))
+    pipeline.notify_response(("keys_list", 102))
+    assert pipeline.awaiting_response_key == ("keys_list", 101)
+
+    # Unanswered: the next request finds it missing
+    await pipeline.async_submit(topic, "102", COMMAND_CLASS_REQUEST, ("keys_list", 102))
+    pacing = pipeline.stats()["pacing"]
+    assert pacing["missing"] == 1
+    rate = pacing["rate"]
+
+    # The late answer is not credited to the request now awaited
+    pipeline.notify_response(("keys_list", 101))
+    pacing = pipeline.stats()["pacing"]
+    assert pacing["late"] == 1
+    assert pacing["samples"] == 1
+    assert pacing["rate"] == rate
+    assert pipeline.awaiting_response_key == ("keys_list", 102)
+
+    pipeline.notify_response(("keys_list", 102))
+    pacing = pipeline.stats()["pacing"]
+    assert pacing["increases"] == 1
+    assert pacing["rate"] == rate + 1
+    assert pacing["samples"] == 2
+    assert pipeline.awaiting_response_key is None
+    await pipeline.async_shutdown()
+
+
+def test_pacer_backs_off_on_slow_responses() -> None:
+    """Test a response slower than the learned threshold cuts the rate, down to the minimum."""
+    pacer = AimdPacer()
+    pacer.on_response(0.05)
+    pacer.on_response(0.05)
+    assert pacer.rate == AIMD_INITIAL_RATE + 2
+
+    # The threshold follows the fast answers down to its minimum
+    assert pacer.threshold == RESPONSE_TIMEOUT_MIN
+
+    pacer.on_response(1.0)
+    assert pacer.slow == 1
+    assert pacer.rate == (AIMD_INITIAL_RATE + 2) / 2
+
+    for _ in range(10):
+        pacer.on_missing()
+    assert pacer.rate == AIMD_MIN_RATE
+    assert pacer.gap == 1 / AIMD_MIN_RATE
+    assert len(pacer.stats()["recent_backoffs"]) == 10
@@ -0,0 +1,60 @@
+"""Test the Sofabaton Hub hold-to-repeat engine."""
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import AsyncMock
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.sofabaton_hub.repeat import KeyRepeater
+
+
+async def test_repeat_until_stopped(hass: HomeAssistant) -> None:
+    """Test a held key repeats at the interval and stops on release."""
+    press = AsyncMock()
+    repeater = KeyRepeater(hass, press, "test", interval=0.02)
+
+    repeater.start(101, 7)
+    assert repeater.active == (101, 7)
+    await asyncio.sleep(0.11)
+    # Stopping another key leaves the repeat running
+    assert not repeater.stop(101, 8)
+    assert repeater.stop(101, 7)
+    await hass.async_block_till_done()
+
+    count = press.await_count
+    assert 3 <= count <= 6
+    assert press.await_args.args[:2] == (101, 7)
+    await asyncio.sleep(0.05)
+    assert press.await_count == count
+    assert repeater.active is None
+    assert repeater.stats()["repeats"] == count
+
+
+async def test_new_key_replaces_repeat(hass: HomeAssistant) -> None:
+    """Test only one key repeats at a time."""
+    press = AsyncMock()
+    repeater = KeyRepeater(hass, press, "test", interval=0.02)
+
+    repeater.start(101, 7)
+    repeater.start(101, 8)
+    await asyncio.sleep(0.05)
+    await repeater.async_shutdown()
+
+    assert {call.args[1] for call in press.await_args_list} == {8}
+
+
+async def test_repeat_times_out(hass: HomeAssistant) -> None:
+    """Test a repeat that is never stopped ends after the maximum duration."""
+    press = AsyncMock(side_effect=[Exception("MQTT error"), None, None, None, None])
+    repeater = KeyRepeater(hass, press, "test", interval=0.01, max_duration=0.035)
+
+    repeater.start(101, 7)
+    await asyncio.sleep(0.1)
+    await hass.async_block_till_done()
+
+    stats = repeater.stats()
+    assert repeater.active is None
+    assert stats["timed_out"] == 1
+    assert stats["repeats"] == 3
+    assert stats["failed"] == 1
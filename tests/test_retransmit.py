@@ -0,0 +1,137 @@
+"""Test retransmission of unanswered Sofabaton Hub requests."""
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+from homeassistant.core import HomeAssistant
+
+from custom_components.sofabaton_hub.api import SofabatonHubApiClient
+from custom_components.sofabaton_hub.const import KEY_KIND_ASSIGNED, RTO_INITIAL, RTO_MIN
+from custom_components.sofabaton_hub.pipeline import RttEstimator
+from custom_components.sofabaton_hub.retransmit import RequestRetransmitter
+
+from .conftest import mqtt_message
+
+
+@pytest.fixture
+def api_client(api_client: SofabatonHubApiClient) -> SofabatonHubApiClient:
+    """Return an API client that resends unanswered requests after 50 ms."""
+    api_client.retransmitter.rtt.rto = 0.05
+    # Do not hold the pipeline for the unanswered first copy longer than the RTO
+    api_client.pipeline.pacer.rtt.rto = 0.05
+    return api_client
+
+
+def test_rtt_estimator() -> None:
+    """Test the smoothed RTT, its variance and the derived timeout."""
+    rtt = RttEstimator()
+    assert rtt.rto == RTO_INITIAL
+
+    rtt.sample(0.2)
+    assert rtt.srtt == pytest.approx(0.2)
+    assert rtt.rttvar == pytest.approx(0.1)
+    assert rtt.rto == pytest.approx(0.6)
+
+    rtt.sample(0.1)
+    assert rtt.srtt == pytest.approx(0.2 + 0.125 * (0.1 - 0.2))
+    assert rtt.rttvar == pytest.approx(0.1)
+
+    # A fast, steady Hub never gets a timeout below the minimum
+    for _ in range(50):
+        rtt.sample(0.01)
+    assert rtt.rto == RTO_MIN
+    assert rtt.stats()["samples"] == 52
+
+
+async def test_lost_key_request_is_resent(
+    hass: HomeAssistant, api_client: SofabatonHubApiClient, mock_mqtt_client
+) -> None:
+    """Test a key request is resent after the RTO and resolved by the late answer."""
+    request = asyncio.ensure_future(api_client.async_request_keys(KEY_KIND_ASSIGNED, 101))
+    await asyncio.sleep(0.01)
+    assert mock_mqtt_client.async_publish.call_count == 1
+
+    # The copy is paced by the pipeline, which backs off after the missing answer
+    async with asyncio.timeout(2.0):
+        while mock_mqtt_client.async_publish.call_count < 2:
+            await asyncio.sleep(0.01)
+    assert mock_mqtt_client.async_publish.call_args[0][1] == "activity/AABBCCDDEEFF/keys_request"
+
+    api_client._message_received(
+        mqtt_message("activity/AABBCCDDEEFF/keys_list", {"activity_id": 101, "data": []})
+    )
+    await asyncio.wait_for(request, 1.0)
+
+    stats = api_client.retransmitter.stats()
+    assert stats["retransmits"] == 1
+    assert stats["recovered"] == 1
+    assert stats["in_flight"] == 0
+    # The answer may belong to either copy, so it is not an RTT sample
+    assert stats["samples"] == 0
+
+
+async def test_request_given_up_after_retries(hass: HomeAssistant) -> None:
+    """Test a request is given up after the retry budget, with doubling timeouts."""
+    retransmitter = RequestRetransmitter(hass, "test", max_retries=2)
+    retransmitter.rtt.rto = 0.02
+    send = AsyncMock()
+    failed = asyncio.get_running_loop().create_future()
+
+    await retransmitter.async_send("request", send, failed.set_result)
+    err = await asyncio.wait_for(failed, 1.0)
+
+    assert isinstance(err, asyncio.TimeoutError)
+    assert send.await_count == 3
+    assert retransmitter.stats()["gave_up"] == 1
+    assert not retransmitter.in_flight("request")
+
+
+async def test_request_given_up_while_copy_queued(hass: HomeAssistant) -> None:
+    """Test a request is given up on time even when its copy is never published."""
+    retransmitter = RequestRetransmitter(hass, "test", max_retries=2)
+    retransmitter.rtt.rto = 0.02
+    published = asyncio.Event()
+    failed = asyncio.get_running_loop().create_future()
+
+    await retransmitter.async_send("request", AsyncMock(), failed.set_result)
+    # Every resent copy waits behind a command that is never published
+    retransmitter._requests["request"].send = published.wait
+    err = await asyncio.wait_for(failed, 1.0)
+
+    assert isinstance(err, asyncio.TimeoutError)
+    assert retransmitter.stats()["retransmits"] == 1
+    assert not retransmitter.in_flight("request")
+    published.set()
+    await hass.async_block_till_done()
+
+async def test_key_request_fails_when_given_up(
+    hass: HomeAssistant, api_client: SofabatonHubApiClient, mock_mqtt_client
+) -> None:
+    """Test a key request without its own timeout fails once the retries are spent."""
+    api_client.retransmitter.max_retries = 1
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(api_client.async_request_keys(KEY_KIND_ASSIGNED, 101), 2.0)
+
+    assert api_client.retransmitter.stats()["gave_up"] == 1
+    assert not api_client._pending_key_requests
+
+async def test_activity_list_request_shared_and_sampled(
+    hass: HomeAssistant, api_client: SofabatonHubApiClient, mock_mqtt_client
+) -> None:
+    """Test list requests in flight are shared and a repeated answer still acknowledges."""
+    payload = {"data": [{"activity_id": 1, "activity_name": "TV", "state": "off"}]}
+    # The same list was received before, so its next delivery looks like a duplicate
+    api_client._message_received(mqtt_message("activity/AABBCCDDEEFF/list", payload))
+
+    await api_client.async_request_activity_list()
+    await api_client.async_request_activity_list()
+    assert mock_mqtt_client.async_publish.call_count == 1
+
+    api_client._message_received(mqtt_message("activity/AABBCCDDEEFF/list", payload))
+    stats = api_client.retransmitter.stats()
+    assert stats["in_flight"] == 0
+    assert stats["samples"] == 1
+    assert stats["retransmits"] == 0
@@ -0,0 +1,93 @@
+"""Test the Sofabaton Hub send_sequence service."""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ServiceValidationError
+
+from custom_components.sofabaton_hub.api import SofabatonHubApiClient
+from custom_components.sofabaton_hub.coordinator import (
+    SofabatonHubDataUpdateCoordinator,
+)
+from custom_components.sofabaton_hub.messages import ActivityInfo, ActivityList
+from custom_components.sofabaton_hub.remote import SEQUENCE_STEP_SCHEMA, SofabatonHubRemote
+
+
+async def test_send_sequence(hass: HomeAssistant, mock_config_entry, mock_mqtt_client) -> None:
+    """Test steps are sent in order with their delays and timings are reported."""
+    published: list[tuple[float, dict]] = []
+    mock_mqtt_client.async_publish.side_effect = lambda hass, topic, message, *_: published.append(
+        (time.monotonic(), json.loads(message)["data"])
+    )
+    api_client = SofabatonHubApiClient(hass, mock_config_entry)
+    coordinator = SofabatonHubDataUpdateCoordinator(hass, api_client, mock_config_entry)
+    coordinator._handle_activity_list(
+        ActivityList((ActivityInfo(101, "Watch TV", "off"), ActivityInfo(102, "Watch Movie", "off")))
+    )
+    remote = SofabatonHubRemote(coordinator, mock_config_entry)
+
+    steps = [
+        SEQUENCE_STEP_SCHEMA(step)
+        for step in (
+            {"command": ["type:start_activity", "activity_id:102"], "delay_secs": 0.05},
+            {"command": "down", "num_repeats": 3},
+            {"command": "ok"},
+        )
+    ]
+    result = await remote.async_send_sequence(steps)
+
+    assert [data for _, data in published] == [
+        {"activity_id": 102, "state": "on"},
+        *[{"activity_id": 102, "key_id": 178}] * 3,
+        {"activity_id": 102, "key_id": 176},
+    ]
+    assert published[1][0] - published[0][0] >= 0.045
+    assert len(result["steps"]) == 3
+    assert result["steps"][1]["started_ms"] >= 45
+    assert result["total_ms"] >= result["steps"][2]["started_ms"]
+    coordinator._clear_pending_activity()
+    await api_client.async_shutdown()
+
+
+async def test_send_sequence_invalid_step(hass: HomeAssistant, mock_config_entry, mock_mqtt_client) -> None:
+    """Test nothing is sent when a step is invalid."""
+    api_client = SofabatonHubApiClient(hass, mock_config_entry)
+    coordinator = SofabatonHubDataUpdateCoordinator(hass, api_client, mock_config_entry)
+    remote = SofabatonHubRemote(coordinator, mock_config_entry)
+
+    steps = [SEQUENCE_STEP_SCHEMA({"command": "ok"}), SEQUENCE_STEP_SCHEMA({"command": "sideways"})]
+    with pytest.raises(ServiceValidationError):
+        await remote.async_send_sequence(steps)
+
+    mock_mqtt_client.async_publish.assert_not_called()
+
+
+async def test_send_sequence_key_request_does_not_hold_channel(
+    hass: HomeAssistant, mock_config_entry, mock_mqtt_client
+) -> None:
+    """Test a key request step does not keep the channel waiting for the Hub's answer."""
+    published: list[str] = []
+    mock_mqtt_client.async_publish.side_effect = lambda hass, topic, *_: published.append(topic)
+    api_client = SofabatonHubApiClient(hass, mock_config_entry)
+    api_client.retransmitter.rtt.rto = 0.05
+    coordinator = SofabatonHubDataUpdateCoordinator(hass, api_client, mock_config_entry)
+    remote = SofabatonHubRemote(coordinator, mock_config_entry)
+
+    steps = [
+        SEQUENCE_STEP_SCHEMA({"command": ["type:request_assigned_keys", "activity_id:101"]}),
+        SEQUENCE_STEP_SCHEMA({"command": ["type:send_assigned_key", "activity_id:101", "key_id:5"]}),
+    ]
+    await asyncio.wait_for(remote.async_send_sequence(steps), 1.0)
+
+    # The Hub never answers: the request is sent after the sequence and given up
+    async with asyncio.timeout(5.0):
+        while api_client.retransmitter.stats()["gave_up"] == 0:
+            await asyncio.sleep(0.01)
+    assert published[0] == "activity/AABBCCDDEEFF/keys_control"
+    assert published[1] == "activity/AABBCCDDEEFF/keys_request"
+    await hass.async_block_till_done()
+    await api_client.async_shutdown()
@@ -0,0 +1,60 @@
+"""Test the Sofabaton Hub state snapshot."""
+from __future__ import annotations
+
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.sofabaton_hub.coordinator import (
+    SofabatonHubDataUpdateCoordinator,
+)
+from custom_components.sofabaton_hub.messages import ActivityInfo, ActivityList, ActivityStatus
+
+
+async def test_restore_snapshot(
+    hass: HomeAssistant, hass_storage: dict[str, Any], mock_config_entry
+) -> None:
+    """Test the previous activity list is available before the Hub answers."""
+    hass_storage["sofabaton_hub.test_entry_id.state"] = {
+        "version": 1,
+        "key": "sofabaton_hub.test_entry_id.state",
+        "data": {"activities": [[101, "Watch TV", "on"], [102, "Watch Movie", "off"]]},
+    }
+    coordinator = SofabatonHubDataUpdateCoordinator(hass, MagicMock(), mock_config_entry)
+
+    assert await coordinator.async_restore_snapshot()
+
+    assert coordinator.restored_from_snapshot
+    assert coordinator.data["current_activity_id"] == 101
+    assert coordinator.data["activities"][102] == {"id": 102, "name": "Watch Movie", "state": "off"}
+
+
+async def test_no_snapshot(hass: HomeAssistant, mock_config_entry) -> None:
+    """Test setup falls back to waiting for the Hub without a snapshot."""
+    coordinator = SofabatonHubDataUpdateCoordinator(hass, MagicMock(), mock_config_entry)
+
+    assert not await coordinator.async_restore_snapshot()
+    assert coordinator.data["activities"] == {}
+
+
+async def test_snapshot_saved_on_change(hass: HomeAssistant, mock_config_entry) -> None:
+    """Test a debounced write is scheduled only when activities change."""
+    coordinator = SofabatonHubDataUpdateCoordinator(hass, MagicMock(), mock_config_entry)
+
+    with patch.object(coordinator.snapshot._store, "async_delay_save") as delay_save:
+        coordinator._handle_activity_list(
+            ActivityList((ActivityInfo(101, "Watch TV", "off"), ActivityInfo(102, "Watch Movie", "off")))
+        )
+        assert delay_save.call_count == 1
+
+        # Status push that changes nothing does not write
+        coordinator._handle_activity_status(ActivityStatus(102, "off"))
+        assert delay_save.call_count == 1
+
+        coordinator._handle_activity_status(ActivityStatus(101, "on"))
+        assert delay_save.call_count == 2
+
+    assert coordinator.snapshot._data_to_save() == {
+        "activities": [[101, "Watch TV", "on"], [102, "Watch Movie", "off"]]
+    }
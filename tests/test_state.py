@@ -0,0 +1,137 @@
+"""Test the Sofabaton Hub copy-on-write state model."""
+from __future__ import annotations
+
+from custom_components.sofabaton_hub.messages import ActivityInfo
+from custom_components.sofabaton_hub.state import (
+    apply_activity_list,
+    apply_activity_status,
+    apply_keys,
+    diff_state,
+    empty_state,
+    replace_keys,
+    restore_activities,
+)
+
+
+def _state_with_activities() -> dict:
+    """Return a snapshot with two activities and cached keys."""
+    data = apply_activity_list(
+        empty_state(),
+        [
+            ActivityInfo(101, "Watch TV", "off"),
+            ActivityInfo(102, "Watch Movie", "off"),
+        ],
+    )
+    return apply_keys(data, "macros", 101, [{"id": 1, "name": "Netflix"}])
+
+
+def test_activity_list_shares_keys() -> None:
+    """Test an activity list update does not copy the key catalogs."""
+    data = _state_with_activities()
+    new = apply_activity_list(
+        data,
+        [
+            ActivityInfo(101, "Watch TV", "on"),
+            ActivityInfo(102, "Watch Movie", "off"),
+        ],
+    )
+
+    assert new["keys"] is data["keys"]
+    assert new["current_activity_id"] == 101
+    # Unchanged activity keeps its identity, changed one is a new object
+    assert new["activities"][102] is data["activities"][102]
+    assert new["activities"][101] is not data["activities"][101]
+    # Previous snapshot is untouched
+    assert data["activities"][101]["state"] == "off"
+
+
+def test_activity_status_switch() -> None:
+    """Test switching activity turns the others off without mutating the old snapshot."""
+    data = apply_activity_status(_state_with_activities(), 101, "on")
+    new = apply_activity_status(data, 102, "on")
+
+    assert new["current_activity_id"] == 102
+    assert new["activities"][101]["state"] == "off"
+    assert new["activities"][102]["state"] == "on"
+    assert data["activities"][101]["state"] == "on"
+    assert new["keys"] is data["keys"]
+
+
+def test_activity_status_all_off() -> None:
+    """Test activity ID 255 turns every activity off."""
+    data = apply_activity_status(_state_with_activities(), 101, "on")
+    new = apply_activity_status(data, 255, "off")
+
+    assert new["current_activity_id"] is None
+    assert all(activity["state"] == "off" for activity in new["activities"].values())
+
+
+def test_activity_status_unchanged_returns_same_snapshot() -> None:
+    """Test a status push that changes nothing returns the same snapshot."""
+    data = _state_with_activities()
+
+    assert apply_activity_status(data, 102, "off") is data
+    assert apply_activity_status(data, 999, "off") is data
+
+
+def test_apply_keys_shares_other_catalogs() -> None:
+    """Test setting one catalog copies only its path."""
+    data = apply_keys(_state_with_activities(), "favorites", 101, [{"id": 7}])
+    new = apply_keys(data, "assigned", 101, [1, 2])
+
+    assert new["keys"]["favorites"] is data["keys"]["favorites"]
+    assert new["keys"]["macros"] is data["keys"]["macros"]
+    assert new["activities"] is data["activities"]
+    assert data["keys"]["assigned"] == {}
+    assert new["keys"]["assigned"] == {101: [1, 2]}
+
+
+def test_replace_keys() -> None:
+    """Test replacing all catalogs of one kind."""
+    data = _state_with_activities()
+    new = replace_keys(data, "macros", {})
+
+    assert new["keys"]["macros"] == {}
+    assert data["keys"]["macros"] == {101: [{"id": 1, "name": "Netflix"}]}
+
+
+def test_diff_state_activity_change() -> None:
+    """Test only the activities whose entry changed are reported."""
+    data = _state_with_activities()
+    new = apply_activity_status(data, 101, "on")
+
+    changes = diff_state(data, new)
+    assert changes.activity_ids == {101}
+    assert changes.current_activity_changed
+    assert not changes.key_kinds
+
+
+def test_diff_state_keys_change() -> None:
+    """Test a key list response reports no activity changes."""
+    data = _state_with_activities()
+    new = apply_keys(data, "favorites", 101, [{"id": 7}])
+
+    changes = diff_state(data, new)
+    assert changes.activity_ids == frozenset()
+    assert changes.key_kinds == {"favorites"}
+    assert not diff_state(new, new)
+
+
+def test_diff_state_activity_removed() -> None:
+    """Test removed activities are reported as changed."""
+    data = _state_with_activities()
+    new = apply_activity_list(data, [ActivityInfo(101, "Watch TV", "off")])
+
+    assert diff_state(data, new).activity_ids == {102}
+
+
+def test_restore_activities() -> None:
+    """Test rolling back activities keeps the newer key catalogs."""
+    data = _state_with_activities()
+    switched = apply_keys(apply_activity_status(data, 101, "on"), "assigned", 101, [1])
+
+    restored = restore_activities(switched, data)
+    assert restored["activities"] is data["activities"]
+    assert restored["current_activity_id"] is None
+    assert restored["keys"] is switched["keys"]
+    assert restore_activities(data, data) is data
@@ -0,0 +1,148 @@
+"""Test the Sofabaton Hub key catalog websocket API."""
+from __future__ import annotations
+
+from unittest.mock import AsyncMock, MagicMock
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import entity_registry as er
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.sofabaton_hub.const import DOMAIN, KEY_KIND_ASSIGNED, KEY_KIND_MACROS
+from custom_components.sofabaton_hub.coordinator import (
+    SofabatonHubDataUpdateCoordinator,
+)
+from custom_components.sofabaton_hub.messages import parse_key_list
+from custom_components.sofabaton_hub.websocket_api import (
+    websocket_get_keys,
+    websocket_subscribe_keys,
+)
+
+
+async def _setup(hass: HomeAssistant) -> tuple[SofabatonHubDataUpdateCoordinator, str]:
+    """Register a hub with a remote entity."""
+    entry = MockConfigEntry(domain=DOMAIN, data={"mac": "AABBCCDDEEFF"}, entry_id="test_entry_id")
+    entry.add_to_hass(hass)
+    api_client = MagicMock()
+    api_client.async_request_keys = AsyncMock()
+    coordinator = SofabatonHubDataUpdateCoordinator(hass, api_client, entry)
+    hass.data[DOMAIN] = {entry.entry_id: {"coordinator": coordinator, "api_client": api_client}}
+
+    entity = er.async_get(hass).async_get_or_create(
+        "remote", DOMAIN, "AABBCCDDEEFF_remote", config_entry=entry
+    )
+    return coordinator, entity.entity_id
+
+
+# The undecorated coroutine, so tests can await the command
+get_keys = websocket_get_keys.__wrapped__
+
+
+def _connection() -> MagicMock:
+    """Return a websocket connection recording what is sent."""
+    connection = MagicMock()
+    connection.subscriptions = {}
+    return connection
+
+
+async def test_get_keys(hass: HomeAssistant) -> None:
+    """Test catalogs are fetched on demand."""
+    coordinator, entity_id = await _setup(hass)
+    coordinator.key_cache.set(101, KEY_KIND_MACROS, [{"id": 1, "name": "Netflix"}])
+    connection = _connection()
+
+    await get_keys(
+        hass, connection, {"id": 1, "entity_id": entity_id, "activity_id": 101, "kind": KEY_KIND_MACROS}
+    )
+    connection.send_result.assert_called_once_with(
+        1, {"activity_id": 101, "keys": {KEY_KIND_MACROS: [{"id": 1, "name": "Netflix"}]}}
+    )
+    coordinator.api_client.async_request_keys.assert_not_called()
+
+    # Unanswered catalogs are reported as None
+    await get_keys(hass, connection, {"id": 2, "entity_id": entity_id, "activity_id": 102})
+    assert connection.send_result.call_args[0][1]["keys"] == {
+        "assigned": None,
+        "macros": None,
+        "favorites": None,
+    }
+
+    await get_keys(hass, connection, {"id": 3, "entity_id": "remote.unknown", "activity_id": 101})
+    assert connection.send_error.call_args[0][:2] == (3, "not_found")
+
+
+async def test_get_keys_returns_fetched_catalog(hass: HomeAssistant) -> None:
+    """Test the fetched catalog is sent even if another activity replaced it in the state."""
+    coordinator, entity_id = await _setup(hass)
+
+    async def answer(kind: str, activity_id: int) -> None:
+        coordinator._handle_assigned_keys(
+            parse_key_list({"activity_id": activity_id, "data": [{"key_id": activity_id}]})
+        )
+        if activity_id == 101:
+            # Another card asks for activity 102 before this request returns,
+            # then shows it again from the cache
+            await coordinator.async_request_keys(KEY_KIND_ASSIGNED, 102)
+            await coordinator.async_request_keys(KEY_KIND_ASSIGNED, 102)
+
+    coordinator.api_client.async_request_keys.side_effect = answer
+    connection = _connection()
+
+    await get_keys(
+        hass, connection, {"id": 1, "entity_id": entity_id, "activity_id": 101, "kind": KEY_KIND_ASSIGNED}
+    )
+    assert 101 not in coordinator.data["keys"][KEY_KIND_ASSIGNED]
+    connection.send_result.assert_called_once_with(
+        1, {"activity_id": 101, "keys": {KEY_KIND_ASSIGNED: [101]}}
+    )
+
+
+async def test_get_keys_publish_failure(hass: HomeAssistant) -> None:
+    """Test a request that cannot be sent is reported as an unanswered catalog."""
+    coordinator, entity_id = await _setup(hass)
+    coordinator.api_client.async_request_keys.side_effect = HomeAssistantError("MQTT is not connected")
+    connection = _connection()
+
+    await get_keys(
+        hass, connection, {"id": 1, "entity_id": entity_id, "activity_id": 101, "kind": KEY_KIND_ASSIGNED}
+    )
+    connection.send_result.assert_called_once_with(1, {"activity_id": 101, "keys": {KEY_KIND_ASSIGNED: None}})
+    connection.send_error.assert_not_called()
+
+
+async def test_subscribe_keys(hass: HomeAssistant) -> None:
+    """Test catalog changes are pushed to subscribers."""
+    coordinator, entity_id = await _setup(hass)
+    connection = _connection()
+
+    websocket_subscribe_keys(hass, connection, {"id": 1, "entity_id": entity_id, "activity_id": 101})
+    connection.send_result.assert_called_once_with(1)
+    assert 1 in connection.subscriptions
+
+    # Other activities are filtered out
+    coordinator._handle_assigned_keys(parse_key_list({"activity_id": 102, "data": [{"key_id": 2}]}))
+    coordinator._handle_assigned_keys(parse_key_list({"activity_id": 101, "data": [{"key_id": 1}]}))
+    connection.send_message.assert_called_once()
+    event = connection.send_message.call_args[0][0]
+    assert event["type"] == "event"
+    assert event["event"] == {"kind": KEY_KIND_ASSIGNED, "activity_id": 101, "keys": [1]}
+
+    # Unsubscribing stops the events
+    connection.subscriptions.pop(1)()
+    coordinator._handle_assigned_keys(parse_key_list({"activity_id": 101, "data": [{"key_id": 3}]}))
+    connection.send_message.assert_called_once()
+
+
+async def test_unsubscribe_withdraws_queued_key_requests(hass: HomeAssistant) -> None:
+    """Test leaving an activity withdraws its queued key requests once nobody shows it."""
+    coordinator, entity_id = await _setup(hass)
+    first, second = _connection(), _connection()
+
+    websocket_subscribe_keys(hass, first, {"id": 1, "entity_id": entity_id, "activity_id": 101})
+    websocket_subscribe_keys(hass, second, {"id": 1, "entity_id": entity_id, "activity_id": 101})
+
+    first.subscriptions.pop(1)()
+    coordinator.api_client.cancel_key_requests.assert_not_called()
+
+    second.subscriptions.pop(1)()
+    coordinator.api_client.cancel_key_requests.assert_called_once_with(101)